@@ -41,7 +41,15 @@ def create_app(config_object=Config):
     # Initialize the embedding manager
     logger.info(f"Initializing DatasetEmbeddingManager with model_size={config_object.SEARCH_MODEL_SIZE}")
     embedding_manager = DatasetEmbeddingManager(
-        model_size=config_object.SEARCH_MODEL_SIZE
+        model_size=config_object.SEARCH_MODEL_SIZE,
+        search_options={
+            'cache_dir': config_object.SEARCH_CACHE_DIR,
+            'expansion_mode': config_object.SEARCH_EXPANSION_MODE,
+            'expansion_timeout': config_object.SEARCH_EXPANSION_TIMEOUT,
+            'hybrid': config_object.SEARCH_HYBRID,
+            'weights': config_object.SEARCH_WEIGHTS
+        },
+        query_log_path=config_object.SEARCH_QUERY_LOG
     )
     
     # Load datasets
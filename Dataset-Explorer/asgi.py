@@ -0,0 +1,216 @@
+"""
+ASGI serving mode for the GEE Dataset Explorer.
+
+Serves the Flask application from an ASGI server, running each request in a
+bounded worker pool chosen by its route: Earth Engine routes, model inference
+routes (search) and everything else each get their own threads. When Earth
+Engine is slow or saturated, its pool fills up and further map requests get
+a quick 503 while search keeps its own threads and keeps answering. Requests
+that run longer than their pool's timeout get a 504.
+
+Run with:
+    uvicorn --factory asgi:create_asgi_app --host 0.0.0.0 --port 5000
+
+Pool metrics are served at /pool_info.
+"""
+import io
+import sys
+import json
+import asyncio
+import logging
+from typing import Dict, Any, List, Tuple
+
+from config import Config
+from services.worker_pools import WorkerPool, PoolSaturated
+
+logger = logging.getLogger(__name__)
+
+# Routes whose requests run in a dedicated pool; all others use the "web" pool
+POOL_ROUTES = {
+    '/get_tile': 'earth_engine',
+    '/get_value_at_location': 'earth_engine',
+    '/search_datasets': 'inference',
+    '/update_search_model': 'inference',
+    '/update_search_weights': 'inference'
+}
+
+
+class PooledWSGIApp:
+    """ASGI application running a WSGI application in per-route worker pools"""
+
+    def __init__(self, wsgi_app, pools: Dict[str, WorkerPool], routes: Dict[str, str] = POOL_ROUTES):
+        """
+        Initialize the adapter.
+
+        Args:
+            wsgi_app: WSGI application, e.g. the Flask app
+            pools: Worker pools by name; must include "web"
+            routes: Pool name of each path with a dedicated pool
+        """
+        self.wsgi_app = wsgi_app
+        self.pools = pools
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            # The application has no WebSocket endpoints
+            await send({'type': 'websocket.close', 'code': 1000})
+            return
+
+        if scope['path'] == '/pool_info':
+            stats = {name: pool.get_stats() for name, pool in self.pools.items()}
+            await self._send_json(send, 200, {'pools': stats})
+            return
+
+        body = await self._read_body(receive)
+        pool = self.pools[self.routes.get(scope['path'], 'web')]
+        try:
+            status, headers, content = await pool.run(self._call_wsgi, self._environ(scope, body))
+        except PoolSaturated:
+            logger.warning(f"Rejected {scope['path']}: {pool.name} pool is saturated")
+            await self._send_json(
+                send, 503,
+                {'error': 'The server is busy with other requests, please try again shortly'},
+                [(b'retry-after', b'5')]
+            )
+            return
+        except asyncio.TimeoutError:
+            await self._send_json(send, 504, {'error': f'Request timed out after {pool.timeout:g} seconds'})
+            return
+        except Exception as e:
+            logger.error(f"Error serving {scope['path']}: {str(e)}")
+            await self._send_json(send, 500, {'error': str(e)})
+            return
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def _lifespan(self, receive, send):
+        """Handle server startup and shutdown."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for pool in self.pools.values():
+                    pool.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        """Read the complete request body."""
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    @staticmethod
+    def _environ(scope, body: bytes) -> Dict[str, Any]:
+        """Build the WSGI environ of an ASGI HTTP request (PEP 3333)."""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+                continue
+            if name == 'CONTENT_LENGTH':
+                continue
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def _call_wsgi(self, environ: Dict[str, Any]) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+        """Run the WSGI application and collect its complete response."""
+        response = {}
+        chunks: List[bytes] = []
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            return lambda data: chunks.append(data)
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            chunks.extend(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], b''.join(chunks)
+
+    @staticmethod
+    async def _send_json(send, status: int, payload: Dict[str, Any], headers: List[Tuple[bytes, bytes]] = ()):
+        content = json.dumps(payload).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(content)).encode())] + list(headers)
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+
+def create_asgi_app(config_object=Config):
+    """ASGI application factory"""
+    # Imported here so the adapter can be used without the application's
+    # search dependencies
+    from app import create_app
+    flask_app = create_app(config_object)
+    pools = {
+        'earth_engine': WorkerPool(
+            'earth_engine',
+            max_workers=config_object.EE_POOL_WORKERS,
+            max_queue=config_object.EE_POOL_QUEUE,
+            timeout=config_object.EE_TIMEOUT
+        ),
+        'inference': WorkerPool(
+            'inference',
+            max_workers=config_object.INFERENCE_POOL_WORKERS,
+            max_queue=config_object.INFERENCE_POOL_QUEUE,
+            timeout=config_object.INFERENCE_TIMEOUT
+        ),
+        'web': WorkerPool(
+            'web',
+            max_workers=config_object.WEB_POOL_WORKERS,
+            max_queue=config_object.WEB_POOL_QUEUE,
+            timeout=config_object.WEB_TIMEOUT
+        )
+    }
+    logger.info("Serving with worker pools: " + ", ".join(
+        f"{name} ({pool.max_workers} threads, queue {pool.max_queue}, timeout {pool.timeout:g}s)"
+        for name, pool in pools.items()
+    ))
+    return PooledWSGIApp(flask_app, pools)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(create_asgi_app(), host='0.0.0.0', port=5000)
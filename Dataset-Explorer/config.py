@@ -5,7 +5,8 @@ import os
 
 class Config:
     """Application configuration settings"""
-    # Keep only the dataset path
+    # Keep only the dataset path: a catalog artifact directory built with
+    # python -m models.catalog_store, or the pickled catalog
     DATASETS_PATH = os.environ.get(
         'DATASETS_PATH', 
         r"E:\A4 WEB DESIGN\Dataset-Explorer\enhanced_gee_catalog_20250425.pkl"
@@ -15,6 +16,15 @@ class Config:
     SEARCH_MODEL_SIZE = os.environ.get('SEARCH_MODEL_SIZE', 'small')  # small, medium, large
     SEARCH_CACHE_DIR = os.environ.get('SEARCH_CACHE_DIR', 'saved_indexes')
     
+    # Query expansion: "llm", "lexical" (BM25 over titles and keywords) or "none"
+    SEARCH_EXPANSION_MODE = os.environ.get('SEARCH_EXPANSION_MODE', 'llm')
+    SEARCH_EXPANSION_TIMEOUT = float(os.environ.get('SEARCH_EXPANSION_TIMEOUT', '0.5'))  # seconds
+    # Application log whose most frequent search queries get precomputed expansions
+    SEARCH_QUERY_LOG = os.environ.get('SEARCH_QUERY_LOG', '')
+    
+    # Fuse BM25 matches over the weighted fields with the vector results
+    SEARCH_HYBRID = os.environ.get('SEARCH_HYBRID', 'True').lower() == 'true'
+    
     # Field weights for search
     SEARCH_WEIGHTS = {
         'title': float(os.environ.get('WEIGHT_TITLE', '0.35')),
@@ -23,6 +33,28 @@ class Config:
         'keywords': float(os.environ.get('WEIGHT_KEYWORDS', '0.20'))
     }
     
+    # Tile URL cache; Earth Engine map IDs expire, so entries are re-rendered
+    # TILE_CACHE_REFRESH_MARGIN seconds before TILE_CACHE_TTL runs out
+    TILE_CACHE_SIZE = int(os.environ.get('TILE_CACHE_SIZE', '512'))
+    TILE_CACHE_TTL = float(os.environ.get('TILE_CACHE_TTL', '10800'))  # seconds
+    TILE_CACHE_REFRESH_MARGIN = float(os.environ.get('TILE_CACHE_REFRESH_MARGIN', '900'))  # seconds
+    # Pre-render tiles of the most requested datasets in this application log at startup
+    TILE_WARMUP_DATASETS = int(os.environ.get('TILE_WARMUP_DATASETS', '20'))
+    TILE_WARMUP_LOG = os.environ.get('TILE_WARMUP_LOG', SEARCH_QUERY_LOG)
+
+    # Worker pools of the ASGI serving mode (asgi.py): threads, queue limit and
+    # request timeout in seconds for Earth Engine routes, model inference
+    # routes and all other routes
+    EE_POOL_WORKERS = int(os.environ.get('EE_POOL_WORKERS', '8'))
+    EE_POOL_QUEUE = int(os.environ.get('EE_POOL_QUEUE', '32'))
+    EE_TIMEOUT = float(os.environ.get('EE_TIMEOUT', '90'))
+    INFERENCE_POOL_WORKERS = int(os.environ.get('INFERENCE_POOL_WORKERS', '2'))
+    INFERENCE_POOL_QUEUE = int(os.environ.get('INFERENCE_POOL_QUEUE', '32'))
+    INFERENCE_TIMEOUT = float(os.environ.get('INFERENCE_TIMEOUT', '30'))
+    WEB_POOL_WORKERS = int(os.environ.get('WEB_POOL_WORKERS', '8'))
+    WEB_POOL_QUEUE = int(os.environ.get('WEB_POOL_QUEUE', '64'))
+    WEB_TIMEOUT = float(os.environ.get('WEB_TIMEOUT', '30'))
+
     # Other configuration settings
     DEBUG = os.environ.get('DEBUG', 'True').lower() == 'true'
     FEATURE_LIMIT = int(os.environ.get('FEATURE_LIMIT', '10000'))  # Default limit for feature collections
@@ -0,0 +1,329 @@
+"""
+Preprocessed catalog artifact.
+
+The GEE catalog is built offline into a directory that loads without pickle:
+
+    manifest.json       format version, catalog fingerprint and file list
+    records.bin         the JSON of every dataset, one after another
+    record_offsets.npy  byte offset of each record in records.bin
+    columns.json        dataset keys and the derived fields of each dataset
+                        (index, search-result and search-text fields)
+    search_index/       optional precomputed search embeddings
+
+At startup the manifest and columns are read and records.bin is
+memory-mapped; a dataset's JSON is only decoded when the dataset is used.
+
+Build an artifact from a pickled catalog with:
+    python -m models.catalog_store --datasets path/to/catalog.pkl --output path/to/catalog
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import datetime
+from collections.abc import Mapping
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from models.dataset_index import index_fields, display_fields
+from services.dataset_service import get_search_fields
+
+logger = logging.getLogger(__name__)
+
+# Version of the artifact layout and of the derived fields; bump it when
+# either changes so stale artifacts are rebuilt
+FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+RECORDS_FILE = "records.bin"
+OFFSETS_FILE = "record_offsets.npy"
+COLUMNS_FILE = "columns.json"
+SEARCH_INDEX_DIR = "search_index"
+
+GEE_TYPES = frozenset({"image", "image_collection", "table", "table_collection", "feature_collection", "bigquery_table"})
+
+
+def _to_json(value: Any) -> Any:
+    """Convert a catalog value (e.g. STAC objects, dates, NumPy values) to plain JSON data."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, "to_dict"):
+        return _to_json(value.to_dict())
+    return str(value)
+
+
+def validate_dataset(dataset: Any) -> List[str]:
+    """
+    Check a dataset against the fields the application relies on.
+
+    Args:
+        dataset: Dataset dictionary, converted to plain JSON data
+
+    Returns:
+        List of problems; empty if the dataset is valid
+    """
+    if not isinstance(dataset, dict):
+        return [f"dataset is a {type(dataset).__name__}, not a dictionary"]
+
+    problems = []
+    if not isinstance(dataset.get("id"), str) or not dataset["id"]:
+        problems.append("missing 'id'")
+    for field in ("title", "description"):
+        if field in dataset and not isinstance(dataset[field], str):
+            problems.append(f"'{field}' is not a string")
+    gee_type = dataset.get("gee:type")
+    if gee_type is not None and str(gee_type).lower() not in GEE_TYPES:
+        problems.append(f"unknown 'gee:type' {gee_type!r}")
+    for field in ("summaries", "properties", "extent", "js_visualization_info"):
+        if field in dataset and dataset[field] is not None and not isinstance(dataset[field], dict):
+            problems.append(f"'{field}' is not an object")
+    interval = ((dataset.get("extent") or {}).get("temporal") or {}).get("interval")
+    if interval is not None and not (
+        isinstance(interval, list) and all(isinstance(i, list) and len(i) == 2 for i in interval)
+    ):
+        problems.append("'extent.temporal.interval' is not a list of [start, end] pairs")
+    return problems
+
+
+def build_catalog(
+    datasets: Dict[Any, Dict[str, Any]],
+    output_dir: str,
+    model_size: Optional[str] = None,
+    skip_invalid: bool = False,
+    source: str = ""
+) -> Dict[str, Any]:
+    """
+    Build a catalog artifact.
+
+    Args:
+        datasets: Dictionary of dataset dictionaries, e.g. the unpickled catalog
+        output_dir: Artifact directory; replaced if it exists
+        model_size: Precompute search embeddings for this model size ("small", ...)
+        skip_invalid: Leave out invalid datasets instead of failing
+        source: Description of the input, stored in the manifest
+
+    Returns:
+        The manifest
+
+    Raises:
+        ValueError: If datasets are invalid and skip_invalid is False
+    """
+    start = time.perf_counter()
+    keys, records, problems = [], [], []
+    seen_ids = set()
+    for key, dataset in datasets.items():
+        record = _to_json(dataset)
+        dataset_problems = validate_dataset(record)
+        if not dataset_problems and record["id"] in seen_ids:
+            dataset_problems = [f"duplicate id {record['id']!r}"]
+        if dataset_problems:
+            problems.append(f"{key}: {'; '.join(dataset_problems)}")
+            continue
+        seen_ids.add(record["id"])
+        keys.append(str(key))
+        records.append(record)
+
+    if problems:
+        logger.warning(f"{len(problems)} invalid datasets:\n  " + "\n  ".join(problems[:50]))
+        if not skip_invalid:
+            raise ValueError(f"{len(problems)} invalid datasets, first: {problems[0]}")
+
+    # Write into a temporary directory and swap it in, so a failed build
+    # leaves the previous artifact intact
+    tmp_dir = f"{output_dir.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    digest = hashlib.sha1(str(FORMAT_VERSION).encode("utf-8"))
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    with open(os.path.join(tmp_dir, RECORDS_FILE), "wb") as f:
+        for i, record in enumerate(records):
+            data = json.dumps(record, separators=(",", ":")).encode("utf-8")
+            digest.update(data)
+            f.write(data)
+            offsets[i + 1] = offsets[i] + len(data)
+    np.save(os.path.join(tmp_dir, OFFSETS_FILE), offsets)
+
+    columns = {
+        "key": keys,
+        "index": [index_fields(record) for record in records],
+        "display": [display_fields(record) for record in records],
+        "search": [get_search_fields(record) for record in records]
+    }
+    with open(os.path.join(tmp_dir, COLUMNS_FILE), "w") as f:
+        json.dump(columns, f, separators=(",", ":"))
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "fingerprint": digest.hexdigest(),
+        "count": len(records),
+        "skipped": len(problems),
+        "source": source,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "files": [RECORDS_FILE, OFFSETS_FILE, COLUMNS_FILE],
+        "columns": list(columns),
+        "search_model_size": None
+    }
+
+    if model_size:
+        # Build the search index against the artifact itself, so the cached
+        # embeddings match what the server computes when it loads it
+        from services.llama_search import create_enhanced_search_manager
+        _write_manifest(tmp_dir, manifest)
+        create_enhanced_search_manager(
+            CatalogStore(tmp_dir),
+            model_size=model_size,
+            cache_dir=os.path.join(tmp_dir, SEARCH_INDEX_DIR),
+            expansion_mode="none"
+        )
+        manifest["search_model_size"] = model_size
+
+    _write_manifest(tmp_dir, manifest)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+
+    logger.info(f"Built catalog artifact with {len(records)} datasets in {output_dir} "
+                f"in {time.perf_counter() - start:.1f}s")
+    return manifest
+
+
+def _write_manifest(directory: str, manifest: Dict[str, Any]):
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def is_catalog_artifact(path: str) -> bool:
+    """Check whether a path is a catalog artifact directory."""
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+class CatalogStore(Mapping):
+    """
+    Read-only mapping of dataset keys to datasets, backed by a catalog artifact.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Open a catalog artifact.
+
+        Args:
+            directory: Artifact directory written by build_catalog()
+
+        Raises:
+            FileNotFoundError: If the artifact files are missing
+            ValueError: If the artifact has another format version or is inconsistent
+        """
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Catalog artifact format {manifest.get('format_version')} is not supported "
+                f"(expected {FORMAT_VERSION}); rebuild it with python -m models.catalog_store"
+            )
+
+        with open(os.path.join(directory, COLUMNS_FILE)) as f:
+            self.columns: Dict[str, List[Any]] = json.load(f)
+
+        self.offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode="r")
+        count = manifest["count"]
+        if len(self.offsets) != count + 1 or any(len(column) != count for column in self.columns.values()):
+            raise ValueError(f"Catalog artifact in {directory} is inconsistent with its manifest")
+        self.records = (
+            np.memmap(os.path.join(directory, RECORDS_FILE), dtype=np.uint8, mode="r")
+            if self.offsets[-1] else np.zeros(0, dtype=np.uint8)
+        )
+
+        self.directory = directory
+        self.manifest = manifest
+        self._rows = {key: row for row, key in enumerate(self.columns["key"])}
+        self._decoded: Dict[str, Dict[str, Any]] = {}
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        dataset = self._decoded.get(key)
+        if dataset is None:
+            row = self._rows[key]
+            data = self.records[self.offsets[row]:self.offsets[row + 1]].tobytes()
+            dataset = json.loads(data)
+            self._decoded[key] = dataset
+        return dataset
+
+    def __iter__(self):
+        return iter(self.columns["key"])
+
+    def __len__(self) -> int:
+        return len(self.columns["key"])
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._rows
+
+    def search_fields(self) -> List[Dict[str, str]]:
+        """Precomputed search-text fields of each dataset, in catalog order."""
+        return self.columns["search"]
+
+    @property
+    def search_index_dir(self) -> Optional[str]:
+        """Directory of the precomputed search embeddings, if the artifact has them."""
+        directory = os.path.join(self.directory, SEARCH_INDEX_DIR)
+        return directory if os.path.isdir(directory) else None
+
+
+def load_catalog(path: str) -> Mapping:
+    """
+    Load the catalog from an artifact directory or, for older deployments, a pickle.
+
+    Args:
+        path: Catalog artifact directory or pickled catalog file
+
+    Returns:
+        Mapping of dataset keys to datasets
+    """
+    if is_catalog_artifact(path):
+        return CatalogStore(path)
+
+    import pickle
+    logger.warning(f"Loading pickled catalog {path}; build an artifact with python -m models.catalog_store "
+                   f"for faster, pickle-free loading")
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def main():
+    """Build a catalog artifact from a pickled catalog."""
+    import argparse
+    import pickle
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--datasets", required=True, help="Path to the pickled catalog")
+    parser.add_argument("--output", required=True, help="Artifact directory to write")
+    parser.add_argument("--model-size", choices=["small", "medium", "large", "minimal"],
+                        help="Also precompute search embeddings for this model size")
+    parser.add_argument("--skip-invalid", action="store_true", help="Leave out invalid datasets instead of failing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.datasets, "rb") as f:
+        datasets = pickle.load(f)
+
+    manifest = build_catalog(
+        datasets,
+        args.output,
+        model_size=args.model_size,
+        skip_invalid=args.skip_invalid,
+        source=os.path.basename(args.datasets)
+    )
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Secondary indexes over the loaded dataset catalog.
+
+Routes look datasets up by ID on every tile request and map click, so the
+catalog is indexed once when it is loaded: by ID, by Earth Engine type, by
+provider, by keyword and by temporal extent. Derived visualization
+parameters, search-result fields and date ranges are memoized per dataset on
+first use, unless the catalog artifact precomputed them.
+"""
+import copy
+import logging
+import threading
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, Any, List, Optional, Tuple, Set
+
+from services.dataset_service import extract_visualization_params, get_date_range
+
+logger = logging.getLogger(__name__)
+
+# End of the temporal extent of ongoing datasets
+OPEN_END = "9999-12-31"
+
+
+def _dataset_keywords(dataset: Dict[str, Any]) -> List[str]:
+    """Collect a dataset's keywords from the catalog's various locations."""
+    keywords = []
+    if isinstance(dataset.get('keywords'), list):
+        keywords.extend(dataset['keywords'])
+
+    summaries = dataset.get('summaries') or {}
+    for field in ('keywords', 'gee:terms'):
+        if isinstance(summaries.get(field), list):
+            keywords.extend(summaries[field])
+
+    props = dataset.get('properties') or {}
+    if isinstance(props.get('keywords'), list):
+        keywords.extend(props['keywords'])
+    elif isinstance(props.get('keywords'), str):
+        keywords.extend(k.strip() for k in props['keywords'].split(','))
+
+    return [str(k).strip().lower() for k in keywords if k and str(k).strip()]
+
+
+def _dataset_providers(dataset: Dict[str, Any]) -> List[str]:
+    """Collect a dataset's provider names and its ID prefix (e.g. "modis")."""
+    providers = [
+        str(provider.get('name', '')).strip().lower()
+        for provider in dataset.get('providers') or []
+        if isinstance(provider, dict) and provider.get('name')
+    ]
+    dataset_id = dataset.get('id', '')
+    if '/' in dataset_id:
+        providers.append(dataset_id.split('/')[0].lower())
+    return providers
+
+
+def _temporal_extent(dataset: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """Start and end of a dataset's temporal extent as ISO date strings."""
+    interval = (((dataset.get('extent') or {}).get('temporal') or {}).get('interval'))
+    if not (isinstance(interval, list) and interval and isinstance(interval[0], list) and len(interval[0]) == 2):
+        return None
+    start, end = interval[0]
+    if not start:
+        return None
+    return str(start)[:10], str(end)[:10] if end else OPEN_END
+
+
+def index_fields(dataset: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the fields a DatasetIndex is built from.
+
+    Args:
+        dataset: Dataset dictionary
+
+    Returns:
+        Dictionary with id, gee_type, providers, keywords and temporal extent
+    """
+    extent = _temporal_extent(dataset)
+    return {
+        'id': dataset.get('id'),
+        'gee_type': str(dataset.get('gee:type', '')).lower(),
+        'providers': sorted(set(_dataset_providers(dataset))),
+        'keywords': sorted(set(_dataset_keywords(dataset))),
+        'extent': list(extent) if extent else None
+    }
+
+
+def display_fields(dataset: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the fields shown with a search result.
+
+    Args:
+        dataset: Dataset dictionary
+
+    Returns:
+        Dictionary with the class palette, class descriptions, type and keywords
+    """
+    palette = None
+    class_descriptions = None
+    bands = (dataset.get('summaries') or {}).get('eo:bands')
+    if bands and isinstance(bands, list) and isinstance(bands[0], dict):
+        class_descriptions = bands[0].get('gee:classes', [])
+        if class_descriptions and isinstance(class_descriptions, list):
+            # Add '#' prefix if colors don't have it
+            palette = [
+                '#' + item['color'] if not item['color'].startswith('#') else item['color']
+                for item in class_descriptions
+                if isinstance(item, dict) and isinstance(item.get('color'), str) and item['color']
+            ]
+
+    # Keywords as displayed, in their original case and without duplicates
+    keywords = []
+    summaries = dataset.get('summaries') or {}
+    for field in ('keywords', 'gee:terms'):
+        if isinstance(summaries.get(field), list):
+            keywords.extend(summaries[field])
+    props_keywords = (dataset.get('properties') or {}).get('keywords', [])
+    if isinstance(props_keywords, list):
+        keywords.extend(props_keywords)
+    elif isinstance(props_keywords, str):
+        keywords.extend(k.strip() for k in props_keywords.split(','))
+
+    fields = {
+        'palette': palette,
+        'class_descriptions': class_descriptions,
+        'keywords': list(dict.fromkeys(keywords))
+    }
+    if 'gee:type' in dataset:
+        fields['type'] = dataset['gee:type']
+    return fields
+
+
+class DatasetIndex:
+    """Lookup tables over the dataset catalog."""
+
+    def __init__(
+        self,
+        datasets: Dict[str, Dict[str, Any]],
+        fields: Optional[List[Dict[str, Any]]] = None,
+        display: Optional[List[Dict[str, Any]]] = None
+    ):
+        """
+        Build the indexes.
+
+        Args:
+            datasets: Dictionary of dataset dictionaries, as loaded from the catalog
+            fields: Precomputed index_fields() of each dataset, in catalog order
+            display: Precomputed display_fields() of each dataset, in catalog order
+        """
+        self.datasets = datasets
+        self.by_id: Dict[str, str] = {}
+        self.by_type: Dict[str, List[str]] = {}
+        self.by_provider: Dict[str, List[str]] = {}
+        self.by_keyword: Dict[str, List[str]] = {}
+
+        if fields is None:
+            fields = [index_fields(dataset) for dataset in datasets.values()]
+
+        extents = []
+        self._rows: Dict[str, int] = {}
+        for row, (key, entry) in enumerate(zip(datasets.keys(), fields)):
+            dataset_id = entry['id']
+            if not dataset_id:
+                continue
+            if dataset_id in self.by_id:
+                # Keep the first entry, like the linear scan this replaces
+                continue
+            self.by_id[dataset_id] = key
+            self._rows[dataset_id] = row
+
+            if entry['gee_type']:
+                self.by_type.setdefault(entry['gee_type'], []).append(dataset_id)
+            for provider in entry['providers']:
+                self.by_provider.setdefault(provider, []).append(dataset_id)
+            for keyword in entry['keywords']:
+                self.by_keyword.setdefault(keyword, []).append(dataset_id)
+            if entry['extent']:
+                extents.append((entry['extent'][0], entry['extent'][1], dataset_id))
+
+        # Temporal extents sorted by start, for overlap queries
+        extents.sort()
+        self._starts = [start for start, _, _ in extents]
+        self._extents = extents
+
+        # Derived values, precomputed by the catalog build or computed on first use
+        self._display = display
+        self._visualization: Dict[str, Tuple] = {}
+        self._display_cache: Dict[str, Dict[str, Any]] = {}
+        self._date_ranges: Dict[str, Tuple[date, Any]] = {}
+        self._lock = threading.Lock()
+
+        logger.info(
+            f"Indexed {len(self.by_id)} datasets: {len(self.by_type)} types, "
+            f"{len(self.by_provider)} providers, {len(self.by_keyword)} keywords, "
+            f"{len(extents)} temporal extents"
+        )
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a dataset by its ID.
+
+        Args:
+            dataset_id: Earth Engine dataset ID
+
+        Returns:
+            The dataset dictionary, or None if unknown
+        """
+        key = self.by_id.get(dataset_id)
+        return self.datasets[key] if key is not None else None
+
+    def find(
+        self,
+        gee_type: Optional[str] = None,
+        provider: Optional[str] = None,
+        keyword: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> List[str]:
+        """
+        Find datasets matching all given criteria.
+
+        Args:
+            gee_type: Earth Engine type, e.g. "image_collection"
+            provider: Provider name or ID prefix, e.g. "modis"
+            keyword: Catalog keyword
+            start: Start of a date range (ISO date) the extent must overlap
+            end: End of a date range (ISO date) the extent must overlap
+
+        Returns:
+            Matching dataset IDs in catalog order
+        """
+        candidates: Optional[Set[str]] = None
+        for table, value in ((self.by_type, gee_type), (self.by_provider, provider), (self.by_keyword, keyword)):
+            if value is None:
+                continue
+            matches = set(table.get(value.lower(), ()))
+            candidates = matches if candidates is None else candidates & matches
+
+        if start is not None or end is not None:
+            matches = set(self.overlapping(start or "0000-01-01", end or OPEN_END))
+            candidates = matches if candidates is None else candidates & matches
+
+        if candidates is None:
+            return list(self.by_id)
+        return [dataset_id for dataset_id in self.by_id if dataset_id in candidates]
+
+    def overlapping(self, start: str, end: str) -> List[str]:
+        """
+        Find datasets whose temporal extent overlaps a date range.
+
+        Args:
+            start: Start of the range (ISO date)
+            end: End of the range (ISO date)
+
+        Returns:
+            Matching dataset IDs, ordered by extent start
+        """
+        # Only extents starting on or before the range end can overlap it
+        last = bisect_right(self._starts, end[:10])
+        return [dataset_id for _, extent_end, dataset_id in self._extents[:last] if extent_end >= start[:10]]
+
+    def display_fields(self, dataset_id: str) -> Dict[str, Any]:
+        """
+        Get the fields shown with a search result of a dataset, memoized.
+
+        Args:
+            dataset_id: Earth Engine dataset ID
+
+        Returns:
+            Dictionary as returned by display_fields(); a copy callers may modify
+
+        Raises:
+            KeyError: If the dataset is unknown
+        """
+        if self._display is not None:
+            fields = self._display[self._rows[dataset_id]]
+        else:
+            fields = self._display_cache.get(dataset_id)
+            if fields is None:
+                dataset = self.get(dataset_id)
+                if dataset is None:
+                    raise KeyError(dataset_id)
+                fields = display_fields(dataset)
+                with self._lock:
+                    self._display_cache[dataset_id] = fields
+        return copy.deepcopy(fields)
+
+    def visualization_params(self, dataset_id: str) -> Tuple[Dict[str, Any], Any, Any, Any]:
+        """
+        Get a dataset's default visualization parameters, memoized.
+
+        Args:
+            dataset_id: Earth Engine dataset ID
+
+        Returns:
+            Tuple of (vis_params, bands, palette, class_descriptions) as returned by
+            extract_visualization_params; a copy callers may modify
+
+        Raises:
+            KeyError: If the dataset is unknown
+        """
+        params = self._visualization.get(dataset_id)
+        if params is None:
+            dataset = self.get(dataset_id)
+            if dataset is None:
+                raise KeyError(dataset_id)
+            params = extract_visualization_params(dataset)
+            with self._lock:
+                self._visualization[dataset_id] = params
+        return copy.deepcopy(params)
+
+    def date_range(self, dataset_id: str) -> Optional[List[str]]:
+        """
+        Get a dataset's default date range, memoized for the current day.
+
+        Defaults of time-series datasets are relative to today, so they are
+        recomputed when the date changes.
+
+        Args:
+            dataset_id: Earth Engine dataset ID
+
+        Returns:
+            Date range as returned by get_date_range; a copy callers may modify
+
+        Raises:
+            KeyError: If the dataset is unknown
+        """
+        today = date.today()
+        cached = self._date_ranges.get(dataset_id)
+        if cached is None or cached[0] != today:
+            dataset = self.get(dataset_id)
+            if dataset is None:
+                raise KeyError(dataset_id)
+            cached = (today, get_date_range(dataset))
+            with self._lock:
+                self._date_ranges[dataset_id] = cached
+        return list(cached[1]) if cached[1] is not None else None
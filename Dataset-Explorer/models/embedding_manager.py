@@ -1,30 +1,37 @@
 import os
-import pickle
 import json
 import logging
 
 # Import our enhanced search module
-from services.llama_search import EnhancedDatasetSearch, create_enhanced_search_manager
+from services.llama_search import EnhancedDatasetSearch, create_enhanced_search_manager, frequent_queries
+from models.dataset_index import DatasetIndex
+from models.catalog_store import CatalogStore, load_catalog
 
 logger = logging.getLogger(__name__)
 
 class DatasetEmbeddingManager:
     """Manages dataset embeddings for similarity search using LlamaIndex capabilities"""
     
-    def __init__(self, model_size="small"):
+    def __init__(self, model_size="small", search_options=None, query_log_path=None):
         """
         Initialize the DatasetEmbeddingManager with specified model size.
         
         Args:
             model_size (str): Size of the models to use ("small", "medium", or "large")
+            search_options (dict): Further EnhancedDatasetSearch options, e.g. expansion_mode
+            query_log_path (str): Application log whose most frequent queries get
+                                  precomputed expansions
         """
         self.model_size = model_size
+        self.search_options = search_options or {}
+        self.query_log_path = query_log_path
         
         # Enhanced search attributes
         self.enhanced_search = None
         
         # Dataset storage
         self.datasets = None
+        self.dataset_index = None
         
         logger.info(f"Using LlamaIndex search with {model_size} models")
 
@@ -33,7 +40,9 @@ class DatasetEmbeddingManager:
         Load datasets from the specified file path and initialize the search index.
         
         Args:
-            datasets_file_path (str): Path to the pickled datasets file
+            datasets_file_path (str): Path to a catalog artifact directory built with
+                                      python -m models.catalog_store, or to the
+                                      pickled datasets file
             
         Returns:
             bool: True if successful
@@ -44,17 +53,26 @@ class DatasetEmbeddingManager:
         logger.info(f"Loading datasets from {datasets_file_path}")
         
         try:
-            with open(datasets_file_path, 'rb') as f:
-                self.datasets = pickle.load(f)
+            self.datasets = load_catalog(datasets_file_path)
             logger.info(f"Successfully loaded {len(self.datasets)} datasets")
+            if isinstance(self.datasets, CatalogStore):
+                self.dataset_index = DatasetIndex(
+                    self.datasets,
+                    fields=self.datasets.columns['index'],
+                    display=self.datasets.columns['display']
+                )
+            else:
+                self.dataset_index = DatasetIndex(self.datasets)
             
             # Initialize the enhanced search
             logger.info("Initializing enhanced search with loaded datasets...")
             self.enhanced_search = create_enhanced_search_manager(
                 self.datasets, 
-                model_size=self.model_size
+                model_size=self.model_size,
+                **self._search_options()
             )
             logger.info("Enhanced search index built successfully from loaded datasets")
+            self._precompute_expansions()
             return True
         except Exception as e:
             logger.error(f"Error loading datasets: {str(e)}")
@@ -76,13 +94,44 @@ class DatasetEmbeddingManager:
         logger.info("Note: Using legacy load_state method, consider switching to load_datasets")
         return self.load_datasets(datasets_file_path)
 
-    def retrieve_datasets(self, query, top_k=20):
+    def get_dataset(self, dataset_id):
+        """
+        Get a loaded dataset by its Earth Engine ID.
+
+        Args:
+            dataset_id (str): Dataset ID, e.g. "MODIS/061/MOD13Q1"
+
+        Returns:
+            dict: The dataset, or None if it is unknown or no datasets are loaded
+        """
+        if self.dataset_index is None:
+            return None
+        return self.dataset_index.get(dataset_id)
+
+    def _search_options(self):
+        """Search options, reading the embeddings precomputed in a catalog artifact if it has them."""
+        search_index_dir = getattr(self.datasets, 'search_index_dir', None)
+        if search_index_dir:
+            return {**self.search_options, 'prebuilt_dir': search_index_dir}
+        return self.search_options
+
+    def _precompute_expansions(self):
+        """Queue expansions of the most frequent logged queries in the background."""
+        if not self.query_log_path or not os.path.exists(self.query_log_path):
+            return
+        try:
+            self.enhanced_search.precompute_expansions(frequent_queries(self.query_log_path))
+        except Exception as e:
+            logger.warning(f"Could not precompute query expansions: {str(e)}")
+
+    def retrieve_datasets(self, query, top_k=20, expand_query=True):
         """
         Retrieve most similar datasets based on query.
         
         Args:
             query (str): The search query
             top_k (int): Number of results to return
+            expand_query (bool): Whether to expand the query
             
         Returns:
             list: List of matching datasets
@@ -98,7 +147,7 @@ class DatasetEmbeddingManager:
                 
         # Use enhanced search
         logger.info(f"Performing enhanced search for query: {query}")
-        return self.enhanced_search.search(query, top_k=top_k)
+        return self.enhanced_search.search(query, top_k=top_k, expand_query=expand_query)
 
     def update_model_size(self, model_size):
         """
@@ -121,9 +170,11 @@ class DatasetEmbeddingManager:
         if self.datasets is not None:
             self.enhanced_search = create_enhanced_search_manager(
                 self.datasets, 
-                model_size=model_size
+                model_size=model_size,
+                **self._search_options()
             )
             logger.info(f"Search index rebuilt with {model_size} models")
+            self._precompute_expansions()
         
         return True
         
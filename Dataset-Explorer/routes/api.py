@@ -1,8 +1,10 @@
 from flask import request, jsonify
+import os
 import logging
 import ee
 import json
 import re
+import time
 from datetime import datetime, timedelta
 # Import the new functions at the top of api.py
 from services.dataset_service import (
@@ -10,13 +12,13 @@ from services.dataset_service import (
     get_spatial_extent,
     get_lookat,
     get_feature_properties,
-    extract_visualization_params,
-    get_date_range,
     get_best_scale_for_dataset,         # New import
     apply_temporal_filter_to_collection, # New import
     get_image_from_collection          # New import
 )
 
+from services.tile_cache import TileCache, tile_cache_key, frequent_datasets
+
 from services.earth_engine import (
     filter_open_buildings,
     create_feature_collection_image,
@@ -36,12 +38,39 @@ COLORMAPS = {
     'greens': ['#F7FCF5', '#C7E9C0', '#A1D99B', '#74C476', '#41AB5D', '#238B45', '#005A32']
 }
 
+# Dataset types of Earth Engine asset types
+ASSET_TYPES = {
+    'IMAGE': 'image',
+    'IMAGE_COLLECTION': 'image_collection',
+    'TABLE': 'feature_collection',
+    'FEATURE_COLLECTION': 'feature_collection'
+}
+
+# Maximum number of cached dataset types
+MAX_RESOLVED_TYPES = 4096
+
+# Seconds before the asset type of a dataset that could not be looked up is tried again
+UNRESOLVED_TYPE_TTL = 600
+
+# Earth Engine errors saying an asset was loaded as the wrong type
+WRONG_TYPE_ERROR = re.compile(
+    r"is not an? (image|table|feature)|expected type|but found",
+    re.IGNORECASE
+)
+
 def register_api_routes(app, embedding_manager):
     """Register API routes for the application"""
     
     # Register the value retrieval route
     register_value_retrieval_route(app, embedding_manager)
     
+    # Rendered tile URLs, shared by all users
+    tile_cache = TileCache(
+        max_entries=app.config.get('TILE_CACHE_SIZE', 512),
+        ttl=app.config.get('TILE_CACHE_TTL', 3 * 3600),
+        refresh_margin=app.config.get('TILE_CACHE_REFRESH_MARGIN', 15 * 60)
+    )
+    
     @app.route('/search_datasets', methods=['POST'])
     def search_datasets():
         data = request.get_json()
@@ -68,7 +97,7 @@ def register_api_routes(app, embedding_manager):
         
         try:
             # Use enhanced search with more results
-            results = embedding_manager.retrieve_datasets(query, top_k=top_k)
+            results = embedding_manager.retrieve_datasets(query, top_k=top_k, expand_query=expand_query)
             
             # Add debugging for the results
             logger.info(f"Retrieved {len(results)} datasets from search")
@@ -92,59 +121,9 @@ def register_api_routes(app, embedding_manager):
                     logger.info(f"Processing dataset: {dataset_id}")
                     processed_result['preview_url'] = f"static/preview_images/{image_id}.png"
                     
-                    # Try to get palette from different potential locations
-                    palette = None
-                    try:
-                        # Extract colors from gee:classes
-                        if ('summaries' in result and 
-                            'eo:bands' in result.get('summaries', {}) and 
-                            result.get('summaries', {}).get('eo:bands')):
-                            
-                            gee_classes = result.get('summaries', {}).get('eo:bands', [])[0].get('gee:classes', [])
-                            if gee_classes and isinstance(gee_classes, list):
-                                palette = [item.get('color', '') for item in gee_classes if 'color' in item]
-                                # Add '#' prefix if colors don't have it
-                                palette = ['#' + color if not color.startswith('#') else color 
-                                        for color in palette if color]
-                    except Exception as e:
-                        logger.warning(f"Error extracting palette for {dataset_id}: {str(e)}")
-                        palette = None
-                    
-                    processed_result['palette'] = palette
-                    
-                    # Also store class descriptions if available
-                    try:
-                        if ('summaries' in result and 
-                            'eo:bands' in result.get('summaries', {}) and 
-                            result.get('summaries', {}).get('eo:bands')):
-                            
-                            gee_classes = result.get('summaries', {}).get('eo:bands', [])[0].get('gee:classes', [])
-                            processed_result['class_descriptions'] = gee_classes
-                    except Exception as e:
-                        logger.warning(f"Error extracting class descriptions for {dataset_id}: {str(e)}")
-                        processed_result['class_descriptions'] = None
-                        
-                    # Add GEE type if available for filtering
-                    if 'gee:type' in result:
-                        processed_result['type'] = result['gee:type']
-                        
-                    # Extract and add keywords if available for display
-                    keywords = []
-                    if 'summaries' in result:
-                        summaries = result.get('summaries', {})
-                        if 'keywords' in summaries and isinstance(summaries.get('keywords', []), list):
-                            keywords.extend(summaries.get('keywords', []))
-                        if 'gee:terms' in summaries and isinstance(summaries.get('gee:terms', []), list):
-                            keywords.extend(summaries.get('gee:terms', []))
-                            
-                    if 'properties' in result and 'keywords' in result.get('properties', {}):
-                        props_keywords = result.get('properties', {}).get('keywords', [])
-                        if isinstance(props_keywords, list):
-                            keywords.extend(props_keywords)
-                        elif isinstance(props_keywords, str):
-                            keywords.extend([k.strip() for k in props_keywords.split(',')])
-                    
-                    processed_result['keywords'] = list(set(keywords)) if keywords else []  # Remove duplicates
+                    # Add the class palette, class descriptions, GEE type (for filtering)
+                    # and keywords (for display), derived once per dataset
+                    processed_result.update(embedding_manager.dataset_index.display_fields(dataset_id))
                     
                     # Add to processed results
                     processed_results.append(processed_result)
@@ -254,11 +233,18 @@ def register_api_routes(app, embedding_manager):
             if use_enhanced and hasattr(embedding_manager, 'enhanced_search') and embedding_manager.enhanced_search is not None:
                 weights = embedding_manager.enhanced_search.weights
             
+            # Query embedding cache and batching statistics
+            query_cache = {}
+            enhanced_search = getattr(embedding_manager, 'enhanced_search', None)
+            if enhanced_search is not None and enhanced_search.query_embedder is not None:
+                query_cache = enhanced_search.query_embedder.get_stats()
+            
             return jsonify({
                 'use_enhanced_search': use_enhanced,
                 'model_size': model_size,
                 'model_details': models.get(model_size, {}),
                 'field_weights': weights,
+                'query_cache': query_cache,
                 'dataset_count': len(embedding_manager.datasets) if embedding_manager.datasets else 0
             })
         except Exception as e:
@@ -266,14 +252,23 @@ def register_api_routes(app, embedding_manager):
             return jsonify({'error': str(e)}), 500
     
  
+    @app.route('/tile_cache_info', methods=['GET'])
+    def tile_cache_info():
+        """Return statistics of the tile cache"""
+        return jsonify({'tile_cache': tile_cache.get_stats()})
+ 
     @app.route('/get_tile', methods=['POST'])
     def get_tile():
-        data = request.get_json()
+        response_data, status = build_tile_response(request.get_json())
+        return jsonify(response_data), status
+
+    def build_tile_response(data):
+        """Build the /get_tile response of a request as (response_data, status)."""
         dataset_id = data.get('dataset_id')
         #dataset_id = dataset_id.replace('/', '_') if '/' in dataset_id else dataset_id
 
         if not dataset_id:
-            return jsonify({'error': 'No dataset_id provided'}), 400
+            return {'error': 'No dataset_id provided'}, 400
         
         logger.info(f"Getting tiles for dataset: {dataset_id}")
         
@@ -298,10 +293,10 @@ def register_api_routes(app, embedding_manager):
             logger.info(f"Custom visualization params received: {json.dumps(visualization)}")
         
         # Find the dataset by its id.
-        dataset = next((embedding_manager.datasets[d] for d in embedding_manager.datasets if embedding_manager.datasets[d]['id'] == dataset_id), None)
+        dataset = embedding_manager.get_dataset(dataset_id)
         if not dataset:
             logger.error(f"Dataset not found: {dataset_id}")
-            return jsonify({'error': 'Dataset not found'}), 404
+            return {'error': 'Dataset not found'}, 404
         
         try:
             # Process the dataset for visualization
@@ -342,7 +337,7 @@ def register_api_routes(app, embedding_manager):
                 date_range = [temporal_filter['start_date'], temporal_filter['end_date']]
                 logger.info(f"Using custom temporal filter date range: {date_range}")
             else:
-                date_range = get_date_range(dataset)
+                date_range = embedding_manager.dataset_index.date_range(dataset_id)
                 logger.info(f"Using optimized date range: {date_range}")
             
             # Special handling for datasets known to have date range issues
@@ -390,7 +385,7 @@ def register_api_routes(app, embedding_manager):
                 class_descriptions = None
             else:
                 # Use default visualization parameters
-                vis_params, bands, palette, class_descriptions = extract_visualization_params(dataset)
+                vis_params, bands, palette, class_descriptions = embedding_manager.dataset_index.visualization_params(dataset_id)
             
             # Get spatial information
             bbox = get_spatial_extent(dataset)
@@ -402,267 +397,299 @@ def register_api_routes(app, embedding_manager):
             
             logger.info(f"Visualization parameters: {vis_params}")
             
-            # Handle different dataset types
-            if gee_type.lower() == 'table':
-                # This is a FeatureCollection (Table in GEE catalog)
-                try:
-                    features = ee.FeatureCollection(gee_collection)
-                    logger.info("Successfully created FeatureCollection reference")
-                except Exception as e:
-                    logger.error(f"Error creating FeatureCollection: {str(e)}")
-                    return jsonify({'error': f'Failed to create FeatureCollection reference: {str(e)}'}), 500
+            def render_tile(vis_params, bands, palette):
+                """Render the tiles with Earth Engine; the slow part of the request."""
+                # Handle different dataset types
+                if gee_type.lower() == 'table':
+                    # This is a FeatureCollection (Table in GEE catalog)
+                    try:
+                        features = ee.FeatureCollection(gee_collection)
+                        logger.info("Successfully created FeatureCollection reference")
+                    except Exception as e:
+                        logger.error(f"Error creating FeatureCollection: {str(e)}")
+                        raise RuntimeError(f'Failed to create FeatureCollection reference: {str(e)}') from e
 
-                # Check if custom style was requested
-                if 'style' in data:
-                    logger.info("Using custom styling parameters from request")
-                    style_params = data['style']
-                    # Update vis_params with style parameters
-                    for key, value in style_params.items():
-                        vis_params[key] = value
+                    # Check if custom style was requested
+                    if 'style' in data:
+                        logger.info("Using custom styling parameters from request")
+                        style_params = data['style']
+                        # Update vis_params with style parameters
+                        for key, value in style_params.items():
+                            vis_params[key] = value
                     
-                    logger.info(f"Applied custom style: {vis_params}")
+                        logger.info(f"Applied custom style: {vis_params}")
+
+                    # Special handling for Open Buildings dataset
+                    if 'open-buildings' in gee_collection:
+                        logger.info("Detected Open Buildings dataset, applying special handling")
+                        try:
+                            features = filter_open_buildings(
+                                features, 
+                                skip_confidence_filter=skip_confidence_filter, 
+                                limit=limit_features
+                            )
+                        except Exception as e:
+                            logger.error(f"Error filtering Open Buildings: {str(e)}")
+                            raise RuntimeError(f'Error filtering Open Buildings: {str(e)}') from e
 
-                # Special handling for Open Buildings dataset
-                if 'open-buildings' in gee_collection:
-                    logger.info("Detected Open Buildings dataset, applying special handling")
+                    # Create an image from the features for visualization
                     try:
-                        features = filter_open_buildings(
-                            features, 
-                            skip_confidence_filter=skip_confidence_filter, 
-                            limit=limit_features
-                        )
+                        image, updated_vis_params = create_feature_collection_image(features, gee_collection, vis_params)
+                        map_id_dict = image.getMapId(updated_vis_params)
+                        is_feature_collection = True
                     except Exception as e:
-                        logger.error(f"Error filtering Open Buildings: {str(e)}")
-                        return jsonify({'error': f'Error filtering Open Buildings: {str(e)}'}), 500
-
-                # Create an image from the features for visualization
-                try:
-                    image, updated_vis_params = create_feature_collection_image(features, gee_collection, vis_params)
-                    map_id_dict = image.getMapId(updated_vis_params)
-                    is_feature_collection = True
-                except Exception as e:
-                    logger.error(f"Error generating map tiles for features: {str(e)}")
-                    return jsonify({'error': f'Error generating map tiles: {str(e)}'}), 500
+                        logger.error(f"Error generating map tiles for features: {str(e)}")
+                        raise RuntimeError(f'Error generating map tiles: {str(e)}') from e
                 
-            elif gee_type.lower() == 'image':
-                # Handle single image
-                logger.info(f"Processing Image: {gee_collection}")
-                try:
-                    image = ee.Image(gee_collection)
+                elif gee_type.lower() == 'image':
+                    # Handle single image
+                    logger.info(f"Processing Image: {gee_collection}")
+                    try:
+                        image = ee.Image(gee_collection)
                     
-                    # Auto-detect RGB visualization if we have 3 bands but no palette
-                    if 'bands' in vis_params and len(vis_params['bands']) == 3 and 'palette' not in vis_params:
-                        logger.info(f"Detected potential RGB bands for image: {vis_params['bands']}")
-                        # Create a copy of vis_params without modifying the original
-                        rgb_vis_params = vis_params.copy()
+                        # Auto-detect RGB visualization if we have 3 bands but no palette
+                        if 'bands' in vis_params and len(vis_params['bands']) == 3 and 'palette' not in vis_params:
+                            logger.info(f"Detected potential RGB bands for image: {vis_params['bands']}")
+                            # Create a copy of vis_params without modifying the original
+                            rgb_vis_params = vis_params.copy()
                         
-                        # Set appropriate visualization for RGB
-                        # Remove any potential min/max values that might be inappropriate for RGB
-                        if 'min' in rgb_vis_params:
-                            rgb_vis_params['min'] = [rgb_vis_params['min']] * 3 if not isinstance(rgb_vis_params['min'], list) else rgb_vis_params['min']
-                        else:
-                            rgb_vis_params['min'] = [0, 0, 0]
+                            # Set appropriate visualization for RGB
+                            # Remove any potential min/max values that might be inappropriate for RGB
+                            if 'min' in rgb_vis_params:
+                                rgb_vis_params['min'] = [rgb_vis_params['min']] * 3 if not isinstance(rgb_vis_params['min'], list) else rgb_vis_params['min']
+                            else:
+                                rgb_vis_params['min'] = [0, 0, 0]
                             
-                        if 'max' in rgb_vis_params:
-                            rgb_vis_params['max'] = [rgb_vis_params['max']] * 3 if not isinstance(rgb_vis_params['max'], list) else rgb_vis_params['max']
-                        else:
-                            # Use 255 as the default max for RGB visualization (common for 8-bit imagery like Landsat)
-                            rgb_vis_params['max'] = [255, 255, 255]
+                            if 'max' in rgb_vis_params:
+                                rgb_vis_params['max'] = [rgb_vis_params['max']] * 3 if not isinstance(rgb_vis_params['max'], list) else rgb_vis_params['max']
+                            else:
+                                # Use 255 as the default max for RGB visualization (common for 8-bit imagery like Landsat)
+                                rgb_vis_params['max'] = [255, 255, 255]
                         
-                        logger.info(f"Using RGB visualization with params: {rgb_vis_params}")
-                        map_id_dict = image.getMapId(rgb_vis_params)
-                    else:
-                        map_id_dict = image.getMapId(vis_params)
+                            logger.info(f"Using RGB visualization with params: {rgb_vis_params}")
+                            map_id_dict = image.getMapId(rgb_vis_params)
+                        else:
+                            map_id_dict = image.getMapId(vis_params)
                         
-                    is_feature_collection = False
-                except Exception as e:
-                    logger.error(f"Error processing image: {str(e)}")
-                    return jsonify({'error': f'Error processing image: {str(e)}'}), 500
+                        is_feature_collection = False
+                    except Exception as e:
+                        logger.error(f"Error processing image: {str(e)}")
+                        raise RuntimeError(f'Error processing image: {str(e)}') from e
                 
-            else:
-                # Handle image collection
-                logger.info(f"Processing ImageCollection: {gee_collection}")
+                else:
+                    # Handle image collection
+                    logger.info(f"Processing ImageCollection: {gee_collection}")
                 
-                # Special handling for ESA WorldCover
-                if 'ESA/WorldCover' in gee_collection:
-                    logger.info("Detected ESA WorldCover dataset, applying special visualization")
+                    # Special handling for ESA WorldCover
+                    if 'ESA/WorldCover' in gee_collection:
+                        logger.info("Detected ESA WorldCover dataset, applying special visualization")
                     
-                    try:
-                        image, updated_vis_params = handle_worldcover_visualization(gee_collection)
-                        map_id_dict = image.getMapId(updated_vis_params)
-                        is_feature_collection = False
+                        try:
+                            image, updated_vis_params = handle_worldcover_visualization(gee_collection)
+                            map_id_dict = image.getMapId(updated_vis_params)
+                            is_feature_collection = False
                         
-                        # Update palette for frontend (with # prefix)
-                        palette = ['#' + color if not color.startswith('#') else color for color in updated_vis_params['palette']]
+                            # Update palette for frontend (with # prefix)
+                            palette = ['#' + color if not color.startswith('#') else color for color in updated_vis_params['palette']]
                         
-                        # Also update min/max values for consistency
-                        min_val = updated_vis_params.get('min', 0)
-                        max_val = updated_vis_params.get('max', 11)
-                    except Exception as e:
-                        logger.error(f"Error processing WorldCover dataset: {str(e)}")
-                        return jsonify({'error': f'Error processing WorldCover dataset: {str(e)}'}), 500
+                            # Also update min/max values for consistency
+                            min_val = updated_vis_params.get('min', 0)
+                            max_val = updated_vis_params.get('max', 11)
+                        except Exception as e:
+                            logger.error(f"Error processing WorldCover dataset: {str(e)}")
+                            raise RuntimeError(f'Error processing WorldCover dataset: {str(e)}') from e
                 
-                # Special handling for Sentinel-1 SAR GRD data
-                elif 'COPERNICUS/S1_GRD' in gee_collection:
-                    logger.info("Detected Sentinel-1 dataset, applying special polarization filtering")
+                    # Special handling for Sentinel-1 SAR GRD data
+                    elif 'COPERNICUS/S1_GRD' in gee_collection:
+                        logger.info("Detected Sentinel-1 dataset, applying special polarization filtering")
                     
-                    try:
-                        # Check if we have coordinates from the frontend
-                        point = None
-                        if 'coordinates' in data and 'lon' in data['coordinates'] and 'lat' in data['coordinates']:
-                            lon = data['coordinates']['lon']
-                            lat = data['coordinates']['lat']
-                            logger.info(f"Using provided coordinates for Sentinel-1: {lon}, {lat}")
-                            point = ee.Geometry.Point([lon, lat])
-                        elif 'js_map_center' in data:
-                            # Try to use map center coordinates
-                            map_center = data['js_map_center']
-                            if 'lon' in map_center and 'lat' in map_center:
-                                lon = map_center['lon']
-                                lat = map_center['lat']
-                                logger.info(f"Using map center for Sentinel-1: {lon}, {lat}")
+                        try:
+                            # Check if we have coordinates from the frontend
+                            point = None
+                            if 'coordinates' in data and 'lon' in data['coordinates'] and 'lat' in data['coordinates']:
+                                lon = data['coordinates']['lon']
+                                lat = data['coordinates']['lat']
+                                logger.info(f"Using provided coordinates for Sentinel-1: {lon}, {lat}")
                                 point = ee.Geometry.Point([lon, lat])
+                            elif 'js_map_center' in data:
+                                # Try to use map center coordinates
+                                map_center = data['js_map_center']
+                                if 'lon' in map_center and 'lat' in map_center:
+                                    lon = map_center['lon']
+                                    lat = map_center['lat']
+                                    logger.info(f"Using map center for Sentinel-1: {lon}, {lat}")
+                                    point = ee.Geometry.Point([lon, lat])
                         
-                        image, updated_vis_params = handle_sentinel1_visualization(gee_collection, date_range, point)
-                        map_id_dict = image.getMapId(updated_vis_params)
-                        is_feature_collection = False
+                            image, updated_vis_params = handle_sentinel1_visualization(gee_collection, date_range, point)
+                            map_id_dict = image.getMapId(updated_vis_params)
+                            is_feature_collection = False
                         
-                        # Update palette info for frontend
-                        palette = ['#000000', '#0000FF', '#00FFFF', '#FFFF00', '#FF0000', '#FFFFFF']
+                            # Update palette info for frontend
+                            palette = ['#000000', '#0000FF', '#00FFFF', '#FFFF00', '#FF0000', '#FFFFFF']
                         
-                        # Also update min/max values for consistency
-                        min_val = updated_vis_params.get('min', -25)
-                        max_val = updated_vis_params.get('max', 0)
+                            # Also update min/max values for consistency
+                            min_val = updated_vis_params.get('min', -25)
+                            max_val = updated_vis_params.get('max', 0)
                         
-                        # Set the selected band for frontend display
-                        bands = ['VV']  # Default to VV as that's our primary target
+                            # Set the selected band for frontend display
+                            bands = ['VV']  # Default to VV as that's our primary target
                         
-                        logger.info(f"Successfully processed Sentinel-1 data with filtered polarization")
-                    except Exception as e:
-                        logger.error(f"Error processing Sentinel-1 dataset: {str(e)}")
-                        return jsonify({'error': f'Error processing Sentinel-1 dataset: {str(e)}'}), 500
+                            logger.info(f"Successfully processed Sentinel-1 data with filtered polarization")
+                        except Exception as e:
+                            logger.error(f"Error processing Sentinel-1 dataset: {str(e)}")
+                            raise RuntimeError(f'Error processing Sentinel-1 dataset: {str(e)}') from e
                 
-                # Special handling for Open Buildings Temporal dataset
-                elif 'GOOGLE/Research/open-buildings-temporal/v1' in gee_collection:
-                    logger.info("Detected Open Buildings Temporal dataset, applying special visualization")
+                    # Special handling for Open Buildings Temporal dataset
+                    elif 'GOOGLE/Research/open-buildings-temporal/v1' in gee_collection:
+                        logger.info("Detected Open Buildings Temporal dataset, applying special visualization")
                     
-                    try:
-                        # Check if we have coordinates from the frontend
-                        point = None
-                        if 'coordinates' in data and 'lon' in data['coordinates'] and 'lat' in data['coordinates']:
-                            lon = data['coordinates']['lon']
-                            lat = data['coordinates']['lat']
-                            logger.info(f"Using provided coordinates for Open Buildings Temporal: {lon}, {lat}")
-                            point = ee.Geometry.Point([lon, lat])
-                        elif 'js_map_center' in data:
-                            # Try to use map center coordinates
-                            map_center = data['js_map_center']
-                            if 'lon' in map_center and 'lat' in map_center:
-                                lon = map_center['lon']
-                                lat = map_center['lat']
-                                logger.info(f"Using map center for Open Buildings Temporal: {lon}, {lat}")
+                        try:
+                            # Check if we have coordinates from the frontend
+                            point = None
+                            if 'coordinates' in data and 'lon' in data['coordinates'] and 'lat' in data['coordinates']:
+                                lon = data['coordinates']['lon']
+                                lat = data['coordinates']['lat']
+                                logger.info(f"Using provided coordinates for Open Buildings Temporal: {lon}, {lat}")
                                 point = ee.Geometry.Point([lon, lat])
-                        elif dataset and 'js_visualization_info' in dataset and 'map_center' in dataset['js_visualization_info']:
-                            # Try to use dataset's default map center
-                            map_center = dataset['js_visualization_info']['map_center']
-                            if 'lon' in map_center and 'lat' in map_center:
-                                lon = map_center['lon']
-                                lat = map_center['lat']
-                                logger.info(f"Using dataset default map center for Open Buildings Temporal: {lon}, {lat}")
+                            elif 'js_map_center' in data:
+                                # Try to use map center coordinates
+                                map_center = data['js_map_center']
+                                if 'lon' in map_center and 'lat' in map_center:
+                                    lon = map_center['lon']
+                                    lat = map_center['lat']
+                                    logger.info(f"Using map center for Open Buildings Temporal: {lon}, {lat}")
+                                    point = ee.Geometry.Point([lon, lat])
+                            elif dataset and 'js_visualization_info' in dataset and 'map_center' in dataset['js_visualization_info']:
+                                # Try to use dataset's default map center
+                                map_center = dataset['js_visualization_info']['map_center']
+                                if 'lon' in map_center and 'lat' in map_center:
+                                    lon = map_center['lon']
+                                    lat = map_center['lat']
+                                    logger.info(f"Using dataset default map center for Open Buildings Temporal: {lon}, {lat}")
+                                    point = ee.Geometry.Point([lon, lat])
+                            else:
+                                # Use default point in New Cairo, Egypt
+                                lon = 31.549876545106667
+                                lat = 30.011531513347673
+                                logger.info(f"Using default coordinates for Open Buildings Temporal: {lon}, {lat}")
                                 point = ee.Geometry.Point([lon, lat])
-                        else:
-                            # Use default point in New Cairo, Egypt
-                            lon = 31.549876545106667
-                            lat = 30.011531513347673
-                            logger.info(f"Using default coordinates for Open Buildings Temporal: {lon}, {lat}")
-                            point = ee.Geometry.Point([lon, lat])
                         
-                        image, updated_vis_params = handle_open_buildings_temporal_visualization(gee_collection, point)
-                        map_id_dict = image.getMapId(updated_vis_params)
-                        is_feature_collection = False
+                            image, updated_vis_params = handle_open_buildings_temporal_visualization(gee_collection, point)
+                            map_id_dict = image.getMapId(updated_vis_params)
+                            is_feature_collection = False
                         
-                        # Update palette for frontend (with # prefix)
-                        palette = ['#000000', '#FFFFFF']  # Black to white
+                            # Update palette for frontend (with # prefix)
+                            palette = ['#000000', '#FFFFFF']  # Black to white
                         
-                        # Also update min/max values for consistency
-                        min_val = 0
-                        max_val = 1
-                    except Exception as e:
-                        logger.error(f"Error processing Open Buildings Temporal dataset: {str(e)}")
-                        return jsonify({'error': f'Error processing Open Buildings Temporal dataset: {str(e)}'}), 500
+                            # Also update min/max values for consistency
+                            min_val = 0
+                            max_val = 1
+                        except Exception as e:
+                            logger.error(f"Error processing Open Buildings Temporal dataset: {str(e)}")
+                            raise RuntimeError(f'Error processing Open Buildings Temporal dataset: {str(e)}') from e
                 
-                # Process other image collections with temporal filter if provided
-                else:
-                    try:
-                        collection = ee.ImageCollection(gee_collection).filterDate(date_range[0], date_range[1])
+                    # Process other image collections with temporal filter if provided
+                    else:
+                        try:
+                            collection = ee.ImageCollection(gee_collection).filterDate(date_range[0], date_range[1])
                         
-                        # Check if we need to apply temporal aggregation (median)
-                        aggregation_method = None
-                        if 'temporal_filter' in vis_params:
-                            aggregation_method = vis_params['temporal_filter'].get('aggregation')
-                            logger.info(f"Using temporal aggregation method: {aggregation_method}")
+                            # Check if we need to apply temporal aggregation (median)
+                            aggregation_method = None
+                            if 'temporal_filter' in vis_params:
+                                aggregation_method = vis_params['temporal_filter'].get('aggregation')
+                                logger.info(f"Using temporal aggregation method: {aggregation_method}")
                         
-                        # Apply appropriate aggregation method
-                        if aggregation_method == 'median':
-                            logger.info(f"Computing median mosaic for date range: {date_range}")
-                            image = collection.median()
-                        elif aggregation_method == 'mean':
-                            logger.info(f"Computing mean mosaic for date range: {date_range}")
-                            image = collection.mean()
-                        elif is_time_series:
-                            # For time series datasets, use the most recent image
-                            logger.info(f"Using most recent image from date range: {date_range}")
-                            image = collection.sort('system:time_start', False).first()
-                        elif is_landsat_sentinel:
-                            # For Landsat/Sentinel, create a median mosaic
-                            logger.info(f"Creating median mosaic for Landsat/Sentinel from date range: {date_range}")
-                            image = collection.median()
-                        else:
-                            # Default approach: use mosaic
-                            logger.info(f"Using default mosaic method")
-                            image = collection.mosaic()
+                            # Apply appropriate aggregation method
+                            if aggregation_method == 'median':
+                                logger.info(f"Computing median mosaic for date range: {date_range}")
+                                image = collection.median()
+                            elif aggregation_method == 'mean':
+                                logger.info(f"Computing mean mosaic for date range: {date_range}")
+                                image = collection.mean()
+                            elif is_time_series:
+                                # For time series datasets, use the most recent image
+                                logger.info(f"Using most recent image from date range: {date_range}")
+                                image = collection.sort('system:time_start', False).first()
+                            elif is_landsat_sentinel:
+                                # For Landsat/Sentinel, create a median mosaic
+                                logger.info(f"Creating median mosaic for Landsat/Sentinel from date range: {date_range}")
+                                image = collection.median()
+                            else:
+                                # Default approach: use mosaic
+                                logger.info(f"Using default mosaic method")
+                                image = collection.mosaic()
                         
-                        # For custom band visualization, select the specific band if provided
-                        if visualization and 'band' in visualization:
-                            selected_band = visualization.get('band')
-                            logger.info(f"Selecting specific band for visualization: {selected_band}")
+                            # For custom band visualization, select the specific band if provided
+                            if visualization and 'band' in visualization:
+                                selected_band = visualization.get('band')
+                                logger.info(f"Selecting specific band for visualization: {selected_band}")
                             
-                            # Select only the requested band
-                            if isinstance(selected_band, str):
-                                image = image.select(selected_band)
-                                logger.info(f"Visualizing single band: {selected_band}")
+                                # Select only the requested band
+                                if isinstance(selected_band, str):
+                                    image = image.select(selected_band)
+                                    logger.info(f"Visualizing single band: {selected_band}")
                         
-                        map_id_dict = image.getMapId(vis_params)
-                        is_feature_collection = False
-                    except Exception as e:
-                        logger.error(f"Error processing image collection: {str(e)}")
-                        return jsonify({'error': f'Error processing image collection: {str(e)}'}), 500
+                            map_id_dict = image.getMapId(vis_params)
+                            is_feature_collection = False
+                        except Exception as e:
+                            logger.error(f"Error processing image collection: {str(e)}")
+                            raise RuntimeError(f'Error processing image collection: {str(e)}') from e
             
-            # Get the tile URL
-            tile_url = map_id_dict['tile_fetcher'].url_format
-            logger.info(f"Generated tile URL: {tile_url}")
+                # Get the tile URL
+                tile_url = map_id_dict['tile_fetcher'].url_format
+                logger.info(f"Generated tile URL: {tile_url}")
             
-            # Get feature properties if this is a feature collection
-            feature_properties = []
-            if is_feature_collection and 'features' in locals():
-                feature_properties = get_feature_properties(features, gee_collection)
+                # Get feature properties if this is a feature collection
+                feature_properties = []
+                if is_feature_collection and 'features' in locals():
+                    feature_properties = get_feature_properties(features, gee_collection)
             
-            # For RGB datasets with 3 bands, use 0-255 range
-            min_val = vis_params.get('min', 0)
-            max_val = vis_params.get('max', 255)
+                # For RGB datasets with 3 bands, use 0-255 range
+                min_val = vis_params.get('min', 0)
+                max_val = vis_params.get('max', 255)
+                
+                return {
+                    'tile_url': tile_url,
+                    'bands': bands,
+                    'palette': palette,
+                    'min': min_val,
+                    'max': max_val,
+                    'is_feature_collection': is_feature_collection,
+                    'feature_properties': feature_properties
+                }
+            
+            # Datasets rendered around a location share tiles within about 1 km
+            location = None
+            if any(x in gee_collection for x in ['COPERNICUS/S1_GRD', 'GOOGLE/Research/open-buildings-temporal/v1']):
+                for source in (data.get('coordinates'), data.get('js_map_center')):
+                    if isinstance(source, dict) and 'lon' in source and 'lat' in source:
+                        location = (round(float(source['lon']), 2), round(float(source['lat']), 2))
+                        break
+            
+            cache_key = tile_cache_key(
+                dataset_id,
+                date_range,
+                visualization=visualization,
+                style=data.get('style'),
+                location=location,
+                limit_features=limit_features,
+                skip_confidence_filter=skip_confidence_filter
+            )
+            tile = tile_cache.get(cache_key, lambda: render_tile(vis_params, bands, palette))
+            tile_url = tile['tile_url']
             
             # Return all needed information
             response_data = {
                 'tileUrl': tile_url, 
-                'bands': bands, 
-                'palette': palette,
-                'min': min_val,
-                'max': max_val,
+                'bands': tile['bands'], 
+                'palette': tile['palette'],
+                'min': tile['min'],
+                'max': tile['max'],
                 'bbox': bbox,
                 'class_descriptions': class_descriptions,
                 'lookat': lookat,
-                'is_feature_collection': is_feature_collection,
-                'feature_properties': feature_properties,
+                'is_feature_collection': tile['is_feature_collection'],
+                'feature_properties': tile['feature_properties'],
                 'date_range': date_range  # Include date range in the response
             }
             
@@ -696,15 +723,33 @@ def register_api_routes(app, embedding_manager):
                 
                 logger.info(f"Processed class_descriptions for frontend")
             
-            return jsonify(response_data)
+            return response_data, 200
             
         except Exception as e:
             logger.error(f"Error in get_tile: {str(e)}")
-            return jsonify({'error': str(e)}), 500
+            return {'error': str(e)}, 500
+
+    # Pre-render the default tiles of the most requested datasets
+    warmup_count = app.config.get('TILE_WARMUP_DATASETS', 0)
+    warmup_log = app.config.get('TILE_WARMUP_LOG')
+    if warmup_count > 0 and warmup_log and os.path.exists(warmup_log):
+        try:
+            dataset_ids = [
+                dataset_id for dataset_id in frequent_datasets(warmup_log, warmup_count)
+                if embedding_manager.get_dataset(dataset_id)
+            ]
+            logger.info(f"Warming tiles of {len(dataset_ids)} popular datasets")
+            tile_cache.warm(dataset_ids, lambda dataset_id: build_tile_response({'dataset_id': dataset_id}))
+        except Exception as e:
+            logger.warning(f"Could not warm the tile cache: {str(e)}")
 
 def register_value_retrieval_route(app,embedding_manager):
     """Register route for retrieving values at specific locations"""
     
+    # Types of datasets without gee:type, resolved once per dataset, and when
+    # they were resolved: dataset ID -> (type, time.monotonic())
+    resolved_types = {}
+    
     @app.route('/get_value_at_location', methods=['POST'])
     def get_value_at_location():
         data = request.get_json()
@@ -728,9 +773,7 @@ def register_value_retrieval_route(app,embedding_manager):
             visualization_params = data.get('visualization')
             
             # Try to find dataset metadata if available from our embedding manager
-            dataset = None
-            if hasattr(embedding_manager, 'datasets') and embedding_manager.datasets:
-                dataset = next((embedding_manager.datasets[d] for d in embedding_manager.datasets if embedding_manager.datasets[d]['id'] == dataset_id), None)
+            dataset = embedding_manager.get_dataset(dataset_id)
             
             # Determine appropriate scale for sampling based on dataset type
             sampling_scale = get_best_scale_for_dataset(dataset_id)
@@ -750,6 +793,9 @@ def register_value_retrieval_route(app,embedding_manager):
             elif 'Image' in dataset_id or 'DEM' in dataset_id:
                 dataset_type = 'image'
             
+            if dataset_type == 'unknown':
+                dataset_type = resolve_dataset_type(dataset_id)
+            
             logger.info(f"Processing value retrieval for dataset_id: {dataset_id}, type: {dataset_type}")
             
             # Handle based on determined type
@@ -776,27 +822,6 @@ def register_value_retrieval_route(app,embedding_manager):
                     dataset_id
                 )
                 
-                # Get the timestamp if available
-                date_millis = None
-                try:
-                    date_millis = image.get('system:time_start').getInfo()
-                except:
-                    # For aggregated images, try to get date range
-                    if date_range:
-                        date_str = f"{date_range[0]} to {date_range[1]}"
-                        logger.info(f"Using date range for aggregated image: {date_str}")
-                        return jsonify({
-                            'values': sample_image_values(image, point, sampling_scale),
-                            'date': date_str
-                        })
-                    else:
-                        logger.warning(f"No timestamp available for {dataset_id}")
-                
-                date_str = None
-                if date_millis:
-                    date_obj = datetime.fromtimestamp(date_millis / 1000)
-                    date_str = date_obj.strftime('%Y-%m-%d')
-                
                 # Handle specific band selection if provided
                 if visualization_params and 'band' in visualization_params:
                     selected_band = visualization_params['band']
@@ -813,8 +838,12 @@ def register_value_retrieval_route(app,embedding_manager):
                     except Exception as e:
                         logger.warning(f"Failed to select band {selected_band}: {str(e)}")
                 
-                # Sample the image at the specified point with progressive scales
-                values = sample_image_values(image, point, sampling_scale)
+                # Sample the image at the specified point with progressive scales,
+                # fetching its timestamp in the same request
+                values, date_millis = sample_image(image, point, sampling_scale)
+                date_str = format_image_date(date_millis, date_range)
+                if date_str is None:
+                    logger.warning(f"No timestamp available for {dataset_id}")
                 
                 return jsonify({
                     'values': values,
@@ -851,8 +880,11 @@ def register_value_retrieval_route(app,embedding_manager):
                 })
             
             else:
-                # If type is unknown, try all approaches
+                # If type is unknown, try all approaches. The approach that works
+                # is remembered only when every earlier one failed because the
+                # asset is another type, not because of a transient error
                 logger.info(f"Trying multiple approaches for dataset of unknown type: {dataset_id}")
+                wrong_types = True
                 
                 # First priority: Try as image collection with temporal filter
                 try:
@@ -873,51 +905,45 @@ def register_value_retrieval_route(app,embedding_manager):
                         dataset_id
                     )
                     
-                    # Sample values
-                    values = sample_image_values(image, point, sampling_scale)
-                    
-                    if values and any(v is not None for v in values.values()):
-                        # Get date information if possible
-                        date_str = None
-                        try:
-                            date_millis = image.get('system:time_start').getInfo()
-                            if date_millis:
-                                date_obj = datetime.fromtimestamp(date_millis / 1000)
-                                date_str = date_obj.strftime('%Y-%m-%d')
-                        except:
-                            # Use date range for aggregated images
-                            if date_range:
-                                date_str = f"{date_range[0]} to {date_range[1]}"
-                        
-                        return jsonify({
-                            'values': values,
-                            'date': date_str
-                        })
+                    # Sample values and the timestamp; the dataset is an image
+                    # collection if this succeeds, even with no values here
+                    values, date_millis = sample_image(image, point, sampling_scale, raise_errors=True)
+                    remember_dataset_type(dataset_id, 'image_collection')
+                    return jsonify({
+                        'values': values,
+                        'date': format_image_date(date_millis, date_range),
+                        'aggregation': aggregation_method
+                    })
                 except Exception as e:
                     logger.info(f"Image collection approach failed: {str(e)}")
+                    wrong_types = is_wrong_type_error(e)
                 
                 # Second priority: Try as single image
                 try:
                     image = ee.Image(dataset_id)
-                    values = sample_image_values(image, point, sampling_scale)
-                    
-                    if values and any(v is not None for v in values.values()):
-                        return jsonify({
-                            'values': values
-                        })
+                    values = sample_image(image, point, sampling_scale, raise_errors=True)[0]
+                    if wrong_types:
+                        remember_dataset_type(dataset_id, 'image')
+                    return jsonify({
+                        'values': values
+                    })
                 except Exception as e:
                     logger.info(f"Single image approach failed: {str(e)}")
+                    wrong_types = wrong_types and is_wrong_type_error(e)
                 
                 # Third priority: Try as feature collection
                 try:
                     features = ee.FeatureCollection(dataset_id)
                     filtered = features.filterBounds(point)
                     features_info = filtered.limit(5).getInfo()
+                    if wrong_types:
+                        remember_dataset_type(dataset_id, 'feature_collection')
                     
                     if features_info and 'features' in features_info and len(features_info['features']) > 0:
                         return jsonify({
                             'features': features_info['features']
                         })
+                    return jsonify({'error': 'No features found at this location'})
                 except Exception as e:
                     logger.info(f"Feature collection approach failed: {str(e)}")
                 
@@ -928,39 +954,90 @@ def register_value_retrieval_route(app,embedding_manager):
             logger.error(f"Error getting value at location: {str(e)}")
             return jsonify({'error': f'Error: {str(e)}'})
 
-    # Helper function to sample image values with progressive scales
-    def sample_image_values(image, point, scale=30):
-        """Sample image values at a point using progressively larger scales if needed"""
-        logger = logging.getLogger(__name__)
+    def resolve_dataset_type(dataset_id):
+        """
+        Resolve the type of a dataset whose catalog entry and ID do not tell it.
+        
+        The type is looked up in the Earth Engine asset metadata once per dataset;
+        a failed lookup is not repeated for UNRESOLVED_TYPE_TTL seconds.
         
-        # Try with initial scale
+        Returns:
+        str: 'image_collection', 'image', 'feature_collection' or 'unknown'
+        """
+        if dataset_id in resolved_types:
+            dataset_type, resolved_at = resolved_types[dataset_id]
+            if dataset_type != 'unknown' or time.monotonic() - resolved_at < UNRESOLVED_TYPE_TTL:
+                return dataset_type
         try:
-            values = image.reduceRegion(
+            asset_type = ee.data.getAsset(dataset_id).get('type', '').upper()
+        except Exception as e:
+            logger.info(f"Could not look up the asset type of {dataset_id}: {str(e)}")
+            asset_type = ''
+        dataset_type = ASSET_TYPES.get(asset_type, 'unknown')
+        remember_dataset_type(dataset_id, dataset_type)
+        return dataset_type
+    
+    def remember_dataset_type(dataset_id, dataset_type):
+        """Cache the resolved type of a dataset, or that it could not be resolved"""
+        if dataset_id in resolved_types or len(resolved_types) < MAX_RESOLVED_TYPES:
+            resolved_types[dataset_id] = (dataset_type, time.monotonic())
+    
+    def is_wrong_type_error(error):
+        """Whether an Earth Engine error says the asset is not the type it was loaded as"""
+        return bool(WRONG_TYPE_ERROR.search(str(error)))
+    
+    def format_image_date(date_millis, date_range=None):
+        """Format an image timestamp, or the date range of an aggregated image without one"""
+        if date_millis:
+            return datetime.fromtimestamp(date_millis / 1000).strftime('%Y-%m-%d')
+        if date_range:
+            return f"{date_range[0]} to {date_range[1]}"
+        return None
+    
+    # Helper function to sample image values with progressive scales
+    def sample_image(image, point, scale=30, raise_errors=False):
+        """
+        Sample image values at a point and get the image timestamp in one request.
+        
+        Values are reduced at progressively larger scales in the same request;
+        the values of the first scale with any non-null value are returned.
+        
+        An error is logged and reported as no values, or re-raised with
+        raise_errors, e.g. to tell whether the image could be loaded at all.
+        
+        Returns:
+        tuple: (values dict, system:time_start in milliseconds or None)
+        """
+        scales = list(dict.fromkeys([scale, scale*2, scale*5, 500, 1000]))
+        samples = {
+            f'scale_{i}': image.reduceRegion(
                 reducer=ee.Reducer.first(),
                 geometry=point,
-                scale=scale
-            ).getInfo()
-            
-            # If we got non-null values, return them
-            if values and any(v is not None for v in values.values()):
-                return values
-                
-            # Otherwise try with progressively larger scales
-            for larger_scale in [scale*2, scale*5, 500, 1000]:
-                logger.info(f"No values found at scale={scale}, trying with scale={larger_scale}")
-                
-                values = image.reduceRegion(
-                    reducer=ee.Reducer.first(),
-                    geometry=point,
-                    scale=larger_scale
-                ).getInfo()
-                
-                if values and any(v is not None for v in values.values()):
-                    return values
-                    
-            # If all attempts failed, return whatever we have
-            return values or {}
-            
+                scale=sample_scale
+            )
+            for i, sample_scale in enumerate(scales)
+        }
+        samples['time_start'] = image.get('system:time_start')
+        
+        try:
+            result = ee.Dictionary(samples).getInfo()
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Error sampling image: {str(e)}")
-            return {}
\ No newline at end of file
+            return {}, None
+        
+        values = {}
+        for i, sample_scale in enumerate(scales):
+            values = result.get(f'scale_{i}') or {}
+            if any(v is not None for v in values.values()):
+                if i > 0:
+                    logger.info(f"No values found at scale={scale}, using scale={sample_scale}")
+                return values, result.get('time_start')
+        
+        # If all scales are empty, return whatever we have
+        return values, result.get('time_start')
+    
+    def sample_image_values(image, point, scale=30):
+        """Sample image values at a point using progressively larger scales if needed"""
+        return sample_image(image, point, scale)[0]
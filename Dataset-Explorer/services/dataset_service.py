@@ -9,6 +9,7 @@ from services.earth_engine import (
 )
 from config import Config
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -222,6 +223,8 @@ def handle_palette_colors(palette):
     Process palette colors to ensure they are in the correct format.
     Handles both hex codes and named colors.
     
+    Catalog palettes repeat across datasets and requests, so results are cached.
+    
     Parameters:
     palette (list): List of color values which may be hex codes or named colors
     
@@ -230,7 +233,18 @@ def handle_palette_colors(palette):
     """
     if not palette:
         return None
-        
+    
+    try:
+        processed_palette = _process_palette(tuple(palette))
+    except TypeError:
+        # Unhashable color values cannot be cached
+        processed_palette = _process_palette.__wrapped__(tuple(palette))
+    return list(processed_palette) if processed_palette else None
+
+
+@lru_cache(maxsize=1024)
+def _process_palette(palette):
+    """Convert a palette tuple to a tuple of formatted colors."""
     # Common CSS color names with their hex equivalents 
     color_name_map = {
         'black': '#000000',
@@ -276,7 +290,7 @@ def handle_palette_colors(palette):
             # Non-string value, just add it as is
             processed_palette.append(color)
     
-    return processed_palette if processed_palette else None
+    return tuple(processed_palette)
 
 
 
@@ -466,6 +480,40 @@ def get_date_range(dataset):
     return date_range
 
 
+def get_search_fields(dataset):
+    """Extract the searchable text fields of a dataset
+    
+    Returns a dictionary with title, id, description, keywords and gee_type text.
+    """
+    # Extract keywords from various locations in the dataset
+    keywords = []
+    
+    # From summaries
+    if 'summaries' in dataset:
+        summaries = dataset['summaries']
+        if 'keywords' in summaries and isinstance(summaries.get('keywords', []), list):
+            keywords.extend(summaries.get('keywords', []))
+        if 'gee:terms' in summaries and isinstance(summaries.get('gee:terms', []), list):
+            keywords.extend(summaries.get('gee:terms', []))
+            
+    # From properties
+    if 'properties' in dataset:
+        props = dataset['properties']
+        if 'keywords' in props:
+            if isinstance(props['keywords'], list):
+                keywords.extend(props['keywords'])
+            elif isinstance(props['keywords'], str):
+                keywords.extend([k.strip() for k in props['keywords'].split(',')])
+    
+    return {
+        "title": dataset.get('title', ''),
+        "id": dataset.get('id', ''),
+        "description": dataset.get('description', ''),
+        "keywords": ", ".join(keywords) if keywords else "",
+        "gee_type": dataset.get('gee:type', '')
+    }
+
+
 def get_spatial_extent(dataset):
     """Extract bounding box from dataset metadata"""
     try:
@@ -0,0 +1,214 @@
+"""
+Lexical (BM25) index for the GEE catalog.
+
+The index scores datasets by weighted BM25 over text fields such as the title,
+ID, keywords and description. Postings are stored in compressed sparse row
+arrays (one document-id array and one per-field term-frequency array, with
+per-term offsets), so a query touches only the postings of its own terms and
+field weights can change without rebuilding the index.
+"""
+import re
+import logging
+from collections import Counter
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words too common in queries and dataset texts to tell datasets apart
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "data", "dataset", "for", "from",
+    "in", "is", "of", "on", "or", "show", "the", "to", "with"
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase alphanumeric tokens without stop words.
+
+    Dataset IDs are split on their separators, e.g. "MODIS/061/MOD13Q1"
+    becomes ["modis", "061", "mod13q1"].
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens
+    """
+    return [token for token in _TOKEN_PATTERN.findall(str(text).lower()) if token not in STOP_WORDS]
+
+
+class LexicalIndex:
+    """
+    Weighted multi-field BM25 index with array-backed postings.
+    """
+
+    def __init__(
+        self,
+        documents: List[Dict[str, str]],
+        field_weights: Dict[str, float],
+        k1: float = 1.2,
+        b: float = 0.75,
+        expansion_fields: Tuple[str, ...] = ("title", "keywords")
+    ):
+        """
+        Build the index.
+
+        Term frequencies of each field are multiplied by the field weight and
+        summed into one weighted frequency per document, which BM25 then
+        saturates and length-normalizes.
+
+        Args:
+            documents: Text fields of each document, in row order
+            field_weights: Weight of each indexed field
+            k1: BM25 term-frequency saturation
+            b: BM25 document-length normalization
+            expansion_fields: Fields whose terms may be added by expand()
+        """
+        self.fields = list(field_weights)
+        self.k1 = k1
+        self.b = b
+
+        vocabulary: Dict[str, int] = {}
+        doc_terms: List[Dict[int, np.ndarray]] = []
+        doc_expansion_terms: List[List[int]] = []
+        self.field_lengths = np.zeros((len(documents), len(self.fields)), dtype=np.float32)
+        for row, document in enumerate(documents):
+            counts: Dict[int, np.ndarray] = {}
+            for f_index, field in enumerate(self.fields):
+                tokens = tokenize(document.get(field) or "")
+                self.field_lengths[row, f_index] = len(tokens)
+                for token, count in Counter(tokens).items():
+                    term = vocabulary.setdefault(token, len(vocabulary))
+                    if term not in counts:
+                        counts[term] = np.zeros(len(self.fields), dtype=np.float32)
+                    counts[term][f_index] = count
+            doc_terms.append(counts)
+            # Expansion fields are part of the vocabulary even when they are not weighted
+            doc_expansion_terms.append(sorted({
+                vocabulary.setdefault(token, len(vocabulary))
+                for field in expansion_fields
+                for token in tokenize(document.get(field) or "")
+            }))
+
+        # Postings in CSR layout: postings of term t are rows offsets[t]:offsets[t + 1]
+        postings = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        for counts in doc_terms:
+            for term in counts:
+                postings[term + 1] += 1
+        self.offsets = np.cumsum(postings)
+        self.doc_ids = np.empty(self.offsets[-1], dtype=np.int32)
+        self.field_frequencies = np.zeros((self.offsets[-1], len(self.fields)), dtype=np.float32)
+        cursor = self.offsets[:-1].copy()
+        for row, counts in enumerate(doc_terms):
+            for term, frequencies in counts.items():
+                self.doc_ids[cursor[term]] = row
+                self.field_frequencies[cursor[term]] = frequencies
+                cursor[term] += 1
+
+        # Forward index of each document's expansion terms
+        self.doc_offsets = np.cumsum([0] + [len(terms) for terms in doc_expansion_terms])
+        self.doc_term_ids = np.fromiter(
+            (term for terms in doc_expansion_terms for term in terms), dtype=np.int32, count=self.doc_offsets[-1]
+        )
+
+        self.vocabulary = vocabulary
+        self.terms = sorted(vocabulary, key=vocabulary.get)
+        document_frequency = np.diff(self.offsets).astype(np.float32)
+        count = len(documents)
+        self.idf = np.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+        self.size = count
+        self.set_weights(field_weights)
+
+        logger.info(f"Built lexical index with {count} documents and {len(vocabulary)} terms")
+
+    def set_weights(self, field_weights: Dict[str, float]):
+        """
+        Change the field weights; fields not in the index are ignored.
+
+        Args:
+            field_weights: Weight of each field
+        """
+        weights = np.array([field_weights.get(field, 0.0) for field in self.fields], dtype=np.float32)
+        self.field_weights = dict(zip(self.fields, weights.tolist()))
+        self.frequencies = self.field_frequencies @ weights
+        lengths = self.field_lengths @ weights
+        average_length = float(lengths.mean()) if self.size else 0.0
+        self.length_norm = (self.k1 * (1 - self.b + self.b * lengths / (average_length or 1.0))).astype(np.float32)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def scores(self, query: str) -> np.ndarray:
+        """
+        BM25 scores of every document for a query.
+
+        Args:
+            query: Search query
+
+        Returns:
+            Array of scores in row order (zero for documents without query terms)
+        """
+        scores = np.zeros(self.size, dtype=np.float32)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            rows = self.doc_ids[start:end]
+            frequencies = self.frequencies[start:end]
+            scores[rows] += self.idf[term] * frequencies * (self.k1 + 1) / (frequencies + self.length_norm[rows])
+        return scores
+
+    def search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the documents best matching a query.
+
+        Args:
+            query: Search query
+            top_k: Maximum number of results
+
+        Returns:
+            Tuple of (row indices, scores), best first, for documents with a positive score
+        """
+        scores = self.scores(query)
+        matches = np.flatnonzero(scores > 0)
+        if len(matches) > top_k:
+            matches = matches[np.argpartition(-scores[matches], top_k - 1)[:top_k]]
+        matches = matches[np.argsort(-scores[matches], kind="stable")]
+        return matches, scores[matches]
+
+    def expand(self, query: str, feedback_docs: int = 3, max_terms: int = 4) -> str:
+        """
+        Expand a query with distinctive terms of its best-matching documents.
+
+        This is pseudo-relevance feedback: terms of the top documents are
+        ranked by their document scores times their IDF.
+
+        Args:
+            query: Search query
+            feedback_docs: Number of top documents to take terms from
+            max_terms: Maximum number of terms to add
+
+        Returns:
+            Expanded query, or the query unchanged if nothing matches
+        """
+        rows, scores = self.search(query, feedback_docs)
+        if len(rows) == 0:
+            return query
+
+        query_tokens = set(tokenize(query))
+        candidates: Dict[int, float] = {}
+        for row, score in zip(rows, scores):
+            for term in self.doc_term_ids[self.doc_offsets[row]:self.doc_offsets[row + 1]]:
+                candidates[term] = candidates.get(term, 0.0) + float(score) * float(self.idf[term])
+
+        ranked = sorted(candidates, key=candidates.get, reverse=True)
+        terms = [
+            self.terms[term] for term in ranked
+            if self.terms[term] not in query_tokens and not self.terms[term].isdigit()
+        ][:max_terms]
+        return f"{query} {' '.join(terms)}" if terms else query
@@ -3,11 +3,21 @@ Enhanced search implementation for GEE Catalog using LlamaIndex
 This module provides search services using LlamaIndex and transformers models
 """
 import os
+import json
+import hashlib
 import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import torch
 from typing import List, Dict, Any, Optional, Union
 import numpy as np
 
+from services.vector_index import VectorIndex, normalize_rows
+from services.query_embedder import QueryEmbedder, normalize_query
+from services.lexical_index import LexicalIndex
+from services.dataset_service import get_search_fields
+
 logger = logging.getLogger(__name__)
 
 # Check for available hardware
@@ -23,6 +33,51 @@ def get_device():
 DEVICE = get_device()
 logger.info(f"Using device: {DEVICE}")
 
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[int]:
+    """
+    Fuse rankings with reciprocal-rank fusion.
+    
+    Each item scores the sum of 1 / (k + rank) over the rankings it appears in.
+    
+    Args:
+        rankings: Ranked item lists, best first
+        k: Damping constant; larger values flatten the influence of top ranks
+        
+    Returns:
+        Items ordered by fused score, best first
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+# Log message of /search_datasets, used to find frequent queries in search logs
+SEARCH_LOG_MARKER = "Searching datasets with query: "
+
+
+def frequent_queries(log_path: str, top_n: int = 50) -> List[str]:
+    """
+    Find the most frequent search queries in an application log.
+    
+    Args:
+        log_path: Path to a log file written by the application
+        top_n: Number of queries to return
+        
+    Returns:
+        Normalized queries, most frequent first
+    """
+    counts = Counter()
+    with open(log_path, errors="ignore") as f:
+        for line in f:
+            position = line.find(SEARCH_LOG_MARKER)
+            if position >= 0:
+                query = normalize_query(line[position + len(SEARCH_LOG_MARKER):])
+                if query:
+                    counts[query] += 1
+    return [query for query, _ in counts.most_common(top_n)]
+
 class EnhancedDatasetSearch:
     """
     Enhanced search functionality for GEE datasets using LlamaIndex
@@ -33,7 +88,17 @@ class EnhancedDatasetSearch:
         self,
         embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
         llm_model_name: str = "TinyLlama/TinyLlama-1.1B-Chat-v1.0",
-        cache_dir: str = "saved_indexes"
+        cache_dir: str = "saved_indexes",
+        prebuilt_dir: Optional[str] = None,
+        quantize: bool = False,
+        ivf_min_datasets: int = 20000,
+        query_cache_size: int = 1024,
+        expansion_mode: str = "llm",
+        expansion_timeout: float = 0.5,
+        max_pending_expansions: int = 4,
+        hybrid: bool = True,
+        rrf_k: int = 60,
+        weights: Optional[Dict[str, float]] = None
     ):
         """
         Initialize the enhanced search with specified models.
@@ -42,18 +107,70 @@ class EnhancedDatasetSearch:
             embedding_model_name: HuggingFace embedding model to use
             llm_model_name: HuggingFace language model to use
             cache_dir: Directory to save/load vector indexes
+            prebuilt_dir: Read-only directory of precomputed vector indexes, e.g. of
+                          a catalog artifact; used when they match, never written
+            quantize: Store dataset vectors as int8 instead of float32
+            ivf_min_datasets: Catalog size from which the vector index is
+                              IVF-partitioned instead of scanned exactly
+            query_cache_size: Number of query embeddings to cache
+            expansion_mode: Query expansion method: "llm", "lexical" (BM25
+                            pseudo-relevance feedback over titles and keywords)
+                            or "none"
+            expansion_timeout: Seconds a search waits for an LLM expansion before
+                               using the raw query
+            max_pending_expansions: Maximum LLM expansions queued at once
+            hybrid: Fuse BM25 matches with the vector results by reciprocal-rank fusion
+            rrf_k: Reciprocal-rank fusion constant
+            weights: Field weights ("title", "id", "description", "keywords") of
+                     the reranking and BM25 scores, e.g. Config.SEARCH_WEIGHTS
         """
+        if expansion_mode not in ("llm", "lexical", "none"):
+            raise ValueError(f"Unknown expansion mode: {expansion_mode}")
+        
         self.embedding_model_name = embedding_model_name
         self.llm_model_name = llm_model_name
         self.cache_dir = cache_dir
+        self.prebuilt_dir = prebuilt_dir
+        self.quantize = quantize
+        self.ivf_min_datasets = ivf_min_datasets
+        self.query_cache_size = query_cache_size
+        self.expansion_mode = expansion_mode
+        self.expansion_timeout = expansion_timeout
+        self.max_pending_expansions = max_pending_expansions
+        self.hybrid = hybrid
+        self.rrf_k = rrf_k
         self.datasets = []
 
         
+        # Vector index over the datasets, in catalog order (built by build_index)
+        self.index: Optional[VectorIndex] = None
+        self.dataset_keys: List[str] = []
+        
         # LlamaIndex components (initialized lazily)
-        self.index = None
         self.embedding_model = None
         self.llm = None
         
+        # Cached, micro-batched query embeddings of the current model
+        self.query_embedder: Optional[QueryEmbedder] = None
+        
+        # BM25 index over the weighted dataset fields, for hybrid retrieval and
+        # lexical query expansion
+        self.lexical_index: Optional[LexicalIndex] = None
+        
+        # LLM query expansions, persisted per LLM and generated off the request
+        # path by a single worker
+        self._expansions: Optional[Dict[str, str]] = None
+        self._expansion_futures: Dict[str, Any] = {}
+        self._expansion_lock = threading.Lock()
+        self._expansion_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-expansion")
+        
+        # Per-field embedding matrices for reranking, computed at build_index time:
+        # a memory-mapped (fields, datasets, dim) float32 array of L2-normalized rows
+        # in catalog order, and the weighted sum of its fields used to score candidates
+        self.field_names: List[str] = []
+        self.field_embeddings = None
+        self.weighted_field_embeddings = None
+        
         # Create cache directory if it doesn't exist
         os.makedirs(cache_dir, exist_ok=True)
         
@@ -64,6 +181,8 @@ class EnhancedDatasetSearch:
             "description": 0.30,
             "keywords": 0.20
         }
+        if weights:
+            self.update_weights(dict(weights))
         
         logger.info(f"Initialized EnhancedDatasetSearch with embedding model: {embedding_model_name}")
         logger.info(f"Using LLM model: {llm_model_name}")
@@ -122,12 +241,30 @@ class EnhancedDatasetSearch:
             logger.info(f"Changing embedding model to: {embedding_model_name}")
             self.embedding_model_name = embedding_model_name
             self.embedding_model = None  # Reset so it will be initialized on next use
+            self.query_embedder = None
             self.index = None  # Reset index since embeddings will change
+            self.field_embeddings = None
+            self.weighted_field_embeddings = None
         
         if llm_model_name:
             logger.info(f"Changing LLM to: {llm_model_name}")
             self.llm_model_name = llm_model_name
             self.llm = None  # Reset so it will be initialized on next use
+            with self._expansion_lock:
+                self._expansions = None  # Expansions are cached per LLM
+    
+    @staticmethod
+    def _dataset_fields(dataset: Dict[Any, Any]) -> Dict[str, str]:
+        """
+        Extract the searchable text fields of a dataset.
+        
+        Args:
+            dataset: Dataset dictionary
+            
+        Returns:
+            Dictionary with title, id, description, keywords and gee_type text
+        """
+        return get_search_fields(dataset)
     
     def _prepare_dataset_nodes(self, datasets: Dict[str, Dict[Any, Any]]) -> List:
         """
@@ -144,55 +281,22 @@ class EnhancedDatasetSearch:
         nodes = []
         
         for i, (dataset_key, dataset) in enumerate(datasets.items()):
-            # Extract key information
-            title = dataset.get('title', '')
-            dataset_id = dataset.get('id', '')
-            description = dataset.get('description', '')
-            
-            # Extract keywords from various locations in the dataset
-            keywords = []
-            
-            # From summaries
-            if 'summaries' in dataset:
-                summaries = dataset['summaries']
-                if 'keywords' in summaries and isinstance(summaries.get('keywords', []), list):
-                    keywords.extend(summaries.get('keywords', []))
-                if 'gee:terms' in summaries and isinstance(summaries.get('gee:terms', []), list):
-                    keywords.extend(summaries.get('gee:terms', []))
-                    
-            # From properties
-            if 'properties' in dataset:
-                props = dataset['properties']
-                if 'keywords' in props:
-                    if isinstance(props['keywords'], list):
-                        keywords.extend(props['keywords'])
-                    elif isinstance(props['keywords'], str):
-                        keywords.extend([k.strip() for k in props['keywords'].split(',')])
-            
-            # Get dataset type
-            gee_type = dataset.get('gee:type', '')
-            
-            # Format keywords
-            keywords_text = ", ".join(keywords) if keywords else ""
+            fields = self._dataset_fields(dataset)
             
             # Create a text representation with field labels
             node_text = (
-                f"TITLE: {title}\n"
-                f"ID: {dataset_id}\n"
-                f"TYPE: {gee_type}\n"
-                f"KEYWORDS: {keywords_text}\n"
-                f"DESCRIPTION: {description}\n"
+                f"TITLE: {fields['title']}\n"
+                f"ID: {fields['id']}\n"
+                f"TYPE: {fields['gee_type']}\n"
+                f"KEYWORDS: {fields['keywords']}\n"
+                f"DESCRIPTION: {fields['description']}\n"
             )
             
             # Create node with metadata
             node = TextNode(
                 text=node_text,
                 metadata={
-                    "title": title,
-                    "id": dataset_id,
-                    "description": description,
-                    "keywords": keywords_text,
-                    "gee_type": gee_type,
+                    **fields,
                     "dataset_key": dataset_key,  # Store original key
                     "dataset_index": i  # Store original index for retrieval
                 }
@@ -207,12 +311,16 @@ class EnhancedDatasetSearch:
         """
         Build vector index from the datasets.
         
+        The dataset vectors and the per-field reranking matrices are cached in
+        the index cache directory and memory-mapped on later starts; they are
+        recomputed when the model or the dataset texts change.
+        
         Args:
             datasets: Dictionary of dataset dictionaries
+            
+        Returns:
+            The VectorIndex
         """
-        from llama_index.core import VectorStoreIndex, Settings, StorageContext
-        from llama_index.core import load_index_from_storage
-        
         self._init_models()
         self.datasets = datasets
         
@@ -222,32 +330,195 @@ class EnhancedDatasetSearch:
             f"{self.embedding_model_name.replace('/', '_')}_index"
         )
         
-        # Check if we have a cached index
-        if os.path.exists(model_cache_dir) and os.path.isdir(model_cache_dir):
-            logger.info(f"Loading cached index from {model_cache_dir}")
+        self.dataset_keys = list(datasets.keys())
+        if hasattr(datasets, "search_fields"):
+            # Catalog artifacts come with the fields precomputed
+            fields = datasets.search_fields()
+        else:
+            fields = [self._dataset_fields(datasets[key]) for key in self.dataset_keys]
+        
+        # The caches are valid for the same model and dataset texts
+        digest = hashlib.sha1(self.embedding_model_name.encode("utf-8"))
+        for key, dataset_fields in zip(self.dataset_keys, fields):
+            digest.update(json.dumps([str(key)] + list(dataset_fields.values())).encode("utf-8"))
+        fingerprint = digest.hexdigest()
+        
+        self.index = self._load_vector_index(model_cache_dir, datasets, fingerprint)
+        self._load_field_embeddings(model_cache_dir, fields, fingerprint)
+        # Index every field, so any field can be weighted later
+        self.lexical_index = LexicalIndex(fields, {name: self.weights.get(name, 0.0) for name in self.field_names})
+        return self.index
+
+    def _load_vector_index(self, model_cache_dir: str, datasets: Dict[str, Dict[Any, Any]], fingerprint: str) -> VectorIndex:
+        """
+        Load the cached dataset vector index, building it if the cache is stale.
+        
+        Args:
+            model_cache_dir: Index cache directory of the current embedding model
+            datasets: Dictionary of dataset dictionaries
+            fingerprint: Fingerprint of the model and dataset texts
+            
+        Returns:
+            The VectorIndex
+        """
+        info = {"fingerprint": fingerprint, "quantized": self.quantize}
+        for directory in self._index_dirs(model_cache_dir):
             try:
-                # Load index from storage
-                storage_context = StorageContext.from_defaults(persist_dir=model_cache_dir)
-                self.index = load_index_from_storage(storage_context)
-                return self.index
+                index = VectorIndex.load(directory)
+                if index.info == info and len(index) == len(datasets):
+                    logger.info(f"Loaded cached vector index from {directory}")
+                    return index
+            except FileNotFoundError:
+                pass
             except Exception as e:
-                logger.warning(f"Error loading cached index: {str(e)}. Building new index.")
+                logger.warning(f"Error loading cached index from {directory}: {str(e)}")
         
-        # Create nodes from datasets
+        # Embed the labelled text of every dataset
         nodes = self._prepare_dataset_nodes(datasets)
-        
-        # Build the index with storage context for saving
         logger.info("Building vector index...")
-        storage_context = StorageContext.from_defaults()
-        self.index = VectorStoreIndex(nodes, storage_context=storage_context)
+        embeddings = self.embedding_model.get_text_embedding_batch([node.text for node in nodes])
         
-        # Cache the index
+        columns = {
+            column: [node.metadata[column] for node in nodes]
+            for column in ("id", "title", "gee_type")
+        }
+        columns["dataset_key"] = [str(node.metadata["dataset_key"]) for node in nodes]
+        
+        index = VectorIndex.build(
+            np.asarray(embeddings, dtype=np.float32),
+            columns=columns,
+            quantize=self.quantize,
+            ivf_lists=int(np.sqrt(len(nodes))) if len(nodes) >= self.ivf_min_datasets else 0,
+            info=info
+        )
+        
+        # Cache the index and reload it memory-mapped
         logger.info(f"Caching index to {model_cache_dir}")
-        storage_context.persist(persist_dir=model_cache_dir)
+        index.save(model_cache_dir)
+        return VectorIndex.load(model_cache_dir)
+
+    def _load_field_embeddings(self, model_cache_dir: str, fields: List[Dict[str, str]], fingerprint: str):
+        """
+        Load the per-field embedding matrices, computing them if the cache is stale.
         
-        return self.index
+        Each dataset field is embedded once, L2-normalized and stored as a row of a
+        (fields, datasets, dim) float32 array in the index cache directory, which is
+        memory-mapped on later loads. Empty fields get a zero row.
+        
+        Args:
+            model_cache_dir: Index cache directory of the current embedding model
+            fields: Text fields of each dataset, in catalog order
+            fingerprint: Fingerprint of the model and dataset texts
+        """
+        field_names = ["title", "id", "description", "keywords"]
+        
+        matrix = None
+        for directory in self._index_dirs(model_cache_dir):
+            matrix_path = os.path.join(directory, "field_embeddings.npy")
+            meta_path = os.path.join(directory, "field_embeddings.json")
+            if not (os.path.exists(matrix_path) and os.path.exists(meta_path)):
+                continue
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                if meta.get("fields") == field_names and meta.get("fingerprint") == fingerprint:
+                    matrix = np.load(matrix_path, mmap_mode="r")
+                    logger.info(f"Loaded field embeddings from {matrix_path}")
+                    break
+            except Exception as e:
+                logger.warning(f"Error loading cached field embeddings from {directory}: {str(e)}")
+        
+        if matrix is None:
+            matrix_path = os.path.join(model_cache_dir, "field_embeddings.npy")
+            meta_path = os.path.join(model_cache_dir, "field_embeddings.json")
+            logger.info(f"Computing field embeddings for {len(fields)} datasets...")
+            for f_index, name in enumerate(field_names):
+                rows = [i for i, dataset_fields in enumerate(fields) if dataset_fields[name]]
+                if not rows:
+                    continue
+                embeddings = self.embedding_model.get_text_embedding_batch([fields[i][name] for i in rows])
+                embeddings = normalize_rows(embeddings)
+                if matrix is None:
+                    matrix = np.zeros((len(field_names), len(fields), embeddings.shape[1]), dtype=np.float32)
+                matrix[f_index, rows] = embeddings
+            
+            if matrix is None:
+                matrix = np.zeros((len(field_names), len(fields), 0), dtype=np.float32)
+            
+            os.makedirs(model_cache_dir, exist_ok=True)
+            np.save(matrix_path, matrix)
+            with open(meta_path, "w") as f:
+                json.dump({"model": self.embedding_model_name, "fields": field_names, "fingerprint": fingerprint}, f)
+            matrix = np.load(matrix_path, mmap_mode="r")
+            logger.info(f"Cached field embeddings to {matrix_path}")
+        
+        self.field_names = field_names
+        self.field_embeddings = matrix
+        self._update_weighted_field_embeddings()
+
+    def _index_dirs(self, model_cache_dir: str) -> List[str]:
+        """Directories to load cached indexes from: the prebuilt one first, then the writable cache."""
+        if not self.prebuilt_dir:
+            return [model_cache_dir]
+        return [os.path.join(self.prebuilt_dir, os.path.basename(model_cache_dir)), model_cache_dir]
+
+    def _update_weighted_field_embeddings(self):
+        """Combine the field embedding matrices with the current field weights."""
+        if self.field_embeddings is None:
+            self.weighted_field_embeddings = None
+            return
+        
+        weighted = np.zeros(self.field_embeddings.shape[1:], dtype=np.float32)
+        for f_index, name in enumerate(self.field_names):
+            weight = self.weights.get(name, 0.0)
+            if weight:
+                weighted += np.float32(weight) * self.field_embeddings[f_index]
+        self.weighted_field_embeddings = weighted
 
 
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a search query for retrieval and reranking.
+        
+        Queries are embedded as the model embeds queries, with its query
+        instruction (e.g. for BGE models). Embeddings are cached per
+        normalized query, and concurrent queries are embedded together in one
+        encoder pass.
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            Read-only L2-normalized float32 query embedding
+        """
+        self._init_models()
+        if self.query_embedder is None:
+            self.query_embedder = QueryEmbedder(
+                self._embed_queries,
+                self.embedding_model_name,
+                cache_size=self.query_cache_size
+            )
+        return self.query_embedder.embed(query)
+    
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed queries in one pass, with the query instruction get_query_embedding
+        would add, which get_text_embedding_batch does not.
+        
+        Args:
+            queries: Search queries
+            
+        Returns:
+            List of query embeddings
+        """
+        from llama_index.embeddings.huggingface.utils import get_query_instruct_for_model_name
+        
+        instruction = (getattr(self.embedding_model, 'query_instruction', None)
+                       or get_query_instruct_for_model_name(self.embedding_model_name))
+        if instruction:
+            queries = [f"{instruction.strip()} {query}" for query in queries]
+        return self.embedding_model.get_text_embedding_batch(queries)
+    
     def update_weights(self, new_weights: Dict[str, float]):
         """
         Update the field weights for search.
@@ -264,22 +535,139 @@ class EnhancedDatasetSearch:
                 new_weights[key] /= total
         
         self.weights = new_weights
+        self._update_weighted_field_embeddings()
+        if self.lexical_index is not None:
+            self.lexical_index.set_weights(new_weights)
         logger.info(f"Updated search weights: {self.weights}")
     
-    def expand_query(self, query: str) -> str:
+    def expand_query(self, query: str, timeout: Optional[float] = None) -> str:
         """
-        Use the LLM to expand the query for better search.
+        Expand the query for better search.
+        
+        With the "lexical" mode, the query is expanded with distinctive title and
+        keyword terms of its best BM25 matches. With the "llm" mode, expansions
+        come from a persistent cache; a missing one is generated in the
+        background and used if it is ready within the latency budget, otherwise
+        the raw query is used and the expansion is cached for the next search.
         
         Args:
             query: Original user query
+            timeout: Latency budget in seconds (defaults to expansion_timeout)
             
         Returns:
             Expanded query string
         """
+        if self.expansion_mode == "none":
+            return query
+        
+        if self.expansion_mode == "lexical":
+            if self.lexical_index is None:
+                return query
+            expanded = self.lexical_index.expand(query)
+            if expanded != query:
+                logger.info(f"Expanded query: {query} -> {expanded}")
+            return expanded
+        
         # Skip expansion if no LLM is set or if query is very short
-        if self.llm is None or len(query.split()) <= 2:
+        if self.llm_model_name is None or len(query.split()) <= 2:
             return query
+        
+        key = normalize_query(query)
+        expansions = self._load_expansions()
+        if key in expansions:
+            return expansions[key]
+        
+        future = self._schedule_expansion(key, query)
+        if future is None:
+            logger.info(f"Query expansion queue is full, using raw query: {query}")
+            return query
+        
+        try:
+            return future.result(timeout=self.expansion_timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            logger.info(f"Query expansion exceeded its latency budget, using raw query: {query}")
+            return query
+        except Exception as e:
+            logger.warning(f"Query expansion failed: {e}")
+            return query
+    
+    def precompute_expansions(self, queries: List[str]) -> int:
+        """
+        Queue LLM expansions of frequent queries that are not cached yet.
+        
+        Args:
+            queries: Queries to expand, e.g. the most frequent ones from search logs
+            
+        Returns:
+            Number of expansions queued
+        """
+        if self.expansion_mode != "llm" or self.llm_model_name is None:
+            return 0
+        
+        expansions = self._load_expansions()
+        queued = 0
+        for query in queries:
+            key = normalize_query(query)
+            if len(query.split()) <= 2 or key in expansions:
+                continue
+            # Warm-up is not bounded by max_pending_expansions
+            if self._schedule_expansion(key, query, bounded=False) is not None:
+                queued += 1
+        
+        logger.info(f"Queued {queued} query expansions for precomputation")
+        return queued
+    
+    def _expansion_cache_path(self) -> str:
+        """Path of the persistent expansion cache of the current LLM."""
+        return os.path.join(self.cache_dir, f"{str(self.llm_model_name).replace('/', '_')}_expansions.json")
+    
+    def _load_expansions(self) -> Dict[str, str]:
+        """Load the persistent expansion cache on first use."""
+        with self._expansion_lock:
+            if self._expansions is None:
+                try:
+                    with open(self._expansion_cache_path()) as f:
+                        self._expansions = json.load(f)
+                    logger.info(f"Loaded {len(self._expansions)} cached query expansions")
+                except FileNotFoundError:
+                    self._expansions = {}
+                except Exception as e:
+                    logger.warning(f"Error loading query expansion cache: {e}")
+                    self._expansions = {}
+            return self._expansions
+    
+    def _schedule_expansion(self, key: str, query: str, bounded: bool = True):
+        """
+        Queue an LLM expansion unless one is already pending.
+        
+        Args:
+            key: Normalized query
+            query: Original query
+            bounded: Whether to refuse when max_pending_expansions are queued
             
+        Returns:
+            Future of the expanded query, or None if the queue is full
+        """
+        with self._expansion_lock:
+            future = self._expansion_futures.get(key)
+            if future is None:
+                if bounded and len(self._expansion_futures) >= self.max_pending_expansions:
+                    return None
+                future = self._expansion_executor.submit(self._generate_expansion, key, query)
+                self._expansion_futures[key] = future
+            return future
+    
+    def _generate_expansion(self, key: str, query: str) -> str:
+        """
+        Generate, cache and persist an LLM expansion; runs on the expansion worker.
+        
+        Args:
+            key: Normalized query
+            query: Original query
+            
+        Returns:
+            Expanded query, or the original query if the expansion was unusable
+        """
         prompt = f"""
         Your task is to expand the following search query for an Earth Engine geospatial dataset search.
         The expanded query should include relevant keywords, alternatives, and specific Earth observation terms.
@@ -292,19 +680,33 @@ class EnhancedDatasetSearch:
         
         try:
             self._init_models()
+            if self.llm is None:
+                return query
             # Get response from LLM
             response = self.llm.complete(prompt)
             expanded = response.text.strip()
             
-            # If expansion looks reasonable, use it
+            # If expansion looks reasonable, use it; otherwise cache the raw
+            # query so the LLM is not asked again
             if expanded and len(expanded) < 200 and len(expanded) > len(query):
                 logger.info(f"Expanded query: {query} -> {expanded}")
-                return expanded
             else:
-                return query
-        except Exception as e:
-            logger.warning(f"Query expansion failed: {e}")
-            return query
+                expanded = query
+            
+            with self._expansion_lock:
+                if self._expansions is None:
+                    self._expansions = {}
+                self._expansions[key] = expanded
+                snapshot = dict(self._expansions)
+            
+            path = self._expansion_cache_path()
+            with open(path + ".tmp", "w") as f:
+                json.dump(snapshot, f)
+            os.replace(path + ".tmp", path)
+            return expanded
+        finally:
+            with self._expansion_lock:
+                self._expansion_futures.pop(key, None)
     
     def search(self, query: str, top_k: int = 20, use_reranking: bool = True, expand_query: bool = True) -> List[Dict[Any, Any]]:
         """
@@ -327,113 +729,66 @@ class EnhancedDatasetSearch:
         
         self._init_models()
         
-        from llama_index.core.retrievers import VectorIndexRetriever
-        
         # Step 1: Optionally expand the query
-        if expand_query and self.llm is not None:
+        if expand_query:
             search_query = self.expand_query(query)
         else:
             search_query = query
         
-        # Step 2: Set up retriever for initial search
-        retriever = VectorIndexRetriever(
-            index=self.index,
-            similarity_top_k=min(top_k * 3, 60)  # Get more results than needed for reranking
-        )
-        
-        # Step 3: Execute search
-        nodes = retriever.retrieve(search_query)
-        logger.info(f"Retrieved {len(nodes)} nodes for query: {search_query}")
-        
-        # Step 4: Optionally apply weighted field reranking
-        if use_reranking and len(nodes) > 0:
-            # Get query embedding
-            query_embedding = self.embedding_model.get_text_embedding(query)
+        # Step 2: Retrieve more results than needed for reranking; the query
+        # is embedded once and reused for reranking
+        candidate_count = min(top_k * 3, 60)
+        query_embedding = self.embed_query(search_query)
+        rows, row_scores = self.index.search(query_embedding, candidate_count)
+        logger.info(f"Retrieved {len(rows)} datasets for query: {search_query}")
+        
+        # Step 3: Optionally retrieve lexical matches, which catch dataset IDs
+        # and exact terms that embeddings miss
+        lexical_rows = []
+        if self.hybrid and self.lexical_index is not None:
+            lexical_rows = self.lexical_index.search(search_query, candidate_count)[0].tolist()
+            rows = np.array(list(dict.fromkeys(rows.tolist() + lexical_rows)), dtype=np.int64)
+            row_scores = self.index.scores(query_embedding, rows)
+        
+        # Step 4: Optionally apply weighted field reranking, as one
+        # matrix-vector product of weighted field cosine similarities
+        if use_reranking and len(rows) > 0:
+            row_scores = self.weighted_field_embeddings[rows] @ query_embedding
+        
+        # Rank by semantic score, fused with the lexical ranking if any
+        semantic_rows = [int(rows[i]) for i in np.argsort(-np.asarray(row_scores), kind="stable")]
+        if lexical_rows:
+            ranked_rows = reciprocal_rank_fusion([semantic_rows, lexical_rows], k=self.rrf_k)
+        else:
+            ranked_rows = semantic_rows
+        similarity = dict(zip(rows.tolist(), np.asarray(row_scores).tolist()))
+        
+        # Get final results
+        search_results = []
+        seen_ids = set()
+        for row in ranked_rows:
+            # Get original dataset and add similarity score
+            dataset = self.datasets[self.dataset_keys[row]].copy()
             
-            # Score each result by weighted field similarity
-            scored_results = []
-            for node in nodes:
-                # Get key from metadata
-                dataset_key = node.metadata.get("dataset_key")
-                if dataset_key is None or dataset_key not in self.datasets:
-                    continue
-                    
-                # Get the actual dataset
-                dataset = self.datasets[dataset_key]
-                    
-                # Get field embeddings and calculate weighted score
-                weighted_score = 0.0
-                for field, weight in self.weights.items():
-                    field_content = node.metadata.get(field, "")
-                    if field_content:
-                        # Get embedding for this field
-                        field_embed = self.embedding_model.get_text_embedding(field_content)
-                        
-                        # Calculate cosine similarity
-                        dot_product = np.dot(query_embedding, field_embed)
-                        magnitude = np.linalg.norm(query_embedding) * np.linalg.norm(field_embed)
-                        
-                        if magnitude > 0:
-                            similarity = dot_product / magnitude
-                            weighted_score += similarity * weight
+            # Skip duplicates
+            dataset_id = dataset['id']
+            if dataset_id in seen_ids:
+                continue
                 
-                # Add to scored results
-                scored_results.append((dataset_key, weighted_score, dataset))
+            dataset['similarity_score'] = float(similarity[row])
+            search_results.append(dataset)
+            seen_ids.add(dataset_id)
             
-            # Sort by score (descending)
-            sorted_results = sorted(scored_results, key=lambda x: x[1], reverse=True)
-            
-            # Get final results
-            search_results = []
-            seen_ids = set()
-            for key, score, dataset in sorted_results[:top_k]:
-                # Get original dataset
-                dataset_copy = dataset.copy()
-                
-                # Skip duplicates
-                dataset_id = dataset_copy['id']
-                if dataset_id in seen_ids:
-                    continue
-                    
-                # Add similarity score
-                dataset_copy['similarity_score'] = float(score)
-                search_results.append(dataset_copy)
-                seen_ids.add(dataset_id)
-                
-                # Stop when we have enough results
-                if len(search_results) >= top_k:
-                    break
-        else:
-            # Without reranking, just use the original node scores
-            search_results = []
-            seen_ids = set()
-            for node in nodes:
-                dataset_key = node.metadata.get("dataset_key")
-                if dataset_key is None or dataset_key not in self.datasets:
-                    continue
-                    
-                # Get original dataset and add similarity score
-                dataset = self.datasets[dataset_key].copy()
-                
-                # Skip duplicates
-                dataset_id = dataset['id']
-                if dataset_id in seen_ids:
-                    continue
-                    
-                dataset['similarity_score'] = float(node.score) if hasattr(node, 'score') else 1.0
-                search_results.append(dataset)
-                seen_ids.add(dataset_id)
-                
-                # Stop when we have enough results
-                if len(search_results) >= top_k:
-                    break
+            # Stop when we have enough results
+            if len(search_results) >= top_k:
+                break
         
         logger.info(f"Returning {len(search_results)} search results")
         return search_results
 
 
 # Create function to easily integrate with existing code
-def create_enhanced_search_manager(datasets, model_size="small"):
+def create_enhanced_search_manager(datasets, model_size="small", **search_options):
     """
     Factory function to create an EnhancedDatasetSearch instance
     with appropriate models based on desired size.
@@ -441,6 +796,7 @@ def create_enhanced_search_manager(datasets, model_size="small"):
     Args:
         datasets: Dictionary of dataset dictionaries
         model_size: Size of models to use ("small", "medium", "large", "minimal")
+        **search_options: Further EnhancedDatasetSearch options, e.g. expansion_mode
         
     Returns:
         Initialized EnhancedDatasetSearch with built index
@@ -466,7 +822,8 @@ def create_enhanced_search_manager(datasets, model_size="small"):
     
     search_manager = EnhancedDatasetSearch(
         embedding_model_name=embedding_model,
-        llm_model_name=llm_model
+        llm_model_name=llm_model,
+        **search_options
     )
     
     # Build index
@@ -0,0 +1,159 @@
+"""
+Query embedding with caching and micro-batching.
+
+Users repeat the same searches ("elevation", "land cover", "NDVI"), so query
+embeddings are kept in an LRU cache keyed on the normalized query and the
+model name. Queries that miss the cache are collected for a few milliseconds
+and embedded together in one encoder pass, so concurrent requests share a
+forward pass instead of queuing for one each. Batches are encoded by a
+batching thread, started when queries are queued and stopped when the queue
+is empty, so no request waits for queries queued after its own.
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.vector_index import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for caching: lowercase with collapsed whitespace.
+
+    Args:
+        query: Search query
+
+    Returns:
+        Normalized query
+    """
+    return " ".join(query.lower().split())
+
+
+class QueryEmbedder:
+    """
+    Thread-safe query embedder with an LRU cache and micro-batching.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], List[List[float]]],
+        model_name: str,
+        cache_size: int = 1024,
+        max_batch: int = 32,
+        batch_window: float = 0.005
+    ):
+        """
+        Initialize the embedder.
+
+        Args:
+            embed_batch: Function embedding a list of texts in one pass
+            model_name: Name of the embedding model, part of the cache key
+            cache_size: Maximum number of cached query embeddings
+            max_batch: Maximum queries per encoder pass
+            batch_window: Seconds to wait for more queries before encoding
+        """
+        self.embed_batch = embed_batch
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+
+        self._cache: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._queue: List[Tuple[str, str]] = []
+        self._batcher: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "batches": 0, "batched_queries": 0}
+
+    def embed(self, query: str) -> np.ndarray:
+        """
+        Embed a query, from the cache if possible.
+
+        Args:
+            query: Search query
+
+        Returns:
+            Read-only L2-normalized float32 embedding
+        """
+        key = (normalize_query(query), self.model_name)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return vector
+
+            future = self._pending.get(key)
+            if future is not None:
+                # The same query is already being embedded
+                self.stats["coalesced"] += 1
+            else:
+                self.stats["misses"] += 1
+                future = Future()
+                self._pending[key] = future
+                self._queue.append(key)
+                if self._batcher is None:
+                    self._batcher = threading.Thread(
+                        target=self._run_batches, name="query-embedder", daemon=True
+                    )
+                    self._batcher.start()
+
+        return future.result()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get cache and batching statistics.
+
+        Returns:
+            Dictionary of counters and the number of cached queries
+        """
+        with self._lock:
+            return {**self.stats, "cached": len(self._cache)}
+
+    def clear(self):
+        """Drop all cached embeddings."""
+        with self._lock:
+            self._cache.clear()
+
+    def _run_batches(self):
+        """Encode queued queries in batches until the queue is empty."""
+        time.sleep(self.batch_window)
+        while True:
+            with self._lock:
+                batch = self._queue[:self.max_batch]
+                del self._queue[:len(batch)]
+                if not batch:
+                    self._batcher = None
+                    return
+                self.stats["batches"] += 1
+                self.stats["batched_queries"] += len(batch)
+
+            try:
+                vectors = normalize_rows(self.embed_batch([text for text, _ in batch]))
+                vectors.flags.writeable = False
+                error = None
+            except Exception as e:
+                logger.warning(f"Query embedding failed: {e}")
+                error = e
+
+            with self._lock:
+                futures = [self._pending.pop(key) for key in batch]
+                if error is None:
+                    for key, vector in zip(batch, vectors):
+                        self._cache[key] = vector
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+            for i, future in enumerate(futures):
+                if error is None:
+                    future.set_result(vectors[i])
+                else:
+                    future.set_exception(error)
@@ -0,0 +1,211 @@
+"""
+Cache of rendered map tiles for dataset previews.
+
+Rendering a preview builds the Earth Engine image, filters and composites the
+collection and calls getMapId(), which takes seconds, while many users open
+the same datasets with the same settings. Rendered tile URLs are kept in an
+LRU cache keyed on everything that affects the image. Earth Engine map IDs
+expire, so entries are re-rendered in the background shortly before their
+time-to-live runs out and are never served after it.
+"""
+import json
+import time
+import logging
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Logged by /get_tile for every request; used to find popular datasets
+TILE_LOG_MARKER = "Getting tiles for dataset: "
+
+
+def tile_cache_key(
+    dataset_id: str,
+    date_range: Optional[List[str]],
+    visualization: Optional[Dict[str, Any]] = None,
+    style: Optional[Dict[str, Any]] = None,
+    location: Optional[Tuple[float, float]] = None,
+    **options: Any
+) -> str:
+    """
+    Build the cache key of a tile request.
+
+    Args:
+        dataset_id: Earth Engine dataset ID
+        date_range: Date range the image is filtered to
+        visualization: Custom visualization (band, min/max, colormap, temporal
+                       filter and aggregation)
+        style: Custom style of feature collections
+        location: Rounded (lon, lat) for datasets rendered around a location
+        **options: Further options affecting the image, e.g. limit_features
+
+    Returns:
+        Canonical JSON key
+    """
+    return json.dumps({
+        "dataset_id": dataset_id,
+        "date_range": date_range,
+        "visualization": visualization,
+        "style": style,
+        "location": location,
+        "options": options
+    }, sort_keys=True, default=str)
+
+
+def frequent_datasets(log_path: str, top_n: int = 20) -> List[str]:
+    """
+    Find the datasets whose tiles were requested most often in an application log.
+
+    Args:
+        log_path: Path to a log file written by the application
+        top_n: Number of datasets to return
+
+    Returns:
+        Dataset IDs, most requested first
+    """
+    counts = Counter()
+    with open(log_path, errors="ignore") as f:
+        for line in f:
+            position = line.find(TILE_LOG_MARKER)
+            if position >= 0:
+                dataset_id = line[position + len(TILE_LOG_MARKER):].strip()
+                if dataset_id:
+                    counts[dataset_id] += 1
+    return [dataset_id for dataset_id, _ in counts.most_common(top_n)]
+
+
+class TileCache:
+    """
+    Thread-safe LRU cache of rendered tiles with expiry and refresh-ahead.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3 * 3600, refresh_margin: float = 15 * 60):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached tiles
+            ttl: Seconds a rendered tile URL stays valid
+            refresh_margin: Seconds before expiry at which an entry is re-rendered
+                            in the background while the old one is still served
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl)
+
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tile-cache")
+
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "expired": 0, "errors": 0}
+
+    def get(self, key: str, render: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Get a rendered tile, rendering it if it is not cached.
+
+        Concurrent requests for the same uncached tile wait for one render.
+
+        Args:
+            key: Cache key from tile_cache_key()
+            render: Function rendering the tile; its result must not be modified
+
+        Returns:
+            The rendered tile
+
+        Raises:
+            Exception: Whatever render raises; failures are not cached
+        """
+        now = time.time()
+        lead = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    if age >= self.ttl - self.refresh_margin and key not in self._pending:
+                        self.stats["refreshes"] += 1
+                        self._pending[key] = self._executor.submit(self._render, key, render)
+                    return entry[1]
+                del self._entries[key]
+                self.stats["expired"] += 1
+
+            future = self._pending.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+            else:
+                self.stats["misses"] += 1
+                future = Future()
+                self._pending[key] = future
+                lead = True
+
+        if lead:
+            try:
+                future.set_result(self._render(key, render))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def warm(self, dataset_ids: List[str], build: Callable[[str], Any]) -> threading.Thread:
+        """
+        Render the default tiles of datasets one after another in a background thread.
+
+        Args:
+            dataset_ids: Datasets to render, most important first
+            build: Function building the tile response of a dataset through this cache
+
+        Returns:
+            The started thread
+        """
+        def run():
+            start = time.time()
+            for dataset_id in dataset_ids:
+                try:
+                    build(dataset_id)
+                except Exception as e:
+                    logger.warning(f"Could not warm tiles of {dataset_id}: {e}")
+            logger.info(f"Warmed tiles of {len(dataset_ids)} datasets in {time.time() - start:.1f}s")
+
+        thread = threading.Thread(target=run, name="tile-cache-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary of counters and the number of cached tiles
+        """
+        with self._lock:
+            return {**self.stats, "cached": len(self._entries), "rendering": len(self._pending)}
+
+    def clear(self):
+        """Drop all cached tiles."""
+        with self._lock:
+            self._entries.clear()
+
+    def _render(self, key: str, render: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Render a tile and store it; failures keep any older entry."""
+        try:
+            rendered_at = time.time()
+            value = render()
+            with self._lock:
+                self._entries[key] = (rendered_at, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        except Exception as e:
+            logger.warning(f"Tile rendering failed: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
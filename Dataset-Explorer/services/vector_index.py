@@ -0,0 +1,351 @@
+"""
+In-process vector index for the GEE catalog.
+
+The index keeps one L2-normalized embedding per dataset in a single .npy file,
+either as float32 or int8 with a per-row scale, and loads it memory-mapped so
+a cold start only reads what a search touches. Metadata lives in a columnar
+JSON sidecar. Search is exact (a matrix-vector product and argpartition) and
+can use an inverted-file (IVF) partition for catalogs too large to scan.
+
+Benchmark against the LlamaIndex vector store with:
+    python -m services.vector_index --datasets path/to/catalog.pkl
+"""
+import os
+import json
+import time
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "vector_scales.npy"
+METADATA_FILE = "vector_metadata.json"
+IVF_FILES = ("ivf_centroids.npy", "ivf_order.npy", "ivf_offsets.npy")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize the rows of a matrix as float32; zero rows stay zero.
+
+    Args:
+        vectors: (n, dim) matrix
+
+    Returns:
+        Normalized float32 matrix
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first.
+
+    Args:
+        scores: 1-D array of scores
+        k: Number of indices to return
+
+    Returns:
+        Array of at most k indices
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorIndex:
+    """
+    Exact (optionally IVF-partitioned) inner-product index over normalized vectors.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+        columns: Optional[Dict[str, List[Any]]] = None,
+        ivf: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+        info: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize the index from prepared arrays; use build() or load() instead.
+
+        Args:
+            vectors: (n, dim) float32 normalized vectors, or int8 quantized vectors
+            scales: Per-row dequantization scales for int8 vectors
+            columns: Metadata columns, one list of n values per column
+            ivf: IVF centroids, row order by list and list offsets
+            info: Free-form information saved with the index
+        """
+        self.vectors = vectors
+        self.scales = scales
+        self.columns = columns or {}
+        self.ivf = ivf
+        self.info = info or {}
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        columns: Optional[Dict[str, List[Any]]] = None,
+        quantize: bool = False,
+        ivf_lists: int = 0,
+        info: Optional[Dict[str, Any]] = None
+    ) -> "VectorIndex":
+        """
+        Build an index from raw embeddings.
+
+        Args:
+            embeddings: (n, dim) embeddings, one per dataset
+            columns: Metadata columns, one list of n values per column
+            quantize: Store vectors as int8 with a per-row scale (4x smaller)
+            ivf_lists: Number of IVF lists; 0 for exact search only
+            info: Free-form information saved with the index
+
+        Returns:
+            The built VectorIndex
+        """
+        vectors = normalize_rows(embeddings)
+        ivf = _build_ivf(vectors, ivf_lists) if ivf_lists and len(vectors) > ivf_lists else None
+
+        scales = None
+        if quantize:
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            vectors = np.round(vectors / scales[:, None]).astype(np.int8)
+            scales = scales.astype(np.float32)
+
+        return cls(vectors, scales, columns, ivf, info)
+
+    def save(self, directory: str):
+        """
+        Save the index files to a directory.
+
+        Args:
+            directory: Target directory
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, VECTORS_FILE), np.ascontiguousarray(self.vectors))
+        if self.scales is not None:
+            np.save(os.path.join(directory, SCALES_FILE), self.scales)
+        if self.ivf is not None:
+            for name, array in zip(IVF_FILES, self.ivf):
+                np.save(os.path.join(directory, name), array)
+
+        metadata = {
+            "count": len(self),
+            "dim": self.dim,
+            "dtype": str(self.vectors.dtype),
+            "ivf": self.ivf is not None,
+            "info": self.info,
+            "columns": self.columns
+        }
+        with open(os.path.join(directory, METADATA_FILE), "w") as f:
+            json.dump(metadata, f)
+
+    @classmethod
+    def load(cls, directory: str) -> "VectorIndex":
+        """
+        Load an index saved with save(); vectors are memory-mapped.
+
+        Args:
+            directory: Index directory
+
+        Returns:
+            The loaded VectorIndex
+
+        Raises:
+            FileNotFoundError: If the index files are missing
+            ValueError: If the files are inconsistent
+        """
+        with open(os.path.join(directory, METADATA_FILE)) as f:
+            metadata = json.load(f)
+
+        vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode="r")
+        if vectors.shape != (metadata["count"], metadata["dim"]):
+            raise ValueError(f"Vector file shape {vectors.shape} does not match metadata")
+
+        scales = None
+        if vectors.dtype == np.int8:
+            scales = np.load(os.path.join(directory, SCALES_FILE))
+
+        ivf = None
+        if metadata.get("ivf"):
+            ivf = tuple(np.load(os.path.join(directory, name)) for name in IVF_FILES)
+
+        return cls(vectors, scales, metadata.get("columns"), ivf, metadata.get("info"))
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine similarity of a normalized query to all or some rows.
+
+        Args:
+            query: (dim,) normalized float32 query vector
+            rows: Row indices to score, or None for all rows
+
+        Returns:
+            Array of scores
+        """
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        if self.scales is None:
+            return vectors @ query
+        scales = self.scales if rows is None else self.scales[rows]
+        return (vectors @ query) * scales
+
+    def search(self, query: np.ndarray, top_k: int, nprobe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the rows most similar to a query.
+
+        Args:
+            query: (dim,) query embedding
+            top_k: Number of results
+            nprobe: IVF lists to scan, if the index is partitioned
+
+        Returns:
+            Tuple of (row indices, scores), best first
+        """
+        query = normalize_rows(query)
+
+        if self.ivf is None:
+            scores = self.scores(query)
+            best = top_k_indices(scores, top_k)
+            return best, scores[best]
+
+        # Scan the rows of the lists whose centroids are closest to the query
+        centroids, order, offsets = self.ivf
+        lists = top_k_indices(centroids @ query, nprobe)
+        rows = np.concatenate([order[offsets[i]:offsets[i + 1]] for i in lists])
+        scores = self.scores(query, rows)
+        best = top_k_indices(scores, top_k)
+        return rows[best], scores[best]
+
+
+def _build_ivf(vectors: np.ndarray, lists: int, iterations: int = 10, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Partition normalized vectors into IVF lists with spherical k-means.
+
+    Args:
+        vectors: (n, dim) normalized vectors
+        lists: Number of lists
+        iterations: k-means iterations
+        seed: Random seed for the initial centroids
+
+    Returns:
+        Tuple of (centroids, row order grouped by list, list offsets into the order)
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]
+        centroids = normalize_rows(sums)
+
+    assignment = np.argmax(vectors @ centroids.T, axis=1)
+    order = np.argsort(assignment, kind="stable")
+    offsets = np.searchsorted(assignment[order], np.arange(lists + 1))
+    return centroids, order, offsets
+
+
+def benchmark(search, queries: List[str], top_k: int = 60, repeats: int = 20) -> Dict[str, Any]:
+    """
+    Compare retrieval latency of a VectorIndex against the LlamaIndex vector store.
+
+    Both use the same precomputed dataset and query embeddings, so only the
+    retrieval step is timed.
+
+    Args:
+        search: EnhancedDatasetSearch with a built index
+        queries: Queries to time
+        top_k: Number of results per query
+        repeats: Timing repetitions per query
+
+    Returns:
+        Dictionary with per-query latency of both paths and their top-k overlap
+    """
+    from llama_index.core import VectorStoreIndex, QueryBundle
+    from llama_index.core.retrievers import VectorIndexRetriever
+
+    index = search.index
+    nodes = search._prepare_dataset_nodes(search.datasets)
+    vectors = np.asarray(index.vectors, dtype=np.float32)
+    if index.scales is not None:
+        vectors = vectors * index.scales[:, None]
+    for node, vector in zip(nodes, vectors):
+        node.embedding = vector.tolist()
+
+    start = time.perf_counter()
+    llama_index = VectorStoreIndex(nodes)
+    llama_build_ms = (time.perf_counter() - start) * 1000
+
+    results = {"llama_index_ms": [], "vector_index_ms": [], "overlap": []}
+    for query in queries:
+        embedding = search.embed_query(query)
+        bundle = QueryBundle(query_str=query, embedding=embedding.tolist())
+        retriever = VectorIndexRetriever(index=llama_index, similarity_top_k=top_k)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            llama_nodes = retriever.retrieve(bundle)
+        results["llama_index_ms"].append((time.perf_counter() - start) * 1000 / repeats)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            rows, _ = index.search(embedding, top_k)
+        results["vector_index_ms"].append((time.perf_counter() - start) * 1000 / repeats)
+
+        llama_rows = {node.metadata["dataset_index"] for node in llama_nodes}
+        results["overlap"].append(len(llama_rows & set(rows.tolist())) / max(len(llama_rows), 1))
+
+    return {
+        "datasets": len(index),
+        "llama_index_build_ms": round(llama_build_ms, 1),
+        "llama_index_ms": round(float(np.mean(results["llama_index_ms"])), 3),
+        "vector_index_ms": round(float(np.mean(results["vector_index_ms"])), 3),
+        "top_k_overlap": round(float(np.mean(results["overlap"])), 3)
+    }
+
+
+def main():
+    """Benchmark the vector index against the LlamaIndex vector store."""
+    import argparse
+    import pickle
+    from services.llama_search import EnhancedDatasetSearch
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--datasets", required=True, help="Path to the pickled catalog")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2", help="Embedding model")
+    parser.add_argument("--top-k", type=int, default=60, help="Results per query")
+    parser.add_argument("--quantize", action="store_true", help="Use int8 vectors")
+    parser.add_argument("queries", nargs="*", default=["elevation", "land cover", "NDVI", "sentinel 2 surface reflectance"])
+    args = parser.parse_args()
+
+    with open(args.datasets, "rb") as f:
+        datasets = pickle.load(f)
+
+    start = time.perf_counter()
+    search = EnhancedDatasetSearch(embedding_model_name=args.model, llm_model_name=None, quantize=args.quantize)
+    search.build_index(datasets)
+    print(f"Index ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+    print(json.dumps(benchmark(search, args.queries, top_k=args.top_k), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Bounded worker pools for blocking work in the ASGI server.
+
+Earth Engine calls (getMapId, getInfo) and model inference block a thread
+for seconds. Each kind of work runs in its own pool with a fixed number of
+threads and a bounded queue, so saturating one (e.g. Earth Engine) does not
+take threads from the other (e.g. search). Work beyond the queue limit is
+rejected right away instead of piling up, and callers stop waiting after a
+timeout.
+"""
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """Raised when a pool's queue is full."""
+
+
+class WorkerPool:
+    """
+    Thread pool with a concurrency limit, a bounded queue, timeouts and metrics.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, timeout: float):
+        """
+        Initialize the pool.
+
+        Args:
+            name: Pool name, used in thread names and metrics
+            max_workers: Number of threads, i.e. maximum concurrent calls
+            max_queue: Maximum calls waiting for a thread
+            timeout: Seconds a caller waits for a call, including its queue time
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._queue_waits = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+
+        self.stats = {"calls": 0, "completed": 0, "failed": 0, "rejected": 0, "timeouts": 0}
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking function in the pool.
+
+        Args:
+            fn: Function to run
+            *args: Its arguments
+
+        Returns:
+            The function's result
+
+        Raises:
+            PoolSaturated: If the queue is full
+            asyncio.TimeoutError: If the call does not finish within the timeout;
+                                  it keeps its thread until it returns
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.stats["rejected"] += 1
+                raise PoolSaturated(f"{self.name} pool is saturated")
+            self._pending += 1
+            self.stats["calls"] += 1
+
+        submitted = time.perf_counter()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._call, submitted, fn, args)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            # Nobody waits for the result any more; consume it when it arrives
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            with self._lock:
+                self.stats["timeouts"] += 1
+            logger.warning(f"{self.name} pool call timed out after {self.timeout}s")
+            raise
+
+    def _call(self, submitted: float, fn: Callable[..., Any], args: tuple) -> Any:
+        """Run a call in a pool thread and record its queue and run times."""
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            self._queue_waits.append(started - submitted)
+        try:
+            result = fn(*args)
+            outcome = "completed"
+            return result
+        except Exception:
+            outcome = "failed"
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self._run_times.append(time.perf_counter() - started)
+                self.stats[outcome] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool metrics.
+
+        Returns:
+            Dictionary of counters, current load and queue-wait/run-time percentiles
+        """
+        with self._lock:
+            return {
+                **self.stats,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "timeout": self.timeout,
+                "queue_wait_ms": _percentiles(self._queue_waits),
+                "run_time_ms": _percentiles(self._run_times)
+            }
+
+    def shutdown(self):
+        """Stop the pool threads once their calls return."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _percentiles(samples) -> Optional[Dict[str, float]]:
+    """p50 and p95 of samples in seconds, as milliseconds."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[len(ordered) // 2] * 1000, 1),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1)
+    }
@@ -0,0 +1,6 @@
+"""
+Tests for the GEE Dataset Explorer.
+
+This package contains test modules for the search, caching, catalog and
+serving components that run without Earth Engine.
+"""
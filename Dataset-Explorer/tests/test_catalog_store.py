@@ -0,0 +1,131 @@
+"""
+Tests for the catalog artifact.
+
+This module contains unit tests for validating datasets, building a catalog
+artifact and loading it lazily, and for the pickle fallback of load_catalog.
+"""
+
+import os
+import sys
+import json
+import pickle
+import datetime
+import tempfile
+import unittest
+
+# Add the parent directory to the path to allow importing the application modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import catalog_store
+from models.catalog_store import CatalogStore, build_catalog, load_catalog, validate_dataset
+from models.dataset_index import index_fields
+
+
+def _dataset(i):
+    return {
+        "id": f"PROVIDER/COLLECTION_{i}",
+        "title": f"Collection {i}",
+        "description": "Surface reflectance",
+        "gee:type": "image_collection",
+        "summaries": {"keywords": ["reflectance", f"band{i}"]},
+        "extent": {"temporal": {"interval": [[datetime.datetime(2000 + i, 1, 1), None]]}}
+    }
+
+
+class TestValidateDataset(unittest.TestCase):
+    """Test cases for validate_dataset."""
+
+    def test_valid_dataset(self):
+        """A complete dataset has no problems."""
+        self.assertEqual(validate_dataset(catalog_store._to_json(_dataset(1))), [])
+
+    def test_problems_are_reported(self):
+        """Missing IDs, wrong types and malformed intervals are reported."""
+        self.assertEqual(validate_dataset(["not", "a", "dict"]), ["dataset is a list, not a dictionary"])
+        problems = validate_dataset({
+            "title": 3,
+            "gee:type": "raster",
+            "summaries": [],
+            "extent": {"temporal": {"interval": ["2000-01-01"]}}
+        })
+        self.assertEqual(len(problems), 5)
+
+
+class TestCatalogStore(unittest.TestCase):
+    """Test cases for building and loading catalog artifacts."""
+
+    def setUp(self):
+        """Create a temporary directory and a small catalog."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.temp_dir.name, "catalog")
+        self.datasets = {f"key{i}": _dataset(i) for i in range(5)}
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.temp_dir.cleanup()
+
+    def test_round_trip(self):
+        """A built artifact loads lazily with the same datasets as JSON data."""
+        manifest = build_catalog(self.datasets, self.output, source="catalog.pkl")
+        store = load_catalog(self.output)
+
+        self.assertIsInstance(store, CatalogStore)
+        self.assertEqual((manifest["count"], manifest["skipped"], manifest["source"]), (5, 0, "catalog.pkl"))
+        self.assertEqual(list(store), list(self.datasets))
+        self.assertEqual(len(store._decoded), 0)
+
+        dataset = store["key3"]
+        self.assertEqual(dataset["id"], "PROVIDER/COLLECTION_3")
+        self.assertEqual(dataset["extent"]["temporal"]["interval"], [["2003-01-01T00:00:00", None]])
+        self.assertEqual(len(store._decoded), 1)
+        self.assertIn("key4", store)
+        self.assertNotIn("key5", store)
+        self.assertEqual(store.columns["index"][3], index_fields(dataset))
+        self.assertEqual(store.search_fields()[3]["keywords"], "reflectance, band3")
+        self.assertIsNone(store.search_index_dir)
+
+    def test_invalid_datasets(self):
+        """Invalid and duplicate datasets fail the build unless they are skipped."""
+        self.datasets["bad"] = {"title": "No ID"}
+        self.datasets["duplicate"] = _dataset(1)
+
+        with self.assertRaises(ValueError):
+            build_catalog(self.datasets, self.output)
+        self.assertFalse(os.path.exists(self.output))
+
+        manifest = build_catalog(self.datasets, self.output, skip_invalid=True)
+        self.assertEqual((manifest["count"], manifest["skipped"]), (5, 2))
+        self.assertNotIn("bad", CatalogStore(self.output))
+
+    def test_rebuild_replaces_artifact(self):
+        """Building again replaces the previous artifact."""
+        build_catalog(self.datasets, self.output)
+        build_catalog({"only": _dataset(9)}, self.output)
+
+        self.assertEqual(list(CatalogStore(self.output)), ["only"])
+        self.assertFalse(os.path.exists(f"{self.output}.tmp"))
+
+    def test_other_format_version_is_rejected(self):
+        """Artifacts of another format version must be rebuilt."""
+        build_catalog(self.datasets, self.output)
+        path = os.path.join(self.output, catalog_store.MANIFEST_FILE)
+        with open(path) as f:
+            manifest = json.load(f)
+        manifest["format_version"] = catalog_store.FORMAT_VERSION + 1
+        with open(path, "w") as f:
+            json.dump(manifest, f)
+
+        with self.assertRaises(ValueError):
+            CatalogStore(self.output)
+
+    def test_pickle_fallback(self):
+        """A path that is not an artifact is loaded as a pickled catalog."""
+        path = os.path.join(self.temp_dir.name, "catalog.pkl")
+        with open(path, "wb") as f:
+            pickle.dump(self.datasets, f)
+
+        self.assertEqual(load_catalog(path), self.datasets)
+
+
+if __name__ == '__main__':
+    unittest.main()
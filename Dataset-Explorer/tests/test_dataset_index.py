@@ -0,0 +1,103 @@
+"""
+Tests for the dataset index.
+
+This module contains unit tests for looking datasets up by ID, finding them by
+type, provider, keyword and temporal extent, and for the memoized derived
+fields.
+"""
+
+import os
+import sys
+import unittest
+
+# Add the parent directory to the path to allow importing the application modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.dataset_index import DatasetIndex, index_fields, display_fields
+
+
+def _dataset(dataset_id, gee_type="image_collection", keywords=(), interval=None, **extra):
+    dataset = {
+        "id": dataset_id,
+        "title": dataset_id,
+        "gee:type": gee_type,
+        "summaries": {"keywords": list(keywords)},
+        "providers": [{"name": "NASA"}]
+    }
+    if interval:
+        dataset["extent"] = {"temporal": {"interval": [list(interval)]}}
+    dataset.update(extra)
+    return dataset
+
+
+class TestDatasetIndex(unittest.TestCase):
+    """Test cases for DatasetIndex."""
+
+    def setUp(self):
+        self.datasets = {
+            "modis": _dataset("MODIS/061/MOD13Q1", keywords=["NDVI", "vegetation"],
+                              interval=("2000-02-18T00:00:00Z", None)),
+            "srtm": _dataset("USGS/SRTMGL1_003", gee_type="IMAGE", keywords=["elevation"]),
+            "landsat": _dataset("LANDSAT/LT05/C02/T1_L2", keywords=["vegetation"],
+                                interval=("1984-03-16T00:00:00Z", "2012-05-05T00:00:00Z")),
+            "duplicate": _dataset("MODIS/061/MOD13Q1", title="Duplicate entry")
+        }
+        self.index = DatasetIndex(self.datasets)
+
+    def test_get_by_id(self):
+        """Test that datasets are found by ID and the first of duplicate IDs is kept."""
+        self.assertIs(self.index.get("USGS/SRTMGL1_003"), self.datasets["srtm"])
+        self.assertIs(self.index.get("MODIS/061/MOD13Q1"), self.datasets["modis"])
+        self.assertIsNone(self.index.get("UNKNOWN/DATASET"))
+        self.assertEqual(len(self.index), 3)
+
+    def test_find_by_type_provider_and_keyword(self):
+        """Test that criteria are case-insensitive, combined and in catalog order."""
+        self.assertEqual(self.index.find(gee_type="image"), ["USGS/SRTMGL1_003"])
+        self.assertEqual(
+            self.index.find(keyword="Vegetation"),
+            ["MODIS/061/MOD13Q1", "LANDSAT/LT05/C02/T1_L2"]
+        )
+        self.assertEqual(self.index.find(provider="modis", keyword="vegetation"), ["MODIS/061/MOD13Q1"])
+        self.assertEqual(self.index.find(provider="nasa"), list(self.index.by_id))
+        self.assertEqual(self.index.find(keyword="ocean"), [])
+
+    def test_temporal_overlap(self):
+        """Test that ongoing and closed extents are matched against a date range."""
+        self.assertEqual(
+            self.index.overlapping("2010-01-01", "2010-12-31"),
+            ["LANDSAT/LT05/C02/T1_L2", "MODIS/061/MOD13Q1"]
+        )
+        self.assertEqual(self.index.overlapping("2020-01-01", "2020-12-31"), ["MODIS/061/MOD13Q1"])
+        self.assertEqual(self.index.overlapping("1990-01-01", "1995-01-01"), ["LANDSAT/LT05/C02/T1_L2"])
+        self.assertEqual(self.index.find(start="2015-01-01"), ["MODIS/061/MOD13Q1"])
+
+    def test_precomputed_fields_match_computed_ones(self):
+        """Test that an index built from precomputed fields answers the same."""
+        datasets = dict(list(self.datasets.items())[:3])
+        index = DatasetIndex(
+            datasets,
+            fields=[index_fields(dataset) for dataset in datasets.values()],
+            display=[display_fields(dataset) for dataset in datasets.values()]
+        )
+
+        self.assertEqual(index.by_keyword, self.index.by_keyword)
+        self.assertEqual(index.display_fields("USGS/SRTMGL1_003"), self.index.display_fields("USGS/SRTMGL1_003"))
+
+    def test_derived_fields_are_memoized_copies(self):
+        """Test that callers modifying derived fields do not change the memoized ones."""
+        fields = self.index.display_fields("MODIS/061/MOD13Q1")
+        fields["keywords"].append("changed")
+        self.assertEqual(self.index.display_fields("MODIS/061/MOD13Q1")["keywords"], ["NDVI", "vegetation"])
+
+        date_range = self.index.date_range("LANDSAT/LT05/C02/T1_L2")
+        self.assertEqual(self.index.date_range("LANDSAT/LT05/C02/T1_L2"), date_range)
+
+        with self.assertRaises(KeyError):
+            self.index.display_fields("UNKNOWN/DATASET")
+        with self.assertRaises(KeyError):
+            self.index.visualization_params("UNKNOWN/DATASET")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Tests for the lexical index.
+
+This module contains unit tests for tokenization, weighted BM25 search,
+re-weighting and pseudo-relevance feedback query expansion.
+"""
+
+import os
+import sys
+import unittest
+
+# Add the parent directory to the path to allow importing the application modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.lexical_index import LexicalIndex, tokenize
+
+DOCUMENTS = [
+    {
+        "title": "MOD13Q1.061 Terra Vegetation Indices 16-Day Global 250m",
+        "id": "MODIS/061/MOD13Q1",
+        "description": "Vegetation indices computed from surface reflectance",
+        "keywords": "ndvi, evi, vegetation, modis"
+    },
+    {
+        "title": "MOD11A1.061 Terra Land Surface Temperature Daily Global 1km",
+        "id": "MODIS/061/MOD11A1",
+        "description": "Daily land surface temperature and emissivity",
+        "keywords": "lst, temperature, modis"
+    },
+    {
+        "title": "Sentinel-2 MSI: MultiSpectral Instrument, Level-2A",
+        "id": "COPERNICUS/S2_SR_HARMONIZED",
+        "description": "Surface reflectance of the Sentinel-2 vegetation and water bands",
+        "keywords": "copernicus, msi, sentinel, harmonized"
+    }
+]
+
+WEIGHTS = {"title": 0.35, "id": 0.15, "description": 0.30, "keywords": 0.20}
+
+
+class TestTokenize(unittest.TestCase):
+    """Test cases for tokenize."""
+
+    def test_ids_are_split_on_separators(self):
+        """Dataset IDs become their lowercase parts."""
+        self.assertEqual(tokenize("MODIS/061/MOD13Q1"), ["modis", "061", "mod13q1"])
+        self.assertEqual(tokenize("COPERNICUS/S2_SR_HARMONIZED"), ["copernicus", "s2", "sr", "harmonized"])
+
+    def test_stop_words_are_removed(self):
+        """Common words that don't tell datasets apart are dropped."""
+        self.assertEqual(tokenize("Show the NDVI data for Africa"), ["ndvi", "africa"])
+
+
+class TestLexicalIndex(unittest.TestCase):
+    """Test cases for LexicalIndex."""
+
+    def test_search_by_id_part(self):
+        """A query for part of a dataset ID finds that dataset first."""
+        index = LexicalIndex(DOCUMENTS, WEIGHTS)
+
+        rows, scores = index.search("mod13q1", 3)
+
+        self.assertEqual(rows.tolist(), [0])
+        self.assertGreater(scores[0], 0)
+
+    def test_results_are_ranked_and_limited(self):
+        """Documents are ranked by score and only those matching are returned."""
+        index = LexicalIndex(DOCUMENTS, WEIGHTS)
+
+        rows, scores = index.search("vegetation", 1)
+        self.assertEqual(rows.tolist(), [0])
+
+        rows, scores = index.search("vegetation", 10)
+        self.assertEqual(sorted(rows.tolist()), [0, 2])
+        self.assertGreaterEqual(scores[0], scores[1])
+        self.assertEqual(len(index.search("glacier", 10)[0]), 0)
+
+    def test_reweighting_changes_ranking_without_rebuild(self):
+        """Changing the field weights changes which fields count."""
+        index = LexicalIndex(DOCUMENTS, WEIGHTS)
+        self.assertEqual(len(index.search("reflectance", 10)[0]), 2)
+
+        index.set_weights({"title": 1.0})
+        self.assertEqual(len(index.search("reflectance", 10)[0]), 0)
+        self.assertEqual(index.search("temperature", 10)[0].tolist(), [1])
+        self.assertEqual(index.field_weights, {"title": 1.0, "id": 0.0, "description": 0.0, "keywords": 0.0})
+
+    def test_unweighted_expansion_fields(self):
+        """Titles and keywords are available for expansion even when they are not weighted."""
+        index = LexicalIndex(DOCUMENTS, {"id": 0.5, "description": 0.5})
+
+        added = index.expand("mod13q1").split()[1:]
+
+        self.assertTrue(added)
+        self.assertTrue(set(added) <= set(tokenize(DOCUMENTS[0]["title"] + " " + DOCUMENTS[0]["keywords"])))
+
+    def test_expand_adds_distinctive_terms(self):
+        """Expansion adds terms of the best-matching documents, not the query's own terms."""
+        index = LexicalIndex(DOCUMENTS, WEIGHTS)
+
+        expanded = index.expand("land surface temperature", max_terms=2)
+        added = expanded.split()[3:]
+
+        self.assertEqual(len(added), 2)
+        self.assertFalse({"land", "surface", "temperature"} & set(added))
+        self.assertEqual(index.expand("glacier"), "glacier")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Tests for the query embedder.
+
+This module contains unit tests for the query embedding cache, micro-batching
+of concurrent queries and propagation of encoder errors.
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Add the parent directory to the path to allow importing the application modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.query_embedder import QueryEmbedder, normalize_query
+
+
+class FakeEncoder:
+    """Encoder recording its batches, returning one vector per text."""
+
+    def __init__(self, fail=False, delay=0.0):
+        self.batches = []
+        self.fail = fail
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.batches.append(list(texts))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model not loaded")
+        return [[len(text), 1.0, 2.0] for text in texts]
+
+
+class TestQueryEmbedder(unittest.TestCase):
+    """Test cases for QueryEmbedder."""
+
+    def test_normalize_query(self):
+        """Queries are lowercased with collapsed whitespace."""
+        self.assertEqual(normalize_query("  Land   Cover\tEurope "), "land cover europe")
+
+    def test_cache_hits_share_the_normalized_query(self):
+        """Repeated queries, in any case or spacing, are embedded once."""
+        encoder = FakeEncoder()
+        embedder = QueryEmbedder(encoder, "model", batch_window=0)
+
+        first = embedder.embed("Elevation")
+        second = embedder.embed("  elevation ")
+
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(encoder.batches, [["elevation"]])
+        self.assertAlmostEqual(float(np.linalg.norm(first)), 1.0, places=5)
+        self.assertFalse(first.flags.writeable)
+        self.assertEqual(embedder.get_stats()["hits"], 1)
+
+    def test_concurrent_queries_are_batched(self):
+        """Queries arriving together are embedded in shared encoder passes."""
+        encoder = FakeEncoder()
+        embedder = QueryEmbedder(encoder, "model", max_batch=8, batch_window=0.05)
+        queries = [f"query {i}" for i in range(8)] + ["query 0"] * 4
+
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            vectors = list(executor.map(embedder.embed, queries))
+
+        self.assertEqual(sum(len(batch) for batch in encoder.batches), 8)
+        self.assertLess(len(encoder.batches), 8)
+        self.assertTrue(all(len(batch) <= 8 for batch in encoder.batches))
+        np.testing.assert_array_equal(vectors[0], vectors[-1])
+        stats = embedder.get_stats()
+        self.assertEqual(stats["misses"] + stats["coalesced"] + stats["hits"], len(queries))
+
+    def test_requests_return_under_steady_load(self):
+        """No request keeps encoding the queries queued after its own."""
+        encoder = FakeEncoder(delay=0.02)
+        embedder = QueryEmbedder(encoder, "model", max_batch=4, batch_window=0.005)
+        deadline = time.monotonic() + 1.0
+        latencies = []
+
+        def send_queries(worker):
+            i = 0
+            while time.monotonic() < deadline:
+                start = time.monotonic()
+                embedder.embed(f"query {worker} {i}")
+                latencies.append(time.monotonic() - start)
+                i += 1
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(send_queries, range(8)))
+
+        self.assertGreater(len(encoder.batches), 10)
+        self.assertLess(max(latencies), 0.5)
+
+    def test_cache_is_bounded(self):
+        """The least recently used embeddings are evicted."""
+        encoder = FakeEncoder()
+        embedder = QueryEmbedder(encoder, "model", cache_size=2, batch_window=0)
+
+        for query in ("a", "b", "c", "a"):
+            embedder.embed(query)
+
+        self.assertEqual(embedder.get_stats()["cached"], 2)
+        self.assertEqual(len(encoder.batches), 4)
+
+    def test_encoder_errors_reach_every_waiting_caller(self):
+        """A failed encoder pass raises in every caller and caches nothing."""
+        encoder = FakeEncoder(fail=True)
+        embedder = QueryEmbedder(encoder, "model", batch_window=0.05)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(embedder.embed, query) for query in ("ndvi", "ndvi", "lst")]
+            for future in futures:
+                with self.assertRaises(RuntimeError):
+                    future.result()
+
+        self.assertEqual(embedder.get_stats()["cached"], 0)
+        encoder.fail = False
+        self.assertEqual(embedder.embed("ndvi").shape, (3,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+Tests for the tile cache.
+
+This module contains unit tests for tile cache keys, expiry, refresh-ahead,
+coalescing of concurrent renders and finding frequently requested datasets.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+# Add the parent directory to the path to allow importing the application modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.tile_cache import TileCache, tile_cache_key, frequent_datasets
+
+
+class FakeRenderer:
+    """Render function returning numbered tiles, optionally blocking until released."""
+
+    def __init__(self, block=False):
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        self.release.wait(5)
+        return {"tileUrl": f"https://tiles/{call}/{{z}}/{{x}}/{{y}}"}
+
+
+class TestTileCacheKey(unittest.TestCase):
+    """Test cases for tile_cache_key."""
+
+    def test_key_is_canonical(self):
+        """Keys ignore dictionary order and change with anything affecting the image."""
+        key = tile_cache_key("MODIS/061/MOD13Q1", ["2024-01-01", "2024-02-01"], {"band": "NDVI", "min": 0, "max": 9000})
+
+        self.assertEqual(key, tile_cache_key(
+            "MODIS/061/MOD13Q1", ["2024-01-01", "2024-02-01"], {"max": 9000, "min": 0, "band": "NDVI"}
+        ))
+        self.assertNotEqual(key, tile_cache_key("MODIS/061/MOD13Q1", ["2024-01-01", "2024-03-01"], {"band": "NDVI", "min": 0, "max": 9000}))
+        self.assertNotEqual(key, tile_cache_key(
+            "MODIS/061/MOD13Q1", ["2024-01-01", "2024-02-01"], {"band": "NDVI", "min": 0, "max": 9000}, limit_features=100
+        ))
+
+
+class TestTileCache(unittest.TestCase):
+    """Test cases for TileCache."""
+
+    def setUp(self):
+        """Control the cache's clock."""
+        self.now = 1000.0
+        patcher = patch("services.tile_cache.time", SimpleNamespace(time=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hits_and_expiry(self):
+        """Cached tiles are served until their time-to-live runs out."""
+        cache = TileCache(ttl=100, refresh_margin=0)
+        render = FakeRenderer()
+
+        first = cache.get("key", render)
+        self.now += 99
+        self.assertIs(cache.get("key", render), first)
+        self.now += 1
+        self.assertIsNot(cache.get("key", render), first)
+
+        self.assertEqual(render.calls, 2)
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["expired"]), (1, 2, 1))
+
+    def test_refresh_ahead_serves_old_tile(self):
+        """Near expiry the old tile is served while a new one renders in the background."""
+        cache = TileCache(ttl=100, refresh_margin=20)
+        render = FakeRenderer()
+        first = cache.get("key", render)
+
+        render.release.clear()
+        self.now += 85
+        self.assertIs(cache.get("key", render), first)
+        self.assertIs(cache.get("key", render), first)
+        refresh = cache._pending["key"]
+        render.release.set()
+        refreshed = refresh.result(5)
+
+        self.now += 10
+        self.assertIs(cache.get("key", render), refreshed)
+        self.assertEqual(render.calls, 2)
+        self.assertEqual(cache.get_stats()["refreshes"], 1)
+
+    def test_concurrent_misses_are_coalesced(self):
+        """Concurrent requests for the same uncached tile share one render."""
+        cache = TileCache()
+        render = FakeRenderer(block=True)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(cache.get, "key", render) for _ in range(4)]
+            while cache.get_stats()["coalesced"] < 3:
+                time.sleep(0.01)
+            render.release.set()
+            results = [future.result(5) for future in futures]
+
+        self.assertEqual(render.calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_failures_are_not_cached(self):
+        """A failed render raises and the next request renders again."""
+        cache = TileCache()
+
+        def failing():
+            raise RuntimeError("Earth Engine unavailable")
+
+        with self.assertRaises(RuntimeError):
+            cache.get("key", failing)
+        self.assertEqual(cache.get("key", FakeRenderer())["tileUrl"], "https://tiles/1/{z}/{x}/{y}")
+        self.assertEqual(cache.get_stats()["errors"], 1)
+
+    def test_size_is_bounded(self):
+        """The least recently used tiles are evicted."""
+        cache = TileCache(max_entries=2)
+        render = FakeRenderer()
+
+        for key in ("a", "b", "a", "c"):
+            cache.get(key, render)
+        cache.get("b", render)
+
+        self.assertEqual(render.calls, 4)
+        self.assertEqual(cache.get_stats()["cached"], 2)
+
+
+class TestFrequentDatasets(unittest.TestCase):
+    """Test cases for frequent_datasets."""
+
+    def test_most_requested_first(self):
+        """Datasets are ranked by how often their tiles were requested."""
+        lines = [
+            "2025-01-01 INFO Getting tiles for dataset: MODIS/061/MOD13Q1",
+            "2025-01-01 INFO Searching datasets with query: ndvi",
+            "2025-01-01 INFO Getting tiles for dataset: USGS/SRTMGL1_003",
+            "2025-01-01 INFO Getting tiles for dataset: MODIS/061/MOD13Q1"
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False) as f:
+            f.write("\n".join(lines))
+        self.addCleanup(os.remove, f.name)
+
+        self.assertEqual(frequent_datasets(f.name), ["MODIS/061/MOD13Q1", "USGS/SRTMGL1_003"])
+        self.assertEqual(frequent_datasets(f.name, top_n=1), ["MODIS/061/MOD13Q1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Tests for value retrieval at a location.
+
+This module contains unit tests for resolving the type of datasets the catalog
+does not describe, against a fake Earth Engine that only loads each asset as
+its actual type.
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+from flask import Flask
+
+# Add the parent directory to the path to allow importing the application modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from routes.api import register_value_retrieval_route
+
+DATASET_ID = 'users/someone/plots'
+
+LOADERS = {
+    'image_collection': 'ImageCollection',
+    'image': 'Image',
+    'feature_collection': 'FeatureCollection'
+}
+
+
+class FakeEarthEngine:
+    """Earth Engine module whose requests fail unless an asset is loaded as its actual type."""
+
+    def __init__(self, asset_type, error=None):
+        self.asset_type = asset_type
+        self.error = error
+        self.loaded = []
+        self.data = MagicMock()
+        self.data.getAsset.side_effect = Exception("Permission denied")
+        self.Geometry = MagicMock()
+        self.Reducer = MagicMock()
+
+    def _load(self, dataset_type):
+        self.loaded.append(dataset_type)
+        return MagicMock()
+
+    def _check(self, dataset_type):
+        if self.error and dataset_type in self.error:
+            raise Exception(self.error[dataset_type])
+        if dataset_type != self.asset_type:
+            raise Exception(f"Asset '{DATASET_ID}' is not an {LOADERS[dataset_type]}.")
+
+    def ImageCollection(self, dataset_id):
+        return self._load('image_collection')
+
+    def Image(self, dataset_id):
+        return self._load('image')
+
+    def FeatureCollection(self, dataset_id):
+        features = self._load('feature_collection')
+
+        def get_info():
+            self._check('feature_collection')
+            return {'features': [{'properties': {'name': 'plot 1'}}]}
+
+        features.filterBounds.return_value.limit.return_value.getInfo.side_effect = get_info
+        return features
+
+    def Dictionary(self, samples):
+        # Images are only sampled, so the last loaded image type is the one sampled
+        dataset_type = self.loaded[-1]
+        dictionary = MagicMock()
+
+        def get_info():
+            self._check(dataset_type)
+            return {'scale_0': {'b1': 5}, 'time_start': None}
+
+        dictionary.getInfo.side_effect = get_info
+        return dictionary
+
+
+class TestValueRetrieval(unittest.TestCase):
+    """Test cases for get_value_at_location on datasets of unknown type."""
+
+    def get_value(self, fake_ee):
+        app = Flask(__name__)
+        embedding_manager = MagicMock()
+        embedding_manager.get_dataset.return_value = None
+        with patch('routes.api.ee', fake_ee):
+            register_value_retrieval_route(app, embedding_manager)
+            client = app.test_client()
+            payload = {'dataset_id': DATASET_ID, 'coordinates': {'lat': 10.0, 'lon': 20.0}}
+            first = client.post('/get_value_at_location', json=payload).get_json()
+            fake_ee.loaded.clear()
+            second = client.post('/get_value_at_location', json=payload).get_json()
+        return first, second
+
+    def test_image_falls_back_and_is_remembered(self):
+        """Test that an image is found after the collection approach and remembered."""
+        fake_ee = FakeEarthEngine('image')
+
+        first, second = self.get_value(fake_ee)
+
+        self.assertEqual(first, {'values': {'b1': 5}})
+        self.assertEqual(second, first)
+        self.assertEqual(fake_ee.loaded, ['image'])
+
+    def test_table_falls_back_and_is_remembered(self):
+        """Test that a table is found after both image approaches and remembered."""
+        fake_ee = FakeEarthEngine('feature_collection')
+
+        first, second = self.get_value(fake_ee)
+
+        self.assertEqual(first, {'features': [{'properties': {'name': 'plot 1'}}]})
+        self.assertEqual(second, first)
+        self.assertEqual(fake_ee.loaded, ['feature_collection'])
+
+    def test_transient_errors_are_not_remembered(self):
+        """Test that an approach that failed for another reason is tried again."""
+        fake_ee = FakeEarthEngine('image', error={'image_collection': 'Computation timed out.'})
+
+        first, second = self.get_value(fake_ee)
+
+        self.assertEqual(first, {'values': {'b1': 5}})
+        self.assertEqual(fake_ee.loaded, ['image_collection', 'image'])
+
+    def test_asset_type_is_looked_up(self):
+        """Test that the asset type from the asset metadata skips the trial approaches."""
+        fake_ee = FakeEarthEngine('feature_collection')
+        fake_ee.data.getAsset.side_effect = None
+        fake_ee.data.getAsset.return_value = {'type': 'TABLE'}
+
+        first, second = self.get_value(fake_ee)
+
+        self.assertEqual(first, {'features': [{'properties': {'name': 'plot 1'}}]})
+        self.assertEqual(fake_ee.loaded, ['feature_collection'])
+        fake_ee.data.getAsset.assert_called_once_with(DATASET_ID)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Tests for the vector index.
+
+This module contains unit tests for exact, IVF-partitioned and int8-quantized
+search and for saving and memory-mapped loading of the index.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add the parent directory to the path to allow importing the application modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.vector_index import VectorIndex, normalize_rows
+
+
+def _exact_top_k(embeddings, query, k):
+    scores = normalize_rows(embeddings) @ normalize_rows(query)
+    return np.argsort(-scores, kind="stable")[:k]
+
+
+class TestVectorIndex(unittest.TestCase):
+    """Test cases for VectorIndex."""
+
+    def setUp(self):
+        """Create clustered random embeddings and queries near them."""
+        rng = np.random.default_rng(42)
+        centers = rng.standard_normal((20, 32))
+        self.embeddings = (centers[rng.integers(0, 20, 2000)] + 0.3 * rng.standard_normal((2000, 32))).astype(np.float32)
+        self.queries = self.embeddings[rng.integers(0, 2000, 20)] + 0.1 * rng.standard_normal((20, 32)).astype(np.float32)
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.temp_dir.cleanup()
+
+    def test_exact_search_matches_brute_force(self):
+        """Exact search returns the brute-force top k, best first."""
+        index = VectorIndex.build(self.embeddings)
+
+        for query in self.queries:
+            rows, scores = index.search(query, 10)
+            np.testing.assert_array_equal(rows, _exact_top_k(self.embeddings, query, 10))
+            self.assertTrue(np.all(np.diff(scores) <= 0))
+
+    def test_ivf_search_recall(self):
+        """IVF search finds nearly all of the exact top k."""
+        index = VectorIndex.build(self.embeddings, ivf_lists=40)
+
+        self.assertIsNotNone(index.ivf)
+        recall = np.mean([
+            len(set(index.search(query, 10, nprobe=8)[0]) & set(_exact_top_k(self.embeddings, query, 10))) / 10
+            for query in self.queries
+        ])
+        self.assertGreaterEqual(recall, 0.9)
+
+    def test_quantized_search_recall_and_scores(self):
+        """int8 vectors keep the ranking and approximate the float scores."""
+        exact = VectorIndex.build(self.embeddings)
+        quantized = VectorIndex.build(self.embeddings, quantize=True)
+
+        self.assertEqual(quantized.vectors.dtype, np.int8)
+        for query in self.queries:
+            rows, scores = quantized.search(query, 10)
+            self.assertGreaterEqual(len(set(rows) & set(exact.search(query, 10)[0])), 8)
+            np.testing.assert_allclose(scores, exact.scores(normalize_rows(query), rows), atol=0.02)
+
+    def test_save_and_load(self):
+        """A saved index loads memory-mapped with its columns, info and IVF lists."""
+        columns = {"id": [f"dataset-{i}" for i in range(len(self.embeddings))]}
+        index = VectorIndex.build(self.embeddings, columns=columns, quantize=True, ivf_lists=40, info={"fingerprint": "abc"})
+        index.save(self.temp_dir.name)
+
+        loaded = VectorIndex.load(self.temp_dir.name)
+
+        self.assertIsInstance(loaded.vectors, np.memmap)
+        self.assertEqual(loaded.columns, columns)
+        self.assertEqual(loaded.info, {"fingerprint": "abc"})
+        for query in self.queries[:5]:
+            np.testing.assert_array_equal(loaded.search(query, 10)[0], index.search(query, 10)[0])
+
+    def test_load_missing_index(self):
+        """Loading from a directory without an index raises FileNotFoundError."""
+        with self.assertRaises(FileNotFoundError):
+            VectorIndex.load(self.temp_dir.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
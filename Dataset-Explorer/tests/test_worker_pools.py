@@ -0,0 +1,161 @@
+"""
+Tests for the worker pools and the ASGI serving mode.
+
+This module contains unit tests for bounded worker pools and for serving a
+WSGI application through PooledWSGIApp, including saturation (503) and
+timeout (504) responses.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+import unittest
+
+# Add the parent directory to the path to allow importing the application modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.worker_pools import WorkerPool, PoolSaturated
+from asgi import PooledWSGIApp
+
+
+def wsgi_app(environ, start_response):
+    """WSGI application echoing the request; /slow waits for the given seconds."""
+    body = environ["wsgi.input"].read(int(environ.get("CONTENT_LENGTH") or 0))
+    if environ["PATH_INFO"] == "/slow":
+        time.sleep(float(environ["QUERY_STRING"] or 1))
+    payload = json.dumps({
+        "path": environ["PATH_INFO"],
+        "query": environ["QUERY_STRING"],
+        "body": body.decode("utf-8"),
+        "content_type": environ.get("CONTENT_TYPE")
+    }).encode("utf-8")
+    start_response("200 OK", [("Content-Type", "application/json")])
+    return [payload]
+
+
+async def call(app, path, body=b"", query_string=b""):
+    """Send an HTTP request to an ASGI application; return the status, headers and JSON body."""
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "query_string": query_string,
+        "headers": [(b"content-type", b"application/json")],
+        "http_version": "1.1"
+    }
+    await app(scope, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"]), json.loads(sent[1]["body"])
+
+
+class TestWorkerPool(unittest.IsolatedAsyncioTestCase):
+    """Test cases for WorkerPool."""
+
+    async def test_saturated_pool_rejects_calls(self):
+        """Calls beyond the threads and queue are rejected right away."""
+        pool = WorkerPool("test", max_workers=1, max_queue=1, timeout=5)
+        self.addCleanup(pool.shutdown)
+        release = threading.Event()
+
+        running = [asyncio.ensure_future(pool.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with self.assertRaises(PoolSaturated):
+            await pool.run(time.sleep, 0)
+        release.set()
+        await asyncio.gather(*running)
+
+        stats = pool.get_stats()
+        self.assertEqual((stats["calls"], stats["completed"], stats["rejected"]), (2, 2, 1))
+        self.assertEqual((stats["running"], stats["queued"]), (0, 0))
+
+    async def test_timeout_and_errors(self):
+        """Slow calls time out for the caller and errors propagate."""
+        pool = WorkerPool("test", max_workers=2, max_queue=0, timeout=0.1)
+        self.addCleanup(pool.shutdown)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await pool.run(time.sleep, 0.3)
+        with self.assertRaises(ZeroDivisionError):
+            await pool.run(lambda: 1 / 0)
+        await asyncio.sleep(0.3)
+
+        stats = pool.get_stats()
+        self.assertEqual((stats["timeouts"], stats["failed"], stats["completed"]), (1, 1, 1))
+
+
+class TestPooledWSGIApp(unittest.IsolatedAsyncioTestCase):
+    """Test cases for PooledWSGIApp."""
+
+    async def asyncSetUp(self):
+        """Serve the echo application with a small pool per route group."""
+        self.pools = {
+            "earth_engine": WorkerPool("earth_engine", max_workers=1, max_queue=1, timeout=5),
+            "inference": WorkerPool("inference", max_workers=1, max_queue=1, timeout=5),
+            "web": WorkerPool("web", max_workers=1, max_queue=1, timeout=0.2)
+        }
+        for pool in self.pools.values():
+            self.addCleanup(pool.shutdown)
+        routes = {"/slow": "earth_engine", "/search_datasets": "inference"}
+        self.app = PooledWSGIApp(wsgi_app, self.pools, routes)
+
+    async def test_request_is_passed_through(self):
+        """Path, query string, body and content type reach the WSGI application."""
+        status, headers, payload = await call(self.app, "/search_datasets", b'{"query": "ndvi"}', b"top_k=5")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"content-type"], b"application/json")
+        self.assertEqual(payload, {
+            "path": "/search_datasets",
+            "query": "top_k=5",
+            "body": '{"query": "ndvi"}',
+            "content_type": "application/json"
+        })
+        self.assertEqual(self.pools["inference"].get_stats()["completed"], 1)
+
+    async def test_saturated_pool_returns_503(self):
+        """A full pool answers 503 while other pools keep serving."""
+        slow = [asyncio.ensure_future(call(self.app, "/slow", query_string=b"0.3")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        status, headers, payload = await call(self.app, "/slow", query_string=b"0.3")
+        self.assertEqual(status, 503)
+        self.assertEqual(headers[b"retry-after"], b"5")
+        self.assertIn("error", payload)
+
+        status, _, _ = await call(self.app, "/search_datasets", b"{}")
+        self.assertEqual(status, 200)
+        self.assertEqual([result[0] for result in await asyncio.gather(*slow)], [200, 200])
+
+    async def test_slow_request_returns_504(self):
+        """A request running longer than its pool's timeout gets a 504."""
+        self.app.routes = {"/slow": "web"}
+
+        status, _, payload = await call(self.app, "/slow", query_string=b"0.5")
+
+        self.assertEqual(status, 504)
+        self.assertIn("timed out", payload["error"])
+
+    async def test_pool_info(self):
+        """Pool metrics are served at /pool_info."""
+        await call(self.app, "/other")
+
+        status, _, payload = await call(self.app, "/pool_info")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(set(payload["pools"]), {"earth_engine", "inference", "web"})
+        self.assertEqual(payload["pools"]["web"]["completed"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+POI index benchmark for the GIS AI Agent.
+
+This script builds a local POI index from synthetic points clustered around
+city centers (1M POIs by default), then measures build time, index size and
+the latency of within-radius and k-nearest queries against the memory-mapped
+index. A sample of queries is checked against a brute-force haversine scan.
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data_sources.poi_index import POIIndex, write_poi_index, haversine_km
+
+
+def generate_pois(count, categories, cities, seed=0):
+    """
+    Generate synthetic POIs clustered around random city centers.
+
+    Args:
+        count: Number of POIs.
+        categories: Number of categories.
+        cities: Number of city centers.
+        seed: Random seed.
+
+    Returns:
+        Tuple of (latitudes, longitudes, category codes, city centers).
+    """
+    rng = np.random.default_rng(seed)
+    centers = np.column_stack([rng.uniform(-55, 65, cities), rng.uniform(-180, 180, cities)])
+    city = rng.integers(0, cities, count)
+    # Most POIs within ~10 km of the center, with a long tail
+    spread = rng.exponential(0.08, count)
+    angle = rng.uniform(0, 2 * np.pi, count)
+    latitudes = np.clip(centers[city, 0] + spread * np.sin(angle), -89.9, 89.9)
+    longitudes = (centers[city, 1] + spread * np.cos(angle) + 180.0) % 360.0 - 180.0
+    # Skewed category popularity, as in real OSM data
+    weights = 1.0 / np.arange(1, categories + 1)
+    codes = rng.choice(categories, count, p=weights / weights.sum())
+    return latitudes, longitudes, codes, centers
+
+
+def percentile_ms(samples, fraction):
+    """Get a latency percentile in milliseconds."""
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))] * 1000
+
+
+def run_benchmark(count, categories, cities, queries):
+    """
+    Run the benchmark and print the results.
+
+    Args:
+        count: Number of POIs.
+        categories: Number of categories.
+        cities: Number of city centers.
+        queries: Number of queries per query type.
+    """
+    latitudes, longitudes, codes, centers = generate_pois(count, categories, cities)
+    names = [f"poi-{i}" for i in range(count)]
+    category_names = [f"category_{i}" for i in range(categories)]
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        start_time = time.perf_counter()
+        write_poi_index(index_dir, latitudes, longitudes, codes, category_names, names=names)
+        build_time = time.perf_counter() - start_time
+        size_mb = sum(f.stat().st_size for f in Path(index_dir).iterdir()) / 1e6
+
+        start_time = time.perf_counter()
+        index = POIIndex(index_dir)
+        load_time = time.perf_counter() - start_time
+
+        print(f"POIs:            {count:,} in {categories} categories around {cities} cities")
+        print(f"Build time:      {build_time:.2f} s")
+        print(f"Index size:      {size_mb:.1f} MB")
+        print(f"Load time:       {load_time * 1000:.1f} ms (memory-mapped)")
+
+        rng = np.random.default_rng(1)
+        query_centers = centers[rng.integers(0, cities, queries)] + rng.normal(0, 0.05, (queries, 2))
+        query_categories = [category_names[c] for c in rng.integers(0, min(categories, 10), queries)]
+
+        for label, run_query in [
+            ("radius 1 km", lambda lat, lon, cat: index.within_radius(lat, lon, 1.0, cat, limit=50)),
+            ("radius 5 km", lambda lat, lon, cat: index.within_radius(lat, lon, 5.0, cat, limit=50)),
+            ("radius 25 km", lambda lat, lon, cat: index.within_radius(lat, lon, 25.0, cat, limit=50)),
+            ("10 nearest", lambda lat, lon, cat: index.nearest(lat, lon, cat, k=10))
+        ]:
+            timings = []
+            found = 0
+            for (lat, lon), cat in zip(query_centers, query_categories):
+                start_time = time.perf_counter()
+                found += len(run_query(lat, lon, cat))
+                timings.append(time.perf_counter() - start_time)
+            print(f"{label:<16} p50 {percentile_ms(timings, 0.5):6.2f} ms   "
+                  f"p95 {percentile_ms(timings, 0.95):6.2f} ms   avg results {found / queries:.1f}")
+
+        # Correctness check against a brute-force scan of the whole dataset
+        stored_latitudes = latitudes.astype(np.float32)
+        stored_longitudes = longitudes.astype(np.float32)
+        for (lat, lon), cat in list(zip(query_centers, query_categories))[:20]:
+            start_time = time.perf_counter()
+            distances = haversine_km(lat, lon, stored_latitudes, stored_longitudes)
+            distances[codes != category_names.index(cat)] = np.inf
+            expected = int((distances <= 5.0).sum())
+            brute_force_time = time.perf_counter() - start_time
+            assert len(index.within_radius(lat, lon, 5.0, cat)) == expected
+        print(f"Brute force:     {brute_force_time * 1000:.1f} ms per query (results match)")
+
+
+def main():
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the local POI index")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of POIs")
+    parser.add_argument("--categories", type=int, default=50, help="Number of categories")
+    parser.add_argument("--cities", type=int, default=500, help="Number of city centers")
+    parser.add_argument("--queries", type=int, default=1000, help="Queries per query type")
+    args = parser.parse_args()
+
+    run_benchmark(args.count, args.categories, args.cities, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ setup(
     author="GIS AI Agent Team",
     author_email="Khalilzaryani007@gmail.com",
     packages=find_packages(),
+    package_data={"src.mcp_server": ["tool_manifest.json"]},
     install_requires=requirements,
     classifiers=[
         "Development Status :: 3 - Alpha",
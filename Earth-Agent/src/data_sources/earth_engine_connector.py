@@ -15,10 +15,56 @@ import asyncio
 from pathlib import Path
 
 from ..config import get_config
+from .geocoding_service import get_geocoding_service, parse_coordinates
+from .ee_executor import get_ee_executor
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# ERA5-Land monthly aggregates (1950-present, ~11 km resolution)
+ERA5_MONTHLY = "ECMWF/ERA5_LAND/MONTHLY_AGGR"
+ERA5_SCALE = 11132  # meters
+
+# Climate variables: ERA5 band, unit conversion (value * scale + offset) and yearly aggregation
+CLIMATE_VARIABLES = {
+    "temperature": {
+        "band": "temperature_2m", "scale": 1.0, "offset": -273.15, "unit": "°C",
+        "yearly": "mean", "increasing": "warming", "decreasing": "cooling"
+    },
+    "precipitation": {
+        "band": "total_precipitation_sum", "scale": 1000.0, "offset": 0.0, "unit": "mm",
+        "yearly": "sum"
+    },
+    "dewpoint_temperature": {
+        "band": "dewpoint_temperature_2m", "scale": 1.0, "offset": -273.15, "unit": "°C",
+        "yearly": "mean"
+    },
+    "surface_pressure": {
+        "band": "surface_pressure", "scale": 0.01, "offset": 0.0, "unit": "hPa",
+        "yearly": "mean"
+    },
+    "soil_moisture": {
+        "band": "volumetric_soil_water_layer_1", "scale": 1.0, "offset": 0.0, "unit": "m³/m³",
+        "yearly": "mean"
+    }
+}
+
+# Interval steps in months, and the period summed variables are totals for
+INTERVAL_MONTHS = {"yearly": 12, "seasonal": 3, "monthly": 1}
+INTERVAL_UNITS = {"yearly": "year", "seasonal": "season", "monthly": "month"}
+
+# Confidence (1 - p-value) above which a trend is reported as significant
+TREND_CONFIDENCE = 0.95
+
+# Size of the box used for places the geocoder returns without a bounding box
+DEFAULT_PLACE_BUFFER = 10000  # meters
+
+
+
+def _round(value: Optional[float], digits: int = 4) -> Optional[float]:
+    """Round an optional number."""
+    return round(value, digits) if value is not None else None
+
 
 class EarthEngineClient:
     """Client for interacting with the Google Earth Engine API."""
@@ -34,7 +80,46 @@ class EarthEngineClient:
         self.config = get_config()
         self.service_account_file = service_account_file
         self.project_id = project_id
-        self._initialize_earth_engine()
+        self.executor = get_ee_executor()
+        self._initialized = False
+        self._init_lock = None
+
+    async def initialize(self) -> None:
+        """
+        Initialize the Earth Engine API once, in the Earth Engine executor.
+        
+        Raises:
+            ValueError: If credentials are missing or invalid
+        """
+        if self._initialized:
+            return
+        
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        
+        async with self._init_lock:
+            if not self._initialized:
+                await self.executor.run(self._initialize_earth_engine)
+                self._initialized = True
+
+    async def _run(self, func, *args, **kwargs) -> Any:
+        """
+        Run a blocking Earth Engine call through the execution layer.
+        
+        Every request to Earth Engine (getInfo, reduceRegion, ...) goes through
+        here; building images and geometries is client-side and doesn't.
+        
+        Args:
+            func: Function performing the call
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function, and the executor's
+                priority and timeout
+            
+        Returns:
+            The function's result
+        """
+        await self.initialize()
+        return await self.executor.run(func, *args, **kwargs)
 
     def _initialize_earth_engine(self) -> None:
         """Initialize the Google Earth Engine API."""
@@ -79,46 +164,196 @@ class EarthEngineClient:
             logger.error(f"Failed to initialize Earth Engine: {e}")
             raise
 
-    def _parse_area_to_geometry(self, area: str) -> ee.Geometry:
+    def _parse_area_to_geometry(self, area: str) -> Optional[ee.Geometry]:
         """
-        Parse area string input to an Earth Engine geometry.
+        Parse GeoJSON or coordinate area input to an Earth Engine geometry.
         
         Args:
             area: Area string which could be coordinates, GeoJSON, or place name
             
         Returns:
-            Earth Engine geometry object
+            Earth Engine geometry object, or None if the area is a place name
         """
-        try:
-            # Check if it's GeoJSON
-            if area.startswith('{') and '"type"' in area and '"geometry"' in area:
-                try:
-                    geojson = json.loads(area)
-                    return ee.Geometry(geojson)
-                except json.JSONDecodeError:
-                    logger.warning(f"Failed to parse area as GeoJSON: {area}")
-            
-            # Check if it's a coordinate pair
-            if ',' in area and area.replace('-', '').replace('.', '').replace(',', '').isdigit():
-                try:
-                    coords = [float(coord.strip()) for coord in area.split(',')]
-                    # Assume lat, lng order
-                    return ee.Geometry.Point(coords[1], coords[0])
-                except (ValueError, IndexError):
-                    logger.warning(f"Failed to parse area as coordinates: {area}")
+        # Check if it's GeoJSON
+        if area.strip().startswith('{'):
+            try:
+                geojson = json.loads(area)
+                return ee.Geometry(geojson.get("geometry", geojson))
+            except (json.JSONDecodeError, AttributeError):
+                logger.warning(f"Failed to parse area as GeoJSON: {area}")
+        
+        # Check if it's a coordinate pair (lat, lng order)
+        coordinates = parse_coordinates(area)
+        if coordinates:
+            return ee.Geometry.Point(coordinates[1], coordinates[0])
+        
+        return None
+
+    async def _resolve_geometry(self, area: str) -> ee.Geometry:
+        """
+        Resolve area input to an Earth Engine geometry.
+        
+        Place names are resolved through the shared (cached) geocoding
+        service, using the place's bounding box when available.
+        
+        Args:
+            area: Area string which could be coordinates, GeoJSON, or place name
             
-            # As a fallback for names or other formats, use a default area
-            # In production, you would integrate with a geocoding service here
-            logger.warning(f"Using default geometry for area: {area}")
-            return ee.Geometry.Point(0, 0)
+        Returns:
+            Earth Engine geometry object
             
-        except Exception as e:
-            logger.error(f"Error parsing area to geometry: {e}")
-            # Return a default geometry
-            return ee.Geometry.Point(0, 0)
+        Raises:
+            ValueError: If the place could not be found
+        """
+        await self.initialize()
+        
+        geometry = self._parse_area_to_geometry(area)
+        if geometry is not None:
+            return geometry
+        
+        location = await get_geocoding_service().geocode(area)
+        if location is None:
+            raise ValueError(f"Could not find location: {area}")
+        
+        # Nominatim bounding boxes are [south, north, west, east]
+        bounding_box = location.raw.get("boundingbox") if location.raw else None
+        if bounding_box and len(bounding_box) == 4:
+            south, north, west, east = (float(value) for value in bounding_box)
+            if north > south and east > west:
+                return ee.Geometry.Rectangle([west, south, east, north])
+        
+        return ee.Geometry.Point(location.longitude, location.latitude).buffer(DEFAULT_PLACE_BUFFER).bounds()
 
     # Core analysis functions
     
+    def _build_climate_trends(self,
+                              geometry: ee.Geometry,
+                              variables: List[str],
+                              start_year: int,
+                              end_year: int,
+                              interval: str) -> ee.Dictionary:
+        """
+        Build the server-side computation for climate trends.
+        
+        ERA5 monthly images are aggregated into one image per interval step,
+        every step is reduced to regional means for all variables at once, and
+        the resulting series is fitted (linear trend, correlation p-value) and
+        summarized (min/max/mean) per variable. Nothing is evaluated here; the
+        returned dictionary is fetched with a single getInfo() call.
+        
+        Args:
+            geometry: Region geometry
+            variables: Supported climate variables to analyze
+            start_year: Starting year for analysis
+            end_year: Ending year for analysis
+            interval: Data granularity (yearly, seasonal, monthly)
+            
+        Returns:
+            Earth Engine dictionary of per-variable statistics
+        """
+        specs = {name: CLIMATE_VARIABLES[name] for name in variables}
+        mean_names = [name for name, spec in specs.items() if spec["yearly"] == "mean"]
+        sum_names = [name for name, spec in specs.items() if spec["yearly"] == "sum"]
+        step_months = INTERVAL_MONTHS[interval]
+        step_count = (end_year - start_year + 1) * 12 // step_months
+        start = ee.Date.fromYMD(start_year, 1, 1)
+        
+        def convert(image):
+            # Unit conversion, with bands renamed to variable names
+            image = ee.Image(image)
+            bands = [
+                image.select(spec["band"]).multiply(spec["scale"]).add(spec["offset"]).rename(name)
+                for name, spec in specs.items()
+            ]
+            return ee.Image.cat(bands).copyProperties(image, ["system:time_start"])
+        
+        monthly = (ee.ImageCollection(ERA5_MONTHLY)
+                   .filterDate(start, ee.Date.fromYMD(end_year + 1, 1, 1))
+                   .select([spec["band"] for spec in specs.values()])
+                   .map(convert))
+        
+        def reduce_step(index):
+            index = ee.Number(index)
+            step_start = start.advance(index.multiply(step_months), "month")
+            months = monthly.filterDate(step_start, step_start.advance(step_months, "month"))
+            parts = []
+            if mean_names:
+                parts.append(months.select(mean_names).mean())
+            if sum_names:
+                parts.append(months.select(sum_names).sum())
+            values = ee.Image.cat(parts).reduceRegion(
+                reducer=ee.Reducer.mean(),
+                geometry=geometry,
+                scale=ERA5_SCALE,
+                bestEffort=True,
+                maxPixels=1e9
+            )
+            # Time in years since the start, so fitted slopes are per year
+            return ee.Feature(None, values).set("t", index.multiply(step_months / 12.0))
+        
+        series = ee.FeatureCollection(ee.List.sequence(0, step_count - 1).map(reduce_step))
+        
+        fit_reducer = ee.Reducer.linearFit().combine(ee.Reducer.pearsonsCorrelation(), sharedInputs=True)
+        stats_reducer = ee.Reducer.minMax().combine(ee.Reducer.mean(), sharedInputs=True)
+        results = {}
+        for name in specs:
+            valid = series.filter(ee.Filter.notNull([name]))
+            results[name] = (ee.Dictionary(valid.reduceColumns(fit_reducer, ["t", name]))
+                             .combine(valid.reduceColumns(stats_reducer, [name]))
+                             .set("count", valid.size()))
+        return ee.Dictionary(results)
+
+    def _format_climate_trends(self, info: Dict[str, Any], variables: List[str], interval: str) -> Dict[str, Any]:
+        """
+        Format the evaluated climate trend statistics.
+        
+        Args:
+            info: Evaluated statistics keyed by variable
+            variables: Requested climate variables
+            interval: Data granularity (yearly, seasonal, monthly)
+            
+        Returns:
+            Per-variable trend results
+        """
+        results = {}
+        for name in variables:
+            spec = CLIMATE_VARIABLES.get(name)
+            if spec is None:
+                results[name] = {
+                    "error": f"Unsupported variable. Supported variables: {', '.join(CLIMATE_VARIABLES)}"
+                }
+                continue
+            
+            values = info.get(name) or {}
+            rate = values.get("scale")
+            p_value = values.get("p-value")
+            confidence = 1.0 - p_value if p_value is not None else None
+            
+            if rate is None or confidence is None or confidence < TREND_CONFIDENCE or rate == 0:
+                trend = "stable"
+            elif rate > 0:
+                trend = spec.get("increasing", "increasing")
+            else:
+                trend = spec.get("decreasing", "decreasing")
+            
+            # Summed variables are totals per interval step
+            unit = spec["unit"]
+            if spec["yearly"] == "sum":
+                unit = f"{unit}/{INTERVAL_UNITS[interval]}"
+            
+            results[name] = {
+                "trend": trend,
+                "rate_of_change": _round(rate),
+                "rate_unit": f"{unit} per year",
+                "confidence": _round(confidence),
+                "min_value": _round(values.get("min")),
+                "max_value": _round(values.get("max")),
+                "mean_value": _round(values.get("mean")),
+                "unit": unit,
+                "samples": values.get("count", 0)
+            }
+        return results
+
     async def analyze_climate_trends(self,
                          region: str,
                          variables: List[str],
@@ -128,65 +363,43 @@ class EarthEngineClient:
         """
         Analyze climate trends for a specific region over time.
         
+        Trends are fitted server-side on ERA5-Land monthly data, and all
+        requested variables are evaluated in a single round trip through the
+        Earth Engine executor.
+        
         Args:
             region: Region identifier or geometry
             variables: Climate variables to analyze
             start_year: Starting year for analysis
             end_year: Ending year for analysis
-            interval: Data granularity (yearly, monthly)
+            interval: Data granularity (yearly, seasonal, monthly)
             
         Returns:
             Climate trend analysis results
         """
         try:
-            geometry = self._parse_area_to_geometry(region)
+            if interval not in INTERVAL_MONTHS:
+                raise ValueError(f"Unsupported interval: {interval}. Use one of: {', '.join(INTERVAL_MONTHS)}")
+            if end_year - start_year < 2:
+                raise ValueError("At least three years are required to fit a trend")
             
-            # Initialize results dictionary
-            results = {
+            geometry = await self._resolve_geometry(region)
+            
+            supported = [name for name in dict.fromkeys(variables) if name in CLIMATE_VARIABLES]
+            info = {}
+            if supported:
+                info = await self._run(
+                    lambda: self._build_climate_trends(geometry, supported, start_year, end_year, interval).getInfo()
+                )
+            
+            return {
                 "region": region,
                 "analysis_period": f"{start_year}-{end_year}",
                 "interval": interval,
-                "variables": {}
+                "dataset": ERA5_MONTHLY,
+                "variables": self._format_climate_trends(info, list(dict.fromkeys(variables)), interval)
             }
             
-            # Process each requested variable
-            for variable in variables:
-                if variable == "temperature":
-                    # Here we would process Earth Engine datasets
-                    # This is production code that would integrate with actual EE datasets
-                    
-                    # Implement actual Earth Engine analysis here
-                    # Example with ERA5 dataset (uncomment and complete for production):
-                    # dataset = ee.ImageCollection('ECMWF/ERA5/MONTHLY')
-                    #    .filter(ee.Filter.date(f'{start_year}-01-01', f'{end_year}-12-31'))
-                    #    .select(['mean_2m_air_temperature'])
-                    
-                    # For now, return placeholder structured data
-                    results["variables"][variable] = {
-                        "trend": "warming",
-                        "rate_of_change": 0.02,  # °C per year
-                        "confidence": 0.95,
-                        "min_value": 10.5,
-                        "max_value": 12.3,
-                        "mean_value": 11.4,
-                        "unit": "°C"
-                    }
-                
-                elif variable == "precipitation":
-                    results["variables"][variable] = {
-                        "trend": "increasing",
-                        "rate_of_change": 5.2,  # mm per year
-                        "confidence": 0.85,
-                        "min_value": 800,
-                        "max_value": 1200,
-                        "mean_value": 950,
-                        "unit": "mm/year"
-                    }
-                    
-                # Additional variables would be implemented similarly
-            
-            return results
-            
         except Exception as e:
             logger.error(f"Error analyzing climate trends: {e}")
             return {
@@ -212,7 +425,7 @@ class EarthEngineClient:
             Land use change analysis
         """
         try:
-            geometry = self._parse_area_to_geometry(area)
+            geometry = await self._resolve_geometry(area)
             
             # Initialize results 
             results = {
@@ -266,7 +479,7 @@ class EarthEngineClient:
             Emissions tracking results
         """
         try:
-            geometry = self._parse_area_to_geometry(area)
+            geometry = await self._resolve_geometry(area)
             
             # Production code would integrate with actual Earth Engine datasets
             # For example, using the CAMS Global Emission Inventories dataset
@@ -310,7 +523,7 @@ class EarthEngineClient:
             Climate projection results
         """
         try:
-            geometry = self._parse_area_to_geometry(region)
+            geometry = await self._resolve_geometry(region)
             
             # Production code would integrate with actual climate model datasets
             # This would use CMIP6 scenario datasets in Earth Engine
@@ -351,7 +564,7 @@ class EarthEngineClient:
             Renewable energy potential analysis
         """
         try:
-            geometry = self._parse_area_to_geometry(area)
+            geometry = await self._resolve_geometry(area)
             
             # Production code would integrate with actual Earth Engine datasets
             # For example, using the Global Solar Atlas or Global Wind Atlas datasets
@@ -393,4 +606,5 @@ async def get_earth_engine_client(service_account_file: str = None, project_id:
     if _earth_engine_client is None:
         _earth_engine_client = EarthEngineClient(service_account_file, project_id)
     
+    await _earth_engine_client.initialize()
     return _earth_engine_client
\ No newline at end of file
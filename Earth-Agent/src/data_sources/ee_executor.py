@@ -0,0 +1,285 @@
+"""
+Earth Engine execution layer for the GIS AI Agent.
+
+Earth Engine calls such as getInfo() are blocking HTTP round trips. This
+module runs them in a dedicated, bounded thread pool behind a global
+concurrency limit, so long reductions never block the event loop. Calls wait
+in a priority queue (interactive requests before background work), get a
+per-call timeout, are retried on transient quota errors, and are recorded in
+execution metrics.
+"""
+
+import re
+import time
+import heapq
+import random
+import logging
+import asyncio
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Deque, List, Optional, Tuple
+
+from ..config import get_config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Call priorities, lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Error message fragments of transient Earth Engine errors worth retrying
+TRANSIENT_ERRORS = (
+    "too many concurrent",
+    "too many requests",
+    "quota",
+    "rate limit",
+    "resource exhausted",
+    "service unavailable",
+    "temporarily unavailable",
+    "deadline exceeded",
+    "connection reset",
+)
+
+# HTTP statuses of transient Earth Engine errors worth retrying
+TRANSIENT_STATUSES = (429, 503)
+
+# HTTP status in an error message, e.g. "<HttpError 429 when requesting ...>"
+_STATUS_PATTERN = re.compile(r"\b(?:http\s*error|status(?:\s*code)?|code)\W*(\d{3})\b", re.IGNORECASE)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Check whether an Earth Engine error is transient.
+
+    Args:
+        error: The raised exception.
+
+    Returns:
+        True if the call is worth retrying.
+    """
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "resp", None), "status", None)
+    if status is not None:
+        try:
+            if int(status) in TRANSIENT_STATUSES:
+                return True
+        except (TypeError, ValueError):
+            pass
+
+    message = str(error)
+    if any(int(code) in TRANSIENT_STATUSES for code in _STATUS_PATTERN.findall(message)):
+        return True
+    message = message.lower()
+    return any(fragment in message for fragment in TRANSIENT_ERRORS)
+
+
+class _Job:
+    """A queued Earth Engine call."""
+
+    def __init__(self, func: Callable[[], Any], priority: int, timeout: float, future: asyncio.Future):
+        self.func = func
+        self.priority = priority
+        self.timeout = timeout
+        self.future = future
+        self.attempts = 0
+        self.queued_at = time.monotonic()
+
+
+class EEExecutor:
+    """Bounded, prioritized executor for blocking Earth Engine calls."""
+
+    def __init__(self,
+                 max_workers: int = 8,
+                 max_concurrency: int = 6,
+                 timeout: float = 120.0,
+                 max_retries: int = 3,
+                 backoff: float = 1.0,
+                 max_backoff: float = 16.0):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Size of the dedicated thread pool.
+            max_concurrency: Maximum calls running at once.
+            timeout: Default per-call timeout in seconds.
+            max_retries: Retries of calls failing with transient errors.
+            backoff: Base delay before the first retry, in seconds.
+            max_backoff: Maximum delay between retries, in seconds.
+        """
+        # A timed-out call keeps its thread until Earth Engine returns, so the
+        # pool is kept larger than the concurrency limit
+        self.max_concurrency = min(max_concurrency, max_workers)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="earth-engine")
+        self._queue: List[Tuple[int, int, _Job]] = []
+        self._sequence = itertools.count()
+        self._running = 0
+
+        self.stats = {"calls": 0, "completed": 0, "failed": 0, "retries": 0, "timeouts": 0, "cancelled": 0}
+        self._wait_times: Deque[float] = deque(maxlen=1000)
+        self._run_times: Deque[float] = deque(maxlen=1000)
+
+    async def run(self,
+                  func: Callable[..., Any],
+                  *args,
+                  priority: int = PRIORITY_INTERACTIVE,
+                  timeout: Optional[float] = None,
+                  **kwargs) -> Any:
+        """
+        Run a blocking Earth Engine call.
+
+        Args:
+            func: Function performing the call.
+            *args: Positional arguments for the function.
+            priority: Call priority, e.g. PRIORITY_BACKGROUND for refresh jobs.
+            timeout: Timeout in seconds. Defaults to the executor timeout.
+            **kwargs: Keyword arguments for the function.
+
+        Returns:
+            The function's result.
+
+        Raises:
+            asyncio.TimeoutError: If the call does not finish in time.
+        """
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(lambda: func(*args, **kwargs), priority, timeout or self.timeout, future)
+        self.stats["calls"] += 1
+        self._enqueue(job)
+
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Queued jobs are skipped; running ones finish in their thread
+            future.cancel()
+            raise
+
+    def _enqueue(self, job: _Job) -> None:
+        """Queue a job and start calls while slots are free."""
+        heapq.heappush(self._queue, (job.priority, next(self._sequence), job))
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start queued jobs, highest priority first, up to the concurrency limit."""
+        while self._queue and self._running < self.max_concurrency:
+            _, _, job = heapq.heappop(self._queue)
+            if job.future.done():
+                self.stats["cancelled"] += 1
+                continue
+            self._running += 1
+            asyncio.ensure_future(self._execute(job))
+
+    async def _execute(self, job: _Job) -> None:
+        """Run one attempt of a job and settle or reschedule it."""
+        loop = asyncio.get_running_loop()
+        job.attempts += 1
+        if job.attempts == 1:
+            self._wait_times.append(time.monotonic() - job.queued_at)
+
+        start_time = time.monotonic()
+        retry_delay = None
+        try:
+            result = await asyncio.wait_for(loop.run_in_executor(self._pool, job.func), job.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self.stats["failed"] += 1
+            logger.warning(f"Earth Engine call timed out after {job.timeout:.0f} s")
+            self._settle(job, error=asyncio.TimeoutError(f"Earth Engine call timed out after {job.timeout:.0f} s"))
+        except Exception as e:
+            if is_transient_error(e) and job.attempts <= self.max_retries and not job.future.done():
+                self.stats["retries"] += 1
+                retry_delay = min(self.max_backoff, self.backoff * (2 ** (job.attempts - 1)))
+                retry_delay *= random.uniform(0.5, 1.0)
+                logger.info(f"Transient Earth Engine error, retrying in {retry_delay:.1f} s: {e}")
+            else:
+                self.stats["failed"] += 1
+                self._settle(job, error=e)
+        else:
+            self.stats["completed"] += 1
+            self._settle(job, result=result)
+        finally:
+            self._run_times.append(time.monotonic() - start_time)
+            self._running -= 1
+
+        # Retries wait outside the concurrency limit and are queued again
+        if retry_delay is not None:
+            loop.call_later(retry_delay, self._enqueue, job)
+        self._dispatch()
+
+    @staticmethod
+    def _settle(job: _Job, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Resolve a job's future unless its caller has gone away."""
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get execution metrics.
+
+        Returns:
+            Dictionary with call counts, current load and latency percentiles.
+        """
+        def percentiles(samples: Deque[float]) -> Dict[str, float]:
+            if not samples:
+                return {"p50": 0.0, "p95": 0.0}
+            ordered = sorted(samples)
+            return {
+                "p50": round(ordered[len(ordered) // 2] * 1000, 1),
+                "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1)
+            }
+
+        return {
+            **self.stats,
+            "running": self._running,
+            "queued": len(self._queue),
+            "max_concurrency": self.max_concurrency,
+            "queue_wait_ms": percentiles(self._wait_times),
+            "run_time_ms": percentiles(self._run_times)
+        }
+
+    def shutdown(self) -> None:
+        """Stop the thread pool without waiting for running calls."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+_ee_executor = None
+
+
+def get_ee_executor() -> EEExecutor:
+    """
+    Get the Earth Engine executor configured under tools.tool_config.earth_engine.
+
+    Returns:
+        EEExecutor instance.
+    """
+    global _ee_executor
+
+    if _ee_executor is None:
+        tool_config = get_config().get_tool_config().get("tool_config", {})
+        ee_config = tool_config.get("earth_engine", {})
+        _ee_executor = EEExecutor(
+            max_workers=ee_config.get("max_workers", 8),
+            max_concurrency=ee_config.get("max_concurrency", 6),
+            timeout=ee_config.get("timeout", tool_config.get("max_execution_time", 120)),
+            max_retries=ee_config.get("max_retries", 3)
+        )
+
+    return _ee_executor
+
+
+def get_ee_metrics() -> Dict[str, Any]:
+    """
+    Get Earth Engine execution metrics.
+
+    Returns:
+        Executor metrics, or an empty dictionary if no call has been made.
+    """
+    return _ee_executor.get_metrics() if _ee_executor is not None else {}
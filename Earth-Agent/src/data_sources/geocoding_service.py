@@ -0,0 +1,243 @@
+"""
+Geocoding service for the GIS AI Agent.
+
+This module provides a shared asynchronous front end to the Nominatim geocoder.
+Blocking geopy calls run in a thread pool, requests are throttled to respect
+Nominatim's usage policy (one request per second), results are cached by
+normalized place name, and concurrent lookups of the same place are coalesced
+into a single request.
+"""
+
+import re
+import logging
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
+from geopy.geocoders import Nominatim
+from geopy.location import Location
+
+from ..utils.cache import Cache, get_cache
+from ..utils.security import RateLimiter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache lifetimes: places rarely move, misses may be typos fixed upstream later
+FOUND_TTL = 30 * 24 * 3600
+NOT_FOUND_TTL = 3600
+
+_COORDINATES_PATTERN = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a place name so that equivalent spellings share a cache entry.
+
+    Args:
+        query: Place name or address.
+
+    Returns:
+        Lower-cased query with collapsed whitespace and no surrounding punctuation.
+    """
+    return " ".join(query.lower().split()).strip(" ,.;")
+
+
+def parse_coordinates(text: str) -> Optional[Tuple[float, float]]:
+    """
+    Parse a "latitude,longitude" string.
+
+    Args:
+        text: Text to parse.
+
+    Returns:
+        (latitude, longitude) tuple, or None if the text is not a valid coordinate pair.
+    """
+    match = _COORDINATES_PATTERN.match(text or "")
+    if not match:
+        return None
+    latitude, longitude = float(match.group(1)), float(match.group(2))
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+class GeocodingService:
+    """Asynchronous, rate-limited and cached geocoding service."""
+
+    def __init__(self,
+                 geocoder: Optional[Any] = None,
+                 cache: Optional[Cache] = None,
+                 requests_per_second: float = 1.0,
+                 timeout: float = 10.0,
+                 max_workers: int = 2):
+        """
+        Initialize the geocoding service.
+
+        Args:
+            geocoder: geopy geocoder to use. Defaults to Nominatim.
+            cache: Persistent cache for results. Defaults to the shared cache.
+            requests_per_second: Maximum rate of upstream geocoding requests.
+            timeout: Timeout of a single upstream request in seconds.
+            max_workers: Number of threads running blocking geocoder calls.
+        """
+        self.geocoder = geocoder or Nominatim(user_agent="gis_agent")
+        self.cache = cache or get_cache()
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(rate=requests_per_second, per=1.0, burst=1)
+        self._rate_lock = asyncio.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="geocoder")
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0}
+
+    async def geocode(self, query: str) -> Optional[Location]:
+        """
+        Geocode a place name.
+
+        Results include address details, so a single cached entry serves
+        every caller.
+
+        Args:
+            query: Place name or address.
+
+        Returns:
+            The geopy Location, or None if the place was not found.
+
+        Raises:
+            geopy.exc.GeopyError: If the upstream geocoder failed.
+        """
+        key = normalize_query(query)
+        if not key:
+            return None
+
+        cached = self.cache.get(("geocode", key))
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return self._from_cache(cached)
+
+        # Coalesce concurrent lookups of the same place. The lookup runs as its
+        # own task, so cancelling one caller doesn't strand the others
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._lookup(key, query))
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._lookup_done, key))
+        return await asyncio.shield(task)
+
+    async def _lookup(self, key: str, query: str) -> Optional[Location]:
+        """Geocode a place upstream and cache the result."""
+        location = await self._request(query)
+        self.cache.set(
+            ("geocode", key),
+            self._to_cache(location),
+            ttl=FOUND_TTL if location else NOT_FOUND_TTL
+        )
+        return location
+
+    def _lookup_done(self, key: str, task: asyncio.Task) -> None:
+        """Forget a finished lookup."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def geocode_many(self, queries: List[str]) -> Dict[str, Optional[Location]]:
+        """
+        Geocode several place names, each distinct place at most once.
+
+        Args:
+            queries: Place names or addresses.
+
+        Returns:
+            Dictionary mapping each query to its Location, or None if it was
+            not found or could not be geocoded.
+        """
+        unique: Dict[str, str] = {}
+        for query in queries:
+            unique.setdefault(normalize_query(query), query)
+
+        results = await asyncio.gather(
+            *(self.geocode(query) for query in unique.values()),
+            return_exceptions=True
+        )
+
+        by_key: Dict[str, Optional[Location]] = {}
+        for key, result in zip(unique, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error geocoding '{unique[key]}': {result}")
+                result = None
+            by_key[key] = result
+
+        return {query: by_key[normalize_query(query)] for query in queries}
+
+    async def resolve_coordinates(self, location: str) -> Optional[Tuple[float, float]]:
+        """
+        Resolve a location to coordinates, geocoding only if needed.
+
+        Args:
+            location: Place name or "latitude,longitude" string.
+
+        Returns:
+            (latitude, longitude) tuple, or None if the place was not found.
+        """
+        coordinates = parse_coordinates(location)
+        if coordinates:
+            return coordinates
+
+        result = await self.geocode(location)
+        return (result.latitude, result.longitude) if result else None
+
+    async def _request(self, query: str) -> Optional[Location]:
+        """
+        Send one throttled request to the upstream geocoder off the event loop.
+
+        Args:
+            query: Place name or address.
+
+        Returns:
+            The geopy Location, or None if the place was not found.
+        """
+        async with self._rate_lock:
+            while not await self.rate_limiter.wait_for_token("geocoder"):
+                pass
+
+        self.stats["requests"] += 1
+        call = partial(self.geocoder.geocode, query, exactly_one=True, addressdetails=True, timeout=self.timeout)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    @staticmethod
+    def _to_cache(location: Optional[Location]) -> Dict[str, Any]:
+        """Convert a geocoding result into a JSON-serializable cache entry."""
+        if location is None:
+            return {"found": False}
+        return {
+            "found": True,
+            "address": location.address,
+            "latitude": location.latitude,
+            "longitude": location.longitude,
+            "raw": location.raw
+        }
+
+    @staticmethod
+    def _from_cache(entry: Dict[str, Any]) -> Optional[Location]:
+        """Rebuild a geocoding result from a cache entry."""
+        if not entry.get("found"):
+            return None
+        return Location(entry["address"], (entry["latitude"], entry["longitude"]), entry.get("raw", {}))
+
+
+# Singleton instance
+_geocoding_service = None
+
+
+def get_geocoding_service() -> GeocodingService:
+    """Get the geocoding service instance."""
+    global _geocoding_service
+
+    if _geocoding_service is None:
+        _geocoding_service = GeocodingService()
+
+    return _geocoding_service
@@ -12,9 +12,10 @@ import asyncio
 import tempfile
 import os
 from pathlib import Path
-import aiohttp
 import time
 from ..config import get_config
+from ..utils.http_client import get_http_client
+from .geocoding_service import get_geocoding_service
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -23,11 +24,17 @@ logger = logging.getLogger(__name__)
 class OpenWeatherMapClient:
     """Client for interacting with the OpenWeatherMap API."""
 
-    def __init__(self):
-        """Initialize the OpenWeatherMap client."""
+    def __init__(self, base_url: str = "https://api.openweathermap.org/data/2.5"):
+        """
+        Initialize the OpenWeatherMap client.
+
+        Args:
+            base_url: API base URL.
+        """
         self.config = get_config()
         self.api_key = None
-        self.base_url = "https://api.openweathermap.org/data/2.5"
+        self.base_url = base_url
+        self.http = get_http_client("openweathermap")
         self._get_api_key()
 
     def _get_api_key(self) -> None:
@@ -43,6 +50,29 @@ class OpenWeatherMapClient:
         if not self.api_key:
             logger.warning("No OpenWeatherMap API key found. Some features may not work.")
 
+    async def _resolve_location(self, location: str) -> Dict[str, Any]:
+        """
+        Resolve a location to OpenWeatherMap query parameters.
+
+        Place names are resolved through the shared geocoding service, so
+        repeated lookups are served from its cache.
+
+        Args:
+            location: Location name or coordinates (lat,lon).
+
+        Returns:
+            Dictionary with 'lat' and 'lon', or with 'q' if the name could not be geocoded.
+        """
+        try:
+            coordinates = await get_geocoding_service().resolve_coordinates(location)
+        except Exception as e:
+            logger.warning(f"Geocoding failed for '{location}', using OpenWeatherMap name lookup: {e}")
+            coordinates = None
+
+        if coordinates:
+            return {"lat": coordinates[0], "lon": coordinates[1]}
+        return {"q": location}
+
     async def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Make a request to the OpenWeatherMap API.
@@ -61,14 +91,12 @@ class OpenWeatherMapClient:
         params["appid"] = self.api_key
         
         url = f"{self.base_url}/{endpoint}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"OpenWeatherMap API error: {error_text}")
-                    raise Exception(f"OpenWeatherMap API error: {response.status} - {error_text}")
-                
-                return await response.json()
+        response = await self.http.request("get", url, params=params)
+        if response.status != 200:
+            logger.error(f"OpenWeatherMap API error: {response.text}")
+            raise Exception(f"OpenWeatherMap API error: {response.status} - {response.text}")
+        
+        return response.json()
 
     async def get_current_weather(self, location: str, units: str = "metric") -> Dict[str, Any]:
         """
@@ -84,15 +112,7 @@ class OpenWeatherMapClient:
         try:
             params = {"units": units}
             
-            # Check if location is coordinates
-            if "," in location and all(part.replace(".", "").replace("-", "").isdigit() 
-                                     for part in location.split(",")):
-                lat, lon = map(float, location.split(","))
-                params["lat"] = lat
-                params["lon"] = lon
-            else:
-                # Location name
-                params["q"] = location
+            params.update(await self._resolve_location(location))
             
             # Make API request
             result = await self._make_request("weather", params)
@@ -157,15 +177,7 @@ class OpenWeatherMapClient:
         try:
             params = {"units": units}
             
-            # Check if location is coordinates
-            if "," in location and all(part.replace(".", "").replace("-", "").isdigit() 
-                                     for part in location.split(",")):
-                lat, lon = map(float, location.split(","))
-                params["lat"] = lat
-                params["lon"] = lon
-            else:
-                # Location name
-                params["q"] = location
+            params.update(await self._resolve_location(location))
             
             # Make API request
             result = await self._make_request("forecast", params)
@@ -228,20 +240,16 @@ class OpenWeatherMapClient:
             Air pollution data.
         """
         try:
-            params = {}
-            
             # OpenWeatherMap air pollution API requires coordinates
-            if "," in location and all(part.replace(".", "").replace("-", "").isdigit() 
-                                     for part in location.split(",")):
-                lat, lon = map(float, location.split(","))
-                params["lat"] = lat
-                params["lon"] = lon
-            else:
-                # For location names, first get coordinates
+            params = await self._resolve_location(location)
+            if "q" in params:
+                # Geocoding failed, fall back to OpenWeatherMap's own name lookup
                 weather_data = await self.get_current_weather(location)
                 coords = weather_data.get("location", {}).get("coordinates", {})
-                params["lat"] = coords.get("latitude", 0)
-                params["lon"] = coords.get("longitude", 0)
+                params = {
+                    "lat": coords.get("latitude", 0),
+                    "lon": coords.get("longitude", 0)
+                }
             
             # Make API request
             result = await self._make_request("air_pollution", params)
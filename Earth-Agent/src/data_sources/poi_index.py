@@ -0,0 +1,551 @@
+"""
+Local points-of-interest index for the GIS AI Agent.
+
+This module ingests an OpenStreetMap extract (GeoJSON, or PBF when pyosmium is
+installed) into a compact, array-backed grid index keyed by tag category, and
+answers within-radius and k-nearest queries with a haversine refinement.
+
+The index is stored as a directory of NumPy arrays that are memory-mapped when
+loaded, so several worker processes share a single copy of the index in the
+page cache.
+
+Usage:
+    python -m src.data_sources.poi_index <extract.geojson|extract.osm.pbf> [output_dir]
+"""
+
+import re
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterator, Tuple, Union
+import numpy as np
+
+from ..config import get_config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.195
+DEFAULT_CELL_SIZE = 0.05  # degrees, about 5.5 km of latitude
+
+# OSM keys whose value is used as the POI category, in order of precedence
+CATEGORY_TAGS = (
+    "amenity", "leisure", "shop", "tourism", "healthcare", "historic",
+    "natural", "office", "craft", "public_transport", "railway", "aeroway", "emergency"
+)
+
+# Default location of the index, relative to the project root
+DEFAULT_INDEX_DIR = "data/poi_index"
+
+_ARRAY_FILES = ("keys", "latitudes", "longitudes", "categories", "osm_ids", "name_offsets")
+
+
+def tag_category(tags: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the POI category of an OSM object from its tags.
+
+    Args:
+        tags: OSM tags.
+
+    Returns:
+        The category (e.g. 'hospital', 'park'), or None if the object is not a POI.
+    """
+    for key in CATEGORY_TAGS:
+        value = tags.get(key)
+        if value and value not in ("yes", "no"):
+            return normalize_category(str(value).split(";")[0])
+    return None
+
+
+def normalize_category(name: str) -> str:
+    """
+    Normalize a category or feature type name.
+
+    Args:
+        name: Category name, e.g. 'Fast food'.
+
+    Returns:
+        Lower-case name with underscores, e.g. 'fast_food'.
+    """
+    return re.sub(r"[\s\-]+", "_", name.strip().lower())
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Compute great-circle distances from one point to many points.
+
+    Inputs are broadcast against each other, so passing (N, 1) origin arrays
+    and (M,) target arrays yields an N x M distance matrix.
+
+    Args:
+        latitude: Latitude of the origin in degrees.
+        longitude: Longitude of the origin in degrees.
+        latitudes: Latitudes of the targets in degrees.
+        longitudes: Longitudes of the targets in degrees.
+
+    Returns:
+        Distances in kilometers.
+    """
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _grid_shape(cell_size: float) -> Tuple[int, int]:
+    """Get the number of grid rows and columns for a cell size."""
+    return int(np.ceil(180.0 / cell_size)), int(np.ceil(360.0 / cell_size))
+
+
+def _cell_ids(latitudes: np.ndarray, longitudes: np.ndarray, cell_size: float) -> np.ndarray:
+    """Get the grid cell of each point."""
+    rows, cols = _grid_shape(cell_size)
+    row = np.clip(((np.asarray(latitudes) + 90.0) // cell_size).astype(np.int64), 0, rows - 1)
+    col = np.clip(((np.asarray(longitudes) + 180.0) // cell_size).astype(np.int64), 0, cols - 1)
+    return row * cols + col
+
+
+def write_poi_index(output_dir: Union[str, Path],
+                    latitudes: np.ndarray,
+                    longitudes: np.ndarray,
+                    category_codes: np.ndarray,
+                    category_names: List[str],
+                    names: Optional[List[str]] = None,
+                    osm_ids: Optional[np.ndarray] = None,
+                    cell_size: float = DEFAULT_CELL_SIZE) -> Dict[str, Any]:
+    """
+    Write a POI index from arrays.
+
+    Points are sorted by (category, grid cell), so the points of one category
+    in one cell form a contiguous run located by binary search.
+
+    Args:
+        output_dir: Directory to write the index to.
+        latitudes: POI latitudes in degrees.
+        longitudes: POI longitudes in degrees.
+        category_codes: Index into category_names for each POI.
+        category_names: Category names.
+        names: Optional POI names.
+        osm_ids: Optional OSM identifiers.
+        cell_size: Grid cell size in degrees.
+
+    Returns:
+        The index metadata.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    latitudes = np.asarray(latitudes, dtype=np.float32)
+    longitudes = np.asarray(longitudes, dtype=np.float32)
+    categories = np.asarray(category_codes, dtype=np.int32)
+    count = len(latitudes)
+
+    rows, cols = _grid_shape(cell_size)
+    keys = categories.astype(np.int64) * (rows * cols) + _cell_ids(latitudes, longitudes, cell_size)
+    order = np.argsort(keys, kind="stable")
+
+    np.save(output_dir / "keys.npy", keys[order])
+    np.save(output_dir / "latitudes.npy", latitudes[order])
+    np.save(output_dir / "longitudes.npy", longitudes[order])
+    np.save(output_dir / "categories.npy", categories[order])
+    ids = np.asarray(osm_ids, dtype=np.int64) if osm_ids is not None else np.zeros(count, dtype=np.int64)
+    np.save(output_dir / "osm_ids.npy", ids[order])
+
+    # Names are stored as one UTF-8 blob with offsets
+    encoded = [(names[i] or "").encode("utf-8") for i in order] if names is not None else [b""] * count
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    if count:
+        offsets[1:] = np.cumsum([len(name) for name in encoded])
+    np.save(output_dir / "name_offsets.npy", offsets)
+    with open(output_dir / "names.bin", "wb") as f:
+        f.write(b"".join(encoded))
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "count": count,
+        "cell_size": cell_size,
+        "categories": list(category_names),
+        "category_counts": np.bincount(categories, minlength=len(category_names)).tolist() if count else [0] * len(category_names),
+        "created_at": time.time()
+    }
+    with open(output_dir / "meta.json", "w") as f:
+        json.dump(meta, f)
+
+    logger.info(f"Wrote POI index with {count} points to {output_dir}")
+    return meta
+
+
+def _parse_osm_id(value: Any) -> int:
+    """Extract the numeric id from values such as 'node/123' or 123."""
+    match = re.search(r"\d+", str(value or ""))
+    return int(match.group()) if match else 0
+
+
+def _geometry_center(geometry: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Get a representative (latitude, longitude) for a GeoJSON geometry."""
+    if not geometry or not geometry.get("coordinates"):
+        return None
+    positions = _flatten_coordinates(geometry["coordinates"])
+    if not positions:
+        return None
+    coordinates = np.asarray(positions, dtype=np.float64)
+    return float(coordinates[:, 1].mean()), float(coordinates[:, 0].mean())
+
+
+def _flatten_coordinates(coordinates: Any) -> List[List[float]]:
+    """Flatten nested GeoJSON coordinates into a list of positions."""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [coordinates[:2]]
+    positions: List[List[float]] = []
+    for item in coordinates:
+        positions.extend(_flatten_coordinates(item))
+    return positions
+
+
+def _read_geojson(path: Path) -> Iterator[Tuple[int, float, float, str, str]]:
+    """Yield (osm_id, latitude, longitude, category, name) from a GeoJSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix in (".geojsonl", ".ndjson", ".jsonl"):
+            features = (json.loads(line) for line in f if line.strip())
+        else:
+            features = iter(json.load(f).get("features", []))
+
+        for feature in features:
+            properties = feature.get("properties") or {}
+            tags = properties.get("tags") if isinstance(properties.get("tags"), dict) else properties
+            category = tag_category(tags)
+            center = _geometry_center(feature.get("geometry"))
+            if category and center:
+                osm_id = _parse_osm_id(feature.get("id") or properties.get("@id") or properties.get("osm_id"))
+                yield osm_id, center[0], center[1], category, tags.get("name", "")
+
+
+def _read_pbf(path: Path) -> Iterator[Tuple[int, float, float, str, str]]:
+    """Yield (osm_id, latitude, longitude, category, name) from tagged nodes of a PBF file."""
+    try:
+        import osmium
+    except ImportError:
+        raise ImportError(
+            "Reading PBF extracts requires pyosmium (pip install osmium). "
+            "Alternatively convert the extract with 'osmium export -f geojsonseq'."
+        )
+
+    records: List[Tuple[int, float, float, str, str]] = []
+
+    class _Handler(osmium.SimpleHandler):
+        def node(self, node):
+            tags = {tag.k: tag.v for tag in node.tags}
+            category = tag_category(tags)
+            if category and node.location.valid():
+                records.append((node.id, node.location.lat, node.location.lon, category, tags.get("name", "")))
+
+    _Handler().apply_file(str(path))
+    return iter(records)
+
+
+def build_poi_index(source: Union[str, Path],
+                    output_dir: Union[str, Path],
+                    cell_size: float = DEFAULT_CELL_SIZE) -> Dict[str, Any]:
+    """
+    Build a POI index from an OpenStreetMap extract.
+
+    Args:
+        source: GeoJSON (FeatureCollection or one feature per line) or .osm.pbf file.
+        output_dir: Directory to write the index to.
+        cell_size: Grid cell size in degrees.
+
+    Returns:
+        The index metadata.
+    """
+    source = Path(source)
+    reader = _read_pbf if source.name.endswith(".pbf") else _read_geojson
+
+    category_ids: Dict[str, int] = {}
+    osm_ids, latitudes, longitudes, categories, names = [], [], [], [], []
+    for osm_id, latitude, longitude, category, name in reader(source):
+        osm_ids.append(osm_id)
+        latitudes.append(latitude)
+        longitudes.append(longitude)
+        categories.append(category_ids.setdefault(category, len(category_ids)))
+        names.append(name)
+
+    return write_poi_index(
+        output_dir,
+        np.array(latitudes, dtype=np.float32),
+        np.array(longitudes, dtype=np.float32),
+        np.array(categories, dtype=np.int32),
+        list(category_ids),
+        names=names,
+        osm_ids=np.array(osm_ids, dtype=np.int64),
+        cell_size=cell_size
+    )
+
+
+class POIIndex:
+    """Memory-mapped grid index of points of interest."""
+
+    def __init__(self, index_dir: Union[str, Path], mmap: bool = True):
+        """
+        Load a POI index.
+
+        Args:
+            index_dir: Directory written by write_poi_index().
+            mmap: Whether to memory-map the arrays instead of reading them into memory.
+        """
+        self.index_dir = Path(index_dir)
+        with open(self.index_dir / "meta.json", "r") as f:
+            self.meta = json.load(f)
+
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported POI index version: {self.meta.get('version')}")
+
+        mmap_mode = "r" if mmap else None
+        arrays = {name: np.load(self.index_dir / f"{name}.npy", mmap_mode=mmap_mode) for name in _ARRAY_FILES}
+        self.keys = arrays["keys"]
+        self.latitudes = arrays["latitudes"]
+        self.longitudes = arrays["longitudes"]
+        self.categories = arrays["categories"]
+        self.osm_ids = arrays["osm_ids"]
+        self.name_offsets = arrays["name_offsets"]
+
+        names_path = self.index_dir / "names.bin"
+        if names_path.stat().st_size and mmap:
+            self.names = np.memmap(names_path, dtype=np.uint8, mode="r")
+        else:
+            self.names = np.fromfile(names_path, dtype=np.uint8)
+
+        self.cell_size = float(self.meta["cell_size"])
+        self.rows, self.cols = _grid_shape(self.cell_size)
+        self.category_names: List[str] = self.meta["categories"]
+        self.category_ids = {name: i for i, name in enumerate(self.category_names)}
+
+    def __len__(self) -> int:
+        """Number of indexed POIs."""
+        return int(self.meta["count"])
+
+    def resolve_category(self, feature_type: str) -> Optional[str]:
+        """
+        Map a free-text feature type to an indexed category.
+
+        Plural forms are accepted, e.g. 'hospitals' or 'Fast foods'.
+
+        Args:
+            feature_type: Feature type as requested by the user.
+
+        Returns:
+            The matching category, or None if no category matches.
+        """
+        name = normalize_category(feature_type)
+        candidates = [name]
+        if name.endswith("ies"):
+            candidates.append(name[:-3] + "y")
+        if name.endswith("es"):
+            candidates.append(name[:-2])
+        if name.endswith("s"):
+            candidates.append(name[:-1])
+        for candidate in candidates:
+            if candidate in self.category_ids:
+                return candidate
+        return None
+
+    def within_radius(self,
+                      latitude: float,
+                      longitude: float,
+                      radius_km: float,
+                      category: str,
+                      limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Find the POIs of a category within a radius, nearest first.
+
+        Args:
+            latitude: Latitude of the center in degrees.
+            longitude: Longitude of the center in degrees.
+            radius_km: Search radius in kilometers.
+            category: Category name, as returned by resolve_category().
+            limit: Maximum number of POIs to return.
+
+        Returns:
+            List of POI dictionaries with their distance in kilometers.
+        """
+        indices, distances = self._search(latitude, longitude, radius_km, category)
+        order = np.argsort(distances, kind="stable")[:limit]
+        return self._records(indices[order], distances[order])
+
+    def nearest(self,
+                latitude: float,
+                longitude: float,
+                category: str,
+                k: int = 10,
+                max_radius_km: float = 100.0) -> List[Dict[str, Any]]:
+        """
+        Find the k nearest POIs of a category.
+
+        The search radius starts at one grid cell and doubles until k POIs
+        are found or max_radius_km is reached.
+
+        Args:
+            latitude: Latitude of the origin in degrees.
+            longitude: Longitude of the origin in degrees.
+            category: Category name, as returned by resolve_category().
+            k: Number of POIs to return.
+            max_radius_km: Maximum search radius in kilometers.
+
+        Returns:
+            List of up to k POI dictionaries with their distance in kilometers.
+        """
+        radius = min(self.cell_size * KM_PER_DEGREE, max_radius_km)
+        while True:
+            indices, distances = self._search(latitude, longitude, radius, category)
+            if len(indices) >= k or radius >= max_radius_km:
+                break
+            radius = min(radius * 2, max_radius_km)
+
+        order = np.argsort(distances, kind="stable")[:k]
+        return self._records(indices[order], distances[order])
+
+    def _search(self, latitude: float, longitude: float, radius_km: float, category: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the POIs of a category within a radius.
+
+        Args:
+            latitude: Latitude of the center in degrees.
+            longitude: Longitude of the center in degrees.
+            radius_km: Search radius in kilometers.
+            category: Category name.
+
+        Returns:
+            Indices of the matching POIs and their distances in kilometers.
+        """
+        category_id = self.category_ids.get(category)
+        if category_id is None or radius_km <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        # The category's POIs are one contiguous run of the sorted keys
+        cell_count = self.rows * self.cols
+        category_start, category_end = np.searchsorted(
+            self.keys, [category_id * cell_count, (category_id + 1) * cell_count], side="left"
+        )
+        rows, cols = self._box_cells(latitude, longitude, radius_km)
+
+        if len(rows) * len(cols) >= category_end - category_start:
+            # The search box spans more cells than the category has POIs: scan them all
+            candidates = np.arange(category_start, category_end)
+        else:
+            # Runs of the category in every grid cell overlapping the search box
+            query_keys = category_id * cell_count + (rows[:, None] * self.cols + cols[None, :]).ravel()
+            starts = np.searchsorted(self.keys, query_keys, side="left")
+            ends = np.searchsorted(self.keys, query_keys, side="right")
+            runs = ends > starts
+            if not runs.any():
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+            candidates = np.concatenate([np.arange(s, e) for s, e in zip(starts[runs], ends[runs])])
+
+        # Exact refinement
+        distances = haversine_km(latitude, longitude, self.latitudes[candidates], self.longitudes[candidates])
+        inside = distances <= radius_km
+        return candidates[inside], distances[inside]
+
+    def _box_cells(self, latitude: float, longitude: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the grid rows and columns overlapping the bounding box of a search circle.
+
+        Args:
+            latitude: Latitude of the center in degrees.
+            longitude: Longitude of the center in degrees.
+            radius_km: Search radius in kilometers.
+
+        Returns:
+            Row and column indices; the box covers every combination of the two.
+        """
+        dlat = radius_km / KM_PER_DEGREE
+        row_min = max(0, int((latitude - dlat + 90.0) // self.cell_size))
+        row_max = min(self.rows - 1, int((latitude + dlat + 90.0) // self.cell_size))
+        rows = np.arange(row_min, row_max + 1, dtype=np.int64)
+
+        # Widest longitude span over the box, wrapping around the antimeridian
+        max_abs_lat = min(89.9, abs(latitude) + dlat)
+        dlon = radius_km / (KM_PER_DEGREE * np.cos(np.radians(max_abs_lat)))
+        if dlon >= 180.0:
+            cols = np.arange(self.cols, dtype=np.int64)
+        else:
+            col_min = int((longitude - dlon + 180.0) // self.cell_size)
+            col_max = int((longitude + dlon + 180.0) // self.cell_size)
+            cols = np.unique(np.arange(col_min, col_max + 1, dtype=np.int64) % self.cols)
+
+        return rows, cols
+
+    def _name(self, index: int) -> str:
+        """Get the name of a POI."""
+        start, end = self.name_offsets[index], self.name_offsets[index + 1]
+        return bytes(self.names[start:end]).decode("utf-8") if end > start else ""
+
+    def _records(self, indices: np.ndarray, distances: np.ndarray) -> List[Dict[str, Any]]:
+        """Convert matching POIs into result dictionaries."""
+        return [
+            {
+                "name": self._name(int(i)),
+                "category": self.category_names[int(self.categories[i])],
+                "osm_id": int(self.osm_ids[i]),
+                "coordinates": {
+                    "latitude": round(float(self.latitudes[i]), 6),
+                    "longitude": round(float(self.longitudes[i]), 6)
+                },
+                "distance_km": round(float(distance), 3)
+            }
+            for i, distance in zip(indices, distances)
+        ]
+
+
+# Singleton instance
+_poi_index = None
+
+
+def get_poi_index() -> Optional[POIIndex]:
+    """
+    Get the POI index configured under data.poi_index_dir.
+
+    Returns:
+        The POIIndex instance, or None if no index has been built.
+    """
+    global _poi_index
+
+    if _poi_index is None:
+        data_config = get_config().get_server_config().get("data", {})
+        index_dir = Path(data_config.get("poi_index_dir", DEFAULT_INDEX_DIR))
+        if not index_dir.is_absolute():
+            index_dir = Path(__file__).parent.parent.parent / index_dir
+
+        if not (index_dir / "meta.json").exists():
+            logger.debug(f"No POI index found in {index_dir}")
+            return None
+
+        _poi_index = POIIndex(index_dir)
+        logger.info(f"Loaded POI index with {len(_poi_index)} points from {index_dir}")
+
+    return _poi_index
+
+
+def main() -> None:
+    """Build a POI index from the command line."""
+    parser = argparse.ArgumentParser(description="Build the local POI index from an OpenStreetMap extract")
+    parser.add_argument("source", help="GeoJSON or .osm.pbf extract")
+    parser.add_argument("output_dir", nargs="?", help=f"Output directory (default: {DEFAULT_INDEX_DIR})")
+    parser.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE, help="Grid cell size in degrees")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    output_dir = args.output_dir or Path(__file__).parent.parent.parent / DEFAULT_INDEX_DIR
+    start_time = time.time()
+    meta = build_poi_index(args.source, output_dir, args.cell_size)
+    print(f"Indexed {meta['count']} POIs in {len(meta['categories'])} categories "
+          f"in {time.time() - start_time:.1f}s -> {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ allowing the agent to use Gemini's language capabilities.
 import os
 import logging
 import google.generativeai as genai
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Union, AsyncIterator
 import asyncio
 
 from ..config import get_config
@@ -247,6 +247,81 @@ class GeminiClient:
             self._initialize_model()
         
         # Format messages for Gemini API
+        formatted_messages = self._format_messages(messages)
+        generation_config = self._chat_generation_config(temperature, max_tokens)
+        
+        try:
+            # Generate response
+            if tools:
+                # If tools are provided, enable function calling
+                response = await self.model.generate_content_async(
+                    formatted_messages,
+                    generation_config=generation_config,
+                    tools=tools
+                )
+            else:
+                # Standard chat without tools
+                response = await self.model.generate_content_async(
+                    formatted_messages,
+                    generation_config=generation_config
+                )
+                
+            return self._process_response(response)
+        except Exception as e:
+            logger.error(f"Error in chat with Gemini: {e}")
+            raise
+
+    async def chat_stream(self,
+            messages: List[Dict[str, Any]],
+            temperature: Optional[float] = None,
+            max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Have a chat conversation with the Gemini model, streaming the reply.
+
+        Args:
+            messages: List of messages in the conversation so far.
+                     Each message should have 'role' (user or assistant) and 'content'.
+            temperature: Temperature for sampling. Higher values make output more random.
+            max_tokens: Maximum number of tokens to generate.
+
+        Yields:
+            Text chunks of the response as they arrive.
+        """
+        if not self.model:
+            self._initialize_model()
+        
+        formatted_messages = self._format_messages(messages)
+        generation_config = self._chat_generation_config(temperature, max_tokens)
+        
+        try:
+            response = await self.model.generate_content_async(
+                formatted_messages,
+                generation_config=generation_config,
+                stream=True
+            )
+            
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except (ValueError, AttributeError):
+                    # Chunks without text parts (e.g. safety or finish metadata)
+                    continue
+                if text:
+                    yield text
+        except Exception as e:
+            logger.error(f"Error in streaming chat with Gemini: {e}")
+            raise
+
+    def _format_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Format conversation messages for the Gemini API.
+
+        Args:
+            messages: List of messages with 'role' and 'content'.
+
+        Returns:
+            List of Gemini content dictionaries.
+        """
         formatted_messages = []
         
         for message in messages:
@@ -262,6 +337,21 @@ class GeminiClient:
                 if not formatted_messages:
                     formatted_messages.append({"role": "user", "parts": [{"text": f"System: {content}"}]})
         
+        return formatted_messages
+
+    def _chat_generation_config(self,
+                                temperature: Optional[float],
+                                max_tokens: Optional[int]) -> "genai.GenerationConfig":
+        """
+        Build the generation config for chat requests.
+
+        Args:
+            temperature: Temperature for sampling, or None for the configured default.
+            max_tokens: Maximum number of tokens, or None for the configured default.
+
+        Returns:
+            Gemini generation config.
+        """
         # Get default values from configuration if not provided
         model_config = self.config.get_model_config()
         if temperature is None:
@@ -269,33 +359,12 @@ class GeminiClient:
         if max_tokens is None:
             max_tokens = model_config.get("max_tokens", 4096)
         
-        generation_config = genai.GenerationConfig(
+        return genai.GenerationConfig(
             temperature=temperature,
             top_p=model_config.get("top_p", 0.95),
             top_k=model_config.get("top_k", 40),
             max_output_tokens=max_tokens
         )
-        
-        try:
-            # Generate response
-            if tools:
-                # If tools are provided, enable function calling
-                response = await self.model.generate_content_async(
-                    formatted_messages,
-                    generation_config=generation_config,
-                    tools=tools
-                )
-            else:
-                # Standard chat without tools
-                response = await self.model.generate_content_async(
-                    formatted_messages,
-                    generation_config=generation_config
-                )
-                
-            return self._process_response(response)
-        except Exception as e:
-            logger.error(f"Error in chat with Gemini: {e}")
-            raise
 
 # Create a singleton instance
 gemini_client = GeminiClient()
@@ -0,0 +1,135 @@
+"""
+Prompt-size helpers for the Gemini client.
+
+This module provides approximate token counting and compact digests of tool
+results, so that large tool outputs can be sent to the model (or kept in the
+conversation history) within a fixed token budget.
+"""
+
+import json
+import logging
+from typing import Any, Dict, List
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Rough average for English text and JSON with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+# Progressively tighter (max_items, max_string, max_depth) limits tried in turn
+_SHRINK_LEVELS = [
+    (20, 400, 6),
+    (10, 200, 5),
+    (5, 100, 4),
+    (3, 60, 3),
+    (2, 40, 2)
+]
+
+
+def estimate_tokens(value: Any) -> int:
+    """
+    Estimate the number of tokens a value occupies in a prompt.
+
+    Args:
+        value: A string, or any JSON-serializable value.
+
+    Returns:
+        Approximate token count.
+    """
+    if not value:
+        return 0
+    text = value if isinstance(value, str) else _to_json(value)
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def compact_tool_result(result: Any, token_budget: int = 800) -> str:
+    """
+    Build a compact JSON digest of a tool result that fits a token budget.
+
+    Long strings are truncated, long lists keep their first items (numeric lists
+    are summarized with count/min/max/mean), and deeply nested values are
+    replaced by size markers. Limits are tightened until the digest fits.
+
+    Args:
+        result: The raw tool result.
+        token_budget: Maximum approximate tokens for the digest.
+
+    Returns:
+        The digest as a JSON string.
+    """
+    digest = _to_json(result)
+    if estimate_tokens(digest) <= token_budget:
+        return digest
+
+    for max_items, max_string, max_depth in _SHRINK_LEVELS:
+        digest = _to_json(_shrink(result, max_items, max_string, max_depth))
+        if estimate_tokens(digest) <= token_budget:
+            return digest
+
+    # Still too large: hard truncate the tightest digest
+    limit = token_budget * CHARS_PER_TOKEN
+    logger.debug(f"Tool result digest truncated to {limit} characters")
+    return digest[:limit] + "...[truncated]"
+
+
+def _to_json(value: Any) -> str:
+    """Serialize a value to compact JSON, falling back to str() for unknown types."""
+    return json.dumps(value, separators=(",", ":"), default=str, ensure_ascii=False)
+
+
+def _shrink(value: Any, max_items: int, max_string: int, max_depth: int, depth: int = 0) -> Any:
+    """
+    Recursively shrink a value to the given limits.
+
+    Args:
+        value: The value to shrink.
+        max_items: Maximum number of list items or dictionary keys to keep.
+        max_string: Maximum string length.
+        max_depth: Maximum nesting depth before values are replaced by markers.
+        depth: Current nesting depth.
+
+    Returns:
+        The shrunk value.
+    """
+    if isinstance(value, str):
+        if len(value) > max_string:
+            return value[:max_string] + f"...(+{len(value) - max_string} chars)"
+        return value
+
+    if isinstance(value, dict):
+        if depth >= max_depth:
+            return f"{{object with {len(value)} keys}}"
+        items = list(value.items())
+        shrunk: Dict[str, Any] = {
+            str(key): _shrink(item, max_items, max_string, max_depth, depth + 1)
+            for key, item in items[:max_items]
+        }
+        if len(items) > max_items:
+            shrunk["..."] = f"+{len(items) - max_items} more keys"
+        return shrunk
+
+    if isinstance(value, (list, tuple)):
+        if depth >= max_depth:
+            return f"[list with {len(value)} items]"
+        if len(value) > max_items and _is_numeric_list(value):
+            return {
+                "count": len(value),
+                "min": min(value),
+                "max": max(value),
+                "mean": round(sum(value) / len(value), 4),
+                "first": list(value[:max_items])
+            }
+        shrunk_list: List[Any] = [
+            _shrink(item, max_items, max_string, max_depth, depth + 1)
+            for item in value[:max_items]
+        ]
+        if len(value) > max_items:
+            shrunk_list.append(f"... +{len(value) - max_items} more items")
+        return shrunk_list
+
+    return value
+
+
+def _is_numeric_list(value: Any) -> bool:
+    """Check whether every item of a list is a (non-boolean) number."""
+    return all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in value)
@@ -5,38 +5,79 @@ This module provides functionality for storing and managing conversation history
 for the Gemini model, allowing for persistent memory across interactions.
 """
 
+import json
 import logging
 import time
-from typing import Dict, List, Any, Optional
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Callable
+
+from .digest import CHARS_PER_TOKEN, compact_tool_result, estimate_tokens
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Summarizer signature: (previous_summary, folded_messages) -> new_summary
+Summarizer = Callable[[str, List[Dict[str, Any]]], str]
+
+
 class ChatHistory:
     """
     Class for managing conversation history for the Gemini model.
-    
+
     This class provides functionality to store and retrieve conversation history,
     organized by session IDs, with support for:
     - Adding messages to history
     - Retrieving history for a specific session
-    - Pruning old or large histories
+    - Tracking approximate token counts per message and per session
+    - Compacting oversized messages (e.g. tool results) into references
+    - Folding old turns into a rolling summary once a token budget is exceeded
+    - Evicting least recently used sessions in O(1)
     - Adding system prompts
     """
-    
-    def __init__(self, max_history_length: int = 20, max_sessions: int = 1000):
+
+    def __init__(self,
+                 max_history_length: int = 20,
+                 max_sessions: int = 1000,
+                 token_budget: int = 4000,
+                 max_message_tokens: int = 1000,
+                 summary_token_budget: int = 500,
+                 min_recent_messages: int = 4,
+                 max_references: int = 10,
+                 summarizer: Optional[Summarizer] = None):
         """
         Initialize the chat history manager.
-        
+
         Args:
             max_history_length: Maximum number of messages to keep per session.
             max_sessions: Maximum number of sessions to track.
+            token_budget: Approximate token budget for a session's history,
+                          including the system prompt and summary.
+            max_message_tokens: Messages above this size are compacted and their
+                                full content is kept as a reference.
+            summary_token_budget: Maximum approximate tokens of the rolling summary.
+            min_recent_messages: Number of recent messages never folded into the summary.
+            max_references: Maximum number of full-content references kept per session.
+            summarizer: Optional callable used to fold old messages into the summary.
+                        Defaults to an extractive summary of the folded turns.
         """
-        self.histories: Dict[str, List[Dict[str, Any]]] = {}
+        # Ordered by last access: the first entry is the least recently used session
+        self.histories: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
         self.session_timestamps: Dict[str, float] = {}
+        self.summaries: Dict[str, str] = {}
+        self.token_counts: Dict[str, int] = {}
+        self.references: Dict[str, "OrderedDict[str, str]"] = {}
+        self.session_prompts: Dict[str, str] = {}
+        self._reference_counters: Dict[str, int] = {}
+
         self.max_history_length = max_history_length
         self.max_sessions = max_sessions
-        
+        self.token_budget = token_budget
+        self.max_message_tokens = max_message_tokens
+        self.summary_token_budget = summary_token_budget
+        self.min_recent_messages = min_recent_messages
+        self.max_references = max_references
+        self.summarizer = summarizer or self._extractive_summary
+
         # System prompt (can be customized)
         self.system_prompt = (
             "You are a helpful GIS and sustainability analysis assistant. "
@@ -44,11 +85,11 @@ class ChatHistory:
             "weather information, environmental metrics, and visualization capabilities. "
             "Provide accurate and helpful responses, and use appropriate tools when needed."
         )
-    
+
     def add_message(self, session_id: str, role: str, content: str) -> None:
         """
         Add a message to the conversation history for a session.
-        
+
         Args:
             session_id: Unique identifier for the conversation session.
             role: Role of the message sender ('user' or 'assistant').
@@ -57,136 +98,305 @@ class ChatHistory:
         if role not in ['user', 'assistant', 'system']:
             logger.warning(f"Invalid role '{role}', defaulting to 'user'")
             role = 'user'
-        
+
         # Initialize history for new sessions with system prompt
         if session_id not in self.histories:
-            self.histories[session_id] = []
-            # Add system prompt if this is a new session
-            self.histories[session_id].append({
-                "role": "system",
-                "content": self.system_prompt
-            })
-        
+            self._create_session(session_id)
+
+        # Keep oversized messages as references with a compact stand-in
+        tokens = estimate_tokens(content)
+        if tokens > self.max_message_tokens:
+            content = self._compact_message(session_id, content)
+            tokens = estimate_tokens(content)
+
         # Add the message
         self.histories[session_id].append({
             "role": role,
-            "content": content
+            "content": content,
+            "tokens": tokens
         })
-        
-        # Update session timestamp
-        self.session_timestamps[session_id] = time.time()
-        
-        # Prune history if needed
-        if len(self.histories[session_id]) > self.max_history_length + 1:  # +1 for system message
-            # Keep system message and trim oldest messages
-            system_message = None
-            if self.histories[session_id][0]["role"] == "system":
-                system_message = self.histories[session_id][0]
-                self.histories[session_id] = self.histories[session_id][-(self.max_history_length):]
-                self.histories[session_id].insert(0, system_message)
-            else:
-                self.histories[session_id] = self.histories[session_id][-(self.max_history_length):]
-        
+        self.token_counts[session_id] += tokens
+
+        self._touch(session_id)
+
+        # Fold old messages into the summary when over the length or token budget
+        self._enforce_budget(session_id)
+
         # Prune old sessions if needed
         if len(self.histories) > self.max_sessions:
             self._prune_old_sessions()
-    
+
     def get_history(self, session_id: str) -> List[Dict[str, Any]]:
         """
         Get the conversation history for a session.
-        
+
         Args:
             session_id: Unique identifier for the conversation session.
-            
+
         Returns:
             List of message dictionaries for the session, or an empty list if no history exists.
         """
         # Update timestamp if session exists
         if session_id in self.histories:
-            self.session_timestamps[session_id] = time.time()
+            self._touch(session_id)
             return self.histories[session_id]
         return []
-    
+
+    def get_token_count(self, session_id: str) -> int:
+        """
+        Get the approximate token count of a session's history.
+
+        Args:
+            session_id: Unique identifier for the conversation session.
+
+        Returns:
+            Approximate number of tokens, or 0 if the session does not exist.
+        """
+        return self.token_counts.get(session_id, 0)
+
+    def get_summary(self, session_id: str) -> str:
+        """
+        Get the rolling summary of turns folded out of a session's history.
+
+        Args:
+            session_id: Unique identifier for the conversation session.
+
+        Returns:
+            The summary text, or an empty string if nothing has been folded yet.
+        """
+        return self.summaries.get(session_id, "")
+
+    def get_reference(self, session_id: str, reference_id: str) -> Optional[str]:
+        """
+        Get the full content of a message that was compacted into a reference.
+
+        Args:
+            session_id: Unique identifier for the conversation session.
+            reference_id: Reference identifier quoted in the compacted message.
+
+        Returns:
+            The original content, or None if the reference is unknown or was evicted.
+        """
+        return self.references.get(session_id, {}).get(reference_id)
+
     def clear_history(self, session_id: str) -> bool:
         """
         Clear the conversation history for a session.
-        
+
         Args:
             session_id: Unique identifier for the conversation session.
-            
+
         Returns:
             True if history was cleared, False if session not found.
         """
         if session_id in self.histories:
-            del self.histories[session_id]
-            if session_id in self.session_timestamps:
-                del self.session_timestamps[session_id]
+            self._remove_session(session_id)
             return True
         return False
-    
+
     def _prune_old_sessions(self) -> None:
         """
-        Remove the oldest sessions when the number of sessions exceeds the maximum.
+        Remove the least recently used sessions when the number of sessions exceeds the maximum.
         """
-        if len(self.histories) <= self.max_sessions:
-            return
-        
-        # Sort sessions by timestamp (oldest first)
-        sorted_sessions = sorted(
-            self.session_timestamps.items(),
-            key=lambda x: x[1]
-        )
-        
-        # Remove oldest sessions until we're under the limit
-        sessions_to_remove = len(self.histories) - self.max_sessions
-        for i in range(sessions_to_remove):
-            if i < len(sorted_sessions):
-                session_id = sorted_sessions[i][0]
-                if session_id in self.histories:
-                    del self.histories[session_id]
-                if session_id in self.session_timestamps:
-                    del self.session_timestamps[session_id]
-    
+        while len(self.histories) > self.max_sessions:
+            session_id = next(iter(self.histories))
+            self._remove_session(session_id)
+
     def set_system_prompt(self, prompt: str) -> None:
         """
         Set the system prompt used for new conversations.
-        
+
         Args:
             prompt: The system prompt to use.
         """
         self.system_prompt = prompt
-    
+
     def update_system_prompt(self, session_id: str, prompt: str) -> bool:
         """
         Update the system prompt for an existing session.
-        
+
         Args:
             session_id: Unique identifier for the conversation session.
             prompt: The new system prompt to use.
-            
+
         Returns:
             True if updated successfully, False if session not found.
         """
         if session_id not in self.histories:
             return False
-        
-        # Find and update system message if it exists
-        for i, message in enumerate(self.histories[session_id]):
-            if message["role"] == "system":
-                self.histories[session_id][i]["content"] = prompt
-                return True
-        
-        # Add system message if it doesn't exist
-        self.histories[session_id].insert(0, {
-            "role": "system",
-            "content": prompt
-        })
+
+        self.session_prompts[session_id] = prompt
+        self._refresh_system_message(session_id)
         return True
 
+    def _create_session(self, session_id: str) -> None:
+        """
+        Create an empty session history starting with the system prompt.
+
+        Args:
+            session_id: Unique identifier for the conversation session.
+        """
+        self.histories[session_id] = []
+        self.token_counts[session_id] = 0
+        self.session_prompts[session_id] = self.system_prompt
+        self._refresh_system_message(session_id)
+
+    def _remove_session(self, session_id: str) -> None:
+        """
+        Remove every trace of a session.
+
+        Args:
+            session_id: Unique identifier for the conversation session.
+        """
+        self.histories.pop(session_id, None)
+        self.session_timestamps.pop(session_id, None)
+        self.summaries.pop(session_id, None)
+        self.token_counts.pop(session_id, None)
+        self.references.pop(session_id, None)
+        self.session_prompts.pop(session_id, None)
+        self._reference_counters.pop(session_id, None)
+
+    def _touch(self, session_id: str) -> None:
+        """
+        Mark a session as most recently used.
+
+        Args:
+            session_id: Unique identifier for the conversation session.
+        """
+        self.histories.move_to_end(session_id)
+        self.session_timestamps[session_id] = time.time()
+
+    def _refresh_system_message(self, session_id: str) -> None:
+        """
+        Rebuild the leading system message from the session prompt and summary.
+
+        The Gemini client only forwards the first system message, so the rolling
+        summary is carried inside it.
+
+        Args:
+            session_id: Unique identifier for the conversation session.
+        """
+        history = self.histories[session_id]
+        content = self.session_prompts.get(session_id, self.system_prompt)
+        summary = self.summaries.get(session_id)
+        if summary:
+            content = f"{content}\n\nSummary of the earlier conversation:\n{summary}"
+
+        message = {"role": "system", "content": content, "tokens": estimate_tokens(content)}
+
+        if history and history[0]["role"] == "system":
+            self.token_counts[session_id] -= history[0].get("tokens", 0)
+            history[0] = message
+        else:
+            history.insert(0, message)
+        self.token_counts[session_id] += message["tokens"]
+
+    def _enforce_budget(self, session_id: str) -> None:
+        """
+        Fold the oldest messages into the summary until the session fits its limits.
+
+        Args:
+            session_id: Unique identifier for the conversation session.
+        """
+        history = self.histories[session_id]
+        first = 1 if history and history[0]["role"] == "system" else 0
+
+        folded: List[Dict[str, Any]] = []
+        while len(history) - first > self.min_recent_messages:
+            over_length = len(history) - first > self.max_history_length
+            over_budget = self.token_counts[session_id] > self.token_budget
+            if not (over_length or over_budget):
+                break
+            message = history.pop(first)
+            self.token_counts[session_id] -= message.get("tokens", 0)
+            folded.append(message)
+
+        if folded:
+            try:
+                summary = self.summarizer(self.summaries.get(session_id, ""), folded)
+            except Exception as e:
+                logger.error(f"Error summarizing chat history for session {session_id}: {e}")
+                summary = self._extractive_summary(self.summaries.get(session_id, ""), folded)
+            self.summaries[session_id] = self._trim_summary(summary)
+            self._refresh_system_message(session_id)
+            logger.debug(f"Folded {len(folded)} messages into the summary for session {session_id}")
+
+    def _compact_message(self, session_id: str, content: str) -> str:
+        """
+        Replace an oversized message by a compact digest and keep the original as a reference.
+
+        Args:
+            session_id: Unique identifier for the conversation session.
+            content: The original message content.
+
+        Returns:
+            The compacted content, ending with the reference identifier.
+        """
+        references = self.references.setdefault(session_id, OrderedDict())
+        self._reference_counters[session_id] = self._reference_counters.get(session_id, 0) + 1
+        reference_id = f"ref-{self._reference_counters[session_id]}"
+        references[reference_id] = content
+        while len(references) > self.max_references:
+            references.popitem(last=False)
+
+        # Tool results are stored as "<prefix>: <json>", so digest the JSON part if possible
+        budget = max(1, self.max_message_tokens // 2)
+        prefix, payload = content, ""
+        start = min((i for i in (content.find("{"), content.find("[")) if i >= 0), default=-1)
+        if start >= 0:
+            prefix, payload = content[:start], content[start:]
+        try:
+            compact = prefix + compact_tool_result(json.loads(payload), budget)
+        except (json.JSONDecodeError, ValueError):
+            compact = content[:budget * CHARS_PER_TOKEN] + "...[truncated]"
+
+        return f"{compact} [full content: {reference_id}]"
+
+    def _trim_summary(self, summary: str) -> str:
+        """
+        Drop the oldest summary lines until the summary fits its token budget.
+
+        The summary never takes more than a quarter of the session budget, so
+        that folding can always bring the history back under it.
+
+        Args:
+            summary: The summary text.
+
+        Returns:
+            The trimmed summary.
+        """
+        budget = min(self.summary_token_budget, self.token_budget // 4)
+        lines = summary.splitlines()
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > budget:
+            lines.pop(0)
+        summary = "\n".join(lines)
+        limit = budget * CHARS_PER_TOKEN
+        return summary[-limit:] if len(summary) > limit else summary
+
+    @staticmethod
+    def _extractive_summary(previous_summary: str, messages: List[Dict[str, Any]]) -> str:
+        """
+        Default summarizer: append one short line per folded message.
+
+        Args:
+            previous_summary: The current summary.
+            messages: Messages being folded out of the history.
+
+        Returns:
+            The new summary.
+        """
+        lines = [previous_summary] if previous_summary else []
+        for message in messages:
+            text = " ".join(message.get("content", "").split())
+            if len(text) > 160:
+                text = text[:160] + "..."
+            lines.append(f"- {message.get('role', 'user')}: {text}")
+        return "\n".join(lines)
+
 
 # Create a singleton instance
 chat_history = ChatHistory()
 
 def get_chat_history() -> ChatHistory:
     """Get the chat history manager instance."""
-    return chat_history 
\ No newline at end of file
+    return chat_history
@@ -92,6 +92,12 @@ def parse_arguments():
         help="Enable debug mode"
     )
     
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report startup phase and import-time breakdowns, then exit"
+    )
+    
     return parser.parse_args()
 
 
@@ -203,6 +209,12 @@ def main():
     """Main entry point for the application."""
     args = parse_arguments()
     
+    # Profile a server start in a child process instead of serving
+    if args.profile_startup:
+        from src.utils.startup_profile import profile_startup, format_report
+        print(format_report(profile_startup(args.config_dir)))
+        return
+    
     # Setup logging based on debug argument
     logger = setup_logging(args.debug)
     
@@ -0,0 +1,202 @@
+"""
+Per-session message dispatcher for the MCP WebSocket endpoint.
+
+Each WebSocket session gets a dispatcher that runs incoming messages as
+concurrent tasks, so a quick message is not stuck behind a long Gemini or tool
+round trip. Every message gets a request ID, and all messages sent back for
+it (intermediate and final) carry that ID.
+
+Messages that read or change the chat history run one at a time, in the order
+they arrived; other messages run concurrently up to a per-session limit. The
+number of pending requests per session is bounded, and a backpressure policy
+decides whether new requests are rejected or replace the oldest queued one.
+Clients can cancel a pending or running request with a ``cancel`` message.
+"""
+
+import uuid
+import logging
+import asyncio
+from typing import Dict, Any, Callable, Awaitable, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Message types that read or change the chat history, run in arrival order
+ORDERED_MESSAGE_TYPES = frozenset({"query", "tool_call", "clear_history"})
+
+# Backpressure policies when a session has too many pending requests
+BACKPRESSURE_REJECT = "reject"
+BACKPRESSURE_CANCEL_OLDEST = "cancel_oldest"
+
+Handler = Callable[..., Awaitable[Dict[str, Any]]]
+Sender = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class SessionDispatcher:
+    """Runs one session's WebSocket messages as bounded, cancellable tasks."""
+
+    def __init__(self,
+                 session_id: str,
+                 handler: Handler,
+                 send: Sender,
+                 max_pending: int = 8,
+                 max_concurrency: int = 4,
+                 backpressure: str = BACKPRESSURE_REJECT):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            session_id: Session the dispatcher serves.
+            handler: Coroutine handling a message, called as
+                     ``handler(data, send=send)`` and returning the response.
+            send: Coroutine sending a message to the client.
+            max_pending: Maximum queued and running requests.
+            max_concurrency: Maximum requests running at once.
+            backpressure: Policy when max_pending is reached, either
+                          "reject" or "cancel_oldest".
+        """
+        if backpressure not in (BACKPRESSURE_REJECT, BACKPRESSURE_CANCEL_OLDEST):
+            raise ValueError(f"Unknown backpressure policy: {backpressure}")
+
+        self.session_id = session_id
+        self.handler = handler
+        self._send_raw = send
+        self.max_pending = max_pending
+        self.backpressure = backpressure
+
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._started: set = set()
+        self._history_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._send_lock = asyncio.Lock()
+        self.stats = {"requests": 0, "completed": 0, "cancelled": 0, "rejected": 0, "failed": 0}
+
+    @property
+    def pending(self) -> int:
+        """Number of queued and running requests."""
+        return len(self._tasks)
+
+    async def submit(self, data: Dict[str, Any]) -> Optional[str]:
+        """
+        Accept a message from the client.
+
+        Args:
+            data: The message, with its session ID set.
+
+        Returns:
+            The request ID, or None if the message was a cancellation or was rejected.
+        """
+        request_id = str(data.get("request_id") or uuid.uuid4().hex)
+        data["request_id"] = request_id
+
+        if data.get("type") == "cancel":
+            await self._cancel_request(request_id, data.get("target_request_id"))
+            return None
+
+        if request_id in self._tasks:
+            await self.send(request_id, {"error": f"Duplicate request ID: {request_id}", "session_id": self.session_id})
+            return None
+
+        if self.pending >= self.max_pending and not self._make_room():
+            self.stats["rejected"] += 1
+            logger.warning(f"Session {self.session_id} has {self.pending} pending requests, rejecting {request_id}")
+            await self.send(request_id, {
+                "type": "busy",
+                "error": "Too many pending requests. Please wait for earlier requests to finish.",
+                "session_id": self.session_id
+            })
+            return None
+
+        self.stats["requests"] += 1
+        task = asyncio.create_task(self._run(request_id, data))
+        self._tasks[request_id] = task
+        task.add_done_callback(lambda _: self._forget(request_id))
+        return request_id
+
+    async def send(self, request_id: str, message: Dict[str, Any]) -> None:
+        """
+        Send a message tagged with a request ID.
+
+        Sends are serialized, and failures (e.g. a closed socket) are logged
+        rather than raised.
+
+        Args:
+            request_id: Request the message belongs to.
+            message: Message to send.
+        """
+        try:
+            async with self._send_lock:
+                await self._send_raw({**message, "request_id": request_id})
+        except Exception as e:
+            logger.debug(f"Could not send message for request {request_id}: {e}")
+
+    async def close(self) -> None:
+        """Cancel every pending request, e.g. when the client disconnects."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, request_id: str, data: Dict[str, Any]) -> None:
+        """Run one request and send its tagged response."""
+        async def send_intermediate(message: Dict[str, Any]) -> None:
+            await self.send(request_id, message)
+
+        try:
+            if data.get("type") in ORDERED_MESSAGE_TYPES:
+                # asyncio.Lock wakes waiters first in, first out, so ordered
+                # requests acquire it in arrival order
+                async with self._history_lock:
+                    response = await self._handle(request_id, data, send_intermediate)
+            else:
+                response = await self._handle(request_id, data, send_intermediate)
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            await self.send(request_id, {"type": "cancelled", "session_id": self.session_id})
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"Error handling request {request_id} of session {self.session_id}: {e}")
+            await self.send(request_id, {"error": str(e), "session_id": self.session_id})
+            return
+
+        self.stats["completed"] += 1
+        await self.send(request_id, response)
+
+    async def _handle(self, request_id: str, data: Dict[str, Any], send: Sender) -> Dict[str, Any]:
+        """Call the handler within the concurrency limit."""
+        async with self._semaphore:
+            self._started.add(request_id)
+            return await self.handler(data, send=send)
+
+    async def _cancel_request(self, request_id: str, target_request_id: Optional[str]) -> None:
+        """Cancel a pending request and acknowledge the cancel message."""
+        task = self._tasks.get(str(target_request_id)) if target_request_id else None
+        if task is not None:
+            task.cancel()
+        await self.send(request_id, {
+            "type": "cancel_result",
+            "target_request_id": target_request_id,
+            "success": task is not None,
+            "session_id": self.session_id
+        })
+
+    def _make_room(self) -> bool:
+        """Apply the backpressure policy; return True if the new request may be queued."""
+        if self.backpressure != BACKPRESSURE_CANCEL_OLDEST:
+            return False
+
+        # Requests are kept in arrival order; cancel the oldest one not yet started
+        for request_id, task in self._tasks.items():
+            if request_id not in self._started and not task.cancelled():
+                logger.info(f"Session {self.session_id} is at capacity, cancelling queued request {request_id}")
+                task.cancel()
+                self._forget(request_id)
+                return True
+        return False
+
+    def _forget(self, request_id: str) -> None:
+        """Drop a finished or cancelled request from the pending set."""
+        self._tasks.pop(request_id, None)
+        self._started.discard(request_id)
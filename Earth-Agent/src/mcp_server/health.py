@@ -13,8 +13,7 @@ import socket
 from typing import Dict, Any, List, Optional
 import json
 import asyncio
-
-import pkg_resources
+from importlib import metadata
 
 from ..config import get_config
 from ..gemini.client import get_gemini_client
@@ -25,6 +24,37 @@ logger = logging.getLogger(__name__)
 # Define startup time
 _startup_time = time.time()
 
+# Dependencies reported by the health check
+CRITICAL_DEPENDENCIES = ["fastapi", "pydantic", "google-generativeai",
+                         "earthengine-api", "geopandas", "shapely"]
+
+# Installed versions, collected once
+_dependency_versions: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+def get_dependency_versions() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the installed versions of the critical dependencies.
+    
+    Versions cannot change while the process runs, so they are looked up
+    once and cached.
+    
+    Returns:
+        Dictionary mapping dependency names to version and install status.
+    """
+    global _dependency_versions
+    
+    if _dependency_versions is None:
+        versions = {}
+        for dep in CRITICAL_DEPENDENCIES:
+            try:
+                versions[dep] = {"version": metadata.version(dep), "status": "installed"}
+            except metadata.PackageNotFoundError:
+                versions[dep] = {"status": "missing"}
+        _dependency_versions = versions
+    
+    return _dependency_versions
+
 
 async def get_health_status() -> Dict[str, Any]:
     """
@@ -75,17 +105,9 @@ async def get_health_status() -> Dict[str, Any]:
     
     # Check critical dependencies
     try:
-        critical_deps = ["fastapi", "pydantic", "google-generativeai", 
-                         "earthengine-api", "geopandas", "shapely"]
-        
-        # Collect version info
-        for dep in critical_deps:
-            try:
-                version = pkg_resources.get_distribution(dep).version
-                health_data["dependencies"][dep] = {"version": version, "status": "installed"}
-            except pkg_resources.DistributionNotFound:
-                health_data["dependencies"][dep] = {"status": "missing"}
-                health_data["status"] = "degraded"
+        health_data["dependencies"] = dict(get_dependency_versions())
+        if any(dep["status"] == "missing" for dep in health_data["dependencies"].values()):
+            health_data["status"] = "degraded"
     except Exception as e:
         logger.error(f"Dependency check failed: {e}")
         health_data["dependencies"]["check_error"] = str(e)
@@ -179,6 +201,9 @@ def register_health_routes(app):
     Args:
         app: FastAPI application instance.
     """
+    # Collect dependency versions once, at startup
+    get_dependency_versions()
+    
     @app.get("/health")
     async def health():
         """Basic health check endpoint."""
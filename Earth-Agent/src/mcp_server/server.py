@@ -9,7 +9,8 @@ import asyncio
 import json
 import logging
 import time
-from typing import Dict, Any, List, Callable, Optional, Union, Tuple
+from collections import deque
+from typing import Dict, Any, List, Callable, Awaitable, Deque, Optional, Union, Tuple
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -18,9 +19,11 @@ import uvicorn
 from ..config import get_config
 from ..gemini.client import get_gemini_client
 from ..gemini.memory import get_chat_history
+from ..gemini.digest import compact_tool_result, estimate_tokens
 from .tools import get_all_tools, get_tool_schemas
-from ..tools.climate_analysis import climate_analysis_tools
-from ..tools.resilience_planning import resilience_planning_tools
+from .tool_selection import ToolIndex
+from .dispatcher import SessionDispatcher
+from ..data_sources.ee_executor import get_ee_metrics
 from ..utils import (
     get_connection_manager,
     get_query_rate_limiter,
@@ -30,8 +33,13 @@ from ..utils import (
     get_cache,
     QueryMessage,
     ToolCallMessage,
+    PipelineMessage,
     ClearHistoryMessage,
-    schedule_cache_maintenance
+    schedule_cache_maintenance,
+    get_http_metrics,
+    close_http_clients,
+    get_chart_renderer,
+    close_chart_renderer
 )
 
 # Configure logging
@@ -58,6 +66,14 @@ class MCPServer:
         self.port = server_config.get("port", 8080)
         self.debug = server_config.get("debug", False)
         
+        # Per-session WebSocket message dispatching
+        websocket_config = server_config.get("websocket", {})
+        self.dispatcher_options = {
+            "max_pending": websocket_config.get("max_pending_requests", 8),
+            "max_concurrency": websocket_config.get("max_concurrent_requests", 4),
+            "backpressure": websocket_config.get("backpressure", "reject")
+        }
+        
         # Initialize FastAPI app
         self.app = FastAPI(title=f"{name} MCP Server", 
                           docs_url="/api/docs",
@@ -73,19 +89,9 @@ class MCPServer:
             allow_headers=["Content-Type", "Authorization"],  # Restrict to necessary headers
         )
         
-        # Load tools
+        # Load tools; implementations are imported when first executed
         self.tools = get_all_tools()
         
-        # Manually add climate analysis tools
-        for name, tool in climate_analysis_tools.items():
-            self.tools[name] = tool
-            logger.info(f"Added climate analysis tool: {name}")
-        
-        # Manually add resilience planning tools
-        for name, tool in resilience_planning_tools.items():
-            self.tools[name] = tool
-            logger.info(f"Added resilience planning tool: {name}")
-            
         # Initialize tool executor with tools
         self.tool_executor = get_tool_executor(self.tools)
         
@@ -96,6 +102,21 @@ class MCPServer:
         self.tool_call_rate_limiter = get_tool_call_rate_limiter()
         self.validator = get_input_validator()
         
+        # Tool-result analysis turn settings and metrics
+        model_config = self.config.get_model_config()
+        self.tool_digest_token_budget = model_config.get("tool_digest_token_budget", 800)
+        self.analysis_context_messages = model_config.get("analysis_context_messages", 4)
+        self.analysis_metrics: Deque[Dict[str, Any]] = deque(maxlen=200)
+        
+        # Gemini tool declarations are compiled on first use and invalidated
+        # by register_tool; a positive top-k sends only the most relevant tools
+        self.tool_selection_top_k = model_config.get("tool_selection_top_k", 0)
+        self.tool_selection_always_include = model_config.get(
+            "tool_selection_always_include", ["analyze_query_with_gemini"]
+        )
+        self._gemini_declarations: Optional[Dict[str, Dict[str, Any]]] = None
+        self._tool_index: Optional[ToolIndex] = None
+        
         # Set up routes
         self._setup_routes()
         
@@ -119,6 +140,26 @@ class MCPServer:
         async def health_check():
             return {"status": "healthy", "timestamp": time.time()}
         
+        @self.app.get("/stats/analysis")
+        async def analysis_stats():
+            return self.get_analysis_stats()
+        
+        @self.app.get("/stats/http")
+        async def http_stats():
+            return {"upstreams": get_http_metrics()}
+        
+        @self.app.get("/stats/earth_engine")
+        async def earth_engine_stats():
+            return {"earth_engine": get_ee_metrics()}
+        
+        @self.app.get("/stats/charts")
+        async def chart_stats():
+            return {"charts": get_chart_renderer().get_metrics()}
+        
+        @self.app.get("/stats/connections")
+        async def connection_stats():
+            return {"connections": self.connection_manager.get_stats()}
+        
         @self.app.get("/tools")
         async def get_tools():
             tool_list = []
@@ -139,9 +180,22 @@ class MCPServer:
                 logger.warning(f"Connection rejected: {e}")
                 return
             
+            # Messages run as concurrent per-session tasks; responses carry
+            # the request ID of the message they answer and go through the
+            # connection's outbound queue
+            async def send(message: Dict[str, Any]) -> None:
+                await self.connection_manager.send_json(session_id, message)
+            
+            dispatcher = SessionDispatcher(
+                session_id,
+                self._handle_websocket_message,
+                send,
+                **self.dispatcher_options
+            )
+            
             try:
                 # Send session info to client
-                await websocket.send_json({
+                await send({
                     "type": "session_info",
                     "session_id": session_id
                 })
@@ -158,31 +212,33 @@ class MCPServer:
                     # Update activity timestamp in session 
                     self.connection_manager.update_activity(session_id)
                     
-                    # Process the message
-                    response = await self._handle_websocket_message(data)
-                    
-                    # Log response before sending
-                    logger.debug(f"Sending response back via WebSocket: {response}")
-                    await websocket.send_json(response)
+                    # Dispatch the message without waiting for earlier ones
+                    await dispatcher.submit(data)
             
             except WebSocketDisconnect:
                 logger.info(f"Client disconnected: {session_id}")
+                await dispatcher.close()
                 await self.connection_manager.disconnect(session_id)
             
             except Exception as e:
                 logger.error(f"Error in WebSocket connection: {e}")
+                await dispatcher.close()
                 try:
                     await websocket.close(code=1011, reason=f"Internal server error: {str(e)[:50]}")
                 except:
                     pass
                 await self.connection_manager.disconnect(session_id)
     
-    async def _handle_websocket_message(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_websocket_message(self,
+                                      data: Dict[str, Any],
+                                      send: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
         """
         Handle a message received through the WebSocket connection.
 
         Args:
             data: The message received from the client.
+            send: Optional coroutine for pushing intermediate messages to the
+                  client before the final response (e.g. pipeline progress).
 
         Returns:
             Response message to send back to the client.
@@ -212,8 +268,8 @@ class MCPServer:
                 # Get the Gemini client
                 gemini_client = get_gemini_client()
                 
-                # Format tools for Gemini API
-                gemini_tools = self._prepare_tools_for_gemini()
+                # Format tools for Gemini API, keeping only relevant ones if configured
+                gemini_tools = self._prepare_tools_for_gemini(query)
                 
                 # Add the user's message to the chat history
                 self.chat_history.add_message(session_id, "user", query)
@@ -273,12 +329,10 @@ class MCPServer:
                             
                             else:
                                 # Tool executed successfully without errors
-                                # Add the tool result to chat history
-                                tool_result_text = f"Tool '{tool_name}' result: {json.dumps(tool_result)}"
-                                self.chat_history.add_message(session_id, "assistant", tool_result_text)
-                                
-                                # Get AI analysis of the tool results
-                                analysis = await self._analyze_tool_result(session_id, tool_name, arguments, tool_result)
+                                # Get AI analysis of the tool results (also records the result in chat history)
+                                analysis = await self._analyze_tool_result(
+                                    session_id, tool_name, arguments, tool_result, send=send
+                                )
                                 logger.info(f"Generated analysis for {tool_name} results")
                                 
                                 # Send tool result and analysis back to client
@@ -424,11 +478,10 @@ class MCPServer:
                 tool_call_text = f"Tool call: {tool_name} with arguments: {json.dumps(arguments)}"
                 self.chat_history.add_message(session_id, "user", tool_call_text)
                 
-                tool_result_text = f"Tool result: {json.dumps(tool_result)}"
-                self.chat_history.add_message(session_id, "assistant", tool_result_text)
-                
-                # Get AI analysis of the tool results
-                analysis = await self._analyze_tool_result(session_id, tool_name, arguments, tool_result)
+                # Get AI analysis of the tool results (also records the result in chat history)
+                analysis = await self._analyze_tool_result(
+                    session_id, tool_name, arguments, tool_result, send=send
+                )
                 logger.info(f"Generated analysis for direct {tool_name} call results")
                 
                 return self._format_tool_response(
@@ -453,23 +506,101 @@ class MCPServer:
                 
                 return response_message
         
+        elif message_type == "pipeline":
+            # Validate pipeline message format
+            validated_data = self.validator.validate_model(data, PipelineMessage)
+            if not validated_data:
+                return self._format_error_response(session_id, "Invalid pipeline format")
+            
+            steps = data.get("steps", [])
+            if not steps:
+                return self._format_error_response(session_id, "No pipeline steps provided")
+            
+            for step in steps:
+                tool_name = step.get("tool", "") if isinstance(step, dict) else ""
+                if tool_name not in self.tools:
+                    return self._format_error_response(session_id, f"Tool not found: {tool_name}")
+            
+            # Each step counts as a tool call for rate limiting
+            if not self.tool_call_rate_limiter.can_request(session_id, tokens=len(steps)):
+                logger.warning(f"Tool call rate limit exceeded for session {session_id}")
+                return self._format_error_response(session_id, "Rate limit exceeded for tool calls. Please try again later.")
+            
+            async def stream_step(record: Dict[str, Any]) -> None:
+                if send is not None:
+                    await send({
+                        "type": "pipeline_step",
+                        "step": record,
+                        "session_id": session_id
+                    })
+            
+            try:
+                results = await self.tool_executor.execute_dag(
+                    steps,
+                    use_cache=True,
+                    max_concurrency=validated_data.max_concurrency,
+                    on_step_complete=stream_step
+                )
+            except Exception as e:
+                logger.error(f"Error executing pipeline: {e}")
+                return self._format_error_response(session_id, f"Pipeline execution failed: {str(e)}")
+            
+            completed = sum(1 for record in results if record["status"] == "completed")
+            return {
+                "type": "pipeline_result",
+                "success": completed == len(results),
+                "completed_steps": completed,
+                "total_steps": len(results),
+                "results": results,
+                "session_id": session_id
+            }
+        
         else:
             return {"error": f"Unknown message type: {message_type}", "session_id": session_id}
     
-    def _prepare_tools_for_gemini(self) -> List[Dict[str, Any]]:
+    def _prepare_tools_for_gemini(self, query: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Format tools for the Gemini API.
         
+        Declarations are compiled once and reused until a tool is registered.
+        If tool selection is enabled and a query is given, only the top-k tools
+        matching the query are returned, plus the always-included tools; all
+        tools are returned when nothing matches.
+        
+        Args:
+            query: Optional user query used to select relevant tools.
+        
         Returns:
             List of tool objects formatted for Gemini.
         """
-        gemini_tools = []
+        if self._gemini_declarations is None:
+            self._gemini_declarations = self._compile_gemini_declarations()
+        
+        if query and self.tool_selection_top_k > 0:
+            if self._tool_index is None:
+                self._tool_index = ToolIndex(self.tools)
+            
+            selected = self._tool_index.select(query, self.tool_selection_top_k, self.tool_selection_always_include)
+            if selected:
+                logger.debug(f"Selected {len(selected)} of {len(self.tools)} tools for query: {selected}")
+                return [self._gemini_declarations[name] for name in selected]
+        
+        return list(self._gemini_declarations.values())
+    
+    def _compile_gemini_declarations(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Build sanitized Gemini declarations for every registered tool.
+        
+        Returns:
+            Dictionary mapping tool names to tool objects formatted for Gemini.
+        """
+        declarations = {}
         for name, tool in self.tools.items():
             # Get the parameters and sanitize them for Gemini API
             parameters = self._sanitize_schema_for_gemini(tool.get("parameters", {}))
             
             # Only add required properties that Gemini API expects
-            gemini_tools.append({
+            declarations[name] = {
                 "function_declarations": [{
                     "name": name,
                     "description": tool.get("description", ""),
@@ -479,9 +610,10 @@ class MCPServer:
                         "required": parameters.get("required", [])
                     }
                 }]
-            })
+            }
         
-        return gemini_tools
+        logger.info(f"Compiled Gemini declarations for {len(declarations)} tools")
+        return declarations
     
     def register_tool(self, 
                      name: str, 
@@ -503,6 +635,10 @@ class MCPServer:
             "parameters": parameters
         }
         
+        # Recompile Gemini declarations and the tool index on next use
+        self._gemini_declarations = None
+        self._tool_index = None
+        
         logger.info(f"Registered tool: {name}")
     
     async def run(self) -> None:
@@ -522,8 +658,13 @@ class MCPServer:
         # Create server
         server = uvicorn.Server(config)
         
-        # Start server
-        await server.serve()
+        # Start server, then release pooled upstream connections and
+        # rendering processes on shutdown
+        try:
+            await server.serve()
+        finally:
+            await close_http_clients()
+            close_chart_renderer()
 
     def _sanitize_schema_for_gemini(self, schema: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -547,11 +688,12 @@ class MCPServer:
             if keyword in sanitized:
                 del sanitized[keyword]
         
-        # Recursively sanitize nested properties
+        # Recursively sanitize nested properties, copying so the registered schema is left intact
         if "properties" in sanitized and isinstance(sanitized["properties"], dict):
-            for prop_name, prop_schema in sanitized["properties"].items():
-                if isinstance(prop_schema, dict):
-                    sanitized["properties"][prop_name] = self._sanitize_schema_for_gemini(prop_schema)
+            sanitized["properties"] = {
+                prop_name: self._sanitize_schema_for_gemini(prop_schema) if isinstance(prop_schema, dict) else prop_schema
+                for prop_name, prop_schema in sanitized["properties"].items()
+            }
         
         # Handle items in arrays
         if "items" in sanitized and isinstance(sanitized["items"], dict):
@@ -559,15 +701,26 @@ class MCPServer:
             
         return sanitized
 
-    async def _analyze_tool_result(self, session_id: str, tool_name: str, arguments: Dict[str, Any], tool_result: Dict[str, Any]) -> str:
+    async def _analyze_tool_result(self,
+                                 session_id: str,
+                                 tool_name: str,
+                                 arguments: Dict[str, Any],
+                                 tool_result: Dict[str, Any],
+                                 send: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> str:
         """
         Send tool results back to Gemini for further analysis.
         
+        The analysis turn only carries the system prompt, the most recent turns
+        of the conversation and a token-budgeted digest of the tool result, and
+        the reply is streamed to the client chunk by chunk when a send
+        coroutine is available.
+        
         Args:
             session_id: Unique identifier for the conversation session.
             tool_name: The name of the tool that was executed.
             arguments: The arguments used to call the tool.
             tool_result: The raw result returned by the tool.
+            send: Optional coroutine used to stream analysis chunks to the client.
             
         Returns:
             A string containing the AI's analysis of the tool results.
@@ -576,44 +729,62 @@ class MCPServer:
             # Get the Gemini client
             gemini_client = get_gemini_client()
             
-            # Format the analysis prompt
-            analysis_prompt = f"""Based on the results of the tool '{tool_name}', provide a detailed analysis and insights.
+            digest = compact_tool_result(tool_result, self.tool_digest_token_budget)
             
-Tool: {tool_name}
-Arguments: {json.dumps(arguments, indent=2)}
-Result: {json.dumps(tool_result, indent=2)}
-
-Please analyze this data and provide relevant insights, trends, and explanations. Focus on:
-1. Key findings and patterns in the data
-2. Any noteworthy observations 
-3. Contextual information to help understand the results
-4. Potential implications or recommendations
-
-Your analysis:"""
-
-            # Add this interaction to chat history as system message
-            self.chat_history.add_message(
-                session_id, 
-                "system", 
-                f"Request for analysis of {tool_name} results with arguments {arguments}"
+            # Format the analysis prompt
+            analysis_prompt = (
+                f"Tool '{tool_name}' was called with arguments {json.dumps(arguments)}.\n"
+                f"Result (digest): {digest}\n\n"
+                "Analyze this result for the user. Focus on key findings and patterns, "
+                "noteworthy observations, context needed to understand the results, "
+                "and potential implications or recommendations."
             )
             
-            # Get conversation history
-            conversation_history = self.chat_history.get_history(session_id)
-            # Add the analysis prompt as the most recent message
-            conversation_history.append({
-                "role": "user",
-                "content": analysis_prompt
-            })
-            
-            # Generate analysis from Gemini
-            logger.info(f"Requesting analysis of {tool_name} results from Gemini")
-            analysis_response = await gemini_client.chat(
-                messages=conversation_history,
-                # No tools for the analysis to keep it focused
+            # Reuse only the prior turn's context rather than the whole history
+            history = self.chat_history.get_history(session_id)
+            system_messages = [message for message in history[:1] if message["role"] == "system"]
+            recent_messages = history[len(system_messages):][-self.analysis_context_messages:] if self.analysis_context_messages > 0 else []
+            messages = system_messages + recent_messages + [{"role": "user", "content": analysis_prompt}]
+            
+            # Record the compact result in the history for later turns
+            self.chat_history.add_message(session_id, "assistant", f"Tool '{tool_name}' result: {digest}")
+            
+            prompt_chars = sum(len(message["content"]) for message in messages)
+            metrics = {
+                "tool_name": tool_name,
+                "prompt_chars": prompt_chars,
+                "prompt_tokens": estimate_tokens("".join(message["content"] for message in messages)),
+                "ttft_ms": None,
+                "total_ms": None,
+                "chunks": 0
+            }
+            
+            # Stream the analysis from Gemini
+            logger.info(f"Requesting analysis of {tool_name} results from Gemini (~{metrics['prompt_tokens']} prompt tokens)")
+            start_time = time.perf_counter()
+            chunks: List[str] = []
+            
+            async for chunk in gemini_client.chat_stream(messages=messages):
+                if not chunks:
+                    metrics["ttft_ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+                chunks.append(chunk)
+                if send is not None:
+                    await send({
+                        "type": "analysis_chunk",
+                        "tool_name": tool_name,
+                        "text": chunk,
+                        "session_id": session_id
+                    })
+            
+            metrics["total_ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+            metrics["chunks"] = len(chunks)
+            self.analysis_metrics.append(metrics)
+            logger.info(
+                f"Analysis of {tool_name}: prompt ~{metrics['prompt_tokens']} tokens, "
+                f"first token after {metrics['ttft_ms']} ms, total {metrics['total_ms']} ms"
             )
             
-            analysis_text = analysis_response.get("text", "I couldn't generate an analysis of these results.")
+            analysis_text = "".join(chunks) or "I couldn't generate an analysis of these results."
             
             # Add the analysis to chat history
             self.chat_history.add_message(session_id, "assistant", analysis_text)
@@ -624,6 +795,33 @@ Your analysis:"""
             logger.error(f"Error analyzing tool results: {e}")
             return f"Error generating analysis: {str(e)}"
 
+    def get_analysis_stats(self) -> Dict[str, Any]:
+        """
+        Summarize prompt size and latency of recent analysis turns.
+        
+        Returns:
+            Dictionary with averages and medians over the recorded turns.
+        """
+        recorded = list(self.analysis_metrics)
+        ttfts = sorted(m["ttft_ms"] for m in recorded if m["ttft_ms"] is not None)
+        prompt_tokens = sorted(m["prompt_tokens"] for m in recorded)
+        
+        def median(values: List[float]) -> Optional[float]:
+            return values[len(values) // 2] if values else None
+        
+        return {
+            "turns": len(recorded),
+            "ttft_ms": {
+                "avg": round(sum(ttfts) / len(ttfts), 1) if ttfts else None,
+                "p50": median(ttfts)
+            },
+            "prompt_tokens": {
+                "avg": round(sum(prompt_tokens) / len(prompt_tokens), 1) if prompt_tokens else None,
+                "p50": median(prompt_tokens)
+            },
+            "recent": recorded[-10:]
+        }
+
     async def _handle_tool_failure(self, 
                                 session_id: str, 
                                 tool_name: str, 
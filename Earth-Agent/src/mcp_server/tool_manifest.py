@@ -0,0 +1,231 @@
+"""
+Tool manifest for the GIS AI Agent's MCP server.
+
+The manifest records the name, description and parameter schema of every tool
+together with the module implementing it, so the server can list and describe
+tools without importing the tool implementations and their heavy dependencies.
+Tool modules are imported the first time one of their tools is executed.
+
+The manifest carries a fingerprint of the tool definitions: the code of each
+module's tool set and its module-level constants, which the descriptions and
+schemas are built from. Editing a tool's implementation leaves the manifest
+valid; if a definition changes, the manifest is ignored until it is rebuilt
+with:
+    python -m src.mcp_server.tool_manifest
+"""
+
+import ast
+import json
+import time
+import hashlib
+import logging
+import asyncio
+import importlib
+from pathlib import Path
+from typing import Dict, Any, Callable, Awaitable, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_PATH = Path(__file__).parent / "tool_manifest.json"
+TOOLS_DIR = Path(__file__).parent.parent / "tools"
+
+# Tool modules under src/tools and the attribute holding their tool set, in
+# registration order. A tool set is a dictionary or a function returning one.
+TOOL_SETS = (
+    ("spatial_query", "spatial_query_tools"),
+    ("sustainability_assessment", "sustainability_assessment_tools"),
+    ("visualization", "visualization_tools"),
+    ("weather_tools", "weather_tools"),
+    ("climate_analysis", "climate_analysis_tools"),
+    ("resilience_planning", "resilience_planning_tools"),
+)
+
+# Seconds spent importing each tool module
+_module_load_times: Dict[str, float] = {}
+
+
+def _tool_set_definition(module: str, attribute: str) -> str:
+    """
+    Get the parsed definition of a tool set, without importing its module.
+
+    Args:
+        module: Module name under src/tools.
+        attribute: Attribute holding the tool set.
+
+    Returns:
+        Dump of the syntax trees of the tool set and the module's constants,
+        independent of formatting, comments and line numbers.
+    """
+    tree = ast.parse((TOOLS_DIR / f"{module}.py").read_text(encoding="utf-8"))
+    nodes = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            names = [node.name]
+        elif isinstance(node, ast.Assign):
+            names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            names = [node.target.id]
+        else:
+            continue
+        if attribute in names or any(name.isupper() for name in names):
+            nodes.append(node)
+    return "\n".join(ast.dump(node) for node in nodes)
+
+
+def source_fingerprint() -> str:
+    """
+    Fingerprint the tool definitions.
+
+    Returns:
+        Hex SHA-256 digest of every module's tool set and constants.
+    """
+    digest = hashlib.sha256()
+    for module, attribute in TOOL_SETS:
+        digest.update(module.encode("utf-8"))
+        digest.update(_tool_set_definition(module, attribute).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_tool_set(module: str, attribute: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Import a tool module and return its tool set.
+
+    Args:
+        module: Module name under src/tools.
+        attribute: Attribute holding the tool set.
+
+    Returns:
+        Dictionary of tools with their functions, descriptions and parameters.
+    """
+    start_time = time.perf_counter()
+    tool_module = importlib.import_module(f"..tools.{module}", __package__)
+    if module not in _module_load_times:
+        _module_load_times[module] = time.perf_counter() - start_time
+        logger.info(f"Loaded tool module '{module}' in {_module_load_times[module] * 1000:.0f} ms")
+
+    tool_set = getattr(tool_module, attribute)
+    return tool_set() if callable(tool_set) else tool_set
+
+
+def build_manifest() -> Dict[str, Any]:
+    """
+    Build the manifest by importing every tool module.
+
+    Returns:
+        Manifest dictionary.
+    """
+    tools = {}
+    for module, attribute in TOOL_SETS:
+        for name, tool in load_tool_set(module, attribute).items():
+            tools[name] = {
+                "module": module,
+                "tool_set": attribute,
+                "description": tool["description"],
+                "parameters": tool["parameters"]
+            }
+
+    return {"version": FORMAT_VERSION, "fingerprint": source_fingerprint(), "tools": tools}
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> Optional[Dict[str, Any]]:
+    """
+    Load the manifest if it is present and matches the tool sources.
+
+    Args:
+        path: Manifest file.
+
+    Returns:
+        Manifest dictionary, or None if it is missing or stale.
+    """
+    if not path.exists():
+        logger.info(f"No tool manifest found at {path}")
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read tool manifest {path}: {e}")
+        return None
+
+    if manifest.get("version") != FORMAT_VERSION or manifest.get("fingerprint") != source_fingerprint():
+        logger.warning("Tool manifest is stale, rebuild it with: python -m src.mcp_server.tool_manifest")
+        return None
+
+    return manifest
+
+
+def get_module_load_times() -> Dict[str, float]:
+    """
+    Get the time spent importing tool modules.
+
+    Returns:
+        Dictionary mapping loaded module names to import time in milliseconds.
+    """
+    return {module: round(seconds * 1000, 1) for module, seconds in _module_load_times.items()}
+
+
+class LazyToolFunction:
+    """Tool function that imports its module when first executed."""
+
+    def __init__(self, name: str, module: str, tool_set: str):
+        """
+        Initialize the lazy tool function.
+
+        Args:
+            name: Tool name.
+            module: Module name under src/tools.
+            tool_set: Attribute holding the module's tool set.
+        """
+        self.name = name
+        self.module = module
+        self.tool_set = tool_set
+        self._function: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None
+
+    def resolve(self) -> Callable[[Dict[str, Any]], Awaitable[Any]]:
+        """
+        Import the tool module and return the tool's function.
+
+        Returns:
+            The tool function.
+
+        Raises:
+            KeyError: If the module no longer provides the tool.
+        """
+        if self._function is None:
+            self._function = load_tool_set(self.module, self.tool_set)[self.name]["function"]
+        return self._function
+
+    async def __call__(self, arguments: Dict[str, Any]) -> Any:
+        """
+        Execute the tool, importing its module off the event loop on first use.
+
+        Args:
+            arguments: Tool arguments.
+
+        Returns:
+            Tool result.
+        """
+        function = self._function
+        if function is None:
+            function = await asyncio.get_running_loop().run_in_executor(None, self.resolve)
+        return await function(arguments)
+
+    def __repr__(self) -> str:
+        return f"LazyToolFunction({self.name!r}, module={self.module!r})"
+
+
+def main() -> None:
+    """Rebuild the tool manifest from the command line."""
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    manifest = build_manifest()
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=False)
+        f.write("\n")
+    logger.info(f"Wrote {len(manifest['tools'])} tools to {MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Tool selection for the GIS AI Agent's MCP server.
+
+This module provides a lightweight keyword index over tool names, descriptions
+and parameter descriptions. It ranks tools against a user query with BM25 so
+that only the most relevant tool declarations are sent to Gemini, which keeps
+prompts short when many tools are registered.
+"""
+
+import re
+import math
+import logging
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words too common in queries and tool descriptions to tell tools apart
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "get",
+    "how", "i", "in", "is", "it", "me", "of", "on", "or", "please", "show", "such",
+    "that", "the", "this", "to", "use", "what", "when", "where", "which", "with", "you"
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into normalized keyword tokens.
+
+    Names such as ``get_air_quality`` are split on underscores, stop words are
+    dropped and plural endings are stripped.
+
+    Args:
+        text: Text to tokenize.
+
+    Returns:
+        List of tokens.
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower().replace("_", " ")):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "is", "us")):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _schema_text(schema: Any) -> Iterable[str]:
+    """Yield property names, descriptions and enum values of a JSON schema."""
+    if not isinstance(schema, dict):
+        return
+    if isinstance(schema.get("description"), str):
+        yield schema["description"]
+    for value in schema.get("enum", []) or []:
+        yield str(value)
+    for name, prop in (schema.get("properties") or {}).items():
+        yield name
+        yield from _schema_text(prop)
+    yield from _schema_text(schema.get("items"))
+
+
+class ToolIndex:
+    """BM25 keyword index over tool descriptions."""
+
+    def __init__(self, tools: Dict[str, Dict[str, Any]], k1: float = 1.2, b: float = 0.75):
+        """
+        Build the index.
+
+        Args:
+            tools: Dictionary mapping tool names to tool definitions with
+                   description and parameters.
+            k1: BM25 term-frequency saturation.
+            b: BM25 document-length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self._documents: Dict[str, Counter] = {}
+        self._lengths: Dict[str, int] = {}
+
+        for name, tool in tools.items():
+            # The tool name counts twice: it is the most specific description
+            text = " ".join([name, name, tool.get("description", ""), *_schema_text(tool.get("parameters", {}))])
+            terms = Counter(tokenize(text))
+            self._documents[name] = terms
+            self._lengths[name] = sum(terms.values())
+
+        document_frequency = Counter(term for terms in self._documents.values() for term in terms)
+        count = len(self._documents)
+        self._idf = {
+            term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+        self._average_length = sum(self._lengths.values()) / count if count else 0.0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def rank(self, query: str) -> List[Tuple[str, float]]:
+        """
+        Rank tools by relevance to a query.
+
+        Args:
+            query: User query.
+
+        Returns:
+            List of (tool name, score) pairs with a positive score, best first.
+        """
+        query_terms = set(tokenize(query))
+        scores = []
+        for name, terms in self._documents.items():
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[name] / (self._average_length or 1.0))
+            for term in query_terms:
+                frequency = terms.get(term)
+                if frequency:
+                    score += self._idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            if score > 0:
+                scores.append((name, score))
+
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores
+
+    def select(self, query: str, top_k: int, always_include: Iterable[str] = ()) -> List[str]:
+        """
+        Select the tools most relevant to a query.
+
+        Args:
+            query: User query.
+            top_k: Maximum number of ranked tools to select.
+            always_include: Tools selected regardless of the query, if registered.
+
+        Returns:
+            Selected tool names, or an empty list if no tool matches the query.
+        """
+        ranked = [name for name, _ in self.rank(query)[:top_k]]
+        if not ranked:
+            return []
+        extra = [name for name in always_include if name in self._documents and name not in ranked]
+        return ranked + extra
@@ -12,13 +12,8 @@ from typing import Dict, Any, List, Optional, Union, Callable, Awaitable
 import asyncio
 import inspect
 
-# Import tools implementations
-from ..tools.spatial_query import spatial_query_tools
-from ..tools.sustainability_assessment import sustainability_assessment_tools
-from ..tools.visualization import visualization_tools
-from ..tools.weather_tools import weather_tools
-from ..tools.climate_analysis import climate_analysis_tools
-from ..tools.resilience_planning import resilience_planning_tools
+# Tool implementations are imported lazily through the manifest
+from .tool_manifest import TOOL_SETS, LazyToolFunction, load_manifest, load_tool_set
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -58,47 +53,12 @@ def get_all_tools() -> Dict[str, Dict[str, Any]]:
     Returns:
         Dictionary of all available LLM tools.
     """
-    # First, use the registry if not empty
-    if _tool_registry:
-        return _tool_registry.copy()
+    # Tools are normally registered when this module is imported
+    if not _tool_registry:
+        logger.warning("Tool registry is empty, initializing tools")
+        _initialize_tools()
     
-    # Otherwise fall back to direct imports (this path shouldn't happen normally)
-    logger.warning("Tool registry is empty, falling back to direct module imports")
-    
-    # Need to handle both function-returning and direct dictionary tools
-    all_tools = {}
-    
-    # Handle spatial_query_tools (function returning dict)
-    if callable(spatial_query_tools):
-        all_tools.update(spatial_query_tools())
-    else:
-        all_tools.update(spatial_query_tools)
-    
-    # Handle sustainability_assessment_tools (function returning dict)
-    if callable(sustainability_assessment_tools):
-        all_tools.update(sustainability_assessment_tools())
-    else:
-        all_tools.update(sustainability_assessment_tools)
-    
-    # Handle visualization_tools (function returning dict)
-    if callable(visualization_tools):
-        all_tools.update(visualization_tools())
-    else:
-        all_tools.update(visualization_tools)
-    
-    # Handle weather_tools (function returning dict)
-    if callable(weather_tools):
-        all_tools.update(weather_tools())
-    else:
-        all_tools.update(weather_tools)
-    
-    # Handle climate_analysis_tools (direct dict)
-    all_tools.update(climate_analysis_tools)
-    
-    # Handle resilience_planning_tools (direct dict)
-    all_tools.update(resilience_planning_tools)
-    
-    return all_tools
+    return _tool_registry.copy()
 
 
 def get_tool_schemas() -> List[Dict[str, Any]]:
@@ -179,25 +139,32 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, A
 
 
 def _initialize_tools() -> None:
-    """Initialize all tool categories and register them."""
-    # Helper function to handle both direct dictionaries and function-returning dictionaries
-    def register_tool_set(tool_set):
-        tools = tool_set() if callable(tool_set) else tool_set
-        for name, tool in tools.items():
+    """
+    Initialize all tool categories and register them.
+    
+    Tools listed in an up-to-date manifest are registered with lazy functions
+    that import their module on first execution. Without a manifest, every
+    tool module is imported now.
+    """
+    manifest = load_manifest()
+    
+    if manifest is not None:
+        for name, tool in manifest["tools"].items():
             register_tool(
                 name=name,
-                function=tool["function"],
+                function=LazyToolFunction(name, tool["module"], tool["tool_set"]),
                 description=tool["description"],
                 parameters=tool["parameters"]
             )
-    
-    # Register all tool sets
-    register_tool_set(spatial_query_tools)
-    register_tool_set(sustainability_assessment_tools)
-    register_tool_set(visualization_tools)
-    register_tool_set(weather_tools)
-    register_tool_set(climate_analysis_tools)
-    register_tool_set(resilience_planning_tools)
+    else:
+        for module, attribute in TOOL_SETS:
+            for name, tool in load_tool_set(module, attribute).items():
+                register_tool(
+                    name=name,
+                    function=tool["function"],
+                    description=tool["description"],
+                    parameters=tool["parameters"]
+                )
     
     # Register a general tool for answering GIS questions
     register_tool(
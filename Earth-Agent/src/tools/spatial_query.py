@@ -8,19 +8,31 @@ and analyzing spatial patterns.
 
 import logging
 import json
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 import asyncio
+import numpy as np
 import geopy.distance
-from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
 
 from ..config import get_config
+from ..data_sources.geocoding_service import get_geocoding_service, parse_coordinates
+from ..data_sources.poi_index import get_poi_index, haversine_km
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize geocoder with user agent
-geocoder = Nominatim(user_agent="gis_agent")
+# Conversion from kilometers to each supported unit
+UNIT_FACTORS = {
+    "kilometers": 1.0,
+    "miles": 0.621371,
+    "meters": 1000.0
+}
+
+# Maximum number of origin/destination pairs in a distance matrix
+MAX_MATRIX_CELLS = 10000
+
+# Maximum search radius of nearby-feature queries, in kilometers
+MAX_NEARBY_RADIUS_KM = 100.0
 
 
 async def get_location_info(arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -43,7 +55,7 @@ async def get_location_info(arguments: Dict[str, Any]) -> Dict[str, Any]:
     
     try:
         # Geocode the location
-        location_data = geocoder.geocode(location, exactly_one=True, addressdetails=True)
+        location_data = await get_geocoding_service().geocode(location)
         
         if not location_data:
             return {"error": f"Could not find location: {location}"}
@@ -125,20 +137,17 @@ async def calculate_distance(arguments: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": "Both locations must be provided"}
     
     try:
-        # Geocode first location
-        loc1_data = geocoder.geocode(location1, exactly_one=True)
-        if not loc1_data:
+        # Resolve both locations concurrently (coordinates are used as-is)
+        geocoding_service = get_geocoding_service()
+        point1, point2 = await asyncio.gather(
+            geocoding_service.resolve_coordinates(location1),
+            geocoding_service.resolve_coordinates(location2)
+        )
+        if not point1:
             return {"error": f"Could not find location: {location1}"}
-        
-        # Geocode second location
-        loc2_data = geocoder.geocode(location2, exactly_one=True)
-        if not loc2_data:
+        if not point2:
             return {"error": f"Could not find location: {location2}"}
         
-        # Calculate distance
-        point1 = (loc1_data.latitude, loc1_data.longitude)
-        point2 = (loc2_data.latitude, loc2_data.longitude)
-        
         # Calculate distance based on requested unit
         if unit == "kilometers":
             distance = geopy.distance.geodesic(point1, point2).kilometers
@@ -162,9 +171,135 @@ async def calculate_distance(arguments: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": str(e)}
 
 
+async def calculate_distance_matrix(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calculate distances between every origin and every destination.
+
+    All distinct place names are geocoded once, concurrently, and the full
+    matrix is computed in one vectorized haversine pass (or with exact
+    geodesic distances on request).
+
+    Args:
+        arguments: Dictionary containing:
+            - origins: List of location names or coordinates.
+            - destinations: List of location names or coordinates (defaults to origins).
+            - unit: Distance unit (kilometers, miles, meters).
+            - method: 'haversine' (fast, spherical) or 'geodesic' (exact, ellipsoidal).
+            - top_k: Number of nearest destinations ranked for each origin.
+
+    Returns:
+        Dictionary with the distance matrix and the nearest destinations of each origin.
+    """
+    origins = arguments.get("origins") or []
+    destinations = arguments.get("destinations") or origins
+    unit = arguments.get("unit", "kilometers")
+    method = arguments.get("method", "haversine")
+    top_k = arguments.get("top_k", 3)
+    
+    try:
+        top_k = int(top_k)
+    except (TypeError, ValueError):
+        return {"error": f"Invalid top_k: {top_k}"}
+    if top_k < 1:
+        return {"error": f"top_k must be at least 1, got {top_k}"}
+    if not origins:
+        return {"error": "At least one origin must be provided"}
+    if unit not in UNIT_FACTORS:
+        return {"error": f"Unsupported unit: {unit}"}
+    if method not in ("haversine", "geodesic"):
+        return {"error": f"Unsupported method: {method}"}
+    if len(origins) * len(destinations) > MAX_MATRIX_CELLS:
+        return {"error": f"Distance matrix too large: at most {MAX_MATRIX_CELLS} origin/destination pairs"}
+    
+    try:
+        # Geocode each distinct place name once (coordinates are used as-is)
+        locations = list(dict.fromkeys(list(origins) + list(destinations)))
+        names = [location for location in locations if parse_coordinates(location) is None]
+        geocoded = await get_geocoding_service().geocode_many(names) if names else {}
+        
+        points: Dict[str, Optional[Tuple[float, float]]] = {}
+        for location in locations:
+            coordinates = parse_coordinates(location)
+            if coordinates is None and geocoded.get(location) is not None:
+                coordinates = (geocoded[location].latitude, geocoded[location].longitude)
+            points[location] = coordinates
+        
+        unresolved = [location for location, coordinates in points.items() if coordinates is None]
+        origin_points = np.array([points[o] or (np.nan, np.nan) for o in origins], dtype=np.float64)
+        destination_points = np.array([points[d] or (np.nan, np.nan) for d in destinations], dtype=np.float64)
+        
+        if method == "haversine":
+            # Broadcast (N, 1) origins against (M,) destinations into an N x M matrix
+            matrix = haversine_km(
+                origin_points[:, :1], origin_points[:, 1:],
+                destination_points[:, 0], destination_points[:, 1]
+            )
+        else:
+            # Geodesic distances are computed pair by pair, off the event loop
+            matrix = await asyncio.get_running_loop().run_in_executor(
+                None, _geodesic_matrix, origin_points, destination_points
+            )
+        matrix = matrix * UNIT_FACTORS[unit]
+        
+        # Rank destinations for each origin, skipping unresolved ones and the origin itself
+        ranked = np.where(np.isnan(matrix), np.inf, matrix)
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                if destination == origin:
+                    ranked[i, j] = np.inf
+        order = np.argsort(ranked, axis=1, kind="stable")[:, :top_k]
+        
+        nearest = {
+            origin: [
+                {"destination": destinations[j], "distance": round(float(matrix[i, j]), 3)}
+                for j in order[i] if np.isfinite(ranked[i, j])
+            ]
+            for i, origin in enumerate(origins)
+        }
+        
+        return {
+            "origins": origins,
+            "destinations": destinations,
+            "matrix": [
+                [None if np.isnan(value) else round(float(value), 3) for value in row]
+                for row in matrix
+            ],
+            "nearest": nearest,
+            "coordinates": {
+                location: {"latitude": coordinates[0], "longitude": coordinates[1]}
+                for location, coordinates in points.items() if coordinates is not None
+            },
+            "unresolved": unresolved,
+            "unit": unit,
+            "method": method
+        }
+    except Exception as e:
+        logger.error(f"Error calculating distance matrix: {e}")
+        return {"error": str(e)}
+
+
+def _geodesic_matrix(origin_points: np.ndarray, destination_points: np.ndarray) -> np.ndarray:
+    """
+    Calculate geodesic distances in kilometers between every origin and destination.
+
+    Args:
+        origin_points: (N, 2) array of latitude/longitude, NaN for unresolved places.
+        destination_points: (M, 2) array of latitude/longitude, NaN for unresolved places.
+
+    Returns:
+        N x M matrix of distances, NaN where either place is unresolved.
+    """
+    matrix = np.full((len(origin_points), len(destination_points)), np.nan)
+    for i, origin in enumerate(origin_points):
+        for j, destination in enumerate(destination_points):
+            if not (np.isnan(origin).any() or np.isnan(destination).any()):
+                matrix[i, j] = geopy.distance.geodesic(tuple(origin), tuple(destination)).kilometers
+    return matrix
+
+
 async def find_nearby_features(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Find features near a specific location using OpenStreetMap data via Nominatim.
+    Find features near a specific location using the local OpenStreetMap POI index.
 
     Args:
         arguments: Dictionary containing:
@@ -174,7 +309,7 @@ async def find_nearby_features(arguments: Dict[str, Any]) -> Dict[str, Any]:
             - limit: Maximum number of features to return.
 
     Returns:
-        Dictionary with nearby features.
+        Dictionary with nearby features, nearest first.
     """
     location = arguments.get("location", "")
     feature_type = arguments.get("feature_type", "")
@@ -183,22 +318,49 @@ async def find_nearby_features(arguments: Dict[str, Any]) -> Dict[str, Any]:
     
     if not location or not feature_type:
         return {"error": "Location and feature type must be provided"}
+    try:
+        radius = float(radius)
+    except (TypeError, ValueError):
+        return {"error": f"Invalid radius: {radius}"}
+    if not radius >= 0:
+        return {"error": "Radius must be a non-negative number of kilometers"}
+    radius = min(radius, MAX_NEARBY_RADIUS_KM)
     
     try:
         # Geocode the location
-        location_data = geocoder.geocode(location, exactly_one=True)
+        location_data = await get_geocoding_service().resolve_coordinates(location)
         if not location_data:
             return {"error": f"Could not find location: {location}"}
         
-        # Note: Nominatim doesn't directly support "find nearby" functionality like ArcGIS
-        # This would require integration with additional APIs like OpenStreetMap Overpass API
-        # For now, we'll return a placeholder response
+        # Nominatim can't answer radius queries, so use the local POI index
+        poi_index = get_poi_index()
+        if poi_index is None:
+            return {
+                "note": "No local POI index has been built. Build one from an OpenStreetMap extract with "
+                        "'python -m src.data_sources.poi_index <extract>'",
+                "features": [],
+                "location": location,
+                "feature_type": feature_type,
+                "radius": radius,
+                "unit": "kilometers"
+            }
+        
+        category = poi_index.resolve_category(feature_type)
+        if category is None:
+            return {"error": f"Unknown feature type: {feature_type}"}
+        
+        latitude, longitude = location_data
+        features = poi_index.within_radius(latitude, longitude, radius, category, limit=int(limit))
         
         return {
-            "note": "Full nearby features search requires integration with additional APIs like OpenStreetMap Overpass API",
-            "features": [],
+            "features": features,
+            "count": len(features),
             "location": location,
-            "feature_type": feature_type,
+            "coordinates": {
+                "latitude": latitude,
+                "longitude": longitude
+            },
+            "feature_type": category,
             "radius": radius,
             "unit": "kilometers"
         }
@@ -304,6 +466,42 @@ def spatial_query_tools() -> Dict[str, Dict[str, Any]]:
             }
         },
         
+        "calculate_distance_matrix": {
+            "function": calculate_distance_matrix,
+            "description": "Calculate distances between several origins and destinations at once and rank the nearest destinations for each origin (e.g. which of these cities is closest to X).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "origins": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Origin location names or coordinates (latitude,longitude)"
+                    },
+                    "destinations": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Destination location names or coordinates (latitude,longitude). Defaults to the origins."
+                    },
+                    "unit": {
+                        "type": "string",
+                        "enum": ["kilometers", "miles", "meters"],
+                        "description": "Distance unit to return"
+                    },
+                    "method": {
+                        "type": "string",
+                        "enum": ["haversine", "geodesic"],
+                        "description": "Distance model: fast spherical haversine (default) or exact ellipsoidal geodesic"
+                    },
+                    "top_k": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Number of nearest destinations to rank for each origin"
+                    }
+                },
+                "required": ["origins"]
+            }
+        },
+        
         "find_nearby_features": {
             "function": find_nearby_features,
             "description": "Find features near a specific location (e.g., parks, hospitals, restaurants).",
@@ -320,7 +518,7 @@ def spatial_query_tools() -> Dict[str, Dict[str, Any]]:
                     },
                     "radius": {
                         "type": "number",
-                        "description": "Search radius in kilometers"
+                        "description": f"Search radius in kilometers (at most {MAX_NEARBY_RADIUS_KM:g})"
                     },
                     "limit": {
                         "type": "integer",
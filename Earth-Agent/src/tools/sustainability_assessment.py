@@ -42,7 +42,7 @@ async def get_carbon_footprint(arguments: Dict[str, Any]) -> Dict[str, Any]:
     
     try:
         # Get the Earth Engine client
-        ee_client = get_earth_engine_client()
+        ee_client = await get_earth_engine_client()
         
         # Calculate carbon footprint
         result = await ee_client.calculate_carbon_footprint(
@@ -84,7 +84,7 @@ async def analyze_water_resources(arguments: Dict[str, Any]) -> Dict[str, Any]:
     
     try:
         # Get the Earth Engine client
-        ee_client = get_earth_engine_client()
+        ee_client = await get_earth_engine_client()
         
         # Analyze water resources using Earth Engine data
         result = await ee_client.analyze_water_resources(
@@ -124,7 +124,7 @@ async def assess_biodiversity(arguments: Dict[str, Any]) -> Dict[str, Any]:
     
     try:
         # Get the Earth Engine client
-        ee_client = get_earth_engine_client()
+        ee_client = await get_earth_engine_client()
         
         # Assess biodiversity using Earth Engine data
         result = await ee_client.assess_biodiversity(
@@ -165,7 +165,7 @@ async def analyze_land_use_change(arguments: Dict[str, Any]) -> Dict[str, Any]:
     
     try:
         # Get the Earth Engine client
-        ee_client = get_earth_engine_client()
+        ee_client = await get_earth_engine_client()
         
         # Analyze land use change
         result = await ee_client.analyze_land_use_change(
@@ -229,7 +229,7 @@ async def calculate_environmental_risk(arguments: Dict[str, Any]) -> Dict[str, A
             }
         else:
             # For other environmental risks, use Earth Engine
-            client = get_earth_engine_client()
+            client = await get_earth_engine_client()
             result = await client.calculate_environmental_risk(
                 area, risk_type, time_frame, parameters
             )
@@ -14,14 +14,12 @@ import os
 from typing import Dict, Any, List, Optional, Union
 import asyncio
 
-import folium
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
 import numpy as np
-import pandas as pd
+from datetime import date, timedelta
 from pathlib import Path
 
 from ..config import get_config
+from ..utils.chart_renderer import get_chart_renderer
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -50,6 +48,9 @@ async def generate_map(arguments: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": "No area provided"}
     
     try:
+        # Imported here so that loading the visualization tools stays cheap
+        import folium
+        
         # Simple implementation using folium
         # In a complete implementation, you would integrate with more GIS libraries
         # for advanced features and data layers
@@ -112,8 +113,9 @@ async def create_chart(arguments: Dict[str, Any]) -> Dict[str, Any]:
         arguments: Dictionary containing:
             - chart_type: Type of chart to create.
             - data_source: Source of the data.
-            - parameters: Additional parameters for the chart.
-            - output_format: Output format (png, jpg, html).
+            - parameters: Additional parameters for the chart, including the
+              output width and height in inches and dpi.
+            - output_format: Output format (png, svg, jpg).
 
     Returns:
         Dictionary with the chart visualization or link to the visualization file.
@@ -127,70 +129,66 @@ async def create_chart(arguments: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": "Chart type and data source must be provided"}
     
     try:
-        # This is a simplified implementation using matplotlib
+        # This is a simplified implementation using placeholder data
         # In a real implementation, you would integrate with data sources
         # to get actual data for the chart
-        
-        # Create a sample dataframe with placeholder data
-        np.random.seed(42)  # For reproducibility
+        rng = np.random.default_rng(42)  # For reproducibility
         
         if chart_type == "bar":
             # Sample data for a bar chart
             categories = ["Category A", "Category B", "Category C", "Category D", "Category E"]
-            values = np.random.randint(1, 100, size=len(categories))
-            
-            plt.figure(figsize=(10, 6))
-            plt.bar(categories, values)
-            plt.xlabel("Categories")
-            plt.ylabel("Values")
-            plt.title(f"Sample Bar Chart: {data_source}")
+            spec = {
+                "kind": "bar",
+                "title": f"Sample Bar Chart: {data_source}",
+                "xlabel": "Categories",
+                "ylabel": "Values",
+                "categories": categories,
+                "series": [{"y": rng.integers(1, 100, size=len(categories)).tolist()}]
+            }
             
         elif chart_type == "line":
             # Sample data for a line chart
-            dates = pd.date_range(start="2023-01-01", periods=30, freq="D")
-            values = np.cumsum(np.random.randn(30) * 10)
-            
-            plt.figure(figsize=(10, 6))
-            plt.plot(dates, values)
-            plt.xlabel("Date")
-            plt.ylabel("Values")
-            plt.title(f"Sample Line Chart: {data_source}")
-            plt.grid(True)
+            spec = {
+                "kind": "line",
+                "title": f"Sample Line Chart: {data_source}",
+                "xlabel": "Date",
+                "ylabel": "Values",
+                "grid": True,
+                "x_dates": True,
+                "series": [{"x": _sample_dates(30), "y": np.cumsum(rng.standard_normal(30) * 10).tolist()}]
+            }
             
         elif chart_type == "scatter":
             # Sample data for a scatter plot
-            x = np.random.randn(50) * 10
-            y = np.random.randn(50) * 10
-            
-            plt.figure(figsize=(10, 6))
-            plt.scatter(x, y)
-            plt.xlabel("X Values")
-            plt.ylabel("Y Values")
-            plt.title(f"Sample Scatter Plot: {data_source}")
-            plt.grid(True)
+            spec = {
+                "kind": "scatter",
+                "title": f"Sample Scatter Plot: {data_source}",
+                "xlabel": "X Values",
+                "ylabel": "Y Values",
+                "grid": True,
+                "series": [{"x": (rng.standard_normal(50) * 10).tolist(), "y": (rng.standard_normal(50) * 10).tolist()}]
+            }
             
         elif chart_type == "pie":
             # Sample data for a pie chart
             categories = ["Category A", "Category B", "Category C", "Category D"]
-            values = np.random.randint(1, 100, size=len(categories))
-            
-            plt.figure(figsize=(10, 6))
-            plt.pie(values, labels=categories, autopct='%1.1f%%')
-            plt.title(f"Sample Pie Chart: {data_source}")
+            spec = {
+                "kind": "pie",
+                "title": f"Sample Pie Chart: {data_source}",
+                "categories": categories,
+                "series": [{"y": rng.integers(1, 100, size=len(categories)).tolist()}]
+            }
             
         else:
             return {"error": f"Chart type '{chart_type}' is not supported"}
         
-        # Save the chart to a file
-        temp_dir = Path(tempfile.gettempdir())
-        file_path = temp_dir / f"chart_{hash(chart_type)}_{hash(data_source)}.{output_format}"
-        
-        plt.tight_layout()
-        plt.savefig(str(file_path), format=output_format)
-        plt.close()
+        # Render in the chart renderer's process pool
+        renderer = get_chart_renderer()
+        size = renderer.resolve_size(parameters.get("width"), parameters.get("height"), parameters.get("dpi"))
+        file_path = await renderer.render_to_file(spec, output_format, size, prefix="chart")
         
         return {
-            "file_path": str(file_path),
+            "file_path": file_path,
             "format": output_format,
             "chart_type": chart_type,
             "data_source": data_source
@@ -210,8 +208,9 @@ async def create_comparison_visualization(arguments: Dict[str, Any]) -> Dict[str
             - subject1: First subject to compare.
             - subject2: Second subject to compare.
             - data_type: Type of data to compare.
-            - parameters: Additional parameters for the comparison.
-            - output_format: Output format (png, jpg, html).
+            - parameters: Additional parameters for the comparison, including
+              the output width and height in inches and dpi.
+            - output_format: Output format (png, svg, jpg).
 
     Returns:
         Dictionary with the comparison visualization or link to the visualization file.
@@ -227,59 +226,54 @@ async def create_comparison_visualization(arguments: Dict[str, Any]) -> Dict[str
         return {"error": "Comparison type, subjects, and data type must be provided"}
     
     try:
-        # This is a simplified implementation using matplotlib
+        # This is a simplified implementation using placeholder data
         # In a real implementation, you would integrate with data sources
         # to get actual data for the comparison
+        rng = np.random.default_rng(42)  # For reproducibility
+        title = f"Comparison of {subject1} and {subject2}: {data_type}"
         
         if comparison_type == "bar":
             # Sample data for a bar chart comparison
             categories = ["Metric 1", "Metric 2", "Metric 3", "Metric 4"]
-            values1 = np.random.randint(1, 100, size=len(categories))
-            values2 = np.random.randint(1, 100, size=len(categories))
-            
-            x = np.arange(len(categories))
-            width = 0.35
-            
-            fig, ax = plt.subplots(figsize=(12, 6))
-            ax.bar(x - width/2, values1, width, label=subject1)
-            ax.bar(x + width/2, values2, width, label=subject2)
-            
-            ax.set_xlabel("Metrics")
-            ax.set_ylabel("Values")
-            ax.set_title(f"Comparison of {subject1} and {subject2}: {data_type}")
-            ax.set_xticks(x)
-            ax.set_xticklabels(categories)
-            ax.legend()
-            ax.grid(True, axis='y')
+            spec = {
+                "kind": "bar",
+                "title": title,
+                "xlabel": "Metrics",
+                "ylabel": "Values",
+                "grid": "y",
+                "categories": categories,
+                "series": [
+                    {"label": subject1, "y": rng.integers(1, 100, size=len(categories)).tolist()},
+                    {"label": subject2, "y": rng.integers(1, 100, size=len(categories)).tolist()}
+                ]
+            }
             
         elif comparison_type == "line":
             # Sample data for a line chart comparison
-            dates = pd.date_range(start="2023-01-01", periods=30, freq="D")
-            values1 = np.cumsum(np.random.randn(30) * 5 + 1)
-            values2 = np.cumsum(np.random.randn(30) * 5 + 2)
-            
-            plt.figure(figsize=(12, 6))
-            plt.plot(dates, values1, label=subject1)
-            plt.plot(dates, values2, label=subject2)
-            plt.xlabel("Date")
-            plt.ylabel("Values")
-            plt.title(f"Comparison of {subject1} and {subject2}: {data_type}")
-            plt.legend()
-            plt.grid(True)
+            dates = _sample_dates(30)
+            spec = {
+                "kind": "line",
+                "title": title,
+                "xlabel": "Date",
+                "ylabel": "Values",
+                "grid": True,
+                "x_dates": True,
+                "series": [
+                    {"label": subject1, "x": dates, "y": np.cumsum(rng.standard_normal(30) * 5 + 1).tolist()},
+                    {"label": subject2, "x": dates, "y": np.cumsum(rng.standard_normal(30) * 5 + 2).tolist()}
+                ]
+            }
             
         else:
             return {"error": f"Comparison type '{comparison_type}' is not supported"}
         
-        # Save the comparison visualization to a file
-        temp_dir = Path(tempfile.gettempdir())
-        file_path = temp_dir / f"comparison_{hash(subject1)}_{hash(subject2)}.{output_format}"
-        
-        plt.tight_layout()
-        plt.savefig(str(file_path), format=output_format)
-        plt.close()
+        # Render in the chart renderer's process pool; comparisons default to a wider chart
+        renderer = get_chart_renderer()
+        size = renderer.resolve_size(parameters.get("width", 12), parameters.get("height"), parameters.get("dpi"))
+        file_path = await renderer.render_to_file(spec, output_format, size, prefix="comparison")
         
         return {
-            "file_path": str(file_path),
+            "file_path": file_path,
             "format": output_format,
             "comparison_type": comparison_type,
             "subject1": subject1,
@@ -291,6 +285,12 @@ async def create_comparison_visualization(arguments: Dict[str, Any]) -> Dict[str
         return {"error": str(e)}
 
 
+def _sample_dates(days: int) -> List[str]:
+    """Daily ISO dates starting 2023-01-01 for placeholder time series."""
+    start = date(2023, 1, 1)
+    return [(start + timedelta(days=i)).isoformat() for i in range(days)]
+
+
 # Function to return all visualization tools
 def visualization_tools() -> Dict[str, Dict[str, Any]]:
     """
@@ -354,7 +354,7 @@ def visualization_tools() -> Dict[str, Dict[str, Any]]:
                     },
                     "output_format": {
                         "type": "string",
-                        "enum": ["png", "jpg", "html"],
+                        "enum": ["png", "svg", "jpg"],
                         "description": "Output format of the visualization"
                     }
                 },
@@ -391,7 +391,7 @@ def visualization_tools() -> Dict[str, Dict[str, Any]]:
                     },
                     "output_format": {
                         "type": "string",
-                        "enum": ["png", "jpg", "html"],
+                        "enum": ["png", "svg", "jpg"],
                         "description": "Output format of the visualization"
                     }
                 },
@@ -20,9 +20,13 @@ from .security import (
     get_input_validator,
     QueryMessage,
     ToolCallMessage,
+    PipelineStep,
+    PipelineMessage,
     ClearHistoryMessage
 )
 from .tool_executor import get_tool_executor
+from .http_client import get_http_client, get_http_metrics, close_http_clients
+from .chart_renderer import get_chart_renderer, close_chart_renderer
 
 __all__ = [
     "get_cache",
@@ -31,8 +35,15 @@ __all__ = [
     "get_tool_call_rate_limiter",
     "get_input_validator",
     "get_tool_executor",
+    "get_http_client",
+    "get_http_metrics",
+    "close_http_clients",
+    "get_chart_renderer",
+    "close_chart_renderer",
     "schedule_cache_maintenance",
     "QueryMessage",
     "ToolCallMessage",
+    "PipelineStep",
+    "PipelineMessage",
     "ClearHistoryMessage"
 ] 
\ No newline at end of file
@@ -0,0 +1,391 @@
+"""
+Chart rendering for the GIS AI Agent.
+
+Charts are described by plain, JSON-serializable specs and rendered with the
+object-oriented matplotlib Figure API in a process pool, so rendering never
+blocks the event loop and concurrent charts never share pyplot state.
+
+Rendered charts are addressed by a hash of their spec, data, format and size:
+output files get unique, content-addressed names, repeated charts are served
+from a result cache, and concurrent requests for the same chart are coalesced
+into a single render.
+
+A chart spec looks like:
+    {
+        "kind": "bar",            # bar, line, scatter or pie
+        "title": "...",
+        "xlabel": "...",
+        "ylabel": "...",
+        "grid": True,             # or "x" / "y" for a single axis
+        "x_dates": False,         # parse x values as ISO dates
+        "categories": [...],      # bar and pie labels
+        "series": [{"label": "...", "x": [...], "y": [...]}]
+    }
+"""
+
+import io
+import os
+import json
+import hashlib
+import logging
+import asyncio
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from ..config import get_config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("png", "svg", "jpg")
+CHART_KINDS = ("bar", "line", "scatter", "pie")
+
+DEFAULT_OUTPUT_DIR = "data/charts"
+
+# Limits of the output size, in inches and dots per inch
+MAX_SIZE_INCHES = 30.0
+MAX_DPI = 300
+
+
+def chart_key(spec: Dict[str, Any], output_format: str, size: Tuple[float, float, int]) -> str:
+    """
+    Compute the content address of a chart.
+
+    Args:
+        spec: Chart spec, including its data.
+        output_format: Output format.
+        size: (width, height, dpi) of the output.
+
+    Returns:
+        Hex SHA-256 digest of the canonical spec, format and size.
+    """
+    payload = json.dumps([spec, output_format, list(size)], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _draw(fig: Any, spec: Dict[str, Any]) -> None:
+    """Draw a chart spec onto a matplotlib Figure."""
+    ax = fig.add_subplot()
+    kind = spec["kind"]
+    series = spec.get("series", [])
+
+    if kind == "pie":
+        ax.pie(series[0]["y"], labels=spec.get("categories"), autopct="%1.1f%%")
+    elif kind == "bar":
+        categories = spec.get("categories", [])
+        positions = list(range(len(categories)))
+        width = 0.8 / max(len(series), 1)
+        for i, item in enumerate(series):
+            offset = (i - (len(series) - 1) / 2) * width
+            ax.bar([p + offset for p in positions], item["y"], width, label=item.get("label"))
+        ax.set_xticks(positions)
+        ax.set_xticklabels(categories)
+    else:
+        for item in series:
+            x = item.get("x", list(range(len(item["y"]))))
+            if spec.get("x_dates"):
+                x = [date.fromisoformat(value) for value in x]
+            if kind == "line":
+                ax.plot(x, item["y"], label=item.get("label"))
+            else:
+                ax.scatter(x, item["y"], label=item.get("label"))
+        if spec.get("x_dates"):
+            fig.autofmt_xdate()
+
+    if kind != "pie":
+        ax.set_xlabel(spec.get("xlabel", ""))
+        ax.set_ylabel(spec.get("ylabel", ""))
+        grid = spec.get("grid", False)
+        if grid:
+            ax.grid(True, axis=grid if grid in ("x", "y") else "both")
+    if any(item.get("label") for item in series) and kind != "pie":
+        ax.legend()
+    ax.set_title(spec.get("title", ""))
+
+
+def _render_chart(spec: Dict[str, Any],
+                  output_format: str,
+                  size: Tuple[float, float, int],
+                  file_path: Optional[str] = None) -> Optional[bytes]:
+    """
+    Render a chart in a worker process.
+
+    Args:
+        spec: Chart spec.
+        output_format: Output format.
+        size: (width, height, dpi) of the output.
+        file_path: Content-addressed output path. If given, the chart is
+            written there (unless it already exists) instead of returned.
+
+    Returns:
+        The encoded chart, or None if it was written to file_path.
+    """
+    if file_path is not None and os.path.exists(file_path):
+        return None
+
+    # Imported here so that only worker processes load matplotlib
+    from matplotlib.figure import Figure
+
+    width, height, dpi = size
+    fig = Figure(figsize=(width, height), dpi=dpi)
+    _draw(fig, spec)
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=output_format, dpi=dpi)
+    data = buffer.getvalue()
+
+    if file_path is None:
+        return data
+
+    # Write atomically so readers never see a partial chart
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, file_path)
+    return None
+
+
+class ChartRenderer:
+    """Process-pool chart renderer with a content-addressed result cache."""
+
+    def __init__(self,
+                 output_dir: Optional[str] = None,
+                 max_workers: int = 2,
+                 cache_size: int = 128,
+                 width: float = 10.0,
+                 height: float = 6.0,
+                 dpi: int = 100):
+        """
+        Initialize the renderer.
+
+        Args:
+            output_dir: Directory for rendered chart files.
+            max_workers: Number of rendering processes.
+            cache_size: Number of rendered charts kept in memory.
+            width: Default chart width in inches.
+            height: Default chart height in inches.
+            dpi: Default resolution in dots per inch.
+        """
+        self.output_dir = Path(output_dir or DEFAULT_OUTPUT_DIR)
+        if not self.output_dir.is_absolute():
+            self.output_dir = Path(__file__).parent.parent.parent / self.output_dir
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._remove_stale_files()
+
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self.default_size = (width, height, dpi)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._images: "OrderedDict[str, bytes]" = OrderedDict()
+        self._files: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, bool], asyncio.Future] = {}
+        self.stats = {"renders": 0, "cache_hits": 0, "coalesced": 0, "errors": 0}
+
+    def resolve_size(self,
+                     width: Optional[float] = None,
+                     height: Optional[float] = None,
+                     dpi: Optional[int] = None) -> Tuple[float, float, int]:
+        """
+        Resolve an output size against the defaults and limits.
+
+        Args:
+            width: Width in inches.
+            height: Height in inches.
+            dpi: Resolution in dots per inch.
+
+        Returns:
+            (width, height, dpi) tuple.
+        """
+        default_width, default_height, default_dpi = self.default_size
+        width = min(max(float(width or default_width), 1.0), MAX_SIZE_INCHES)
+        height = min(max(float(height or default_height), 1.0), MAX_SIZE_INCHES)
+        dpi = min(max(int(dpi or default_dpi), 10), MAX_DPI)
+        return width, height, dpi
+
+    async def render(self,
+                     spec: Dict[str, Any],
+                     output_format: str = "png",
+                     size: Optional[Tuple[float, float, int]] = None) -> bytes:
+        """
+        Render a chart to bytes.
+
+        Args:
+            spec: Chart spec.
+            output_format: Output format (png, svg or jpg).
+            size: (width, height, dpi) of the output. Defaults to the renderer defaults.
+
+        Returns:
+            The encoded chart.
+
+        Raises:
+            ValueError: If the spec or format is not supported.
+        """
+        size = size or self.default_size
+        key = self._validate(spec, output_format, size)
+
+        if key in self._images:
+            self.stats["cache_hits"] += 1
+            self._images.move_to_end(key)
+            return self._images[key]
+
+        data = await self._submit((key, False), spec, output_format, size, None)
+        self._remember(self._images, key, data)
+        return data
+
+    async def render_to_file(self,
+                             spec: Dict[str, Any],
+                             output_format: str = "png",
+                             size: Optional[Tuple[float, float, int]] = None,
+                             prefix: str = "chart") -> str:
+        """
+        Render a chart to a content-addressed file.
+
+        Args:
+            spec: Chart spec.
+            output_format: Output format (png, svg or jpg).
+            size: (width, height, dpi) of the output. Defaults to the renderer defaults.
+            prefix: File name prefix.
+
+        Returns:
+            Path of the chart file.
+
+        Raises:
+            ValueError: If the spec or format is not supported.
+        """
+        size = size or self.default_size
+        key = self._validate(spec, output_format, size)
+
+        if key in self._files:
+            self.stats["cache_hits"] += 1
+            self._files.move_to_end(key)
+            return self._files[key]
+
+        file_path = str(self.output_dir / f"{prefix}_{key[:24]}.{output_format}")
+        await self._submit((key, True), spec, output_format, size, file_path)
+        self._remember(self._files, key, file_path)
+        return file_path
+
+    def _validate(self, spec: Dict[str, Any], output_format: str, size: Tuple[float, float, int]) -> str:
+        """Check a chart request and return its content address."""
+        if output_format not in SUPPORTED_FORMATS:
+            raise ValueError(f"Output format '{output_format}' is not supported, use one of {', '.join(SUPPORTED_FORMATS)}")
+        if spec.get("kind") not in CHART_KINDS:
+            raise ValueError(f"Chart kind '{spec.get('kind')}' is not supported")
+        if not spec.get("series"):
+            raise ValueError("Chart spec has no data series")
+        return chart_key(spec, output_format, size)
+
+    async def _submit(self,
+                      inflight_key: Tuple[str, bool],
+                      spec: Dict[str, Any],
+                      output_format: str,
+                      size: Tuple[float, float, int],
+                      file_path: Optional[str]) -> Optional[bytes]:
+        """Render in the process pool, coalescing identical concurrent requests."""
+        if inflight_key in self._inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._inflight[inflight_key])
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_pool(), _render_chart, spec, output_format, size, file_path)
+        self._inflight[inflight_key] = future
+        self.stats["renders"] += 1
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._inflight.pop(inflight_key, None)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Create the process pool on first use."""
+        if self._pool is None:
+            # Spawned workers don't inherit the server's threads, locks and sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def _remove_stale_files(self) -> None:
+        """Delete chart files left by earlier runs, which no cache refers to."""
+        removed = 0
+        for output_format in SUPPORTED_FORMATS:
+            for path in self.output_dir.glob(f"*_{'[0-9a-f]' * 24}.{output_format}"):
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError as e:
+                    logger.warning(f"Could not remove stale chart file {path}: {e}")
+        if removed:
+            logger.info(f"Removed {removed} chart files from earlier runs in {self.output_dir}")
+
+    def _remember(self, cache: "OrderedDict[str, Any]", key: str, value: Any) -> None:
+        """Store a result in an LRU cache, deleting the files of evicted charts."""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            _, evicted = cache.popitem(last=False)
+            if cache is self._files:
+                try:
+                    os.remove(evicted)
+                except OSError as e:
+                    logger.warning(f"Could not remove evicted chart file {evicted}: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get rendering metrics.
+
+        Returns:
+            Dictionary with render, cache-hit, coalescing and error counts.
+        """
+        return {**self.stats, "cached": len(self._images) + len(self._files), "inflight": len(self._inflight)}
+
+    def shutdown(self) -> None:
+        """Stop the rendering processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Singleton instance
+_chart_renderer = None
+
+
+def get_chart_renderer() -> ChartRenderer:
+    """
+    Get the chart renderer configured under tools.tool_config.visualization.
+
+    Returns:
+        ChartRenderer instance.
+    """
+    global _chart_renderer
+
+    if _chart_renderer is None:
+        tool_config = get_config().get_tool_config().get("tool_config", {})
+        chart_config = tool_config.get("visualization", {})
+        _chart_renderer = ChartRenderer(
+            output_dir=chart_config.get("output_dir", DEFAULT_OUTPUT_DIR),
+            max_workers=chart_config.get("max_workers", 2),
+            cache_size=chart_config.get("cache_size", 128),
+            width=chart_config.get("width", 10.0),
+            height=chart_config.get("height", 6.0),
+            dpi=chart_config.get("dpi", 100)
+        )
+
+    return _chart_renderer
+
+
+def close_chart_renderer() -> None:
+    """Stop the shared chart renderer's worker processes."""
+    global _chart_renderer
+
+    if _chart_renderer is not None:
+        _chart_renderer.shutdown()
+        _chart_renderer = None
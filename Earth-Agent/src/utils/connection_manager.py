@@ -3,11 +3,19 @@ Connection manager module for the GIS AI Agent.
 
 This module provides functionality for managing WebSocket connections and sessions,
 including connection pooling, session hibernation, and reconnection.
+
+Inactivity and hibernation deadlines are kept in heaps, so the session monitor
+sleeps until the next deadline and expires sessions in O(log n) each instead
+of scanning every session. Outgoing messages go through a bounded queue per
+connection, drained by its own writer task with a send timeout, so one slow
+client cannot delay messages to the others; a client whose queue fills up or
+whose send times out is evicted.
 """
 
+import heapq
 import asyncio
 import logging
-from typing import Dict, Set, Optional, List, Any, Callable, Awaitable
+from typing import Dict, Set, Optional, List, Any, Callable, Awaitable, Tuple
 import time
 import uuid
 from fastapi import WebSocket, WebSocketDisconnect
@@ -29,7 +37,10 @@ class ConnectionManager:
     def __init__(self, 
                 inactive_timeout: int = 1800,  # 30 minutes
                 max_connections: int = 100,
-                hibernation_timeout: int = 7200):  # 2 hours
+                hibernation_timeout: int = 7200,  # 2 hours
+                send_timeout: float = 10.0,
+                outbound_queue_size: int = 256,
+                monitor_interval: float = 300.0):
         """
         Initialize the connection manager.
         
@@ -37,6 +48,11 @@ class ConnectionManager:
             inactive_timeout: Time in seconds after which a session is considered inactive.
             max_connections: Maximum number of active connections allowed.
             hibernation_timeout: Time in seconds after which a hibernated session is removed.
+            send_timeout: Time in seconds a single send may take before the client
+                          is evicted as a slow consumer.
+            outbound_queue_size: Maximum queued outgoing messages per connection
+                                 before the client is evicted as a slow consumer.
+            monitor_interval: Maximum time in seconds the session monitor sleeps.
         """
         self.active_connections: Dict[str, WebSocket] = {}  # session_id -> WebSocket
         self.connection_times: Dict[str, float] = {}  # session_id -> last_activity_time
@@ -45,8 +61,25 @@ class ConnectionManager:
         self.inactive_timeout = inactive_timeout
         self.max_connections = max_connections
         self.hibernation_timeout = hibernation_timeout
+        self.send_timeout = send_timeout
+        self.outbound_queue_size = outbound_queue_size
+        self.monitor_interval = monitor_interval
         self._monitor_task = None
         
+        # Outbound queue and writer task per connection
+        self._outbound: Dict[str, asyncio.Queue] = {}
+        self._writers: Dict[str, asyncio.Task] = {}
+        
+        # (deadline, session_id) heaps. Activity updates do not touch the
+        # heaps; an entry whose session was active since it was pushed is
+        # rescheduled when it reaches the top.
+        self._inactivity_deadlines: List[Tuple[float, str]] = []
+        self._hibernation_deadlines: List[Tuple[float, str]] = []
+        self._wakeup = asyncio.Event()
+        self._next_wakeup = 0.0
+        
+        self.stats = {"connected": 0, "hibernated": 0, "expired": 0, "evicted": 0, "dropped_messages": 0}
+        
         logger.info(f"ConnectionManager initialized with {max_connections} max connections")
     
     def start_monitoring(self) -> None:
@@ -98,8 +131,16 @@ class ConnectionManager:
         # We could restore session data here if the client provides a previous session ID
         
         # Register the connection
+        now = time.time()
         self.active_connections[session_id] = websocket
-        self.connection_times[session_id] = time.time()
+        self.connection_times[session_id] = now
+        self._schedule(self._inactivity_deadlines, now + self.inactive_timeout, session_id)
+        
+        # Start the connection's writer
+        queue = asyncio.Queue(maxsize=self.outbound_queue_size)
+        self._outbound[session_id] = queue
+        self._writers[session_id] = asyncio.create_task(self._write_outbound(session_id, websocket, queue))
+        self.stats["connected"] += 1
         
         logger.info(f"Client connected with session ID: {session_id}")
         return session_id
@@ -113,13 +154,24 @@ class ConnectionManager:
         """
         if session_id in self.active_connections:
             # Move to hibernated state instead of complete removal
-            self.hibernated_sessions[session_id] = time.time()
+            now = time.time()
+            self.hibernated_sessions[session_id] = now
+            self._schedule(self._hibernation_deadlines, now + self.hibernation_timeout, session_id)
             
             # Remove from active connections
             del self.active_connections[session_id]
             
             if session_id in self.connection_times:
                 del self.connection_times[session_id]
+            
+            # Stop the writer and drop undelivered messages; a writer that
+            # is evicting its own client must not cancel itself
+            queue = self._outbound.pop(session_id, None)
+            if queue is not None:
+                self.stats["dropped_messages"] += queue.qsize()
+            writer = self._writers.pop(session_id, None)
+            if writer is not None and writer is not asyncio.current_task():
+                writer.cancel()
                 
             logger.info(f"Client disconnected, session hibernated: {session_id}")
     
@@ -139,50 +191,113 @@ class ConnectionManager:
         """
         Send a JSON message to a specific client.
         
+        The message is queued for the connection's writer, so this does not
+        wait for a slow client. A client whose queue is full is evicted.
+        
         Args:
             session_id: The session ID to send the message to.
             message: The message object to send.
             
         Returns:
-            True if the message was sent, False if the session is not connected.
+            True if the message was queued, False if the session is not connected
+            or was evicted.
         """
-        if session_id not in self.active_connections:
+        queue = self._outbound.get(session_id)
+        if queue is None:
             return False
         
+        # Update last activity time
+        self.connection_times[session_id] = time.time()
+        
         try:
-            # Update last activity time
-            self.connection_times[session_id] = time.time()
-            
-            # Send the message
-            await self.active_connections[session_id].send_json(message)
+            queue.put_nowait(message)
             return True
-        except Exception as e:
-            logger.error(f"Error sending message to session {session_id}: {e}")
-            await self._handle_connection_error(session_id)
+        except asyncio.QueueFull:
+            await self._evict(session_id, "outbound queue full")
             return False
     
-    async def broadcast_json(self, message: Any, exclude: Optional[List[str]] = None) -> None:
+    async def broadcast_json(self, message: Any, exclude: Optional[List[str]] = None) -> int:
         """
         Broadcast a JSON message to all connected clients.
         
+        The message is queued on every connection at once and each writer
+        delivers it independently; clients whose queue is full are evicted.
+        
         Args:
             message: The message object to broadcast.
             exclude: List of session IDs to exclude from the broadcast.
+            
+        Returns:
+            Number of clients the message was queued for.
         """
-        exclude = exclude or []
-        failed_sessions = []
+        exclude = set(exclude or [])
+        queued = 0
+        slow_sessions = []
         
-        for session_id, websocket in self.active_connections.items():
-            if session_id not in exclude:
-                try:
-                    await websocket.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to session {session_id}: {e}")
-                    failed_sessions.append(session_id)
+        for session_id, queue in self._outbound.items():
+            if session_id in exclude:
+                continue
+            try:
+                queue.put_nowait(message)
+                queued += 1
+            except asyncio.QueueFull:
+                slow_sessions.append(session_id)
+        
+        # Evict slow consumers concurrently
+        if slow_sessions:
+            await asyncio.gather(*(self._evict(session_id, "outbound queue full") for session_id in slow_sessions))
+        
+        return queued
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get connection statistics.
+        
+        Returns:
+            Dictionary with connection counts, queued outgoing messages and
+            counters of hibernated, expired and evicted sessions.
+        """
+        return {
+            "active": len(self.active_connections),
+            "hibernated_sessions": len(self.hibernated_sessions),
+            "queued_messages": sum(queue.qsize() for queue in self._outbound.values()),
+            **self.stats
+        }
+    
+    async def _write_outbound(self, session_id: str, websocket: WebSocket, queue: asyncio.Queue) -> None:
+        """
+        Deliver a connection's queued messages in order.
         
-        # Clean up failed connections
-        for session_id in failed_sessions:
-            await self._handle_connection_error(session_id)
+        Args:
+            session_id: The session ID of the connection.
+            websocket: The WebSocket connection.
+            queue: The connection's outbound queue.
+        """
+        while True:
+            message = await queue.get()
+            try:
+                await asyncio.wait_for(websocket.send_json(message), timeout=self.send_timeout)
+            except asyncio.TimeoutError:
+                await self._evict(session_id, f"send timed out after {self.send_timeout}s")
+                return
+            except Exception as e:
+                logger.error(f"Error sending message to session {session_id}: {e}")
+                await self._handle_connection_error(session_id)
+                return
+    
+    async def _evict(self, session_id: str, reason: str) -> None:
+        """
+        Disconnect a client that does not keep up with its messages.
+        
+        Args:
+            session_id: The session ID to evict.
+            reason: Why the client is evicted, for the log.
+        """
+        if session_id not in self.active_connections:
+            return
+        logger.warning(f"Evicting slow client {session_id}: {reason}")
+        self.stats["evicted"] += 1
+        await self._close_session(session_id, code=1008, reason="Client too slow")
     
     async def _handle_connection_error(self, session_id: str) -> None:
         """
@@ -191,15 +306,29 @@ class ConnectionManager:
         Args:
             session_id: The session ID that experienced an error.
         """
+        await self._close_session(session_id, code=1011, reason="Internal server error")
+    
+    async def _close_session(self, session_id: str, code: int, reason: str) -> None:
+        """
+        Close a connection and move its session to hibernated state.
+        
+        Args:
+            session_id: The session ID to close.
+            code: WebSocket close code.
+            reason: WebSocket close reason.
+        """
+        websocket = self.active_connections.get(session_id)
+        if websocket is None:
+            return
+        
+        # Move the session to hibernated state first, so a close that blocks
+        # on an unresponsive client does not keep it registered
+        await self.disconnect(session_id)
         try:
             # Try to close the connection cleanly
-            websocket = self.active_connections[session_id]
-            await websocket.close(code=1011, reason="Internal server error")
+            await asyncio.wait_for(websocket.close(code=code, reason=reason), timeout=self.send_timeout)
         except Exception:
             pass  # Connection might already be closed
-        
-        # Move the session to hibernated state
-        await self.disconnect(session_id)
     
     def update_activity(self, session_id: str) -> None:
         """
@@ -211,6 +340,43 @@ class ConnectionManager:
         if session_id in self.active_connections:
             self.connection_times[session_id] = time.time()
     
+    def _schedule(self, heap: List[Tuple[float, str]], deadline: float, session_id: str) -> None:
+        """
+        Add a session deadline and wake the monitor if it is the earliest one.
+        
+        Args:
+            heap: Deadline heap to add to.
+            deadline: Time at which the deadline expires.
+            session_id: The session ID the deadline belongs to.
+        """
+        heapq.heappush(heap, (deadline, session_id))
+        if deadline < self._next_wakeup:
+            self._wakeup.set()
+    
+    def _pop_inactive_sessions(self, now: float) -> List[str]:
+        """
+        Pop sessions whose inactivity deadline has passed.
+        
+        Args:
+            now: Current time.
+            
+        Returns:
+            Session IDs that have been inactive for longer than the timeout.
+        """
+        expired = []
+        heap = self._inactivity_deadlines
+        while heap and heap[0][0] <= now:
+            _, session_id = heapq.heappop(heap)
+            last_activity = self.connection_times.get(session_id)
+            if last_activity is None:
+                continue  # Disconnected since the deadline was set
+            deadline = last_activity + self.inactive_timeout
+            if deadline > now:
+                heapq.heappush(heap, (deadline, session_id))  # Active since; reschedule
+            else:
+                expired.append(session_id)
+        return expired
+    
     async def _hibernate_inactive_connections(self) -> int:
         """
         Hibernate inactive connections to free up resources.
@@ -218,25 +384,17 @@ class ConnectionManager:
         Returns:
             Number of connections hibernated.
         """
-        current_time = time.time()
-        inactive_sessions = [
-            session_id for session_id, last_activity in self.connection_times.items()
-            if current_time - last_activity > self.inactive_timeout
-        ]
+        inactive_sessions = self._pop_inactive_sessions(time.time())
+        if not inactive_sessions:
+            return 0
         
-        count = 0
-        for session_id in inactive_sessions:
-            if session_id in self.active_connections:
-                try:
-                    websocket = self.active_connections[session_id]
-                    await websocket.close(code=1000, reason="Session hibernated due to inactivity")
-                    await self.disconnect(session_id)
-                    count += 1
-                except Exception as e:
-                    logger.error(f"Error hibernating session {session_id}: {e}")
-        
-        if count > 0:
-            logger.info(f"Hibernated {count} inactive connections")
+        await asyncio.gather(*(
+            self._close_session(session_id, code=1000, reason="Session hibernated due to inactivity")
+            for session_id in inactive_sessions
+        ))
+        count = len(inactive_sessions)
+        self.stats["hibernated"] += count
+        logger.info(f"Hibernated {count} inactive connections")
         
         return count
     
@@ -247,22 +405,24 @@ class ConnectionManager:
         Returns:
             Number of hibernated sessions removed.
         """
-        current_time = time.time()
-        expired_sessions = [
-            session_id for session_id, hibernation_time in self.hibernated_sessions.items()
-            if current_time - hibernation_time > self.hibernation_timeout
-        ]
-        
-        for session_id in expired_sessions:
-            del self.hibernated_sessions[session_id]
+        now = time.time()
+        count = 0
+        heap = self._hibernation_deadlines
+        while heap and heap[0][0] <= now:
+            deadline, session_id = heapq.heappop(heap)
+            hibernation_time = self.hibernated_sessions.get(session_id)
+            if hibernation_time is not None and hibernation_time + self.hibernation_timeout <= deadline:
+                del self.hibernated_sessions[session_id]
+                count += 1
         
-        if expired_sessions:
-            logger.info(f"Removed {len(expired_sessions)} expired hibernated sessions")
+        if count:
+            self.stats["expired"] += count
+            logger.info(f"Removed {count} expired hibernated sessions")
         
-        return len(expired_sessions)
+        return count
     
     async def _monitor_sessions(self) -> None:
-        """Periodically monitor sessions for inactivity and cleanup."""
+        """Expire sessions as their deadlines pass."""
         while True:
             try:
                 await self._hibernate_inactive_connections()
@@ -270,7 +430,16 @@ class ConnectionManager:
             except Exception as e:
                 logger.error(f"Error in session monitor: {e}")
             
-            await asyncio.sleep(300)  # Run every 5 minutes
+            # Sleep until the earliest deadline; a new earlier deadline wakes the monitor
+            deadlines = [heap[0][0] for heap in (self._inactivity_deadlines, self._hibernation_deadlines) if heap]
+            now = time.time()
+            delay = min([self.monitor_interval] + [deadline - now for deadline in deadlines])
+            self._next_wakeup = now + max(delay, 0.0)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0.0))
+            except asyncio.TimeoutError:
+                pass
 
 
 # Create a singleton instance
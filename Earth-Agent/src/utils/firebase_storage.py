@@ -10,20 +10,25 @@ import logging
 import asyncio
 import time
 import base64
+import hashlib
 from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
+from urllib.parse import urlparse
 import os
 import aiohttp
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from .http_client import get_http_client, CircuitOpenError
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Constants
-MAX_RETRIES = 3
-RETRY_DELAY = 0.5  # seconds
+# Chat history sync
+CHAT_FLUSH_DELAY = 1.0  # seconds to wait for more messages before writing a batch
+CHAT_MAX_BATCH = 20  # messages that trigger an immediate write
+CHAT_PAGE_SIZE = 50  # messages restored per page
 
 class FirebaseStorage:
     """
@@ -31,7 +36,7 @@ class FirebaseStorage:
     
     This class manages:
     - Session persistence
-    - Chat history storage
+    - Chat history storage (one encrypted child per message, appended incrementally)
     - Encryption/decryption of sensitive data
     - Data synchronization
     """
@@ -40,7 +45,9 @@ class FirebaseStorage:
                 database_url: Optional[str] = None,
                 api_key: Optional[str] = None,
                 encryption_key: Optional[str] = None,
-                disabled: bool = False):
+                disabled: bool = False,
+                flush_delay: float = CHAT_FLUSH_DELAY,
+                max_batch_size: int = CHAT_MAX_BATCH):
         """
         Initialize the Firebase storage.
         
@@ -52,7 +59,12 @@ class FirebaseStorage:
             encryption_key: Key used to encrypt sensitive data.
                             If None, uses FIREBASE_ENCRYPTION_KEY environment variable.
             disabled: If True, Firebase storage will be disabled and all operations will be no-ops.
+            flush_delay: Seconds to wait for more chat messages before writing a queued batch.
+            max_batch_size: Number of queued chat messages that triggers an immediate write.
         """
+        self.flush_delay = flush_delay
+        self.max_batch_size = max_batch_size
+        
         # Check if Firebase is explicitly disabled
         self.disabled = disabled or os.environ.get("DISABLE_FIREBASE", "").lower() == "true"
         
@@ -62,8 +74,13 @@ class FirebaseStorage:
             self.database_url = None
             self.api_key = None
             self.cipher = None
-            self._session = None
+            self.http = get_http_client("firebase")
             self._database_exists = False
+            self._next_sequence = {}
+            self._history_digest = {}
+            self._pending_messages = {}
+            self._flush_tasks = {}
+            self._sync_locks = {}
             return
             
         self.database_url = database_url or os.environ.get("FIREBASE_DB_URL")
@@ -76,8 +93,8 @@ class FirebaseStorage:
                 self.database_url = self.database_url[:-1]
                 logger.info("Removed trailing slash from Firebase database URL")
                 
-            # Ensure it has the correct format
-            if not 'firebaseio.com' in self.database_url:
+            # Ensure it has the correct format (local emulators are used as-is)
+            if not 'firebaseio.com' in self.database_url and not self._is_local_database(self.database_url):
                 # Add 'https://' prefix if missing
                 if not self.database_url.startswith('http'):
                     self.database_url = f"https://{self.database_url}"
@@ -112,11 +129,31 @@ class FirebaseStorage:
         else:
             logger.info(f"Firebase storage initialized with database URL: {self.database_url}")
             
-        # For connection pooling
-        self._session: Optional[aiohttp.ClientSession] = None
+        # Pooled connections with the shared retry and circuit-breaker policy
+        self.http = get_http_client("firebase")
         
         # Flag to track if database exists - will be set during first request
         self._database_exists = None
+        
+        # Incremental chat history sync state
+        self._next_sequence: Dict[str, int] = {}
+        self._history_digest: Dict[str, Optional[str]] = {}
+        self._pending_messages: Dict[str, List[Dict[str, Any]]] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        self._sync_locks: Dict[str, asyncio.Lock] = {}
+    
+    @staticmethod
+    def _is_local_database(url: str) -> bool:
+        """
+        Check whether a database URL points to a local emulator or test server.
+        
+        Args:
+            url: Database URL.
+            
+        Returns:
+            True for localhost URLs, which are used without normalization.
+        """
+        return urlparse(url if "://" in url else f"//{url}").hostname in ("localhost", "127.0.0.1")
     
     def _initialize_encryption(self, key: Optional[str]) -> None:
         """
@@ -156,21 +193,19 @@ class FirebaseStorage:
     
     async def get_session(self) -> aiohttp.ClientSession:
         """
-        Get or create an aiohttp ClientSession.
+        Get the pooled aiohttp ClientSession shared by Firebase requests.
         
         Returns:
             A ClientSession for making HTTP requests.
         """
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
-        
-        return self._session
+        return await self.http.get_session()
     
     async def close(self) -> None:
-        """Close resources."""
-        if self._session and not self._session.closed:
-            await self._session.close()
-            self._session = None
+        """Flush pending chat messages and close resources."""
+        if self._pending_messages:
+            await self.flush_chat_messages()
+        
+        await self.http.close()
     
     def _encrypt_data(self, data: Union[str, Dict, List]) -> str:
         """
@@ -221,14 +256,19 @@ class FirebaseStorage:
             # Return as string if not valid JSON
             return decrypted_data
             
-    async def _firebase_request(self, method: str, path: str, json_data: Optional[Dict] = None) -> Optional[Dict]:
+    async def _firebase_request(self,
+                                method: str,
+                                path: str,
+                                json_data: Optional[Dict] = None,
+                                query: Optional[Dict[str, str]] = None) -> Optional[Dict]:
         """
-        Make a request to Firebase with automatic retries.
+        Make a request to Firebase through the shared HTTP client.
         
         Args:
             method: HTTP method ('get', 'put', 'patch', 'delete')
             path: Path to the Firebase resource
             json_data: JSON data to send (for PUT, PATCH)
+            query: Extra query parameters (e.g. orderBy, limitToLast, shallow)
             
         Returns:
             Response data as dict or None on error
@@ -248,7 +288,7 @@ class FirebaseStorage:
             
         # Ensure the database URL is properly formatted
         base_url = self.database_url
-        if not base_url.endswith('.firebaseio.com'):
+        if not base_url.endswith('.firebaseio.com') and not self._is_local_database(base_url):
             # Check if we need to add the default RTD suffix
             if not 'firebaseio.com' in base_url:
                 if not base_url.endswith('.'):
@@ -267,7 +307,7 @@ class FirebaseStorage:
         url = f"{base_url}{path}"
         
         # Add query parameters
-        params = {}
+        params = dict(query or {})
         if self.api_key:
             params['auth'] = self.api_key
         
@@ -275,141 +315,65 @@ class FirebaseStorage:
         masked_url = url.replace(self.api_key, "***") if self.api_key and self.api_key in url else url
         logger.debug(f"Firebase {method.upper()} request to {masked_url}")
         
-        session = await self.get_session()
-        retries = 0
-        
-        while retries < MAX_RETRIES:
-            try:
-                if method.lower() == 'get':
-                    async with session.get(url, params=params) as response:
-                        if response.status == 404:
-                            # Record that the database doesn't exist to avoid future requests
-                            if path == '/.json' and self._database_exists is None:
-                                self._database_exists = False
-                                logger.warning("Firebase database does not exist - disabling write operations")
-                                
-                            logger.debug(f"Resource not found: {path}")
-                            return None
-                        elif response.status != 200:
-                            error_text = await response.text()
-                            logger.error(f"Firebase {method} error: {response.status} - {error_text}")
-                            retries += 1
-                            if retries < MAX_RETRIES:
-                                await asyncio.sleep(RETRY_DELAY * (2 ** retries))  # Exponential backoff
-                                continue
-                            return None
-                        
-                        # If we get here successfully, the database exists
-                        if path == '/.json' and self._database_exists is None:
-                            self._database_exists = True
-                            logger.info("Verified Firebase database exists")
-                            
-                        return await response.json()
-                        
-                elif method.lower() == 'put':
-                    # Skip if we know the database doesn't exist
-                    if self._database_exists is False:
-                        logger.debug(f"Skipping PUT request - database doesn't exist")
-                        return None
-                        
-                    async with session.put(url, json=json_data, params=params) as response:
-                        if response.status != 200:
-                            error_text = await response.text()
-                            logger.error(f"Firebase {method} error: {response.status} - {error_text}")
-                            
-                            # If the database doesn't exist, mark it
-                            if response.status == 404:
-                                self._database_exists = False
-                                logger.warning("Firebase database does not exist - disabling write operations")
-                                # Return empty dict for 404 to emulate success when database doesn't exist
-                                # This prevents cascading errors
-                                return {}
-                                
-                            retries += 1
-                            if retries < MAX_RETRIES:
-                                await asyncio.sleep(RETRY_DELAY * (2 ** retries))
-                                continue
-                            return None
-                        return await response.json()
-                        
-                elif method.lower() == 'patch':
-                    # Skip if we know the database doesn't exist
-                    if self._database_exists is False:
-                        logger.debug(f"Skipping PATCH request - database doesn't exist")
-                        return None
-                        
-                    async with session.patch(url, json=json_data, params=params) as response:
-                        if response.status != 200:
-                            error_text = await response.text()
-                            logger.error(f"Firebase {method} error: {response.status} - {error_text}")
-                            
-                            # If the database doesn't exist, mark it
-                            if response.status == 404:
-                                self._database_exists = False
-                                logger.warning("Firebase database does not exist - disabling write operations")
-                                # Return empty dict for 404 to emulate success when database doesn't exist
-                                # This prevents cascading errors
-                                return {}
-                                
-                            retries += 1
-                            if retries < MAX_RETRIES:
-                                await asyncio.sleep(RETRY_DELAY * (2 ** retries))
-                                continue
-                            return None
-                        return await response.json()
-                        
-                elif method.lower() == 'delete':
-                    # Skip if we know the database doesn't exist
-                    if self._database_exists is False:
-                        logger.debug(f"Skipping DELETE request - database doesn't exist")
-                        return None
-                        
-                    async with session.delete(url, params=params) as response:
-                        if response.status != 200:
-                            error_text = await response.text()
-                            logger.error(f"Firebase {method} error: {response.status} - {error_text}")
-                            
-                            # If the database doesn't exist, mark it
-                            if response.status == 404:
-                                self._database_exists = False
-                                logger.warning("Firebase database does not exist - disabling write operations")
-                                # Return empty dict for 404 to emulate success when database doesn't exist
-                                # This prevents cascading errors
-                                return {}
-                                
-                            retries += 1
-                            if retries < MAX_RETRIES:
-                                await asyncio.sleep(RETRY_DELAY * (2 ** retries))
-                                continue
-                            return None
-                        
-                        # Firebase sometimes returns empty response for delete operations
-                        # that actually succeeded, so we handle this special case
-                        try:
-                            return await response.json()
-                        except (json.JSONDecodeError, aiohttp.ContentTypeError):
-                            logger.info(f"Empty response from Firebase delete operation (this is normal)")
-                            return {}  # Return empty dict instead of None to indicate success
-                
-            except aiohttp.ClientError as e:
-                logger.error(f"Firebase request error: {e}")
-                retries += 1
-                if retries < MAX_RETRIES:
-                    await asyncio.sleep(RETRY_DELAY * (2 ** retries))
-                    continue
+        method = method.lower()
+        if method not in ('get', 'put', 'patch', 'delete'):
+            logger.error(f"Unsupported Firebase method: {method}")
+            return None
+        
+        # Retries, backoff and the circuit breaker are handled by the shared client
+        try:
+            response = await self.http.request(
+                method, url, params=params,
+                json_data=json_data if method in ('put', 'patch') else None
+            )
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping Firebase {method} request: {e}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Firebase request error: {e!r}")
+            return None
+        
+        if response.status == 404:
+            if method == 'get':
+                # Record that the database doesn't exist to avoid future requests
+                if path == '/.json' and self._database_exists is None:
+                    self._database_exists = False
+                    logger.warning("Firebase database does not exist - disabling write operations")
+                    
+                logger.debug(f"Resource not found: {path}")
                 return None
-                
-            except asyncio.TimeoutError:
-                logger.error(f"Firebase request timeout")
-                retries += 1
-                if retries < MAX_RETRIES:
-                    await asyncio.sleep(RETRY_DELAY * (2 ** retries))
-                    continue
+            
+            # If the database doesn't exist, mark it
+            self._database_exists = False
+            logger.warning("Firebase database does not exist - disabling write operations")
+            # Return empty dict for 404 to emulate success when database doesn't exist
+            # This prevents cascading errors
+            return {}
+        
+        if response.status != 200:
+            logger.error(f"Firebase {method} error: {response.status} - {response.text}")
+            return None
+        
+        # If we get here successfully, the database exists
+        if method == 'get' and path == '/.json' and self._database_exists is None:
+            self._database_exists = True
+            logger.info("Verified Firebase database exists")
+        
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            if method != 'delete':
+                logger.error(f"Invalid JSON in Firebase {method} response")
                 return None
-                
-            break  # Exit loop on success
-                
-        return None  # Return None if all retries failed
+            data = None
+        
+        # Firebase sometimes returns empty response for delete operations
+        # that actually succeeded, so we handle this special case
+        if data is None and method == 'delete':
+            logger.debug(f"Empty response from Firebase delete operation (this is normal)")
+            return {}
+        
+        return data
     
     async def check_database_exists(self) -> bool:
         """
@@ -434,14 +398,174 @@ class FirebaseStorage:
         # _firebase_request will set self._database_exists
         return self._database_exists or False
     
-    async def save_chat_history(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+    def _get_sync_lock(self, session_id: str) -> asyncio.Lock:
         """
-        Save chat history for a session to Firebase.
+        Get the lock serializing chat history writes for a session.
+        
+        Args:
+            session_id: The session ID.
+            
+        Returns:
+            The session's lock.
+        """
+        if session_id not in self._sync_locks:
+            self._sync_locks[session_id] = asyncio.Lock()
+        return self._sync_locks[session_id]
+    
+    @staticmethod
+    def _message_key(sequence: int) -> str:
+        """
+        Build the child key of a chat message.
+        
+        Keys are zero-padded so that lexicographic and numeric order agree.
+        
+        Args:
+            sequence: Position of the message in the session history.
+            
+        Returns:
+            The child key.
+        """
+        return f"{sequence:010d}"
+    
+    @staticmethod
+    def _chain_digest(digest: str, messages: List[Dict[str, Any]]) -> str:
+        """
+        Extend the fingerprint of a history with more messages.
+        
+        The fingerprint of a history is a hash chain over its messages, so a
+        stored history is a prefix of a list exactly when the list's first
+        messages chain to the stored fingerprint.
+        
+        Args:
+            digest: Fingerprint of the history so far ("" for an empty one).
+            messages: Messages appended to it.
+            
+        Returns:
+            The fingerprint of the extended history.
+        """
+        for message in messages:
+            data = json.dumps(message, sort_keys=True, default=str)
+            digest = hashlib.sha256(f"{digest}{data}".encode("utf-8")).hexdigest()
+        return digest
+    
+    def _message_record(self, message: Dict[str, Any], created_at: str) -> Dict[str, Any]:
+        """
+        Build the stored record of a single chat message.
+        
+        Args:
+            message: Message dictionary.
+            created_at: ISO timestamp of the write.
+            
+        Returns:
+            The record, with the message encrypted on its own.
+        """
+        return {
+            "data": self._encrypt_data(message),
+            "created_at": created_at
+        }
+    
+    async def _load_legacy_history(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Load a history stored in the legacy layout (one encrypted blob per session).
+        
+        Args:
+            session_id: The session ID.
+            
+        Returns:
+            List of message dictionaries, or None if the session does not use the legacy layout.
+        """
+        # A shallow read returns child keys for the message layout, or the blob itself
+        data = await self._firebase_request(
+            'get', f"/chat_history/{session_id}/messages", query={"shallow": "true"}
+        )
+        if not isinstance(data, str):
+            return None
+        
+        try:
+            messages = self._decrypt_data(data)
+            return messages if isinstance(messages, list) else None
+        except Exception as e:
+            logger.error(f"Error decrypting legacy chat history: {e}")
+            return None
+    
+    async def _get_next_sequence(self, session_id: str) -> int:
+        """
+        Get the sequence number of the next message to append for a session.
+        
+        The count and the history fingerprint are read from the session's
+        metadata once and then tracked locally. Sessions still stored in the
+        legacy layout are migrated first.
+        
+        Args:
+            session_id: The session ID.
+            
+        Returns:
+            The next sequence number.
+        """
+        if session_id in self._next_sequence:
+            return self._next_sequence[session_id]
+        
+        meta = await self._firebase_request('get', f"/chat_history/{session_id}/meta")
+        if isinstance(meta, dict) and isinstance(meta.get("count"), int):
+            # Histories written before fingerprints were stored have none
+            self._next_sequence[session_id] = meta["count"]
+            self._history_digest[session_id] = meta.get("digest") if meta["count"] else ""
+        else:
+            legacy_messages = await self._load_legacy_history(session_id)
+            if legacy_messages:
+                if not await self._write_chat_history(session_id, legacy_messages):
+                    raise RuntimeError(f"Failed to migrate legacy chat history for session {session_id}")
+                logger.info(f"Migrated legacy chat history for session {session_id}")
+            else:
+                self._next_sequence[session_id] = 0
+                self._history_digest[session_id] = ""
+        
+        return self._next_sequence[session_id]
+    
+    async def _write_chat_history(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """
+        Replace the stored history of a session with the given messages.
         
         Args:
             session_id: The session ID.
             messages: List of message dictionaries.
             
+        Returns:
+            True if written successfully, False otherwise.
+        """
+        now = datetime.now().isoformat()
+        digest = self._chain_digest("", messages)
+        payload = {
+            "meta": {
+                "count": len(messages),
+                "digest": digest,
+                "updated_at": now
+            },
+            "messages": {
+                self._message_key(sequence): self._message_record(message, now)
+                for sequence, message in enumerate(messages)
+            }
+        }
+        
+        result = await self._firebase_request('put', f"/chat_history/{session_id}", payload)
+        if result is None:
+            return False
+        
+        self._next_sequence[session_id] = len(messages)
+        self._history_digest[session_id] = digest
+        return True
+    
+    async def append_chat_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """
+        Append messages to the chat history of a session in a single write.
+        
+        Each message is stored as its own encrypted child, so the cost of a
+        write depends only on the new messages, not on the history size.
+        
+        Args:
+            session_id: The session ID.
+            messages: List of message dictionaries to append.
+            
         Returns:
             True if saved successfully, False otherwise.
         """
@@ -449,52 +573,235 @@ class FirebaseStorage:
             return True  # Pretend success when disabled
             
         if not self.is_configured:
-            logger.debug("Not saving chat history: Firebase not configured")
+            logger.debug("Not saving chat messages: Firebase not configured")
             return True  # Pretend success when not configured
             
         # If we know the database doesn't exist, fail fast
         if self._database_exists is False:
-            logger.debug("Not saving chat history: Firebase database doesn't exist")
+            logger.debug("Not saving chat messages: Firebase database doesn't exist")
             return True  # Pretend success to avoid errors
         
+        if not messages:
+            return True
+        
+        async with self._get_sync_lock(session_id):
+            return await self._append_messages(session_id, messages)
+    
+    async def _append_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """
+        Append messages to the chat history of a session, holding its sync lock.
+        
+        Args:
+            session_id: The session ID.
+            messages: List of message dictionaries to append.
+            
+        Returns:
+            True if saved successfully, False otherwise.
+        """
         try:
-            # Encrypt the messages
-            encrypted_data = self._encrypt_data(messages)
+            sequence = await self._get_next_sequence(session_id)
+            count = sequence + len(messages)
+            digest = self._history_digest.get(session_id)
+            if digest is not None:
+                digest = self._chain_digest(digest, messages)
+            now = datetime.now().isoformat()
             
-            # Create the payload
+            # Multi-path update: new message children and the metadata in one PATCH
             payload = {
-                "updated_at": datetime.now().isoformat(),
-                "messages": encrypted_data
+                f"messages/{self._message_key(sequence + offset)}": self._message_record(message, now)
+                for offset, message in enumerate(messages)
             }
+            payload["meta/count"] = count
+            payload["meta/digest"] = digest
+            payload["meta/updated_at"] = now
             
-            # Save to Firebase using the helper method
-            result = await self._firebase_request('put', f"/chat_history/{session_id}", payload)
+            result = await self._firebase_request('patch', f"/chat_history/{session_id}", payload)
             
             if result is not None:
-                logger.debug(f"Saved chat history for session {session_id} to Firebase")
+                self._next_sequence[session_id] = count
+                self._history_digest[session_id] = digest
+                logger.debug(f"Appended {len(messages)} chat messages for session {session_id} to Firebase")
                 return True
-            else:
-                # If database doesn't exist, log once but don't treat as error
-                if self._database_exists is False:
-                    logger.debug(f"Skipped saving chat history (database doesn't exist)")
+            
+            # If database doesn't exist, log once but don't treat as error
+            if self._database_exists is False:
+                logger.debug(f"Skipped saving chat messages (database doesn't exist)")
+                return True
+            
+            # The stored history is unknown after a failed write, re-read it next time
+            self._forget_history_state(session_id)
+            logger.error(f"Failed to append chat messages for session {session_id}")
+            return False
+        
+        except Exception as e:
+            self._forget_history_state(session_id)
+            logger.error(f"Error appending chat messages to Firebase: {e}")
+            return False
+    
+    def _forget_history_state(self, session_id: str) -> None:
+        """Drop the tracked message count and fingerprint of a session."""
+        self._next_sequence.pop(session_id, None)
+        self._history_digest.pop(session_id, None)
+    
+    async def queue_chat_message(self, session_id: str, message: Dict[str, Any]) -> None:
+        """
+        Queue a chat message for a debounced, batched append.
+        
+        Messages are written together once no new message arrived for
+        `flush_delay` seconds, or as soon as `max_batch_size` are pending.
+        
+        Args:
+            session_id: The session ID.
+            message: Message dictionary.
+        """
+        if self.disabled or not self.is_configured:
+            return
+        
+        pending = self._pending_messages.setdefault(session_id, [])
+        pending.append(message)
+        
+        if len(pending) >= self.max_batch_size:
+            await self.flush_chat_messages(session_id)
+            return
+        
+        # Restart the debounce timer
+        task = self._flush_tasks.pop(session_id, None)
+        if task:
+            task.cancel()
+        self._flush_tasks[session_id] = asyncio.create_task(self._delayed_flush(session_id))
+    
+    async def _delayed_flush(self, session_id: str) -> None:
+        """
+        Flush the pending messages of a session after the debounce delay.
+        
+        Args:
+            session_id: The session ID.
+        """
+        await asyncio.sleep(self.flush_delay)
+        self._flush_tasks.pop(session_id, None)
+        await self._flush_session(session_id)
+    
+    async def _flush_session(self, session_id: str) -> bool:
+        """
+        Write the pending messages of a session.
+        
+        Messages are put back in the queue if the write fails, so they are
+        retried with the next flush.
+        
+        Args:
+            session_id: The session ID.
+            
+        Returns:
+            True if there was nothing to write or the write succeeded, False otherwise.
+        """
+        messages = self._pending_messages.pop(session_id, [])
+        if not messages:
+            return True
+        
+        if await self.append_chat_messages(session_id, messages):
+            return True
+        
+        self._pending_messages[session_id] = messages + self._pending_messages.get(session_id, [])
+        return False
+    
+    async def flush_chat_messages(self, session_id: Optional[str] = None) -> bool:
+        """
+        Immediately write queued chat messages.
+        
+        Args:
+            session_id: Session to flush. If None, flushes every session.
+            
+        Returns:
+            True if all pending messages were written, False otherwise.
+        """
+        session_ids = [session_id] if session_id else list(self._pending_messages)
+        
+        success = True
+        for sid in session_ids:
+            task = self._flush_tasks.pop(sid, None)
+            if task:
+                task.cancel()
+            success = await self._flush_session(sid) and success
+        
+        return success
+    
+    async def save_chat_history(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """
+        Save chat history for a session to Firebase.
+        
+        The history is treated as append-only: when the stored history is a
+        prefix of `messages`, only the new messages are written. Otherwise
+        (e.g. after the history was cleared or compacted) `messages` replace
+        the stored history. Whether the stored history is a prefix is checked
+        against its fingerprint, not just its length.
+        
+        Args:
+            session_id: The session ID.
+            messages: List of message dictionaries.
+            
+        Returns:
+            True if saved successfully, False otherwise.
+        """
+        if self.disabled:
+            return True  # Pretend success when disabled
+            
+        if not self.is_configured:
+            logger.debug("Not saving chat history: Firebase not configured")
+            return True  # Pretend success when not configured
+            
+        # If we know the database doesn't exist, fail fast
+        if self._database_exists is False:
+            logger.debug("Not saving chat history: Firebase database doesn't exist")
+            return True  # Pretend success to avoid errors
+        
+        # Queued messages are part of the new list, write them through it
+        self._pending_messages.pop(session_id, None)
+        task = self._flush_tasks.pop(session_id, None)
+        if task:
+            task.cancel()
+        
+        try:
+            async with self._get_sync_lock(session_id):
+                stored_count = await self._get_next_sequence(session_id)
+                stored_digest = self._history_digest.get(session_id)
+                if (len(messages) >= stored_count and stored_digest is not None
+                        and self._chain_digest("", messages[:stored_count]) == stored_digest):
+                    if len(messages) == stored_count:
+                        return True
+                    return await self._append_messages(session_id, messages[stored_count:])
+                
+                result = await self._write_chat_history(session_id, messages)
+                if result or self._database_exists is False:
+                    logger.debug(f"Replaced chat history for session {session_id} in Firebase")
                     return True
-                else:
-                    logger.error(f"Failed to save chat history for session {session_id}")
-                    return False
+                self._forget_history_state(session_id)
+                logger.error(f"Failed to save chat history for session {session_id}")
+                return False
         
         except Exception as e:
+            self._forget_history_state(session_id)
             logger.error(f"Error saving chat history to Firebase: {e}")
             return False
     
-    async def load_chat_history(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+    async def load_chat_history_page(self,
+                                     session_id: str,
+                                     limit: int = CHAT_PAGE_SIZE,
+                                     before: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
-        Load chat history for a session from Firebase.
+        Load one page of chat history for a session, newest messages first.
+        
+        Only the requested window is downloaded and decrypted, so reconnecting
+        sessions can restore their recent messages without the whole history.
         
         Args:
             session_id: The session ID.
+            limit: Maximum number of messages to load.
+            before: Cursor returned by a previous call; loads the messages preceding it.
             
         Returns:
-            List of message dictionaries, or None if no history found or error occurred.
+            Dictionary with the page's messages in chronological order and a
+            'before' cursor for the previous page (None when the start of the
+            history was reached), or None if no history found or error occurred.
         """
         if self.disabled:
             return None
@@ -503,27 +810,75 @@ class FirebaseStorage:
             logger.debug("Not loading chat history: Firebase not configured")
             return None
         
+        if limit <= 0 or (before is not None and before <= 0):
+            return {"messages": [], "before": None}
+        
         try:
-            # Load from Firebase using the helper method
-            data = await self._firebase_request('get', f"/chat_history/{session_id}")
+            query = {
+                "orderBy": '"$key"',
+                "limitToLast": str(limit)
+            }
+            if before is not None:
+                query["endAt"] = f'"{self._message_key(before - 1)}"'
+            
+            data = await self._firebase_request('get', f"/chat_history/{session_id}/messages", query=query)
             
-            if not data or "messages" not in data:
+            if isinstance(data, str):
+                # Legacy layout: a single blob holding the whole history
+                legacy_messages = self._decrypt_data(data)
+                end = len(legacy_messages) if before is None else min(before, len(legacy_messages))
+                start = max(0, end - limit)
+                return {"messages": legacy_messages[start:end], "before": start or None}
+            
+            if not data:
                 logger.debug(f"No chat history found for session {session_id}")
                 return None
             
-            # Decrypt the messages
-            try:
-                messages = self._decrypt_data(data["messages"])
-                logger.debug(f"Loaded chat history for session {session_id} from Firebase")
-                return messages
-            except Exception as e:
-                logger.error(f"Error decrypting chat history: {e}")
-                return None
+            keys = sorted(data)
+            messages = []
+            for key in keys:
+                try:
+                    messages.append(self._decrypt_data(data[key]["data"]))
+                except Exception as e:
+                    logger.error(f"Error decrypting chat message {key}: {e}")
+            
+            first = int(keys[0])
+            logger.debug(f"Loaded {len(messages)} chat messages for session {session_id} from Firebase")
+            return {"messages": messages, "before": first or None}
         
         except Exception as e:
             logger.error(f"Error loading chat history from Firebase: {e}")
             return None
     
+    async def load_chat_history(self,
+                                session_id: str,
+                                limit: Optional[int] = CHAT_PAGE_SIZE) -> Optional[List[Dict[str, Any]]]:
+        """
+        Load the most recent chat history for a session from Firebase.
+        
+        Args:
+            session_id: The session ID.
+            limit: Maximum number of recent messages to load. If None, loads the
+                   whole history page by page.
+            
+        Returns:
+            List of message dictionaries, or None if no history found or error occurred.
+        """
+        if limit is not None:
+            page = await self.load_chat_history_page(session_id, limit)
+            return page["messages"] if page else None
+        
+        messages: List[Dict[str, Any]] = []
+        before = None
+        while True:
+            page = await self.load_chat_history_page(session_id, CHAT_PAGE_SIZE, before)
+            if page is None:
+                return messages or None
+            messages = page["messages"] + messages
+            before = page["before"]
+            if before is None:
+                return messages
+    
     async def delete_chat_history(self, session_id: str) -> bool:
         """
         Delete chat history for a session from Firebase.
@@ -546,24 +901,34 @@ class FirebaseStorage:
             logger.debug("Not deleting chat history: Firebase database doesn't exist")
             return True  # Pretend success to avoid errors
         
+        # Drop queued messages
+        self._pending_messages.pop(session_id, None)
+        task = self._flush_tasks.pop(session_id, None)
+        if task:
+            task.cancel()
+        
         try:
-            # Delete from Firebase using the helper method
-            result = await self._firebase_request('delete', f"/chat_history/{session_id}")
-            
-            # Check if Firebase returned a successful response
-            if result is not None:
-                logger.debug(f"Deleted chat history for session {session_id} from Firebase")
-                return True
-            else:
-                # As a backup verification, try to load the data after deletion
-                # If it's gone, that means deletion was successful despite the error
-                verification = await self.load_chat_history(session_id)
-                if verification is None:
-                    logger.debug(f"Deletion verified for session {session_id} (data not found)")
-                    return True
+            # Wait for writes in progress, so they don't recreate the history
+            async with self._get_sync_lock(session_id):
+                self._forget_history_state(session_id)
                 
-                logger.error(f"Failed to delete chat history for session {session_id}")
-                return False
+                # Delete from Firebase using the helper method
+                result = await self._firebase_request('delete', f"/chat_history/{session_id}")
+                
+                # Check if Firebase returned a successful response
+                if result is not None:
+                    logger.debug(f"Deleted chat history for session {session_id} from Firebase")
+                    return True
+                else:
+                    # As a backup verification, try to load the data after deletion
+                    # If it's gone, that means deletion was successful despite the error
+                    verification = await self.load_chat_history(session_id)
+                    if verification is None:
+                        logger.debug(f"Deletion verified for session {session_id} (data not found)")
+                        return True
+                    
+                    logger.error(f"Failed to delete chat history for session {session_id}")
+                    return False
         
         except Exception as e:
             logger.error(f"Error deleting chat history from Firebase: {e}")
@@ -0,0 +1,369 @@
+"""
+Shared HTTP client module for the GIS AI Agent.
+
+This module provides one pooled aiohttp session per upstream service, with
+keep-alive connections, per-host connection limits and DNS caching, plus a
+common retry/backoff policy, a circuit breaker and per-upstream latency and
+error metrics.
+"""
+
+import time
+import json
+import random
+import logging
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional, Deque, Tuple
+import aiohttp
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is rejected because the upstream circuit is open."""
+
+
+class HTTPResponse:
+    """Fully read HTTP response, detached from the pooled connection."""
+
+    def __init__(self, status: int, text: str, headers: Dict[str, str]):
+        """
+        Initialize the response.
+
+        Args:
+            status: HTTP status code.
+            text: Response body.
+            headers: Response headers.
+        """
+        self.status = status
+        self.text = text
+        self.headers = headers
+
+    def json(self) -> Any:
+        """
+        Parse the body as JSON.
+
+        Returns:
+            The parsed body, or None for an empty body.
+        """
+        return json.loads(self.text) if self.text else None
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for failed requests."""
+
+    def __init__(self,
+                 max_retries: int = 2,
+                 backoff: float = 0.5,
+                 max_backoff: float = 8.0,
+                 retry_statuses: Tuple[int, ...] = RETRY_STATUSES):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_retries: Number of retries after the first attempt.
+            backoff: Base delay in seconds, doubled on each retry.
+            max_backoff: Maximum delay in seconds.
+            retry_statuses: HTTP statuses that are retried.
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+
+    def get_delay(self, attempt: int) -> float:
+        """
+        Get the delay before a retry.
+
+        Args:
+            attempt: Number of the attempt that failed, starting at 1.
+
+        Returns:
+            Delay in seconds.
+        """
+        delay = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+
+class CircuitBreaker:
+    """Circuit breaker that stops calling an upstream after repeated failures."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit.
+            reset_timeout: Seconds before a trial request is let through.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """Current state: 'closed', 'open' or 'half_open'."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent.
+
+        Returns:
+            False while the circuit is open, True otherwise.
+        """
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful request."""
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failed request, opening the circuit at the threshold."""
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.state == "half_open":
+            if self.opened_at is None:
+                logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+
+
+class UpstreamMetrics:
+    """Latency and error counters for one upstream."""
+
+    def __init__(self, window: int = 200):
+        """
+        Initialize the metrics.
+
+        Args:
+            window: Number of recent latencies kept for percentiles.
+        """
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.status_counts: Dict[str, int] = {}
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency_ms: float, status: Optional[int] = None, error: bool = False) -> None:
+        """
+        Record one attempt.
+
+        Args:
+            latency_ms: Duration of the attempt in milliseconds.
+            status: HTTP status, or None if no response was received.
+            error: Whether the attempt failed.
+        """
+        self.requests += 1
+        self.latencies.append(latency_ms)
+        key = str(status) if status is not None else "no_response"
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+        if error:
+            self.errors += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summarize the metrics.
+
+        Returns:
+            Dictionary with counters and latency percentiles.
+        """
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))], 1)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "statuses": dict(self.status_counts),
+            "latency_ms": {
+                "avg": round(sum(latencies) / len(latencies), 1) if latencies else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95)
+            }
+        }
+
+
+class UpstreamClient:
+    """Pooled HTTP client for a single upstream service."""
+
+    def __init__(self,
+                 name: str,
+                 limit_per_host: int = 10,
+                 timeout: float = 30.0,
+                 dns_cache_ttl: int = 300,
+                 keepalive_timeout: float = 30.0,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        """
+        Initialize the upstream client.
+
+        Args:
+            name: Upstream name used in logs and metrics.
+            limit_per_host: Maximum concurrent connections per host.
+            timeout: Total timeout of a single attempt in seconds.
+            dns_cache_ttl: Seconds DNS resolutions are cached.
+            keepalive_timeout: Seconds idle connections are kept open.
+            retry_policy: Retry policy; defaults to RetryPolicy().
+            circuit_breaker: Circuit breaker; defaults to CircuitBreaker().
+        """
+        self.name = name
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.metrics = UpstreamMetrics()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the pooled session, creating it on first use.
+
+        A session is bound to the event loop it was created in, so a new one
+        is created if the loop changed (e.g. between test cases).
+
+        Returns:
+            The shared ClientSession.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._loop = loop
+        return self._session
+
+    async def request(self,
+                      method: str,
+                      url: str,
+                      params: Optional[Dict[str, Any]] = None,
+                      json_data: Any = None) -> HTTPResponse:
+        """
+        Send a request with the upstream's retry and circuit-breaker policy.
+
+        Responses with a status that is not retried (including 4xx errors)
+        are returned to the caller as-is.
+
+        Args:
+            method: HTTP method.
+            url: Request URL.
+            params: Query parameters.
+            json_data: JSON body.
+
+        Returns:
+            The response.
+
+        Raises:
+            CircuitOpenError: If the upstream circuit is open.
+            aiohttp.ClientError, asyncio.TimeoutError: If the last attempt failed.
+        """
+        if not self.circuit_breaker.allow_request():
+            self.metrics.rejected += 1
+            raise CircuitOpenError(f"Circuit open for upstream '{self.name}'")
+
+        session = await self.get_session()
+        attempt = 0
+        while True:
+            attempt += 1
+            start_time = time.perf_counter()
+            try:
+                async with session.request(method.upper(), url, params=params, json=json_data) as response:
+                    text = await response.text()
+                    result = HTTPResponse(response.status, text, dict(response.headers))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.metrics.record((time.perf_counter() - start_time) * 1000, error=True)
+                if attempt > self.retry_policy.max_retries:
+                    self.circuit_breaker.record_failure()
+                    raise
+                logger.warning(f"{self.name} request failed ({e!r}), retrying")
+            else:
+                retryable = result.status in self.retry_policy.retry_statuses
+                self.metrics.record((time.perf_counter() - start_time) * 1000, result.status, error=retryable)
+                if not retryable:
+                    self.circuit_breaker.record_success()
+                    return result
+                if attempt > self.retry_policy.max_retries:
+                    self.circuit_breaker.record_failure()
+                    return result
+                logger.warning(f"{self.name} request returned {result.status}, retrying")
+
+            self.metrics.retries += 1
+            await asyncio.sleep(self.retry_policy.get_delay(attempt))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the upstream's metrics.
+
+        Returns:
+            Dictionary with counters, latency percentiles and circuit state.
+        """
+        metrics = self.metrics.to_dict()
+        metrics["circuit"] = self.circuit_breaker.state
+        return metrics
+
+    async def close(self) -> None:
+        """Close the pooled session."""
+        if self._session and not self._session.closed and self._loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+# Registry of upstream clients
+_http_clients: Dict[str, UpstreamClient] = {}
+
+
+def get_http_client(name: str, **options: Any) -> UpstreamClient:
+    """
+    Get the shared client of an upstream, creating it on first use.
+
+    Args:
+        name: Upstream name.
+        **options: UpstreamClient options, used only when the client is created.
+
+    Returns:
+        The upstream's UpstreamClient instance.
+    """
+    if name not in _http_clients:
+        _http_clients[name] = UpstreamClient(name, **options)
+    return _http_clients[name]
+
+
+def get_http_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the metrics of every upstream.
+
+    Returns:
+        Dictionary mapping upstream names to their metrics.
+    """
+    return {name: client.get_metrics() for name, client in _http_clients.items()}
+
+
+async def close_http_clients() -> None:
+    """Close the pooled sessions of every upstream."""
+    for client in _http_clients.values():
+        await client.close()
@@ -9,9 +9,11 @@ import time
 import logging
 import asyncio
 from typing import Dict, Any, Optional, Callable, TypeVar, cast, List, Type
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, Field, StrictInt, ValidationError
 import json
 
+from .tool_executor import MAX_STEP_RETRIES, MAX_RETRY_DELAY
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -170,6 +172,7 @@ class QueryMessage(BaseModel):
     type: str = "query"
     query: str
     session_id: Optional[str] = None
+    request_id: Optional[str] = None
 
 
 class ToolCallMessage(BaseModel):
@@ -178,12 +181,34 @@ class ToolCallMessage(BaseModel):
     tool_name: str
     arguments: Dict[str, Any]
     session_id: Optional[str] = None
+    request_id: Optional[str] = None
+
+
+class PipelineStep(BaseModel):
+    """Model for pipeline steps."""
+    tool: str
+    arguments: Dict[str, Any] = {}
+    output_mapping: Optional[Dict[str, str]] = None
+    required: bool = True
+    timeout: Optional[float] = Field(None, gt=0)
+    retries: StrictInt = Field(0, ge=0, le=MAX_STEP_RETRIES)
+    retry_delay: float = Field(0.5, ge=0, le=MAX_RETRY_DELAY)
+
+
+class PipelineMessage(BaseModel):
+    """Model for pipeline messages."""
+    type: str = "pipeline"
+    steps: List[PipelineStep]
+    max_concurrency: Optional[StrictInt] = Field(None, ge=1)
+    session_id: Optional[str] = None
+    request_id: Optional[str] = None
 
 
 class ClearHistoryMessage(BaseModel):
     """Model for clear history messages."""
     type: str = "clear_history"
     session_id: Optional[str] = None
+    request_id: Optional[str] = None
 
 
 # Create rate limiter instances for different operations
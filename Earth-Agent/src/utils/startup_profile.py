@@ -0,0 +1,181 @@
+"""
+Startup profiling for the GIS AI Agent.
+
+This module measures a server start in a child process running with
+``python -X importtime``: it creates the server without serving, records how
+long each startup phase took, and breaks import time down by top-level
+package and by project module.
+
+Usage:
+    python -m src.main --profile-startup
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# Marker prefixing the child's phase report on stdout
+_REPORT_MARKER = "STARTUP_PROFILE "
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """
+    Parse ``-X importtime`` output.
+
+    Args:
+        output: Standard error of a process run with ``-X importtime``.
+
+    Returns:
+        List of (module, self_us, cumulative_us) tuples in import order.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        modules.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return modules
+
+
+def summarize_imports(modules: List[Tuple[str, int, int]], top: int = 15) -> Dict[str, Any]:
+    """
+    Break import time down by top-level package and by project module.
+
+    Args:
+        modules: Parsed (module, self_us, cumulative_us) tuples.
+        top: Number of entries to keep per ranking.
+
+    Returns:
+        Dictionary with total import time, per-package self time and the
+        project modules with the highest cumulative import time, in milliseconds.
+    """
+    packages: Dict[str, int] = {}
+    for module, self_us, _ in modules:
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    project = sorted(
+        ((module, cumulative) for module, _, cumulative in modules if module.split(".")[0] == "src"),
+        key=lambda item: item[1],
+        reverse=True
+    )
+
+    return {
+        "total_ms": round(sum(packages.values()) / 1000, 1),
+        "packages_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "project_modules_ms": {name: round(us / 1000, 1) for name, us in project[:top]}
+    }
+
+
+def measure_startup(config_dir: Optional[str] = None) -> None:
+    """
+    Create the server without serving and report phase timings.
+
+    Runs in the profiled child process, then exits it immediately so that
+    background timers started by the server do not keep it alive.
+
+    Args:
+        config_dir: Configuration directory.
+    """
+    phases = []
+    last = time.perf_counter()
+
+    def mark(name: str) -> None:
+        nonlocal last
+        now = time.perf_counter()
+        phases.append((name, round((now - last) * 1000, 1)))
+        last = now
+
+    from src.config import get_config
+    get_config(config_dir)
+    mark("load config")
+
+    from src.mcp_server.server import create_server
+    from src.mcp_server.health import register_health_routes
+    mark("import server")
+
+    server = create_server(name="GIS AI Agent")
+    mark("create server")
+
+    register_health_routes(server.app)
+    mark("register health routes")
+
+    from src.mcp_server.tool_manifest import get_module_load_times
+    report = {
+        "phases_ms": dict(phases),
+        "tools": len(server.tools),
+        "tool_modules_loaded_ms": get_module_load_times()
+    }
+    sys.stdout.write(_REPORT_MARKER + json.dumps(report) + "\n")
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def profile_startup(config_dir: Optional[str] = None, top: int = 15) -> Dict[str, Any]:
+    """
+    Profile a server start in a child process.
+
+    Args:
+        config_dir: Configuration directory.
+        top: Number of entries to keep per import ranking.
+
+    Returns:
+        Dictionary with wall time, phase timings and import-time breakdowns.
+
+    Raises:
+        RuntimeError: If the child process failed.
+    """
+    code = f"from src.utils.startup_profile import measure_startup; measure_startup({config_dir!r})"
+    start_time = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(PROJECT_ROOT),
+        capture_output=True,
+        text=True
+    )
+    wall_ms = round((time.perf_counter() - start_time) * 1000, 1)
+
+    report_lines = [line for line in result.stdout.splitlines() if line.startswith(_REPORT_MARKER)]
+    if result.returncode != 0 or not report_lines:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("Startup failed while profiling:\n" + "\n".join(errors[-20:]))
+
+    return {
+        "wall_ms": wall_ms,
+        **json.loads(report_lines[-1][len(_REPORT_MARKER):]),
+        "imports": summarize_imports(parse_importtime(result.stderr), top)
+    }
+
+
+def format_report(profile: Dict[str, Any]) -> str:
+    """
+    Format a startup profile as text.
+
+    Args:
+        profile: Result of profile_startup().
+
+    Returns:
+        Human-readable report.
+    """
+    imports = profile["imports"]
+    lines = [f"Startup wall time: {profile['wall_ms']:.0f} ms ({imports['total_ms']:.0f} ms importing)", "", "Phases:"]
+    lines += [f"  {name:<28}{ms:>10.1f} ms" for name, ms in profile["phases_ms"].items()]
+    lines += ["", f"Tools registered: {profile['tools']}"]
+    loaded = profile["tool_modules_loaded_ms"]
+    lines.append(f"Tool modules imported at startup: {', '.join(loaded) if loaded else 'none (served from manifest)'}")
+    lines += ["", "Import time by package (self):"]
+    lines += [f"  {name:<28}{ms:>10.1f} ms" for name, ms in imports["packages_ms"].items()]
+    lines += ["", "Project modules by cumulative import time:"]
+    lines += [f"  {name:<40}{ms:>10.1f} ms" for name, ms in imports["project_modules_ms"].items()]
+    return "\n".join(lines)
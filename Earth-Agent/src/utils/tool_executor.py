@@ -10,13 +10,17 @@ import asyncio
 import time
 import json
 import copy
-from typing import Dict, Any, List, Optional, Callable, Tuple, Union, Set
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple, Union, Set
 
 from .cache import get_tool_result_cache, async_cached
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Limits of a DAG pipeline step's retry policy
+MAX_STEP_RETRIES = 5
+MAX_RETRY_DELAY = 30.0
+
 class ToolExecutor:
     """
     Manages the execution of tools, including caching and parallel execution.
@@ -26,6 +30,7 @@ class ToolExecutor:
     - Caching tool results to avoid redundant calls
     - Supporting parallel execution of multiple tools
     - Supporting sequential tool pipelines
+    - Supporting dependency-aware pipelines that run independent steps concurrently
     """
     
     def __init__(self, tools: Dict[str, Dict[str, Any]]):
@@ -177,7 +182,305 @@ class ToolExecutor:
                 break
         
         return results
-    
+
+    async def execute_dag(self,
+                        pipeline: List[Dict[str, Any]],
+                        use_cache: bool = True,
+                        max_concurrency: Optional[int] = None,
+                        on_step_complete: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+                        ) -> List[Dict[str, Any]]:
+        """
+        Execute a pipeline of tools as a dependency graph.
+
+        Dependencies are inferred from the ``${key}`` placeholders in each step's
+        arguments: a step depends on the closest earlier step whose
+        'output_mapping' produces that key, and its placeholders are filled from
+        that step's outputs. Steps whose dependencies are satisfied run
+        concurrently.
+
+        Args:
+            pipeline: List of pipeline steps, each with 'tool', 'arguments', and
+                      optional 'output_mapping', 'required' (default True),
+                      'timeout' (seconds), 'retries' (default 0, at most
+                      MAX_STEP_RETRIES) and 'retry_delay' (seconds, default 0.5).
+            use_cache: Whether to use cached results if available.
+            max_concurrency: Maximum number of steps running at once (unbounded if None).
+            on_step_complete: Optional coroutine called with each step record as
+                              soon as the step finishes, fails or is skipped.
+
+        Returns:
+            List of step records in pipeline order. Each record has 'step', 'tool',
+            'arguments', 'result', 'status' ('completed', 'failed' or 'skipped'),
+            'attempts' and 'duration'.
+
+        Raises:
+            ValueError: If max_concurrency is below 1 or a step has an invalid
+                        retry count, retry delay or timeout.
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        for index, step in enumerate(pipeline):
+            retries = step.get("retries", 0)
+            if isinstance(retries, bool) or not isinstance(retries, int) or not 0 <= retries <= MAX_STEP_RETRIES:
+                raise ValueError(
+                    f"Pipeline step {index}: retries must be an integer from 0 to {MAX_STEP_RETRIES}, got {retries!r}"
+                )
+            retry_delay = step.get("retry_delay", 0.5)
+            if not isinstance(retry_delay, (int, float)) or not 0 <= retry_delay <= MAX_RETRY_DELAY:
+                raise ValueError(
+                    f"Pipeline step {index}: retry_delay must be from 0 to {MAX_RETRY_DELAY} seconds, got {retry_delay!r}"
+                )
+            timeout = step.get("timeout")
+            if timeout is not None and (not isinstance(timeout, (int, float)) or not timeout > 0):
+                raise ValueError(f"Pipeline step {index}: timeout must be positive, got {timeout!r}")
+
+        bindings = self._infer_dependencies(pipeline)
+        dependencies = {index: set(producers.values()) for index, producers in bindings.items()}
+        dependents: Dict[int, Set[int]] = {index: set() for index in range(len(pipeline))}
+        for index, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].add(index)
+
+        records: List[Optional[Dict[str, Any]]] = [None] * len(pipeline)
+        # Mapped outputs of each completed step
+        outputs: Dict[int, Dict[str, Any]] = {}
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency is not None else None
+        remaining = {index: set(deps) for index, deps in dependencies.items()}
+        running: Dict[asyncio.Task, int] = {}
+        halted = False
+
+        async def finish(index: int, record: Dict[str, Any]) -> None:
+            records[index] = record
+            if on_step_complete is not None:
+                try:
+                    await on_step_complete(record)
+                except Exception as e:
+                    logger.error(f"Error in pipeline step callback for step {index}: {e}")
+
+        async def run_step(index: int) -> Dict[str, Any]:
+            # Fill placeholders from the steps this one depends on, not from
+            # whichever producer of the same key finished last
+            context = {key: outputs[producer][key] for key, producer in bindings[index].items()}
+            if semaphore is None:
+                return await self._execute_dag_step(index, pipeline[index], context, use_cache)
+            async with semaphore:
+                return await self._execute_dag_step(index, pipeline[index], context, use_cache)
+
+        def ready_steps() -> List[int]:
+            return [index for index, deps in remaining.items() if not deps]
+
+        try:
+            while remaining or running:
+                if not halted:
+                    for index in ready_steps():
+                        del remaining[index]
+                        running[asyncio.create_task(run_step(index))] = index
+
+                if not running:
+                    # Nothing can make progress: the pipeline was halted
+                    break
+
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    index = running.pop(task)
+                    step = pipeline[index]
+                    record = task.result()
+
+                    if record["status"] == "completed":
+                        outputs[index] = {}
+                        if isinstance(step.get("output_mapping"), dict):
+                            for context_key, result_path in step["output_mapping"].items():
+                                outputs[index][context_key] = self._get_nested_value(record["result"], result_path)
+                        for dependent in dependents[index]:
+                            if dependent in remaining:
+                                remaining[dependent].discard(index)
+                    else:
+                        # Dependents cannot run without this step's outputs
+                        for skipped in self._collect_dependents(index, dependents):
+                            if skipped in remaining:
+                                del remaining[skipped]
+                                await finish(skipped, self._skipped_record(
+                                    skipped, pipeline[skipped],
+                                    f"Skipped: dependency '{step['tool']}' (step {index}) failed"
+                                ))
+                                if pipeline[skipped].get("required", True):
+                                    halted = True
+                        if step.get("required", True):
+                            halted = True
+
+                    await finish(index, record)
+
+                if halted and remaining:
+                    logger.warning("DAG pipeline halted because a required step failed")
+                    for index in list(remaining):
+                        del remaining[index]
+                        await finish(index, self._skipped_record(
+                            index, pipeline[index], "Skipped: pipeline halted after a required step failed"
+                        ))
+        finally:
+            # Don't leave steps running when the pipeline exits with an error
+            for task in running:
+                task.cancel()
+
+        return [record for record in records if record is not None]
+
+    async def _execute_dag_step(self,
+                              index: int,
+                              step: Dict[str, Any],
+                              context: Dict[str, Any],
+                              use_cache: bool) -> Dict[str, Any]:
+        """
+        Execute a single DAG pipeline step with its timeout and retry policy.
+
+        Args:
+            index: Position of the step in the pipeline.
+            step: The pipeline step definition.
+            context: Outputs of the steps this step depends on.
+            use_cache: Whether to use cached results if available.
+
+        Returns:
+            The step record.
+        """
+        tool_name = step["tool"]
+        arguments = copy.deepcopy(step.get("arguments", {}))
+        self._apply_context_to_arguments(arguments, context)
+
+        timeout = step.get("timeout")
+        retries = step.get("retries", 0)
+        retry_delay = step.get("retry_delay", 0.5)
+
+        start_time = time.time()
+        result: Dict[str, Any] = {}
+        attempts = 0
+
+        while attempts <= retries:
+            # Error results are cached briefly, so retries must bypass the cache
+            force_refresh = attempts > 0
+            attempts += 1
+            try:
+                coroutine = self.execute_tool(tool_name, arguments, use_cache, force_refresh)
+                if timeout:
+                    result = await asyncio.wait_for(coroutine, timeout=timeout)
+                else:
+                    result = await coroutine
+            except asyncio.TimeoutError:
+                logger.warning(f"Pipeline step {index} ({tool_name}) timed out after {timeout}s")
+                result = {"error": f"Tool {tool_name} timed out after {timeout}s"}
+
+            if not (isinstance(result, dict) and "error" in result):
+                break
+
+            if attempts <= retries:
+                logger.info(f"Retrying pipeline step {index} ({tool_name}), attempt {attempts + 1}")
+                await asyncio.sleep(min(retry_delay * (2 ** (attempts - 1)), MAX_RETRY_DELAY))
+
+        failed = isinstance(result, dict) and "error" in result
+        return {
+            "step": index,
+            "tool": tool_name,
+            "arguments": arguments,
+            "result": result,
+            "status": "failed" if failed else "completed",
+            "attempts": attempts,
+            "duration": time.time() - start_time
+        }
+
+    def _skipped_record(self, index: int, step: Dict[str, Any], reason: str) -> Dict[str, Any]:
+        """
+        Build the record for a pipeline step that was never executed.
+
+        Args:
+            index: Position of the step in the pipeline.
+            step: The pipeline step definition.
+            reason: Why the step was skipped.
+
+        Returns:
+            The step record.
+        """
+        return {
+            "step": index,
+            "tool": step["tool"],
+            "arguments": step.get("arguments", {}),
+            "result": {"error": reason},
+            "status": "skipped",
+            "attempts": 0,
+            "duration": 0.0
+        }
+
+    def _infer_dependencies(self, pipeline: List[Dict[str, Any]]) -> Dict[int, Dict[str, int]]:
+        """
+        Infer step dependencies from the placeholders used in step arguments.
+
+        A placeholder resolves to the closest earlier step whose 'output_mapping'
+        produces the key, which keeps the graph acyclic and matches the context
+        the linear pipeline would have seen. Placeholders without a producer are
+        left untouched, as in execute_pipeline.
+
+        Args:
+            pipeline: List of pipeline steps.
+
+        Returns:
+            Dictionary mapping each step index to the producing step index of
+            each placeholder key it uses.
+        """
+        producers: Dict[str, int] = {}
+        bindings: Dict[int, Dict[str, int]] = {}
+
+        for index, step in enumerate(pipeline):
+            placeholders = self._find_placeholders(step.get("arguments", {}))
+            bindings[index] = {key: producers[key] for key in placeholders if key in producers}
+
+            if isinstance(step.get("output_mapping"), dict):
+                for context_key in step["output_mapping"]:
+                    producers[context_key] = index
+
+        return bindings
+
+    def _find_placeholders(self, value: Any) -> Set[str]:
+        """
+        Collect the ``${key}`` placeholder names referenced in a value.
+
+        Args:
+            value: Arguments (or a nested part of them) to scan.
+
+        Returns:
+            Set of referenced context keys.
+        """
+        if isinstance(value, str):
+            if value.startswith("${") and value.endswith("}"):
+                return {value[2:-1]}
+            return set()
+
+        keys: Set[str] = set()
+        if isinstance(value, dict):
+            for item in value.values():
+                keys |= self._find_placeholders(item)
+        elif isinstance(value, list):
+            for item in value:
+                keys |= self._find_placeholders(item)
+        return keys
+
+    def _collect_dependents(self, index: int, dependents: Dict[int, Set[int]]) -> List[int]:
+        """
+        Collect every step that transitively depends on a step.
+
+        Args:
+            index: The step whose dependents to collect.
+            dependents: Dictionary mapping step indices to their direct dependents.
+
+        Returns:
+            Indices of all transitive dependents, in pipeline order.
+        """
+        collected: Set[int] = set()
+        stack = list(dependents[index])
+        while stack:
+            current = stack.pop()
+            if current not in collected:
+                collected.add(current)
+                stack.extend(dependents[current])
+        return sorted(collected)
+
     def _generate_cache_key(self, tool_name: str, arguments: Dict[str, Any]) -> str:
         """
         Generate a cache key for a tool call.
@@ -216,6 +519,7 @@ class ToolExecutor:
             # Longer TTL for relatively static data
             "get_location_info": 86400,  # 24 hours
             "calculate_distance": 86400,  # 24 hours
+            "calculate_distance_matrix": 86400,  # 24 hours
             "find_nearby_features": 43200,  # 12 hours
             "analyze_area": 43200,  # 12 hours
             
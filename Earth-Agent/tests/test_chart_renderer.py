@@ -0,0 +1,130 @@
+"""
+Tests for the chart renderer.
+
+This module contains unit tests for the process-pool chart renderer, its
+content-addressed output paths and its render-result cache.
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import unittest
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.chart_renderer import ChartRenderer, chart_key
+
+BAR_SPEC = {
+    "kind": "bar",
+    "title": "Rainfall",
+    "categories": ["A", "B", "C"],
+    "series": [{"label": "2023", "y": [1, 2, 3]}, {"label": "2024", "y": [2, 3, 1]}]
+}
+
+LINE_SPEC = {
+    "kind": "line",
+    "title": "Temperature",
+    "grid": True,
+    "x_dates": True,
+    "series": [{"x": ["2023-01-01", "2023-01-02", "2023-01-03"], "y": [1.5, 2.0, 0.5]}]
+}
+
+
+class TestChartKey(unittest.TestCase):
+    """Test cases for chart content addresses."""
+
+    def test_key_depends_on_spec_data_format_and_size(self):
+        """Equal charts share a key; any change of data, format or size changes it."""
+        size = (10.0, 6.0, 100)
+        key = chart_key(BAR_SPEC, "png", size)
+
+        self.assertEqual(key, chart_key(dict(reversed(list(BAR_SPEC.items()))), "png", size))
+        changed = dict(BAR_SPEC, series=[{"label": "2023", "y": [1, 2, 4]}])
+        self.assertNotEqual(key, chart_key(changed, "png", size))
+        self.assertNotEqual(key, chart_key(BAR_SPEC, "svg", size))
+        self.assertNotEqual(key, chart_key(BAR_SPEC, "png", (12.0, 6.0, 100)))
+
+
+class TestChartRenderer(unittest.IsolatedAsyncioTestCase):
+    """Test cases for ChartRenderer."""
+
+    async def asyncSetUp(self):
+        """Set up a renderer writing into a private directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.renderer = ChartRenderer(output_dir=self.temp_dir.name, max_workers=2, width=4, height=3, dpi=50)
+
+    async def asyncTearDown(self):
+        """Stop the rendering processes and remove the output directory."""
+        self.renderer.shutdown()
+        self.temp_dir.cleanup()
+
+    async def test_render_returns_png_and_svg_bytes(self):
+        """Charts render to encoded bytes in the requested format."""
+        png = await self.renderer.render(BAR_SPEC, "png")
+        svg = await self.renderer.render(LINE_SPEC, "svg")
+
+        self.assertTrue(png.startswith(b"\x89PNG"))
+        self.assertIn(b"<svg", svg)
+
+    async def test_files_are_content_addressed_and_cached(self):
+        """Identical charts share one file and one render; different charts get different files."""
+        paths = await asyncio.gather(*(self.renderer.render_to_file(BAR_SPEC, "png") for _ in range(3)))
+        other = await self.renderer.render_to_file(LINE_SPEC, "png")
+        again = await self.renderer.render_to_file(BAR_SPEC, "png")
+
+        self.assertEqual(len(set(paths)), 1)
+        self.assertEqual(again, paths[0])
+        self.assertNotEqual(other, paths[0])
+        self.assertTrue(os.path.exists(paths[0]))
+        self.assertEqual(os.path.dirname(paths[0]), self.temp_dir.name)
+
+        metrics = self.renderer.get_metrics()
+        self.assertEqual(metrics["renders"], 2)
+        self.assertEqual(metrics["coalesced"], 2)
+        self.assertEqual(metrics["cache_hits"], 1)
+
+    async def test_evicted_files_are_removed(self):
+        """Chart files leave the disk when their cache entries are evicted."""
+        self.renderer.cache_size = 1
+        first = await self.renderer.render_to_file(BAR_SPEC, "png")
+        second = await self.renderer.render_to_file(LINE_SPEC, "png")
+
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.exists(second))
+        self.assertEqual(os.listdir(self.temp_dir.name), [os.path.basename(second)])
+
+    async def test_files_from_earlier_runs_are_removed(self):
+        """A new renderer deletes chart files it did not render, keeping other files."""
+        path = await self.renderer.render_to_file(BAR_SPEC)
+        other = os.path.join(self.temp_dir.name, "notes.txt")
+        with open(other, "w") as f:
+            f.write("keep")
+
+        ChartRenderer(output_dir=self.temp_dir.name)
+
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(other))
+
+    async def test_size_is_configurable_and_bounded(self):
+        """Output sizes fall back to the defaults and are clamped to the limits."""
+        self.assertEqual(self.renderer.resolve_size(), (4.0, 3.0, 50))
+        self.assertEqual(self.renderer.resolve_size(8, None, 1000), (8.0, 3.0, 300))
+
+        small = await self.renderer.render(BAR_SPEC, "png", self.renderer.resolve_size(2, 2, 50))
+        large = await self.renderer.render(BAR_SPEC, "png", self.renderer.resolve_size(8, 6, 100))
+        self.assertGreater(len(large), len(small))
+
+    async def test_unsupported_requests_are_rejected(self):
+        """Unknown formats, chart kinds and empty specs raise ValueError."""
+        with self.assertRaises(ValueError):
+            await self.renderer.render(BAR_SPEC, "html")
+        with self.assertRaises(ValueError):
+            await self.renderer.render(dict(BAR_SPEC, kind="choropleth"))
+        with self.assertRaises(ValueError):
+            await self.renderer.render(dict(BAR_SPEC, series=[]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Tests for the WebSocket connection manager.
+
+This module contains unit tests for deadline-based session expiry, per-connection
+outbound queues and slow-consumer eviction, and a load test with 10,000
+simulated sockets.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import unittest
+from unittest import mock
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.connection_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    """Simulated WebSocket that records sent messages, optionally sending slowly."""
+
+    def __init__(self, send_delay: float = 0.0):
+        self.send_delay = send_delay
+        self.sent = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        self.sent.append(message)
+
+    async def close(self, code=1000, reason=""):
+        self.closed = code
+
+
+class TestConnectionManager(unittest.IsolatedAsyncioTestCase):
+    """Test cases for ConnectionManager."""
+
+    async def asyncTearDown(self):
+        """Stop background tasks of the manager under test."""
+        for session_id in list(self.manager.active_connections):
+            await self.manager.disconnect(session_id)
+        if self.manager._monitor_task is not None:
+            self.manager._monitor_task.cancel()
+
+    async def flush(self):
+        """Wait until every outbound queue has been drained."""
+        while self.manager.get_stats()["queued_messages"]:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0)
+
+    async def test_inactive_sessions_expire_by_deadline(self):
+        """Inactive sessions are hibernated, and hibernated sessions later removed."""
+        self.manager = ConnectionManager(inactive_timeout=0.2, hibernation_timeout=0.2)
+        idle = FakeWebSocket()
+        idle_id = await self.manager.connect(idle)
+        busy_id = await self.manager.connect(FakeWebSocket())
+
+        for _ in range(6):
+            await asyncio.sleep(0.05)
+            self.manager.update_activity(busy_id)
+
+        self.assertFalse(self.manager.is_connected(idle_id))
+        self.assertEqual(idle.closed, 1000)
+        self.assertIn(idle_id, self.manager.hibernated_sessions)
+        self.assertTrue(self.manager.is_connected(busy_id))
+
+        await asyncio.sleep(0.35)
+        self.assertNotIn(idle_id, self.manager.hibernated_sessions)
+        self.assertEqual(self.manager.stats["expired"], 1)
+
+    async def test_messages_are_delivered_in_order(self):
+        """Queued messages reach the client in the order they were sent."""
+        self.manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        session_id = await self.manager.connect(websocket)
+
+        for i in range(5):
+            self.assertTrue(await self.manager.send_json(session_id, {"n": i}))
+        await self.flush()
+
+        self.assertEqual([message["n"] for message in websocket.sent], list(range(5)))
+        self.assertFalse(await self.manager.send_json("unknown", {"n": 0}))
+
+    async def test_slow_consumer_does_not_delay_others(self):
+        """A client that does not keep up is evicted while others get their messages."""
+        self.manager = ConnectionManager(send_timeout=0.1, outbound_queue_size=4)
+        slow = FakeWebSocket(send_delay=10)
+        fast = FakeWebSocket()
+        slow_id = await self.manager.connect(slow)
+        fast_id = await self.manager.connect(fast)
+
+        for i in range(3):
+            await self.manager.broadcast_json({"n": i})
+        await self.flush()
+        self.assertEqual(len(fast.sent), 3)
+
+        await asyncio.sleep(0.15)
+        self.assertFalse(self.manager.is_connected(slow_id))
+        self.assertTrue(self.manager.is_connected(fast_id))
+        self.assertEqual(slow.closed, 1008)
+        self.assertEqual(self.manager.stats["evicted"], 1)
+
+    async def test_full_queue_evicts_client(self):
+        """A client whose outbound queue is full is evicted."""
+        self.manager = ConnectionManager(outbound_queue_size=2)
+        websocket = FakeWebSocket(send_delay=10)
+        session_id = await self.manager.connect(websocket)
+
+        results = [await self.manager.send_json(session_id, {"n": i}) for i in range(4)]
+
+        self.assertIn(False, results)
+        self.assertFalse(self.manager.is_connected(session_id))
+
+
+class TestConnectionManagerLoad(unittest.IsolatedAsyncioTestCase):
+    """Load test with many simulated sockets."""
+
+    SOCKETS = 10000
+
+    async def test_ten_thousand_sockets(self):
+        """Broadcast and expiry stay fast with 10,000 connections and some slow clients."""
+        self.manager = ConnectionManager(
+            max_connections=self.SOCKETS,
+            inactive_timeout=3600,
+            send_timeout=0.5,
+            outbound_queue_size=8
+        )
+        sockets = [FakeWebSocket(send_delay=60 if i % 1000 == 0 else 0) for i in range(self.SOCKETS)]
+        session_ids = [await self.manager.connect(websocket) for websocket in sockets]
+
+        start = time.perf_counter()
+        queued = await self.manager.broadcast_json({"type": "notice"})
+        while sum(len(websocket.sent) for websocket in sockets) < self.SOCKETS - 10:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(queued, self.SOCKETS)
+        # Ten clients taking a minute per send must not hold up delivery to
+        # the others (sequential sends would take ten minutes)
+        self.assertLess(elapsed, 30)
+
+        while self.manager.stats["evicted"] < 10 and time.perf_counter() - start < 30:
+            await asyncio.sleep(0.05)
+        self.assertEqual(self.manager.stats["evicted"], 10)
+        self.assertEqual(len(self.manager.active_connections), self.SOCKETS - 10)
+
+        # An hour later, every session but five has been active
+        later = time.time() + 3601
+        with mock.patch("src.utils.connection_manager.time.time", return_value=later):
+            idle = set(session_ids[1:6])
+            for session_id in self.manager.active_connections:
+                if session_id not in idle:
+                    self.manager.update_activity(session_id)
+
+            self.assertEqual(await self.manager._hibernate_inactive_connections(), 5)
+            # Rescheduled deadlines lie in the future, so the next check pops nothing
+            start = time.perf_counter()
+            self.assertEqual(await self.manager._hibernate_inactive_connections(), 0)
+            self.assertLess(time.perf_counter() - start, 0.1)
+
+        self.assertTrue(idle.isdisjoint(self.manager.active_connections))
+
+        for session_id in list(self.manager.active_connections):
+            await self.manager.disconnect(session_id)
+        self.manager._monitor_task.cancel()
+
+
+if __name__ == '__main__':
+    unittest.main()
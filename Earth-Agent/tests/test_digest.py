@@ -0,0 +1,48 @@
+"""
+Tests for the tool-result digest helpers.
+
+This module contains unit tests for token estimation and compact digests.
+"""
+
+import os
+import sys
+import json
+import unittest
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.gemini.digest import compact_tool_result, estimate_tokens
+
+
+class TestDigest(unittest.TestCase):
+    """Test cases for compact_tool_result and estimate_tokens."""
+
+    def test_small_results_are_unchanged(self):
+        """Results within budget are serialized as-is."""
+        result = {"result": {"temperature": 21.5, "unit": "°C"}}
+        self.assertEqual(json.loads(compact_tool_result(result, 100)), result)
+
+    def test_large_results_fit_budget(self):
+        """Large results are shrunk to the token budget."""
+        result = {
+            "series": list(range(5000)),
+            "description": "x" * 5000,
+            "features": [{"name": f"feature {i}", "value": i} for i in range(500)]
+        }
+        digest = compact_tool_result(result, 300)
+
+        self.assertLessEqual(estimate_tokens(digest), 300)
+        self.assertGreater(estimate_tokens(result), 300)
+
+    def test_numeric_lists_are_summarized(self):
+        """Long numeric lists keep their statistics."""
+        digest = json.loads(compact_tool_result({"values": list(range(1000))}, 100))
+
+        self.assertEqual(digest["values"]["count"], 1000)
+        self.assertEqual(digest["values"]["min"], 0)
+        self.assertEqual(digest["values"]["max"], 999)
+
+
+if __name__ == '__main__':
+    unittest.main()
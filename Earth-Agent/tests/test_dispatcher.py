@@ -0,0 +1,116 @@
+"""
+Tests for the per-session WebSocket message dispatcher.
+
+This module contains unit tests for request tagging, ordering, cancellation
+and backpressure of SessionDispatcher, using a fake message handler.
+"""
+
+import os
+import sys
+import asyncio
+import unittest
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.mcp_server.dispatcher import SessionDispatcher
+
+
+class FakeHandler:
+    """Message handler that sleeps for the requested delay and records the order of events."""
+
+    def __init__(self):
+        self.events = []
+
+    async def __call__(self, data, send=None):
+        name = data.get("name", data["type"])
+        self.events.append(("start", name))
+        if send is not None:
+            await send({"type": "progress", "name": name})
+        await asyncio.sleep(data.get("delay", 0))
+        self.events.append(("end", name))
+        return {"type": "done", "name": name}
+
+
+class TestSessionDispatcher(unittest.IsolatedAsyncioTestCase):
+    """Test cases for SessionDispatcher."""
+
+    async def asyncSetUp(self):
+        """Set up a dispatcher that collects sent messages."""
+        self.sent = []
+        self.handler = FakeHandler()
+
+        async def send(message):
+            self.sent.append(message)
+
+        self.send = send
+        self.dispatcher = SessionDispatcher("session", self.handler, send, max_pending=3, max_concurrency=4)
+
+    async def wait_idle(self):
+        """Wait until every pending request has finished."""
+        while self.dispatcher.pending:
+            await asyncio.sleep(0.01)
+
+    def messages(self, request_id):
+        """Messages sent for a request, in order."""
+        return [message for message in self.sent if message["request_id"] == request_id]
+
+    async def test_quick_messages_are_not_blocked_by_slow_ones(self):
+        """A pipeline finishes while an earlier query is still running."""
+        await self.dispatcher.submit({"type": "query", "name": "slow", "delay": 0.2, "request_id": "q1"})
+        await self.dispatcher.submit({"type": "pipeline", "name": "quick", "request_id": "p1"})
+        await self.wait_idle()
+
+        self.assertLess(self.handler.events.index(("end", "quick")), self.handler.events.index(("end", "slow")))
+        self.assertEqual([m["type"] for m in self.messages("q1")], ["progress", "done"])
+        self.assertEqual([m["type"] for m in self.messages("p1")], ["progress", "done"])
+
+    async def test_history_messages_keep_their_order(self):
+        """Queries, tool calls and history clears run one at a time in arrival order."""
+        await self.dispatcher.submit({"type": "query", "name": "first", "delay": 0.1})
+        await self.dispatcher.submit({"type": "clear_history", "name": "clear"})
+        await self.dispatcher.submit({"type": "tool_call", "name": "second"})
+        await self.wait_idle()
+
+        self.assertEqual(self.handler.events, [
+            ("start", "first"), ("end", "first"),
+            ("start", "clear"), ("end", "clear"),
+            ("start", "second"), ("end", "second")
+        ])
+        self.assertTrue(all(message.get("request_id") for message in self.sent))
+
+    async def test_cancel_running_request(self):
+        """A cancel message stops a running request, which ends with a cancelled message."""
+        await self.dispatcher.submit({"type": "query", "name": "slow", "delay": 5, "request_id": "q1"})
+        await asyncio.sleep(0.05)
+        await self.dispatcher.submit({"type": "cancel", "target_request_id": "q1", "request_id": "c1"})
+        await self.wait_idle()
+
+        self.assertEqual(self.messages("c1")[0]["type"], "cancel_result")
+        self.assertTrue(self.messages("c1")[0]["success"])
+        self.assertEqual(self.messages("q1")[-1]["type"], "cancelled")
+        self.assertNotIn(("end", "slow"), self.handler.events)
+
+    async def test_backpressure_rejects_or_cancels_oldest(self):
+        """Beyond max_pending, requests are rejected, or the oldest queued one is cancelled."""
+        for i in range(3):
+            await self.dispatcher.submit({"type": "query", "name": f"q{i}", "delay": 0.1, "request_id": f"q{i}"})
+        self.assertIsNone(await self.dispatcher.submit({"type": "query", "name": "q3", "request_id": "q3"}))
+        self.assertEqual(self.messages("q3")[0]["type"], "busy")
+        await self.dispatcher.close()
+
+        dispatcher = SessionDispatcher("session", self.handler, self.send, max_pending=2, backpressure="cancel_oldest")
+        await dispatcher.submit({"type": "query", "name": "r0", "delay": 0.1, "request_id": "r0"})
+        await dispatcher.submit({"type": "query", "name": "r1", "request_id": "r1"})
+        await asyncio.sleep(0.01)
+        self.assertEqual(await dispatcher.submit({"type": "query", "name": "r2", "request_id": "r2"}), "r2")
+        while dispatcher.pending:
+            await asyncio.sleep(0.01)
+
+        self.assertEqual(self.messages("r1")[-1]["type"], "cancelled")
+        self.assertEqual(self.messages("r2")[-1]["type"], "done")
+        self.assertEqual(self.messages("r0")[-1]["type"], "done")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests for the Earth Engine connector.
+
+This module contains unit tests for climate trend analysis, using a local
+stub of the `ee` client so no Earth Engine account is needed.
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+from geopy.location import Location
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_sources import earth_engine_connector
+from src.data_sources.earth_engine_connector import EarthEngineClient
+
+
+class FakeGeocodingService:
+    """Geocoding service returning a fixed place with a bounding box."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def geocode(self, query):
+        self.calls.append(query)
+        if query == "Atlantis":
+            return None
+        return Location("Paris", (48.85, 2.35), {"boundingbox": ["48.81", "48.90", "2.22", "2.47"]})
+
+
+class TestClimateTrends(unittest.IsolatedAsyncioTestCase):
+    """Test cases for EarthEngineClient.analyze_climate_trends."""
+
+    async def asyncSetUp(self):
+        """Set up a client backed by a stub ee module and geocoder."""
+        self.ee = MagicMock()
+        self.ee.Dictionary.return_value.getInfo.return_value = {
+            "temperature": {"scale": 0.031, "offset": 11.2, "correlation": 0.8, "p-value": 0.001,
+                            "min": 10.9, "max": 12.6, "mean": 11.8, "count": 30},
+            "precipitation": {"scale": -1.5, "offset": 640.0, "correlation": -0.1, "p-value": 0.6,
+                              "min": 520.4, "max": 760.1, "mean": 637.2, "count": 30}
+        }
+        self.geocoder = FakeGeocodingService()
+        patchers = [
+            patch.object(earth_engine_connector, "ee", self.ee),
+            patch.object(earth_engine_connector, "get_geocoding_service", return_value=self.geocoder),
+            patch.object(EarthEngineClient, "_initialize_earth_engine")
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = EarthEngineClient()
+
+    async def test_all_variables_are_evaluated_in_one_round_trip(self):
+        """Trends for every variable come from one combined computation and one getInfo()."""
+        result = await self.client.analyze_climate_trends(
+            "Paris", ["temperature", "precipitation", "temperature"], 1991, 2020, "yearly"
+        )
+
+        self.ee.Dictionary.return_value.getInfo.assert_called_once_with()
+        self.ee.ImageCollection.assert_called_once_with(earth_engine_connector.ERA5_MONTHLY)
+        self.ee.List.sequence.assert_called_once_with(0, 29)
+
+        temperature = result["variables"]["temperature"]
+        self.assertEqual(temperature["trend"], "warming")
+        self.assertEqual(temperature["rate_of_change"], 0.031)
+        self.assertEqual(temperature["confidence"], 0.999)
+        self.assertEqual(temperature["unit"], "°C")
+        self.assertEqual(temperature["samples"], 30)
+
+        precipitation = result["variables"]["precipitation"]
+        self.assertEqual(precipitation["trend"], "stable")
+        self.assertEqual(precipitation["unit"], "mm/year")
+        self.assertEqual(precipitation["mean_value"], 637.2)
+
+    async def test_place_names_are_resolved_through_the_geocoder(self):
+        """Place names become their bounding box instead of a default point."""
+        await self.client.analyze_climate_trends("Paris", ["temperature"], 2000, 2010, "monthly")
+
+        self.assertEqual(self.geocoder.calls, ["Paris"])
+        self.ee.Geometry.Rectangle.assert_called_once_with([2.22, 48.81, 2.47, 48.90])
+        self.ee.List.sequence.assert_called_once_with(0, 131)
+
+        result = await self.client.analyze_climate_trends("Atlantis", ["temperature"], 2000, 2010, "yearly")
+
+        self.assertIn("Could not find location", result["error"])
+        self.ee.Geometry.Point.assert_not_called()
+
+    async def test_unsupported_input(self):
+        """Unknown variables are reported and invalid periods fail before any request."""
+        result = await self.client.analyze_climate_trends("48.85,2.35", ["sea_level"], 2000, 2010, "yearly")
+
+        self.assertIn("error", result["variables"]["sea_level"])
+        self.ee.Dictionary.return_value.getInfo.assert_not_called()
+
+        result = await self.client.analyze_climate_trends("48.85,2.35", ["temperature"], 2019, 2020, "yearly")
+
+        self.assertIn("three years", result["error"])
+        self.ee.Geometry.Point.assert_called_once_with(2.35, 48.85)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Tests for the Earth Engine execution layer.
+
+This module contains unit tests for the bounded, prioritized executor used
+for blocking Earth Engine calls, using plain blocking functions in place of
+Earth Engine requests.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_sources.ee_executor import EEExecutor, is_transient_error, PRIORITY_BACKGROUND
+
+
+class TestEEExecutor(unittest.IsolatedAsyncioTestCase):
+    """Test cases for EEExecutor."""
+
+    async def asyncSetUp(self):
+        """Set up an executor with short timeouts and backoff."""
+        self.executor = EEExecutor(max_workers=4, max_concurrency=2, timeout=5, max_retries=2, backoff=0.01)
+
+    async def asyncTearDown(self):
+        """Shut down the thread pool."""
+        self.executor.shutdown()
+
+    async def test_blocking_calls_respect_the_concurrency_limit(self):
+        """Calls run off the event loop, at most max_concurrency at a time."""
+        lock = threading.Lock()
+        active = 0
+        peak = 0
+        ticks = 0
+
+        def blocking_call(value):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+            return value * 2
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(self.executor.run(blocking_call, i) for i in range(6)))
+        task.cancel()
+
+        self.assertEqual(results, [0, 2, 4, 6, 8, 10])
+        self.assertEqual(peak, 2)
+        self.assertGreater(ticks, 5)
+        self.assertEqual(self.executor.get_metrics()["completed"], 6)
+
+    async def test_interactive_calls_run_before_background_calls(self):
+        """Queued interactive calls are started before earlier background calls."""
+        order = []
+        release = threading.Event()
+
+        def call(name):
+            if name == "blocker":
+                release.wait(5)
+            order.append(name)
+
+        blockers = [asyncio.create_task(self.executor.run(call, "blocker")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        background = [
+            asyncio.create_task(self.executor.run(call, f"background-{i}", priority=PRIORITY_BACKGROUND))
+            for i in range(2)
+        ]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(self.executor.run(call, "interactive"))
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.executor.get_metrics()["queued"], 3)
+
+        release.set()
+        await asyncio.gather(*blockers, *background, interactive)
+
+        self.assertEqual(order.index("interactive"), 2)
+        self.assertEqual(self.executor.get_metrics()["queued"], 0)
+
+    async def test_transient_errors_are_retried(self):
+        """Quota errors are retried; other errors are raised right away."""
+        attempts = {"quota": 0, "bad": 0}
+
+        def flaky():
+            attempts["quota"] += 1
+            if attempts["quota"] < 3:
+                raise Exception("Too many concurrent aggregations.")
+            return "ok"
+
+        def bad_request():
+            attempts["bad"] += 1
+            raise ValueError("Image.select: Pattern 'B99' did not match any bands.")
+
+        self.assertEqual(await self.executor.run(flaky), "ok")
+        with self.assertRaises(ValueError):
+            await self.executor.run(bad_request)
+
+        self.assertEqual(attempts, {"quota": 3, "bad": 1})
+        metrics = self.executor.get_metrics()
+        self.assertEqual(metrics["retries"], 2)
+        self.assertEqual(metrics["failed"], 1)
+        self.assertTrue(is_transient_error(Exception("Earth Engine memory quota exceeded")))
+
+    def test_transient_statuses(self):
+        """HTTP 429 and 503 are transient; the same digits elsewhere in a message are not."""
+        class HttpError(Exception):
+            status_code = 429
+
+        self.assertTrue(is_transient_error(HttpError("Request rejected")))
+        self.assertTrue(is_transient_error(Exception('<HttpError 429 when requesting ... returned "Rate Limited">')))
+        self.assertTrue(is_transient_error(Exception("Too Many Requests")))
+        self.assertTrue(is_transient_error(Exception("Request failed with status code 503")))
+        self.assertFalse(is_transient_error(Exception("Asset 'users/me/tile_4290' not found.")))
+        self.assertFalse(is_transient_error(Exception("Band B503 not found")))
+
+    async def test_calls_time_out(self):
+        """Slow calls fail with a timeout and free their concurrency slot."""
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.executor.run(time.sleep, 0.5, timeout=0.05)
+
+        self.assertEqual(await self.executor.run(lambda: "next", timeout=1), "next")
+        metrics = self.executor.get_metrics()
+        self.assertEqual(metrics["timeouts"], 1)
+        self.assertEqual(metrics["running"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,240 @@
+"""
+Tests for the Firebase storage.
+
+This module contains unit tests for the incremental chat history sync,
+run against a local fake of the Realtime Database REST API.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from cryptography.fernet import Fernet
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.firebase_storage import FirebaseStorage
+
+
+class FakeRealtimeDatabase:
+    """In-memory subset of the Realtime Database REST API."""
+
+    def __init__(self):
+        """Initialize an empty database."""
+        self.data = {}
+        self.requests = []
+
+    def make_app(self) -> web.Application:
+        """Create the web application serving the database."""
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}.json", self.handle)
+        return app
+
+    def _get(self, parts):
+        node = self.data
+        for part in parts:
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return node
+
+    def _set(self, parts, value):
+        if not parts:
+            self.data = value if isinstance(value, dict) else {}
+            return
+        node = self.data
+        for part in parts[:-1]:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = value
+
+    def _query(self, value, query):
+        if not isinstance(value, dict):
+            return value
+        if query.get("shallow") == "true":
+            return {key: True for key in value}
+        if query.get("orderBy") == '"$key"':
+            keys = sorted(value)
+            if "endAt" in query:
+                end_at = json.loads(query["endAt"])
+                keys = [key for key in keys if key <= end_at]
+            if "limitToLast" in query:
+                keys = keys[-int(query["limitToLast"]):]
+            value = {key: value[key] for key in keys}
+        return value
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Serve a GET, PUT, PATCH or DELETE request."""
+        parts = [part for part in request.match_info["path"].split("/") if part]
+        body = await request.json() if request.method in ("PUT", "PATCH") else None
+        self.requests.append((request.method, "/".join(parts), dict(request.query), body))
+
+        if request.method == "GET":
+            return web.json_response(self._query(self._get(parts), request.query))
+        if request.method == "PUT":
+            self._set(parts, body)
+            return web.json_response(body)
+        if request.method == "PATCH":
+            for key, value in body.items():
+                self._set(parts + key.split("/"), value)
+            return web.json_response(body)
+        if request.method == "DELETE":
+            self._set(parts, None)
+            return web.json_response(None)
+        return web.json_response({"error": "method not allowed"}, status=405)
+
+    def writes(self):
+        """Return the PUT and PATCH requests received so far."""
+        return [request for request in self.requests if request[0] in ("PUT", "PATCH")]
+
+
+class TestChatHistorySync(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the incremental chat history sync."""
+
+    async def asyncSetUp(self):
+        """Start the fake database and connect a storage instance to it."""
+        self.database = FakeRealtimeDatabase()
+        self.server = TestServer(self.database.make_app())
+        await self.server.start_server()
+        self.encryption_key = Fernet.generate_key().decode()
+        self.storage = FirebaseStorage(
+            database_url=str(self.server.make_url("/")),
+            api_key="test-key",
+            encryption_key=self.encryption_key,
+            flush_delay=0.05,
+            max_batch_size=5
+        )
+
+    async def asyncTearDown(self):
+        """Close the storage and stop the fake database."""
+        await self.storage.close()
+        await self.server.close()
+
+    @staticmethod
+    def _messages(count, start=0):
+        return [{"role": "user", "content": f"message {i}"} for i in range(start, start + count)]
+
+    async def test_append_writes_only_new_messages(self):
+        """Each append is one PATCH holding only the new messages."""
+        self.assertTrue(await self.storage.append_chat_messages("s1", self._messages(3)))
+        self.assertTrue(await self.storage.append_chat_messages("s1", self._messages(1, start=3)))
+
+        method, path, _, body = self.database.writes()[-1]
+        self.assertEqual((method, path), ("PATCH", "chat_history/s1"))
+        self.assertEqual(
+            sorted(body),
+            ["messages/0000000003", "meta/count", "meta/digest", "meta/updated_at"]
+        )
+
+        stored = self.database.data["chat_history"]["s1"]
+        self.assertEqual(stored["meta"]["count"], 4)
+        self.assertEqual(len(stored["messages"]), 4)
+
+    async def test_queued_messages_are_batched(self):
+        """Queued messages are written together after the debounce delay."""
+        for message in self._messages(3):
+            await self.storage.queue_chat_message("s1", message)
+        self.assertEqual(self.database.writes(), [])
+
+        await asyncio.sleep(0.2)
+
+        writes = self.database.writes()
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(writes[0][3]["meta/count"], 3)
+
+        # A full batch is written without waiting
+        for message in self._messages(5, start=3):
+            await self.storage.queue_chat_message("s1", message)
+        self.assertEqual(len(self.database.writes()), 2)
+
+    async def test_history_is_loaded_page_by_page(self):
+        """Pages are loaded newest first and chained with the 'before' cursor."""
+        await self.storage.append_chat_messages("s1", self._messages(7))
+
+        page = await self.storage.load_chat_history_page("s1", limit=3)
+        self.assertEqual([m["content"] for m in page["messages"]], ["message 4", "message 5", "message 6"])
+        self.assertEqual(page["before"], 4)
+
+        page = await self.storage.load_chat_history_page("s1", limit=3, before=page["before"])
+        self.assertEqual([m["content"] for m in page["messages"]], ["message 1", "message 2", "message 3"])
+
+        page = await self.storage.load_chat_history_page("s1", limit=3, before=page["before"])
+        self.assertEqual([m["content"] for m in page["messages"]], ["message 0"])
+        self.assertIsNone(page["before"])
+
+        self.assertEqual(len(await self.storage.load_chat_history("s1", limit=None)), 7)
+        self.assertEqual(len(await self.storage.load_chat_history("s1", limit=2)), 2)
+
+    async def test_save_chat_history_appends_tail_and_migrates_legacy_layout(self):
+        """Legacy blobs are still readable and are migrated on the first append."""
+        self.database.data = {
+            "chat_history": {
+                "s1": {
+                    "updated_at": "2024-01-01T00:00:00",
+                    "messages": self.storage._encrypt_data(self._messages(2))
+                }
+            }
+        }
+
+        self.assertEqual(len(await self.storage.load_chat_history("s1")), 2)
+
+        self.assertTrue(await self.storage.save_chat_history("s1", self._messages(3)))
+
+        stored = self.database.data["chat_history"]["s1"]
+        self.assertEqual(stored["meta"]["count"], 3)
+        self.assertEqual(sorted(stored["messages"]), ["0000000000", "0000000001", "0000000002"])
+        self.assertEqual(
+            sorted(self.database.writes()[-1][3]),
+            ["messages/0000000002", "meta/count", "meta/digest", "meta/updated_at"]
+        )
+
+        messages = await self.storage.load_chat_history("s1")
+        self.assertEqual([m["content"] for m in messages], ["message 0", "message 1", "message 2"])
+
+    async def test_save_chat_history_replaces_a_diverged_history(self):
+        """A list the stored history is not a prefix of replaces it, even when it is longer."""
+        await self.storage.append_chat_messages("s1", self._messages(3))
+
+        # Cleared and continued with more messages than were stored
+        self.assertTrue(await self.storage.save_chat_history("s1", self._messages(4, start=10)))
+        messages = await self.storage.load_chat_history("s1")
+        self.assertEqual([m["content"] for m in messages], [f"message {i}" for i in range(10, 14)])
+        self.assertEqual(self.database.writes()[-1][0], "PUT")
+
+        # A new storage instance checks the stored fingerprint
+        storage = FirebaseStorage(
+            database_url=str(self.server.make_url("/")),
+            api_key="test-key",
+            encryption_key=self.encryption_key
+        )
+        try:
+            self.assertTrue(await storage.save_chat_history("s1", self._messages(5, start=10)))
+            self.assertEqual(self.database.writes()[-1][0], "PATCH")
+            self.assertEqual(len(await storage.load_chat_history("s1")), 5)
+        finally:
+            await storage.close()
+
+    async def test_delete_waits_for_writes_in_progress(self):
+        """A delete takes the session's sync lock, so an append cannot recreate the history."""
+        lock = self.storage._get_sync_lock("s1")
+        await lock.acquire()
+        delete = asyncio.create_task(self.storage.delete_chat_history("s1"))
+        await asyncio.sleep(0.05)
+        self.assertFalse(delete.done())
+
+        lock.release()
+        self.assertTrue(await delete)
+        self.assertEqual(self.database.requests[-1][0], "DELETE")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Tests for the geocoding service.
+
+This module contains unit tests for the asynchronous, rate-limited and cached
+geocoding service, using a fake blocking geocoder.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import unittest
+
+from geopy.location import Location
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.cache import Cache
+from src.data_sources.geocoding_service import GeocodingService, normalize_query, parse_coordinates
+
+
+class FakeGeocoder:
+    """Blocking geocoder returning a fixed location for known places."""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.calls = []
+
+    def geocode(self, query, exactly_one=True, addressdetails=False, timeout=None):
+        self.calls.append(query)
+        time.sleep(self.delay)
+        if "nowhere" in query.lower():
+            return None
+        return Location(query.title(), (48.85, 2.35), {"display_name": query.title(), "address": {}})
+
+
+class TestGeocodingService(unittest.IsolatedAsyncioTestCase):
+    """Test cases for GeocodingService."""
+
+    async def asyncSetUp(self):
+        """Set up a service with a fake geocoder and a private cache."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.geocoder = FakeGeocoder()
+        self.service = GeocodingService(
+            geocoder=self.geocoder,
+            cache=Cache(self.temp_dir.name),
+            requests_per_second=10
+        )
+
+    async def asyncTearDown(self):
+        """Remove the private cache directory."""
+        self.temp_dir.cleanup()
+
+    async def test_blocking_calls_run_off_the_event_loop(self):
+        """The event loop keeps running while the geocoder blocks."""
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await self.service.geocode("Paris")
+        task.cancel()
+
+        self.assertGreater(ticks, 5)
+
+    async def test_normalized_names_share_the_persistent_cache(self):
+        """Equivalent spellings hit the cache, including from a new service instance."""
+        location = await self.service.geocode("Paris, France")
+        self.assertEqual((location.latitude, location.longitude), (48.85, 2.35))
+        await self.service.geocode("  paris,   FRANCE ")
+        self.assertIsNone(await self.service.geocode("Nowhere"))
+        self.assertIsNone(await self.service.geocode("nowhere"))
+
+        other = GeocodingService(geocoder=self.geocoder, cache=Cache(self.temp_dir.name))
+        cached = await other.geocode("PARIS, france")
+
+        self.assertEqual(cached.address, "Paris, France")
+        self.assertEqual(self.geocoder.calls, ["Paris, France", "Nowhere"])
+
+    async def test_concurrent_lookups_are_coalesced(self):
+        """Concurrent requests for the same place send a single upstream request."""
+        results = await asyncio.gather(*(self.service.geocode("Berlin") for _ in range(5)))
+
+        self.assertEqual(len(self.geocoder.calls), 1)
+        self.assertTrue(all(result.address == "Berlin" for result in results))
+        self.assertEqual(self.service.stats["coalesced"], 4)
+
+    async def test_cancelled_caller_does_not_strand_coalesced_lookups(self):
+        """Cancelling the caller that started a lookup still resolves the others."""
+        first = asyncio.create_task(self.service.geocode("Berlin"))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(self.service.geocode("berlin"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        location = await asyncio.wait_for(second, timeout=2)
+
+        self.assertEqual(location.address, "Berlin")
+        self.assertTrue(first.cancelled())
+        self.assertEqual(self.geocoder.calls, ["Berlin"])
+        self.assertEqual(self.service._inflight, {})
+
+    async def test_batch_geocoding_is_deduplicated_and_rate_limited(self):
+        """Batches geocode each distinct place once, at most at the configured rate."""
+        start_time = time.time()
+        results = await self.service.geocode_many(["Rome", "rome", "Madrid", "Lisbon", "Nowhere"])
+        elapsed = time.time() - start_time
+
+        self.assertEqual(len(self.geocoder.calls), 4)
+        self.assertIsNone(results["Nowhere"])
+        self.assertEqual(results["rome"].address, "Rome")
+        # Four upstream requests at 10 per second with a burst of one
+        self.assertGreaterEqual(elapsed, 0.3)
+
+    def test_query_helpers(self):
+        """Queries are normalized and coordinate pairs are recognized."""
+        self.assertEqual(normalize_query("  New   York, "), "new york")
+        self.assertEqual(parse_coordinates("40.7, -74.0"), (40.7, -74.0))
+        self.assertIsNone(parse_coordinates("New York"))
+        self.assertIsNone(parse_coordinates("95,200"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Tests for the shared HTTP client.
+
+This module contains unit tests for the pooled upstream client, its retry
+and circuit-breaker policy, and the connectors using it, run against a
+local stub server.
+"""
+
+import os
+import sys
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.http_client import UpstreamClient, RetryPolicy, CircuitBreaker, CircuitOpenError
+from src.data_sources.openweathermap_connector import OpenWeatherMapClient
+
+
+class TestUpstreamClient(unittest.IsolatedAsyncioTestCase):
+    """Test cases for UpstreamClient."""
+
+    async def asyncSetUp(self):
+        """Start a stub server with flaky, failing and weather endpoints."""
+        self.hits = {"flaky": 0, "down": 0}
+        self.peers = set()
+
+        async def ok(request):
+            self.peers.add(request.transport.get_extra_info("peername"))
+            return web.json_response({"ok": True})
+
+        async def flaky(request):
+            self.hits["flaky"] += 1
+            if self.hits["flaky"] < 3:
+                return web.json_response({"error": "busy"}, status=503)
+            return web.json_response({"ok": True})
+
+        async def down(request):
+            self.hits["down"] += 1
+            return web.json_response({"error": "down"}, status=500)
+
+        async def missing(request):
+            return web.json_response({"error": "not found"}, status=404)
+
+        async def weather(request):
+            return web.json_response({
+                "name": "Paris",
+                "coord": {"lat": float(request.query["lat"]), "lon": float(request.query["lon"])},
+                "main": {"temp": 21.5, "humidity": 40},
+                "weather": [{"description": "clear sky"}]
+            })
+
+        app = web.Application()
+        app.router.add_get("/ok", ok)
+        app.router.add_get("/flaky", flaky)
+        app.router.add_get("/down", down)
+        app.router.add_get("/missing", missing)
+        app.router.add_get("/weather", weather)
+        self.server = TestServer(app)
+        await self.server.start_server()
+
+        self.client = UpstreamClient(
+            "stub",
+            retry_policy=RetryPolicy(max_retries=2, backoff=0.01),
+            circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        )
+
+    async def asyncTearDown(self):
+        """Close the client and stop the stub server."""
+        await self.client.close()
+        await self.server.close()
+
+    def _url(self, path):
+        return str(self.server.make_url(path))
+
+    async def test_connections_are_reused(self):
+        """Sequential requests share one pooled keep-alive connection."""
+        for _ in range(5):
+            response = await self.client.request("get", self._url("/ok"))
+            self.assertEqual(response.json(), {"ok": True})
+
+        self.assertEqual(len(self.peers), 1)
+        self.assertEqual(self.client.get_metrics()["requests"], 5)
+
+    async def test_transient_errors_are_retried(self):
+        """Retryable statuses are retried until the request succeeds."""
+        response = await self.client.request("get", self._url("/flaky"))
+
+        self.assertEqual(response.status, 200)
+        metrics = self.client.get_metrics()
+        self.assertEqual(metrics["retries"], 2)
+        self.assertEqual(metrics["statuses"], {"503": 2, "200": 1})
+
+    async def test_client_errors_are_not_retried(self):
+        """Non-retryable statuses are returned to the caller right away."""
+        response = await self.client.request("get", self._url("/missing"))
+
+        self.assertEqual(response.status, 404)
+        self.assertEqual(self.client.get_metrics()["retries"], 0)
+
+    async def test_circuit_opens_after_repeated_failures(self):
+        """Requests are rejected without reaching the upstream once the circuit is open."""
+        for _ in range(2):
+            response = await self.client.request("get", self._url("/down"))
+            self.assertEqual(response.status, 500)
+        self.assertEqual(self.hits["down"], 6)
+
+        with self.assertRaises(CircuitOpenError):
+            await self.client.request("get", self._url("/down"))
+
+        self.assertEqual(self.hits["down"], 6)
+        metrics = self.client.get_metrics()
+        self.assertEqual(metrics["circuit"], "open")
+        self.assertEqual(metrics["rejected"], 1)
+
+    async def test_openweathermap_uses_shared_client(self):
+        """The OpenWeatherMap connector sends its requests through the pooled client."""
+        weather_client = OpenWeatherMapClient(base_url=str(self.server.make_url("")).rstrip("/"))
+        weather_client.api_key = "test-key"
+        weather_client.http = self.client
+
+        result = await weather_client.get_current_weather("48.85,2.35")
+
+        self.assertEqual(result["location"]["coordinates"], {"latitude": 48.85, "longitude": 2.35})
+        self.assertEqual(result["weather"]["temperature"]["current"], 21.5)
+        self.assertEqual(self.client.get_metrics()["statuses"], {"200": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Tests for the chat history manager.
+
+This module contains unit tests for token budgeting, rolling summaries,
+reference compaction and session eviction in ChatHistory.
+"""
+
+import os
+import sys
+import json
+import unittest
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.gemini.memory import ChatHistory
+
+
+class TestChatHistory(unittest.TestCase):
+    """Test cases for ChatHistory."""
+
+    def test_token_counts_are_tracked(self):
+        """Each message carries a token estimate and the session keeps the total."""
+        history = ChatHistory()
+        history.add_message("s1", "user", "What is the NDVI of Nairobi?")
+
+        messages = history.get_history("s1")
+        self.assertEqual(messages[0]["role"], "system")
+        self.assertEqual(
+            history.get_token_count("s1"),
+            sum(message["tokens"] for message in messages)
+        )
+
+    def test_large_tool_results_become_references(self):
+        """Oversized messages are compacted and the original stays retrievable."""
+        history = ChatHistory(max_message_tokens=100)
+        payload = {"features": [{"name": f"park {i}", "area": i} for i in range(500)]}
+        content = f"Tool 'find_nearby_features' result: {json.dumps(payload)}"
+
+        history.add_message("s1", "assistant", content)
+
+        stored = history.get_history("s1")[-1]["content"]
+        self.assertLess(len(stored), len(content))
+        self.assertTrue(stored.endswith("[full content: ref-1]"))
+        self.assertEqual(history.get_reference("s1", "ref-1"), content)
+
+    def test_old_turns_fold_into_summary(self):
+        """Exceeding the token budget folds old turns into the system message."""
+        history = ChatHistory(token_budget=300, min_recent_messages=2)
+        for i in range(20):
+            history.add_message("s1", "user", f"Question number {i} about land cover " + "detail " * 20)
+
+        messages = history.get_history("s1")
+        self.assertLessEqual(history.get_token_count("s1"), 300)
+        self.assertIn("Question number", history.get_summary("s1"))
+        self.assertIn("Summary of the earlier conversation", messages[0]["content"])
+        self.assertIn("Question number 19", messages[-1]["content"])
+
+    def test_least_recently_used_session_is_evicted(self):
+        """The least recently used session is removed when over capacity."""
+        history = ChatHistory(max_sessions=2)
+        history.add_message("s1", "user", "hello")
+        history.add_message("s2", "user", "hello")
+        history.get_history("s1")
+        history.add_message("s3", "user", "hello")
+
+        self.assertEqual(list(history.histories), ["s1", "s3"])
+        self.assertNotIn("s2", history.token_counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
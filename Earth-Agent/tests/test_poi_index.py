@@ -0,0 +1,138 @@
+"""
+Tests for the local POI index.
+
+This module contains unit tests for building the index from an OpenStreetMap
+GeoJSON extract and for radius and k-nearest queries.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_sources.poi_index import POIIndex, build_poi_index, write_poi_index, haversine_km
+
+
+def _feature(osm_id, lon, lat, **tags):
+    return {
+        "type": "Feature",
+        "id": f"node/{osm_id}",
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": tags
+    }
+
+
+class TestPOIIndex(unittest.TestCase):
+    """Test cases for the POI index."""
+
+    def setUp(self):
+        """Create a temporary directory for indexes."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.temp_dir.cleanup()
+
+    def test_build_from_geojson_and_query_radius(self):
+        """POIs are categorized from their tags and returned nearest first."""
+        park_polygon = {
+            "type": "Feature",
+            "id": "way/7",
+            "geometry": {"type": "Polygon", "coordinates": [[[2.33, 48.86], [2.34, 48.86], [2.34, 48.87], [2.33, 48.86]]]},
+            "properties": {"leisure": "park", "name": "Jardin"}
+        }
+        extract = {
+            "type": "FeatureCollection",
+            "features": [
+                _feature(1, 2.3522, 48.8566, amenity="hospital", name="Hôtel-Dieu"),
+                _feature(2, 2.3700, 48.8600, amenity="hospital", name="Saint-Antoine"),
+                _feature(3, 2.2945, 48.8584, amenity="hospital", name="Far West"),
+                _feature(4, 2.3530, 48.8570, amenity="cafe", name="Café"),
+                _feature(5, 2.3530, 48.8570, building="yes"),
+                park_polygon
+            ]
+        }
+        source = os.path.join(self.temp_dir.name, "extract.geojson")
+        with open(source, "w", encoding="utf-8") as f:
+            json.dump(extract, f)
+
+        meta = build_poi_index(source, os.path.join(self.temp_dir.name, "index"))
+        self.assertEqual(meta["count"], 5)
+
+        index = POIIndex(os.path.join(self.temp_dir.name, "index"))
+        self.assertIsInstance(index.latitudes, np.memmap)
+        self.assertEqual(index.resolve_category("Hospitals"), "hospital")
+        self.assertEqual(index.resolve_category("parks"), "park")
+        self.assertIsNone(index.resolve_category("volcanoes"))
+
+        features = index.within_radius(48.8566, 2.3522, 3.0, "hospital")
+        self.assertEqual([f["name"] for f in features], ["Hôtel-Dieu", "Saint-Antoine"])
+        self.assertEqual(features[0]["osm_id"], 1)
+        self.assertLess(features[0]["distance_km"], features[1]["distance_km"])
+
+        self.assertEqual(index.within_radius(48.8566, 2.3522, 5.0, "park")[0]["name"], "Jardin")
+
+    def test_queries_match_brute_force(self):
+        """Radius and k-nearest queries agree with a full haversine scan."""
+        rng = np.random.default_rng(42)
+        count = 20000
+        latitudes = rng.uniform(45.0, 47.0, count)
+        longitudes = rng.uniform(5.0, 8.0, count)
+        categories = rng.integers(0, 3, count)
+        write_poi_index(self.temp_dir.name, latitudes, longitudes, categories, ["school", "park", "pharmacy"])
+        index = POIIndex(self.temp_dir.name)
+
+        stored_latitudes = latitudes.astype(np.float32)
+        stored_longitudes = longitudes.astype(np.float32)
+        for latitude, longitude in [(46.0, 6.5), (45.01, 5.02), (46.9, 7.9)]:
+            distances = haversine_km(latitude, longitude, stored_latitudes, stored_longitudes)
+            distances[categories != 1] = np.inf
+
+            within = index.within_radius(latitude, longitude, 10.0, "park")
+            self.assertEqual(len(within), int((distances <= 10.0).sum()))
+
+            nearest = index.nearest(latitude, longitude, "park", k=15)
+            expected = np.sort(distances)[:15]
+            np.testing.assert_allclose([f["distance_km"] for f in nearest], expected, atol=1e-3)
+
+    def test_radius_query_across_the_antimeridian(self):
+        """Cells on both sides of the antimeridian are searched."""
+        write_poi_index(
+            self.temp_dir.name,
+            np.array([0.0, 0.0, 0.0]),
+            np.array([179.99, -179.99, 170.0]),
+            np.array([0, 0, 0]),
+            ["harbour"],
+            names=["East", "West", "Far"]
+        )
+        index = POIIndex(self.temp_dir.name, mmap=False)
+
+        features = index.within_radius(0.0, 179.995, 5.0, "harbour")
+
+        self.assertEqual(sorted(f["name"] for f in features), ["East", "West"])
+
+    def test_radius_covering_the_globe_scans_the_category(self):
+        """A search box larger than the category is answered from the category's POIs directly."""
+        write_poi_index(
+            self.temp_dir.name,
+            np.array([48.85, -33.87, 35.68]),
+            np.array([2.35, 151.21, 139.69]),
+            np.array([0, 0, 1]),
+            ["museum", "park"]
+        )
+        index = POIIndex(self.temp_dir.name)
+
+        features = index.within_radius(48.85, 2.35, 25000.0, "museum")
+
+        self.assertEqual(len(features), 2)
+        self.assertEqual(features[0]["distance_km"], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
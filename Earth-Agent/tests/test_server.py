@@ -104,6 +104,33 @@ class TestMCPServer(unittest.TestCase):
         self.assertEqual(server.tools["custom_tool"]["description"], "Custom test tool")
         self.assertEqual(server.tools["custom_tool"]["function"], test_function)
         self.assertEqual(server.tools["custom_tool"]["parameters"], {"param1": {"type": "string"}})
+    
+    def test_gemini_declarations_are_cached_until_registration(self):
+        """Declarations are compiled once, sanitized without touching the schema, and rebuilt on registration."""
+        server = create_server(name="Test MCP Server")
+        parameters = {"type": "object", "properties": {"radius": {"type": "number", "minimum": 0}}}
+        server.register_tool("find_parks", MagicMock(), "Find parks near a location", parameters)
+        
+        first = server._prepare_tools_for_gemini()
+        self.assertIs(first[0], server._prepare_tools_for_gemini()[0])
+        declaration = next(tool for tool in first if tool["function_declarations"][0]["name"] == "find_parks")
+        self.assertNotIn("minimum", declaration["function_declarations"][0]["parameters"]["properties"]["radius"])
+        self.assertEqual(parameters["properties"]["radius"]["minimum"], 0)
+        
+        server.register_tool("get_air_quality", MagicMock(), "Get air quality for a city", {})
+        names = [tool["function_declarations"][0]["name"] for tool in server._prepare_tools_for_gemini()]
+        self.assertIn("get_air_quality", names)
+    
+    def test_relevant_tool_subset(self):
+        """With a top-k configured, only tools matching the query are sent; unmatched queries get every tool."""
+        self.config_mock.get_model_config.return_value["tool_selection_top_k"] = 1
+        server = create_server(name="Test MCP Server")
+        server.register_tool("find_parks", MagicMock(), "Find parks near a location", {})
+        server.register_tool("get_air_quality", MagicMock(), "Get air quality for a city", {})
+        
+        names = [tool["function_declarations"][0]["name"] for tool in server._prepare_tools_for_gemini("Air quality in Lahore?")]
+        self.assertEqual(names, ["get_air_quality"])
+        self.assertEqual(len(server._prepare_tools_for_gemini("hello")), len(server.tools))
 
 
 class TestAsyncMCPServer(unittest.IsolatedAsyncioTestCase):
@@ -0,0 +1,131 @@
+"""
+Tests for the spatial query tools.
+
+This module contains unit tests for the distance matrix mode of the
+distance calculation and for nearby-feature queries.
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+from geopy.location import Location
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools.spatial_query import calculate_distance_matrix, find_nearby_features, MAX_NEARBY_RADIUS_KM
+
+
+class FakeGeocodingService:
+    """Geocoding service resolving a fixed set of place names."""
+
+    places = {"Lyon": (45.764, 4.8357)}
+
+    def __init__(self):
+        self.batches = []
+
+    async def resolve_coordinates(self, query):
+        return self.places.get(query)
+
+    async def geocode_many(self, queries):
+        self.batches.append(list(queries))
+        return {
+            query: Location(query, self.places[query], {}) if query in self.places else None
+            for query in queries
+        }
+
+
+class TestDistanceMatrix(unittest.IsolatedAsyncioTestCase):
+    """Test cases for calculate_distance_matrix."""
+
+    async def asyncSetUp(self):
+        """Patch the geocoding service."""
+        self.geocoding_service = FakeGeocodingService()
+        patcher = patch("src.tools.spatial_query.get_geocoding_service", return_value=self.geocoding_service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_matrix_and_rankings(self):
+        """Every origin/destination pair is computed and destinations are ranked."""
+        paris, berlin, madrid = "48.8566,2.3522", "52.52,13.405", "40.4168,-3.7038"
+
+        result = await calculate_distance_matrix({
+            "origins": [paris, "Lyon"],
+            "destinations": [berlin, madrid, "Lyon", "Atlantis", "Lyon"],
+            "top_k": 2
+        })
+
+        self.assertEqual(self.geocoding_service.batches, [["Lyon", "Atlantis"]])
+        self.assertEqual(len(result["matrix"]), 2)
+        self.assertEqual(len(result["matrix"][0]), 5)
+        self.assertAlmostEqual(result["matrix"][0][0], 878, delta=5)
+        self.assertIsNone(result["matrix"][0][3])
+        self.assertEqual(result["unresolved"], ["Atlantis"])
+
+        self.assertEqual([n["destination"] for n in result["nearest"][paris]], ["Lyon", "Lyon"])
+        # An origin is never ranked as its own nearest destination
+        self.assertEqual([n["destination"] for n in result["nearest"]["Lyon"]], [madrid, berlin])
+
+    async def test_geodesic_method_and_units(self):
+        """Geodesic distances agree with haversine to within half a percent."""
+        arguments = {"origins": ["48.8566,2.3522"], "destinations": ["52.52,13.405"], "unit": "miles"}
+
+        haversine = await calculate_distance_matrix(arguments)
+        geodesic = await calculate_distance_matrix(dict(arguments, method="geodesic"))
+
+        self.assertEqual(haversine["unit"], "miles")
+        self.assertAlmostEqual(haversine["matrix"][0][0], geodesic["matrix"][0][0], delta=geodesic["matrix"][0][0] * 0.005)
+        self.assertEqual(self.geocoding_service.batches, [])
+
+    async def test_invalid_arguments(self):
+        """Missing origins and unsupported options are reported as errors."""
+        self.assertIn("error", await calculate_distance_matrix({"origins": []}))
+        self.assertIn("error", await calculate_distance_matrix({"origins": ["Lyon"], "unit": "parsecs"}))
+        for top_k in (0, -2, "three", None):
+            self.assertIn("error", await calculate_distance_matrix({"origins": ["Lyon"], "top_k": top_k}))
+
+
+class FakePOIIndex:
+    """POI index recording the radius of each query."""
+
+    def __init__(self):
+        self.radii = []
+
+    def resolve_category(self, feature_type):
+        return "park"
+
+    def within_radius(self, latitude, longitude, radius_km, category, limit=None):
+        self.radii.append(radius_km)
+        return []
+
+
+class TestFindNearbyFeatures(unittest.IsolatedAsyncioTestCase):
+    """Test cases for find_nearby_features."""
+
+    async def asyncSetUp(self):
+        """Patch the geocoding service and the POI index."""
+        self.poi_index = FakePOIIndex()
+        for target, value in [("get_geocoding_service", FakeGeocodingService()), ("get_poi_index", self.poi_index)]:
+            patcher = patch(f"src.tools.spatial_query.{target}", return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_radius_is_clamped(self):
+        """Radii beyond the maximum are reduced to it."""
+        result = await find_nearby_features({"location": "Lyon", "feature_type": "parks", "radius": 20000})
+
+        self.assertEqual(result["radius"], MAX_NEARBY_RADIUS_KM)
+        self.assertEqual(self.poi_index.radii, [MAX_NEARBY_RADIUS_KM])
+
+    async def test_invalid_radius(self):
+        """Non-numeric and negative radii are reported as errors without querying the index."""
+        for radius in ["far", -1, None, float("nan")]:
+            result = await find_nearby_features({"location": "Lyon", "feature_type": "parks", "radius": radius})
+            self.assertIn("error", result)
+        self.assertEqual(self.poi_index.radii, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Tests for startup profiling.
+
+This module contains unit tests for parsing and summarizing the import-time
+report used by ``python -m src.main --profile-startup``.
+"""
+
+import os
+import sys
+import unittest
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.startup_profile import parse_importtime, summarize_imports, format_report
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2000 |       2000 |     numpy.core
+import time:      3000 |       5000 |   numpy
+import time:       500 |        500 |     src.config
+import time:      1000 |       6500 | src.tools.visualization
+some other stderr line
+"""
+
+
+class TestStartupProfile(unittest.TestCase):
+    """Test cases for startup profiling."""
+
+    def test_parse_importtime(self):
+        """Import lines are parsed into module, self and cumulative times."""
+        modules = parse_importtime(IMPORTTIME_OUTPUT)
+
+        self.assertEqual(modules[0], ("_io", 120, 120))
+        self.assertEqual(modules[-1], ("src.tools.visualization", 1000, 6500))
+        self.assertEqual(len(modules), 5)
+
+    def test_summarize_imports(self):
+        """Self times are grouped by top-level package; project modules are ranked by cumulative time."""
+        summary = summarize_imports(parse_importtime(IMPORTTIME_OUTPUT))
+
+        self.assertEqual(summary["total_ms"], 6.6)
+        self.assertEqual(list(summary["packages_ms"].items())[0], ("numpy", 5.0))
+        self.assertEqual(summary["packages_ms"]["src"], 1.5)
+        self.assertEqual(list(summary["project_modules_ms"]), ["src.tools.visualization", "src.config"])
+
+    def test_format_report(self):
+        """The report lists phases, lazily loaded tool modules and import rankings."""
+        report = format_report({
+            "wall_ms": 900.0,
+            "phases_ms": {"load config": 10.0, "import server": 700.0},
+            "tools": 26,
+            "tool_modules_loaded_ms": {},
+            "imports": summarize_imports(parse_importtime(IMPORTTIME_OUTPUT))
+        })
+
+        self.assertIn("import server", report)
+        self.assertIn("none (served from manifest)", report)
+        self.assertIn("src.tools.visualization", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
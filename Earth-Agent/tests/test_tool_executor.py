@@ -0,0 +1,249 @@
+"""
+Tests for the tool executor.
+
+This module contains unit tests for the dependency-aware pipeline execution
+and the validation of pipeline messages.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.cache import Cache
+from src.utils.tool_executor import ToolExecutor
+from src.utils.security import InputValidator, PipelineMessage
+
+
+class TestDagPipeline(unittest.IsolatedAsyncioTestCase):
+    """Test cases for ToolExecutor.execute_dag."""
+
+    async def asyncSetUp(self):
+        """Set up a tool executor with a private cache and test tools."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.calls = []
+        self.flaky_attempts = 0
+        self.cancelled = []
+
+        async def geocode(arguments):
+            self.calls.append(("geocode", arguments))
+            await asyncio.sleep(0.1)
+            return {"result": {"coordinates": f"{arguments['location']}-coords"}}
+
+        async def weather(arguments):
+            self.calls.append(("weather", arguments))
+            return {"result": {"temperature": 21, "at": arguments["coordinates"]}}
+
+        async def failing(arguments):
+            self.calls.append(("failing", arguments))
+            return {"error": "upstream unavailable"}
+
+        async def slow(arguments):
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                self.cancelled.append("slow")
+                raise
+            return {"result": "too late"}
+
+        async def echo(arguments):
+            self.calls.append(("echo", arguments))
+            await asyncio.sleep(arguments.get("delay", 0))
+            return {"result": arguments.get("value")}
+
+        async def flaky(arguments):
+            self.flaky_attempts += 1
+            if self.flaky_attempts < 3:
+                return {"error": "transient"}
+            return {"result": "ok"}
+
+        tools = {
+            name: {"function": function, "description": name, "parameters": {}}
+            for name, function in {
+                "geocode": geocode,
+                "weather": weather,
+                "failing": failing,
+                "slow": slow,
+                "flaky": flaky,
+                "echo": echo
+            }.items()
+        }
+        self.executor = ToolExecutor(tools)
+        self.executor.cache = Cache(self.temp_dir.name)
+
+    async def asyncTearDown(self):
+        """Remove the private cache directory."""
+        self.temp_dir.cleanup()
+
+    async def test_independent_steps_run_concurrently(self):
+        """Steps without placeholders between them should overlap."""
+        pipeline = [
+            {"tool": "geocode", "arguments": {"location": "Paris"}},
+            {"tool": "geocode", "arguments": {"location": "Berlin"}},
+            {"tool": "geocode", "arguments": {"location": "Madrid"}}
+        ]
+
+        start_time = time.time()
+        results = await self.executor.execute_dag(pipeline, use_cache=False)
+        elapsed = time.time() - start_time
+
+        self.assertEqual([record["status"] for record in results], ["completed"] * 3)
+        self.assertLess(elapsed, 0.25)
+
+    async def test_placeholders_create_dependencies(self):
+        """A step waits for the step producing its placeholder and receives the value."""
+        pipeline = [
+            {
+                "tool": "geocode",
+                "arguments": {"location": "Paris"},
+                "output_mapping": {"coords": "result.coordinates"}
+            },
+            {"tool": "weather", "arguments": {"coordinates": "${coords}"}}
+        ]
+
+        results = await self.executor.execute_dag(pipeline, use_cache=False)
+
+        self.assertEqual(results[1]["arguments"], {"coordinates": "Paris-coords"})
+        self.assertEqual(results[1]["result"]["result"]["at"], "Paris-coords")
+        self.assertEqual([call[0] for call in self.calls], ["geocode", "weather"])
+
+    async def test_placeholders_use_their_own_producer(self):
+        """A later step producing the same key does not change what an earlier consumer receives."""
+        pipeline = [
+            {"tool": "echo", "arguments": {"value": "first"}, "output_mapping": {"x": "result"}},
+            {"tool": "echo", "arguments": {"value": "y", "delay": 0.1}, "output_mapping": {"y": "result"}},
+            {"tool": "echo", "arguments": {"value": ["${x}", "${y}"]}},
+            {"tool": "echo", "arguments": {"value": "second", "delay": 0.02}, "output_mapping": {"x": "result"}},
+            {"tool": "echo", "arguments": {"value": "${x}"}}
+        ]
+
+        results = await self.executor.execute_dag(pipeline, use_cache=False)
+
+        self.assertEqual(results[2]["result"]["result"], ["first", "y"])
+        self.assertEqual(results[4]["result"]["result"], "second")
+
+    async def test_optional_failure_keeps_partial_results(self):
+        """A failing optional step skips its dependents but not unrelated steps."""
+        pipeline = [
+            {
+                "tool": "failing",
+                "arguments": {},
+                "required": False,
+                "output_mapping": {"coords": "result.coordinates"}
+            },
+            {"tool": "weather", "arguments": {"coordinates": "${coords}"}, "required": False},
+            {"tool": "geocode", "arguments": {"location": "Rome"}}
+        ]
+
+        results = await self.executor.execute_dag(pipeline, use_cache=False)
+
+        self.assertEqual(
+            [record["status"] for record in results],
+            ["failed", "skipped", "completed"]
+        )
+        self.assertNotIn("weather", [call[0] for call in self.calls])
+
+    async def test_required_failure_halts_pending_steps(self):
+        """A failing required step prevents steps that have not started from running."""
+        pipeline = [
+            {"tool": "failing", "arguments": {}, "output_mapping": {"coords": "result.coordinates"}},
+            {"tool": "weather", "arguments": {"coordinates": "${coords}"}},
+            {"tool": "geocode", "arguments": {"location": "${coords}"}}
+        ]
+
+        results = await self.executor.execute_dag(pipeline, use_cache=False)
+
+        self.assertEqual(results[0]["status"], "failed")
+        self.assertEqual(results[1]["status"], "skipped")
+        self.assertEqual(results[2]["status"], "skipped")
+
+    async def test_timeout_and_retries(self):
+        """Steps honour their timeout and are retried on errors."""
+        pipeline = [
+            {"tool": "slow", "arguments": {}, "timeout": 0.05, "required": False},
+            {"tool": "flaky", "arguments": {}, "retries": 2, "retry_delay": 0}
+        ]
+
+        results = await self.executor.execute_dag(pipeline)
+
+        self.assertEqual(results[0]["status"], "failed")
+        self.assertIn("timed out", results[0]["result"]["error"])
+        self.assertEqual(results[1]["status"], "completed")
+        self.assertEqual(results[1]["attempts"], 3)
+
+    async def test_step_completions_are_streamed(self):
+        """The completion callback receives every step as it finishes."""
+        streamed = []
+
+        async def on_step_complete(record):
+            streamed.append(record["step"])
+
+        pipeline = [
+            {"tool": "geocode", "arguments": {"location": "Paris"}, "output_mapping": {"coords": "result.coordinates"}},
+            {"tool": "weather", "arguments": {"coordinates": "${coords}"}}
+        ]
+
+        await self.executor.execute_dag(pipeline, use_cache=False, on_step_complete=on_step_complete)
+
+        self.assertEqual(streamed, [0, 1])
+
+    async def test_invalid_limits_are_rejected(self):
+        """Invalid concurrency, retry and timeout limits raise ValueError before any step runs."""
+        pipeline = [{"tool": "geocode", "arguments": {"location": "Paris"}}]
+
+        for max_concurrency in (0, -1):
+            with self.assertRaises(ValueError):
+                await self.executor.execute_dag(pipeline, max_concurrency=max_concurrency)
+        for retries in ("two", -1, 1.5, 1000):
+            with self.assertRaises(ValueError):
+                await self.executor.execute_dag([dict(pipeline[0], retries=retries)])
+        for limits in ({"retry_delay": -1}, {"retry_delay": 3600}, {"timeout": 0}, {"timeout": -5}):
+            with self.assertRaises(ValueError):
+                await self.executor.execute_dag([dict(pipeline[0], **limits)])
+        self.assertEqual(self.calls, [])
+
+    async def test_running_steps_are_cancelled_on_error(self):
+        """Steps still running are cancelled when the pipeline exits with an error."""
+        pipeline = [
+            {"tool": "geocode", "arguments": {"location": "Paris"}, "output_mapping": {"coords": "result.coordinates"}},
+            {"tool": "slow", "arguments": {}}
+        ]
+
+        with patch.object(self.executor, "_get_nested_value", side_effect=RuntimeError("bad mapping")):
+            with self.assertRaises(RuntimeError):
+                await self.executor.execute_dag(pipeline, use_cache=False)
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.cancelled, ["slow"])
+
+
+class TestPipelineMessage(unittest.TestCase):
+    """Test cases for validating pipeline messages."""
+
+    def test_limits_are_validated(self):
+        """max_concurrency must be at least 1, retries and retry_delay bounded and timeout positive."""
+        step = {"tool": "geocode", "arguments": {"location": "Paris"}}
+
+        self.assertIsNotNone(InputValidator.validate_model({"steps": [step], "max_concurrency": 2}, PipelineMessage))
+        self.assertIsNotNone(InputValidator.validate_model({"steps": [dict(step, retries=2)]}, PipelineMessage))
+        for message in (
+            {"steps": [step], "max_concurrency": 0},
+            {"steps": [step], "max_concurrency": -1},
+            {"steps": [dict(step, retries=-1)]},
+            {"steps": [dict(step, retries="2")]},
+            {"steps": [dict(step, retries=1000)]},
+            {"steps": [dict(step, retry_delay=3600)]},
+            {"steps": [dict(step, timeout=0)]},
+            {"steps": [{"arguments": {}}]}
+        ):
+            self.assertIsNone(InputValidator.validate_model(message, PipelineMessage))
+
+
+if __name__ == '__main__':
+    unittest.main()
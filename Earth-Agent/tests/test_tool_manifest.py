@@ -0,0 +1,100 @@
+"""
+Tests for the tool manifest.
+
+This module contains unit tests for the manifest that lets the MCP server
+register tools without importing their implementations.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.mcp_server import tool_manifest
+from src.mcp_server.tool_manifest import LazyToolFunction, load_manifest, source_fingerprint
+from src.mcp_server.tools import get_all_tools
+
+
+class TestToolManifest(unittest.TestCase):
+    """Test cases for loading the tool manifest."""
+
+    def test_checked_in_manifest_is_current(self):
+        """The shipped manifest matches the tool sources and registers lazy tools."""
+        manifest = load_manifest()
+
+        self.assertIsNotNone(manifest, "Rebuild with: python -m src.mcp_server.tool_manifest")
+        tools = get_all_tools()
+        for name in manifest["tools"]:
+            self.assertIsInstance(tools[name]["function"], LazyToolFunction)
+            self.assertEqual(tools[name]["parameters"], manifest["tools"][name]["parameters"])
+
+    def test_manifest_matches_tool_modules(self):
+        """Descriptions and schemas in the manifest equal those of the imported modules."""
+        built = tool_manifest.build_manifest()
+
+        with open(tool_manifest.MANIFEST_PATH, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), built)
+
+    def test_stale_or_missing_manifest_is_ignored(self):
+        """A manifest with another fingerprint or format version is not used."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "tool_manifest.json"
+            self.assertIsNone(load_manifest(path))
+
+            for version, fingerprint in ((tool_manifest.FORMAT_VERSION, "0" * 64), (0, source_fingerprint())):
+                path.write_text(json.dumps({"version": version, "fingerprint": fingerprint, "tools": {}}))
+                self.assertIsNone(load_manifest(path))
+
+    def test_implementation_changes_keep_the_manifest(self):
+        """Only changes to tool sets and module constants change the fingerprint."""
+        source = "\n".join((
+            "LIMIT = 10",
+            "",
+            "async def run(arguments):",
+            "    return {}",
+            "",
+            "def demo_tools():",
+            "    return {'run': {'function': run, 'description': f'At most {LIMIT}', 'parameters': {}}}",
+            ""
+        ))
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                patch.object(tool_manifest, "TOOLS_DIR", Path(temp_dir)), \
+                patch.object(tool_manifest, "TOOL_SETS", (("demo", "demo_tools"),)):
+            path = Path(temp_dir) / "demo.py"
+            path.write_text(source)
+            fingerprint = source_fingerprint()
+
+            path.write_text(source.replace("return {}\n", "# Reformatted\n    return  {\n    }\n"))
+            self.assertEqual(source_fingerprint(), fingerprint)
+
+            for changed in (source.replace("LIMIT = 10", "LIMIT = 20"), source.replace("At most", "Up to")):
+                path.write_text(changed)
+                self.assertNotEqual(source_fingerprint(), fingerprint)
+
+
+class TestLazyToolFunction(unittest.IsolatedAsyncioTestCase):
+    """Test cases for LazyToolFunction."""
+
+    async def test_module_is_loaded_on_first_call_only(self):
+        """The tool module is imported when the tool first runs and reused afterwards."""
+        async def echo(arguments):
+            return {"echo": arguments["value"]}
+
+        with patch.object(tool_manifest, "load_tool_set", return_value={"echo": {"function": echo}}) as load:
+            function = LazyToolFunction("echo", "fake_module", "fake_tools")
+            load.assert_not_called()
+
+            self.assertEqual(await function({"value": 1}), {"echo": 1})
+            self.assertEqual(await function({"value": 2}), {"echo": 2})
+
+        load.assert_called_once_with("fake_module", "fake_tools")
+
+
+if __name__ == '__main__':
+    unittest.main()
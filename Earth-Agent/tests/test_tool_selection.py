@@ -0,0 +1,67 @@
+"""
+Tests for tool selection.
+
+This module contains unit tests for the keyword index that ranks tools by
+relevance to a user query.
+"""
+
+import os
+import sys
+import unittest
+
+# Add the parent directory to the path to allow importing from the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.mcp_server.tool_selection import ToolIndex, tokenize
+
+TOOLS = {
+    "get_air_quality": {
+        "description": "Get air quality data for a specific location.",
+        "parameters": {"type": "object", "properties": {"location": {"type": "string", "description": "City name"}}}
+    },
+    "get_weather_forecast": {
+        "description": "Get weather forecast for the next days.",
+        "parameters": {"type": "object", "properties": {"days": {"type": "integer", "description": "Number of days"}}}
+    },
+    "create_chart": {
+        "description": "Create a chart visualization of GIS data.",
+        "parameters": {
+            "type": "object",
+            "properties": {"chart_type": {"type": "string", "enum": ["bar", "line", "pie"]}}
+        }
+    },
+    "analyze_query_with_gemini": {
+        "description": "Analyze any input query using Gemini when no specific tool is available.",
+        "parameters": {}
+    }
+}
+
+
+class TestToolIndex(unittest.TestCase):
+    """Test cases for ToolIndex."""
+
+    def setUp(self):
+        """Build an index over a few tools."""
+        self.index = ToolIndex(TOOLS)
+
+    def test_tokenize(self):
+        """Names are split on underscores, stop words dropped and plurals stripped."""
+        self.assertEqual(tokenize("Show the forecasts for get_air_quality"), ["forecast", "air", "quality"])
+        self.assertEqual(tokenize("Cities and analysis"), ["city", "analysis"])
+
+    def test_rank_prefers_matching_tools(self):
+        """Tools sharing terms with the query rank first; schema enums are indexed too."""
+        self.assertEqual(self.index.rank("What is the air quality in Delhi?")[0][0], "get_air_quality")
+        self.assertEqual(self.index.rank("weather forecast for 5 days")[0][0], "get_weather_forecast")
+        self.assertEqual(self.index.rank("draw a pie of land cover")[0][0], "create_chart")
+
+    def test_select_top_k_with_always_included_tools(self):
+        """Selection keeps the top-k matches plus always-included tools, and nothing when no tool matches."""
+        selected = self.index.select("air quality forecast", 1, ["analyze_query_with_gemini", "unknown_tool"])
+
+        self.assertEqual(selected, ["get_air_quality", "analyze_query_with_gemini"])
+        self.assertEqual(self.index.select("hello there", 3, ["analyze_query_with_gemini"]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()